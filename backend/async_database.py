@@ -0,0 +1,147 @@
+"""Async access to PostgreSQL for the public read endpoints.
+
+Connections come from SQLAlchemy's async engine with the psycopg 3 driver, so
+endpoints can await queries on the event loop instead of holding one of the
+threadpool's workers for the whole request.  :func:`async_connection` yields
+the driver connection itself: queries keep the ``%s`` placeholders used by
+the psycopg2 code elsewhere and results are plain tuples.
+
+When psycopg 3 is not installed (or ``ASYNC_DB_ENABLED=0``) the same API is
+served by a psycopg2 connection from :func:`backend.database.get_connection`
+whose calls run in the threadpool.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from psycopg2.errors import UndefinedColumn as _Psycopg2UndefinedColumn
+from starlette.concurrency import run_in_threadpool
+
+from . import database
+
+try:  # pragma: no cover - depends on the installed driver
+    import psycopg
+    from psycopg.errors import UndefinedColumn as _PsycopgUndefinedColumn
+except ImportError:  # pragma: no cover - psycopg 3 is optional
+    psycopg = None
+    _PsycopgUndefinedColumn = None
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DB_ENABLED = psycopg is not None and os.getenv("ASYNC_DB_ENABLED", "1") != "0"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or database.DATABASE_URL.replace(
+    "postgresql://", "postgresql+psycopg://", 1
+)
+POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("ASYNC_DB_POOL_TIMEOUT", "10"))
+
+# Catch with ``except UndefinedColumnErrors`` regardless of the active driver.
+UndefinedColumnErrors: tuple[type[BaseException], ...] = tuple(
+    exc for exc in (_Psycopg2UndefinedColumn, _PsycopgUndefinedColumn) if exc is not None
+)
+
+_engine = None
+
+
+def get_async_engine():
+    """Create the async engine on first use (keeps imports driver-free)."""
+
+    global _engine
+    if _engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT_SECONDS,
+            pool_pre_ping=True,
+            # Same session time zone as ``database.get_connection``.
+            connect_args={"options": "-c TimeZone=Europe/Sofia"},
+        )
+    return _engine
+
+
+async def dispose() -> None:
+    global _engine
+    engine, _engine = _engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+class _ThreadedCursor:
+    """Awaitable facade over a psycopg2 cursor."""
+
+    def __init__(self, cursor) -> None:
+        self._cursor = cursor
+
+    async def __aenter__(self) -> "_ThreadedCursor":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def execute(self, query: str, params: Any = None) -> None:
+        await run_in_threadpool(self._cursor.execute, query, params)
+
+    async def fetchone(self) -> Optional[tuple]:
+        return self._cursor.fetchone()
+
+    async def fetchall(self) -> list:
+        return list(self._cursor.fetchall() or [])
+
+    async def close(self) -> None:
+        close = getattr(self._cursor, "close", None)
+        if close is not None:
+            close()
+
+
+class _ThreadedConnection:
+    """Awaitable facade over a psycopg2 connection."""
+
+    def __init__(self, connection) -> None:
+        self._connection = connection
+
+    def cursor(self) -> _ThreadedCursor:
+        return _ThreadedCursor(self._connection.cursor())
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self._connection.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self._connection.rollback)
+
+
+@asynccontextmanager
+async def async_connection() -> AsyncIterator[Any]:
+    """Yield a connection with awaitable ``cursor().execute/fetch*``.
+
+    The transaction is rolled back when the block exits; callers that write
+    must ``await conn.commit()`` themselves.
+    """
+
+    if not ASYNC_DB_ENABLED:
+        connection = await run_in_threadpool(database.get_connection)
+        try:
+            yield _ThreadedConnection(connection)
+        finally:
+            await run_in_threadpool(connection.close)
+        return
+
+    async with get_async_engine().connect() as sa_connection:
+        raw = await sa_connection.get_raw_connection()
+        yield raw.driver_connection
+
+
+__all__ = [
+    "ASYNC_DB_ENABLED",
+    "UndefinedColumnErrors",
+    "async_connection",
+    "dispose",
+    "get_async_engine",
+]
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import time
 from dataclasses import dataclass, field
 from typing import Any, List, Optional
 
@@ -9,9 +12,17 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from .jwt_utils import decode_token
 from .services import ticket_links
+from .utils.ttl_cache import TTLCache
 
 security = HTTPBearer(auto_error=False)
 
+# Verified bearer tokens, keyed by their SHA-256, until ``exp`` (at most
+# TOKEN_CACHE_MAX_SECONDS), so admin polling skips the signature check.
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_MAX_SECONDS = float(os.getenv("TOKEN_CACHE_MAX_SECONDS", "300"))
+
+_token_cache: TTLCache[dict] = TTLCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_MAX_SECONDS)
+
 
 @dataclass
 class RequestContext:
@@ -47,7 +58,7 @@ def _get_payload(credentials: HTTPAuthorizationCredentials | None) -> dict:
             detail="Invalid or missing admin token",
         )
     try:
-        payload = decode_token(credentials.credentials)
+        payload = _decode_cached(credentials.credentials)
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,6 +67,25 @@ def _get_payload(credentials: HTTPAuthorizationCredentials | None) -> dict:
     return payload
 
 
+def _decode_cached(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    payload = decode_token(token)
+    exp = payload.get("exp")
+    # Only tokens that expire are cached, and never past their expiry.
+    if isinstance(exp, (int, float)):
+        ttl = min(exp - time.time(), TOKEN_CACHE_MAX_SECONDS)
+        if ttl > 0:
+            _token_cache.set(key, dict(payload), ttl=ttl)
+    return payload
+
+
+def clear_token_cache() -> None:
+    _token_cache.clear()
+
+
 def require_admin_token(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
 ):
@@ -1,3 +1,4 @@
+import logging
 import os
 import time
 import psycopg2
@@ -62,6 +63,19 @@ def get_connection():
 
 from pathlib import Path
 
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "db" / "migrations"
+
+# Files up to this one predate shipping db/migrations in the image: the schema
+# they describe comes from db/init.sql plus the startup compatibility DDL
+# below, and several of them cannot run against a live database (000 uses
+# ``CREATE TYPE IF NOT EXISTS``, 015 drops link_sessions).  They are recorded
+# as applied without being executed.
+LEGACY_MIGRATIONS_BASELINE = "023_backfill_liqpay_and_fiscal_columns.sql"
+
+# Key of the session-level advisory lock that serializes migrations between
+# the web and worker processes starting at the same time.
+MIGRATIONS_LOCK_KEY = 4_202_034
+
 
 def _ensure_purchase_schema_compatibility(cur) -> None:
     """Backfill critical purchase columns when historical migrations were marked but not applied."""
@@ -97,26 +111,20 @@ def _ensure_purchase_schema_compatibility(cur) -> None:
     )
 
 
-def run_migrations() -> None:
-    """Apply SQL migrations found in db/migrations."""
-    migrations_dir = Path(__file__).resolve().parents[1] / "db" / "migrations"
-    if not migrations_dir.exists():
-        return
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS schema_migrations (
-            filename VARCHAR(255) PRIMARY KEY,
-            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-    )
-    conn.commit()
+def _apply_migrations(conn, cur, migrations_dir: Path) -> None:
+    latest = None
     for path in sorted(migrations_dir.glob("*.sql")):
+        latest = path.name
         cur.execute("SELECT 1 FROM schema_migrations WHERE filename=%s", (path.name,))
         if cur.fetchone():
             continue
+        if path.name <= LEGACY_MIGRATIONS_BASELINE:
+            cur.execute(
+                "INSERT INTO schema_migrations (filename) VALUES (%s)", (path.name,)
+            )
+            conn.commit()
+            logging.getLogger(__name__).info("Stamped legacy migration %s", path.name)
+            continue
         with open(path, "r") as f:
             sql_statements = f.read()
         cur.execute(sql_statements)
@@ -126,7 +134,72 @@ def run_migrations() -> None:
         conn.commit()
 
     _ensure_purchase_schema_compatibility(cur)
+    if latest:
+        cur.execute(
+            """
+            INSERT INTO schema_version (id, version) VALUES (1, %s)
+            ON CONFLICT (id) DO UPDATE
+               SET version = EXCLUDED.version, updated_at = CURRENT_TIMESTAMP
+             WHERE schema_version.version IS DISTINCT FROM EXCLUDED.version
+            """,
+            (latest,),
+        )
     conn.commit()
+
+
+def run_migrations() -> None:
+    """Apply SQL migrations found in db/migrations and load the schema registry.
+
+    Migrations run under an advisory lock, so concurrently starting processes
+    apply each file once.
+
+    The registry is loaded even when the migrations directory is not shipped,
+    so capability checks always reflect the live database.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            filename VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            id SMALLINT PRIMARY KEY CHECK (id = 1),
+            version VARCHAR(255) NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.commit()
+    if MIGRATIONS_DIR.exists():
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_KEY,))
+        try:
+            _apply_migrations(conn, cur, MIGRATIONS_DIR)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_KEY,))
+            conn.commit()
+    else:
+        logging.getLogger(__name__).warning(
+            "Migrations directory %s not found; no migrations applied", MIGRATIONS_DIR
+        )
+
+    # Capture column capabilities once so request paths never need to
+    # inspect information_schema.
+    from . import schema
+
+    try:
+        schema.load(cur)
+    except Exception:
+        # Leave the registry unloaded; callers fall back to optimistic checks.
+        logging.getLogger(__name__).warning("Schema registry load failed", exc_info=True)
     cur.close()
     conn.close()
 
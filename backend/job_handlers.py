@@ -0,0 +1,95 @@
+"""Handlers for :mod:`backend.services.jobs`, registered on import.
+
+Kinds:
+
+``telegram.purchase_event``
+    ``{purchase_id, event_type, snapshot}``: render the staff notification
+    for a purchase event into :mod:`.services.telegram_outbox`, which sends
+    it in a rate-limited digest.
+``checkbox.fiscalize``
+    ``{purchase_id}``: CheckBox fiscalization.  ``fiscalize_purchase``
+    records its own failures; :func:`enqueue_pending_fiscalizations`
+    queues the retries.
+``ticket_pdf.prerender``
+    ``{ticket_id, lang, deep_link}``: render a ticket PDF into
+    ``ticket_pdf_cache`` ahead of the ticket email.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from .database import get_connection
+from .services import checkbox, jobs, ticket_pdf_store
+
+logger = logging.getLogger(__name__)
+
+FISCAL_RETRY_MAX_ATTEMPTS = 10
+FISCAL_RETRY_BATCH_SIZE = 20
+
+
+@jobs.handler("telegram.purchase_event")
+def _telegram_purchase_event(job: jobs.Job) -> None:
+    from .routers.purchase import _record_telegram_event
+
+    payload = job.payload
+    if not _record_telegram_event(
+        int(payload["purchase_id"]),
+        str(payload["event_type"]),
+        payload.get("snapshot") or None,
+    ):
+        raise RuntimeError("Telegram notification was not stored")
+
+
+@jobs.handler("checkbox.fiscalize")
+def _checkbox_fiscalize(job: jobs.Job) -> None:
+    checkbox.fiscalize_purchase(int(job.payload["purchase_id"]))
+
+
+@jobs.handler("ticket_pdf.prerender")
+def _ticket_pdf_prerender(job: jobs.Job) -> None:
+    payload = job.payload
+    ticket_pdf_store.prerender(
+        int(payload["ticket_id"]),
+        str(payload.get("lang") or "bg"),
+        payload.get("deep_link"),
+    )
+
+
+def enqueue_pending_fiscalizations() -> int:
+    """Queue ``checkbox.fiscalize`` for pending/failed purchases; returns how many."""
+
+    if not checkbox.is_enabled():
+        return 0
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id FROM purchase
+                 WHERE fiscal_status IN ('pending', 'failed')
+                   AND COALESCE(fiscal_attempts, 0) < %s
+                 ORDER BY id
+                 LIMIT %s
+                """,
+                (FISCAL_RETRY_MAX_ATTEMPTS, FISCAL_RETRY_BATCH_SIZE),
+            )
+            purchase_ids = [row[0] for row in cur.fetchall()]
+        queued = jobs.enqueue_many(
+            "checkbox.fiscalize",
+            [{"purchase_id": purchase_id} for purchase_id in purchase_ids],
+            priority=jobs.PRIORITY_LOW,
+            dedup_keys=[str(purchase_id) for purchase_id in purchase_ids],
+            conn=conn,
+        )
+        conn.commit()
+        return len(queued)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+__all__ = ["enqueue_pending_fiscalizations"]
@@ -0,0 +1,256 @@
+"""Process-wide logging: JSON lines written off the request path.
+
+:func:`configure_logging` installs a single :class:`~logging.handlers.QueueHandler`
+on the root logger.  Callers only format the record and put it on an
+in-memory queue; a :class:`~logging.handlers.QueueListener` thread does the
+actual write to stdout, so a slow terminal or log shipper never blocks a
+request.  Records are rendered by python-json-logger (``LOG_FORMAT=text``
+keeps the classic one-line format for local runs).
+
+Every record carries ``request_id``.  :class:`RequestIdMiddleware` takes it
+from the ``X-Request-ID`` header (or generates one) and echoes it in the
+response; :func:`request_context` binds it for code running elsewhere, e.g.
+background jobs enqueued by that request (``backend.services.jobs`` stores
+it with the job).
+
+High-volume categories can be sampled with ``LOG_SAMPLE_RATES``, e.g.
+``backend.public_access=0.1,uvicorn.access=0.05``: a category is a logger
+name and covers its children; only records below WARNING are dropped.  The
+decision is made per request id, so a sampled request keeps all its lines.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Mapping, Optional
+
+from pythonjsonlogger.json import JsonFormatter
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Records waiting for the listener; beyond this, new records are dropped
+# rather than blocking the caller.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[str]:
+    """Bind ``request_id`` (a new one when omitted) for the enclosed code."""
+
+    value = request_id or uuid.uuid4().hex
+    token = _request_id.set(value)
+    try:
+        yield value
+    finally:
+        _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (``-`` outside requests)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        return True
+
+
+def parse_sample_rates(raw: Optional[str]) -> Dict[str, float]:
+    """Parse ``name=rate,name=rate``; malformed entries are ignored."""
+
+    rates: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        name, sep, value = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(max(float(value), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of the sub-WARNING records of each configured category."""
+
+    def __init__(self, rates: Mapping[str, float]) -> None:
+        super().__init__()
+        # Longest prefix first so ``a.b`` wins over ``a``.
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def _rate(self, name: str) -> float:
+        for category, rate in self.rates:
+            if name == category or name.startswith(category + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        request_id = _request_id.get()
+        if request_id is None:
+            return random.random() < rate
+        bucket = zlib.crc32(f"{record.name}:{request_id}".encode()) % 10_000
+        return bucket < rate * 10_000
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _formatter(fmt: str) -> logging.Formatter:
+    if fmt == "text":
+        return logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s"
+        )
+    return JsonFormatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s %(request_id)s",
+        rename_fields={"asctime": "time", "levelname": "level", "name": "logger"},
+    )
+
+
+_lock = threading.Lock()
+_installed: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    *,
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    sample_rates: Optional[Mapping[str, float]] = None,
+    capture_uvicorn: bool = True,
+) -> None:
+    """Route all logging through the background queue; safe to call again.
+
+    Handlers installed by others (pytest, for instance) are left alone.
+    With ``capture_uvicorn`` uvicorn's own loggers propagate here too, so
+    access and error lines share the format, sampling and request id.
+    """
+
+    global _installed, _listener
+
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            _listener.stop()
+        if _installed is not None:
+            root.removeHandler(_installed)
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(_formatter((fmt or os.getenv("LOG_FORMAT", "json")).lower()))
+
+        records: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _DroppingQueueHandler(records)
+        handler.addFilter(RequestIdFilter())
+        handler.addFilter(
+            SamplingFilter(
+                sample_rates
+                if sample_rates is not None
+                else parse_sample_rates(os.getenv("LOG_SAMPLE_RATES"))
+            )
+        )
+        root.addHandler(handler)
+        root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+
+        if capture_uvicorn:
+            for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+                uvicorn_logger = logging.getLogger(name)
+                uvicorn_logger.handlers.clear()
+                uvicorn_logger.propagate = True
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        _installed = handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+
+    global _installed, _listener
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        if _installed is not None:
+            logging.getLogger().removeHandler(_installed)
+            _installed = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware binding a request id to everything the request logs."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self._header = REQUEST_ID_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for key, value in scope.get("headers", ()):
+            if key == self._header:
+                candidate = value.decode("latin-1")
+                # Client-supplied ids end up in every log line; accept only plain tokens.
+                if _REQUEST_ID_RE.match(candidate):
+                    incoming = candidate
+                break
+
+        with request_context(incoming) as request_id:
+            encoded = request_id.encode("latin-1")
+
+            async def send_with_id(message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", ()))
+                    headers.append((self._header, encoded))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
+
+
+__all__ = [
+    "REQUEST_ID_HEADER",
+    "RequestIdFilter",
+    "RequestIdMiddleware",
+    "SamplingFilter",
+    "configure_logging",
+    "get_request_id",
+    "parse_sample_rates",
+    "request_context",
+    "shutdown_logging",
+]
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 import threading
 import time
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +11,11 @@ from dotenv import load_dotenv
 # Load .env configuration for local/non-docker runs.
 load_dotenv()
 
+from .log_config import RequestIdMiddleware, configure_logging
+from .utils.json_response import FastJSONResponse
+
+configure_logging()
+
 # Ensure application runs in Bulgarian time (UTC+3) so all logs and time-based
 # functions reflect the expected timezone.
 os.environ.setdefault("TZ", "Europe/Sofia")
@@ -57,7 +63,12 @@ def _parse_cors_origins() -> list[str]:
     ]
 
 
-app = FastAPI()
+# orjson renders responses; ORJSON_RESPONSES=0 falls back to the stdlib encoder.
+app = FastAPI(
+    default_response_class=(
+        JSONResponse if os.getenv("ORJSON_RESPONSES", "1") == "0" else FastJSONResponse
+    )
+)
 
 # Healthcheck endpoint
 @app.get("/health")
@@ -81,9 +92,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "X-Total-Count", "X-Next-After-Id", "X-Request-ID"],
     max_age=86400,
 )
+# Outermost, so everything logged while handling a request carries its id.
+app.add_middleware(RequestIdMiddleware)
 
 # Подключаем роутеры
 app.include_router(stop.router)
@@ -112,7 +125,7 @@ def _cancel_expired_loop():
     while True:
         time.sleep(60)
         from .database import get_connection
-        from .ticket_utils import free_ticket
+        from .ticket_utils import free_tickets
 
         conn = get_connection()
         cur = conn.cursor()
@@ -127,8 +140,7 @@ def _cancel_expired_loop():
                     "SELECT id FROM ticket WHERE purchase_id=%s",
                     (pid,),
                 )
-                for t_row in cur.fetchall():
-                    free_ticket(cur, t_row[0])
+                free_tickets(cur, [t_row[0] for t_row in cur.fetchall()])
 
                 cur.execute(
                     "UPDATE purchase SET status='cancelled', update_at=NOW() WHERE id=%s",
@@ -181,46 +193,55 @@ def _finish_departed_tours_loop():
             conn.close()
 
 
-def _fiscalize_retry_loop():
-    """Periodically retry pending/failed CheckBox fiscalizations."""
+def _flush_session_usage_loop():
+    """Persist buffered link session ``used`` timestamps."""
+    from .services import link_sessions
+
     while True:
-        time.sleep(120)
-        from .services.checkbox import is_enabled, fiscalize_purchase
+        time.sleep(link_sessions.USAGE_FLUSH_INTERVAL_SECONDS)
+        link_sessions.flush_session_usage()
 
-        if not is_enabled():
-            continue
 
-        from .database import get_connection
+_background_stop = threading.Event()
 
-        conn = get_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute(
-                """
-                SELECT id FROM purchase
-                 WHERE fiscal_status IN ('pending', 'failed')
-                   AND COALESCE(fiscal_attempts, 0) < 10
-                 ORDER BY id
-                 LIMIT 20
-                """,
-            )
-            purchase_ids = [row[0] for row in cur.fetchall()]
-        except Exception:
-            purchase_ids = []
-        finally:
-            cur.close()
-            conn.close()
 
-        for pid in purchase_ids:
-            try:
-                fiscalize_purchase(pid)
-            except Exception:
-                pass  # errors are persisted inside fiscalize_purchase
+@app.on_event("startup")
+def _start_background_workers():
+    """Run the ``backend.worker`` loops here when no worker process is deployed.
+
+    Off by default: delivery belongs in ``python -m backend.worker``.  Only
+    single-process setups set ``BACKGROUND_WORKERS_IN_PROCESS=1``.
+    """
+    if os.getenv("BACKGROUND_WORKERS_IN_PROCESS", "0") != "1":
+        return
+    from .worker import start_background_workers
+
+    _background_stop.clear()
+    start_background_workers(_background_stop, threads=1)
+
+
+@app.on_event("shutdown")
+def _stop_background_workers():
+    _background_stop.set()
+
+
+@app.on_event("shutdown")
+def _flush_session_usage_on_shutdown():
+    from .services import link_sessions
+
+    link_sessions.flush_session_usage()
+
+
+@app.on_event("shutdown")
+async def _dispose_async_engine():
+    from . import async_database
+
+    await async_database.dispose()
 
 
 threading.Thread(target=_cancel_expired_loop, daemon=True).start()
 threading.Thread(target=_finish_departed_tours_loop, daemon=True).start()
-threading.Thread(target=_fiscalize_retry_loop, daemon=True).start()
+threading.Thread(target=_flush_session_usage_loop, daemon=True).start()
 
 # Serve React static files
 # app.mount("/", StaticFiles(directory="frontend/build", html=True), name="static")
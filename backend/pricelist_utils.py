@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Dict, Iterable
 
 from psycopg2.errors import UndefinedColumn
 
+from . import schema
+
 DEFAULT_CURRENCY = "UAH"
 
 
@@ -27,6 +29,7 @@ def ensure_pricelist_currency_column(conn: Any) -> None:
         )
         if hasattr(conn, "commit"):
             conn.commit()
+        schema.mark_present("pricelist", ("currency",))
     finally:
         if hasattr(cur, "close"):
             cur.close()
@@ -56,3 +59,95 @@ def fetch_pricelist_currency(conn: Any, pricelist_id: int, default: str = DEFAUL
             if hasattr(cur, "close"):
                 cur.close()
     return default
+
+
+def fetch_pricelist_currencies(
+    conn: Any, pricelist_ids: Iterable[int], default: str = DEFAULT_CURRENCY
+) -> Dict[int, str]:
+    """Fetch currencies for several pricelists with a single query."""
+
+    ids = sorted({int(pid) for pid in pricelist_ids if pid is not None})
+    if not ids:
+        return {}
+    currencies = {pid: default for pid in ids}
+    for _ in range(2):
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT id, currency FROM pricelist WHERE id = ANY(%s)", (ids,))
+            for pid, currency in cur.fetchall():
+                currencies[int(pid)] = currency or default
+            return currencies
+        except UndefinedColumn:
+            if hasattr(conn, "rollback"):
+                conn.rollback()
+            ensure_pricelist_currency_column(conn)
+        except Exception:
+            if hasattr(conn, "rollback"):
+                conn.rollback()
+            return currencies
+        finally:
+            if hasattr(cur, "close"):
+                cur.close()
+    return currencies
+
+
+async def fetch_pricelist_currency_async(
+    conn: Any, pricelist_id: int, default: str = DEFAULT_CURRENCY
+) -> str:
+    """Awaitable :func:`fetch_pricelist_currency` for ``async_connection``.
+
+    The column is not created on the fly here; a missing column yields
+    ``default`` until a sync caller adds it.
+    """
+
+    from .async_database import UndefinedColumnErrors
+
+    if not schema.has_column("pricelist", "currency"):
+        return default
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT currency FROM pricelist WHERE id = %s", (pricelist_id,))
+            row = await cur.fetchone()
+    except UndefinedColumnErrors:
+        await conn.rollback()
+        schema.mark_missing("pricelist", ("currency",))
+        return default
+    except Exception:
+        await conn.rollback()
+        return default
+    if not row:
+        return default
+    return row[0] or default
+
+
+async def fetch_pricelist_currencies_async(
+    conn: Any, pricelist_ids: Iterable[int], default: str = DEFAULT_CURRENCY
+) -> Dict[int, str]:
+    """Awaitable :func:`fetch_pricelist_currencies` for ``async_connection``.
+
+    Like :func:`fetch_pricelist_currency_async` it falls back to ``default``
+    instead of adding a missing column.
+    """
+
+    from .async_database import UndefinedColumnErrors
+
+    ids = sorted({int(pid) for pid in pricelist_ids if pid is not None})
+    if not ids:
+        return {}
+    currencies = {pid: default for pid in ids}
+    if not schema.has_column("pricelist", "currency"):
+        return currencies
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT id, currency FROM pricelist WHERE id = ANY(%s)", (ids,))
+            rows = await cur.fetchall()
+    except UndefinedColumnErrors:
+        await conn.rollback()
+        schema.mark_missing("pricelist", ("currency",))
+        return currencies
+    except Exception:
+        await conn.rollback()
+        return currencies
+    for pid, currency in rows:
+        currencies[int(pid)] = currency or default
+    return currencies
@@ -10,7 +10,7 @@ from typing import NotRequired, Required
 from fastapi import HTTPException
 
 from ..services import ticket_links
-from ..services.link_sessions import get_or_create_view_session
+from ..services.link_sessions import get_or_create_view_sessions
 from ..services.ticket_dto import get_ticket_dto
 from ..database import get_connection
 from ..utils.client_app import get_client_app_base
@@ -131,28 +131,31 @@ def issue_ticket_links(
     except ValueError as exc:
         raise HTTPException(500, str(exc)) from exc
 
-    for spec in specs:
-        try:
-            opaque, _expires_at = get_or_create_view_session(
-                spec["ticket_id"],
-                purchase_id=spec["purchase_id"],
-                lang=lang_value,
-                departure_dt=spec["departure_dt"],
-                scopes=DEFAULT_TICKET_SCOPES,
-                conn=conn,
-            )
-        except ticket_links.TicketLinkError as exc:
-            logger.exception(
-                "Failed to issue ticket link for ticket %s", spec["ticket_id"]
-            )
-            raise HTTPException(500, "Failed to issue ticket link") from exc
-        except Exception as exc:  # pragma: no cover - unexpected failure
-            logger.exception(
-                "Unexpected error while issuing ticket link for ticket %s",
-                spec["ticket_id"],
-            )
-            raise HTTPException(500, "Failed to issue ticket link") from exc
+    try:
+        sessions = get_or_create_view_sessions(
+            [
+                (spec["ticket_id"], spec["purchase_id"], spec["departure_dt"])
+                for spec in specs
+            ],
+            lang=lang_value,
+            scopes=DEFAULT_TICKET_SCOPES,
+            conn=conn,
+        )
+    except ticket_links.TicketLinkError as exc:
+        logger.exception(
+            "Failed to issue ticket links for tickets %s",
+            [spec["ticket_id"] for spec in specs],
+        )
+        raise HTTPException(500, "Failed to issue ticket link") from exc
+    except Exception as exc:  # pragma: no cover - unexpected failure
+        logger.exception(
+            "Unexpected error while issuing ticket links for tickets %s",
+            [spec["ticket_id"] for spec in specs],
+        )
+        raise HTTPException(500, "Failed to issue ticket link") from exc
 
+    for spec in specs:
+        opaque, _expires_at = sessions[spec["ticket_id"]]
         deep_link = build_deep_link(opaque, base_url=base_url)
         logger.info(
             "Issued ticket link for ticket %s (purchase %s): %s",
@@ -1,8 +1,13 @@
-import os
+import asyncio
 import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from passlib.context import CryptContext
 
@@ -16,6 +21,18 @@ pwd_context = CryptContext(schemes=["bcrypt"])
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
 
+# bcrypt runs on its own small pool so a burst of logins cannot occupy the
+# threadpool that serves every other sync endpoint.  Verifications beyond
+# PASSWORD_VERIFY_MAX_PENDING (running + waiting) are refused with 503.
+PASSWORD_VERIFY_WORKERS = int(os.getenv("PASSWORD_VERIFY_WORKERS", "2"))
+PASSWORD_VERIFY_MAX_PENDING = int(os.getenv("PASSWORD_VERIFY_MAX_PENDING", "16"))
+
+_verify_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_VERIFY_WORKERS, thread_name_prefix="password-verify"
+)
+_verify_pending = 0
+_verify_lock = threading.Lock()
+
 class LoginIn(BaseModel):
     username: str
     password: str
@@ -46,27 +63,66 @@ def register(data: RegisterIn):
     conn.close()
     return {"id": user_id, "username": data.username, "email": data.email, "role": data.role}
 
+def _bcrypt_verify(password: str, hashed_password: str) -> bool:
+    try:
+        return pwd_context.verify(password, hashed_password)
+    except Exception:  # UnknownHashError or invalid format
+        return False
+
+
+async def _verify_password(password: str, hashed_password: str) -> bool:
+    """Check ``password`` against a bcrypt or legacy SHA-256 hex hash."""
+
+    global _verify_pending
+
+    if pwd_context.identify(hashed_password, required=False) is None:
+        sha256_hash = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(sha256_hash, hashed_password)
+
+    with _verify_lock:
+        if _verify_pending >= PASSWORD_VERIFY_MAX_PENDING:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many login attempts, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        _verify_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            _verify_executor, _bcrypt_verify, password, hashed_password
+        )
+    finally:
+        with _verify_lock:
+            _verify_pending -= 1
+
+
+def _load_user(username: str):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT id, hashed_password, role FROM users WHERE username=%s", (username,)
+        )
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+
 @router.post("/login", response_model=TokenOut)
-def login(data: LoginIn):
+async def login(data: LoginIn):
     # 1) Check env-based admin credentials first
     if (
         ADMIN_USERNAME
         and ADMIN_PASSWORD
         and data.username == ADMIN_USERNAME
-        and data.password == ADMIN_PASSWORD
+        and hmac.compare_digest(data.password.encode(), ADMIN_PASSWORD.encode())
     ):
         token = create_token({"user_id": 0, "role": "admin"})
         return {"token": token}
 
     # 2) Fallback: check database users
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, hashed_password, role FROM users WHERE username=%s", (data.username,)
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    row = await run_in_threadpool(_load_user, data.username)
     if not row:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -77,14 +133,8 @@ def login(data: LoginIn):
     else:
         user_id, hashed_password, role = row
 
-    try:
-        valid = pwd_context.verify(data.password, hashed_password)
-    except Exception:  # UnknownHashError or invalid format
-        valid = False
-    if not valid:
-        sha256_hash = hashlib.sha256(data.password.encode()).hexdigest()
-        if sha256_hash != hashed_password:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not await _verify_password(data.password, hashed_password):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_token({"user_id": user_id, "role": role})
     return {"token": token}
@@ -25,6 +25,24 @@ class Available(BaseModel):
     class Config:
         from_attributes = True
 
+def _stop_orders(cur, item: AvailableCreate):
+    """Route positions of the item's stops (``None`` when not on the route)."""
+    cur.execute(
+        """
+        SELECT MIN(position) FILTER (WHERE stop_id = %s),
+               MIN(position) FILTER (WHERE stop_id = %s)
+          FROM (
+                SELECT rs.stop_id, row_number() OVER (ORDER BY rs."order") - 1 AS position
+                  FROM tour t
+                  JOIN routestop rs ON rs.route_id = t.route_id
+                 WHERE t.id = %s
+               ) AS positions
+        """,
+        (item.departure_stop_id, item.arrival_stop_id, item.tour_id),
+    )
+    row = cur.fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
 @router.get("/", response_model=list[Available])
 def get_available(
     tour_id: int = Query(None, description="ID на рейса"),
@@ -69,13 +87,15 @@ def create_available(item: AvailableCreate):
     conn = get_connection()
     cur = conn.cursor()
     try:
+        dep_order, arr_order = _stop_orders(cur, item)
         cur.execute(
             """
-            INSERT INTO available (tour_id, departure_stop_id, arrival_stop_id, seats)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO available
+                   (tour_id, departure_stop_id, arrival_stop_id, seats, departure_order, arrival_order)
+            VALUES (%s, %s, %s, %s, %s, %s)
             RETURNING id;
             """,
-            (item.tour_id, item.departure_stop_id, item.arrival_stop_id, item.seats)
+            (item.tour_id, item.departure_stop_id, item.arrival_stop_id, item.seats, dep_order, arr_order)
         )
         new_id = cur.fetchone()[0]
         conn.commit()
@@ -101,17 +121,21 @@ def update_available(available_id: int, item: AvailableCreate):
     conn = get_connection()
     cur = conn.cursor()
     try:
+        dep_order, arr_order = _stop_orders(cur, item)
         cur.execute(
             """
             UPDATE available
             SET tour_id = %s,
                 departure_stop_id = %s,
                 arrival_stop_id = %s,
-                seats = %s
+                seats = %s,
+                departure_order = %s,
+                arrival_order = %s
             WHERE id = %s
             RETURNING id, tour_id, departure_stop_id, arrival_stop_id, seats;
             """,
-            (item.tour_id, item.departure_stop_id, item.arrival_stop_id, item.seats, available_id)
+            (item.tour_id, item.departure_stop_id, item.arrival_stop_id, item.seats,
+             dep_order, arr_order, available_id)
         )
         updated_row = cur.fetchone()
         if updated_row is None:
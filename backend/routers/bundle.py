@@ -1,6 +1,7 @@
 from datetime import time as dt_time
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from ..auth import require_admin_token
 from ..database import get_connection
 from ..models import (
@@ -13,8 +14,10 @@ from ..models import (
     AdminSelectedPricelistOut,
     SuccessResponse,
 )
-from psycopg2.errors import UndefinedColumn
-from ..pricelist_utils import fetch_pricelist_currency
+from ..async_database import UndefinedColumnErrors, async_connection
+from ..pricelist_utils import fetch_pricelist_currency, fetch_pricelist_currency_async
+from ..services import bundle_cache
+from ..utils.http_cache import etag_matches
 
 router = APIRouter(tags=["bundle"])
 
@@ -87,6 +90,7 @@ def set_selected_routes(data: AdminSelectedRoutesIn):
                 (r1, r2),
             )
         conn.commit()
+        bundle_cache.invalidate()
         return {"success": True}
     except Exception as e:
         conn.rollback()
@@ -117,6 +121,7 @@ def set_selected_pricelist(data: AdminSelectedPricelistIn):
                 (data.pricelist_id,),
             )
         conn.commit()
+        bundle_cache.invalidate()
         return {"success": True}
     except Exception as e:
         conn.rollback()
@@ -126,11 +131,11 @@ def set_selected_pricelist(data: AdminSelectedPricelistIn):
         conn.close()
 
 
-def _get_route(cur, route_id: int, col: str):
-    cur.execute("SELECT name FROM route WHERE id=%s", (route_id,))
-    row = cur.fetchone()
+async def _get_route(cur, route_id: int, col: str):
+    await cur.execute("SELECT name FROM route WHERE id=%s", (route_id,))
+    row = await cur.fetchone()
     name = row[0] if row else ""
-    cur.execute(
+    await cur.execute(
         f'SELECT s.id, COALESCE(s.{col}, s.stop_name), s.description, s.location, '
         f'rs.arrival_time, rs.departure_time '
         f'FROM routestop rs JOIN stop s ON rs.stop_id=s.id '
@@ -149,7 +154,7 @@ def _get_route(cur, route_id: int, col: str):
             "arrival_time": _fmt(r[4]),
             "departure_time": _fmt(r[5]),
         }
-        for r in cur.fetchall()
+        for r in await cur.fetchall()
     ]
     return {"id": route_id, "name": name, "stops": stops}
 
@@ -160,30 +165,43 @@ def selected_route_options() -> Response:
     return Response(status_code=200)
 
 
-@router.post("/selected_route", response_model=RoutesBundleOut)
-def selected_route(data: LangRequest):
-    lang = data.lang.lower()
+async def _build_routes_bundle(lang: str) -> dict:
     col = f"stop_{lang}" if lang in {"en", "bg", "ua"} else "stop_name"
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT id FROM route WHERE is_demo ORDER BY id")
-        rows = cur.fetchall()
-        if not rows:
-            raise HTTPException(404, "Demo routes not found")
-        forward_id = rows[0][0]
-        backward_id = rows[1][0] if len(rows) > 1 else forward_id
-        forward = _get_route(cur, forward_id, col)
-        backward = _get_route(cur, backward_id, col)
-        return {"forward": forward, "backward": backward}
-    finally:
-        cur.close()
-        conn.close()
+    async with async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT id FROM route WHERE is_demo ORDER BY id")
+            rows = await cur.fetchall()
+            if not rows:
+                raise HTTPException(404, "Demo routes not found")
+            forward_id = rows[0][0]
+            backward_id = rows[1][0] if len(rows) > 1 else forward_id
+            forward = await _get_route(cur, forward_id, col)
+            backward = await _get_route(cur, backward_id, col)
+    return jsonable_encoder(RoutesBundleOut(forward=forward, backward=backward))
 
 
-@router.post("/selected_pricelist", response_model=PricelistBundleOut)
-def selected_pricelist(data: LangRequest):
+def _cached_response(request: Request, cached: bundle_cache.CachedResponse) -> Response:
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=cached.headers)
+    return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+
+@router.post("/selected_route", response_model=RoutesBundleOut)
+async def selected_route(data: LangRequest, request: Request):
     lang = data.lang.lower()
+    cached = await bundle_cache.get_or_build(
+        "route", lang, lambda: _build_routes_bundle(lang)
+    )
+    return _cached_response(request, cached)
+
+
+@router.get("/selected_route", response_model=RoutesBundleOut)
+async def selected_route_get(request: Request, lang: str = Query("bg")):
+    """Cacheable GET form of :func:`selected_route` for CDNs and proxies."""
+    return await selected_route(LangRequest(lang=lang), request)
+
+
+async def _build_pricelist_bundle(lang: str) -> dict:
     # Map supported languages to their corresponding column names.  If an
     # unsupported language is requested we gracefully fall back to the
     # default ``stop_name`` column rather than constructing a non-existent
@@ -191,11 +209,10 @@ def selected_pricelist(data: LangRequest):
     # a 500 response.
     lang_columns = {"en": "stop_en", "bg": "stop_bg", "ua": "stop_ua"}
     col = lang_columns.get(lang, "stop_name")
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT pricelist_id FROM route_pricelist_bundle WHERE id=1")
-        row = cur.fetchone()
+    async with async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT pricelist_id FROM route_pricelist_bundle WHERE id=1")
+            row = await cur.fetchone()
         pricelist_id = row[0] if row else None
         if pricelist_id is None:
             # The ``pricelist`` table gained an ``is_demo`` column via a later
@@ -206,16 +223,18 @@ def selected_pricelist(data: LangRequest):
             # missing, effectively selecting the first available pricelist instead
             # of failing hard.
             try:
-                cur.execute("SELECT id FROM pricelist WHERE is_demo ORDER BY id LIMIT 1")
-            except UndefinedColumn:
-                conn.rollback()
-                cur = conn.cursor()
-                cur.execute("SELECT id FROM pricelist ORDER BY id LIMIT 1")
-            row = cur.fetchone()
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT id FROM pricelist WHERE is_demo ORDER BY id LIMIT 1")
+                    row = await cur.fetchone()
+            except UndefinedColumnErrors:
+                await conn.rollback()
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT id FROM pricelist ORDER BY id LIMIT 1")
+                    row = await cur.fetchone()
             if not row:
                 raise HTTPException(404, "Demo pricelist not found")
             pricelist_id = row[0]
-        currency = fetch_pricelist_currency(conn, pricelist_id)
+        currency = await fetch_pricelist_currency_async(conn, pricelist_id)
         # Build the query dynamically with the requested translation column.
         query_tpl = """
             SELECT p.departure_stop_id, COALESCE(s1.{col}, s1.stop_name),
@@ -227,36 +246,48 @@ def selected_pricelist(data: LangRequest):
              WHERE p.pricelist_id=%s
              ORDER BY p.id
         """
-        query = query_tpl.format(col=col)
         try:
-            cur.execute(query, (pricelist_id,))
-        except UndefinedColumn:
+            async with conn.cursor() as cur:
+                await cur.execute(query_tpl.format(col=col), (pricelist_id,))
+                rows = await cur.fetchall()
+        except Exception as e:
             # If the database does not contain the requested translation
             # column (e.g. ``stop_bg``), retry the query using the default
             # ``stop_name`` column instead of failing with a 500 error.
-            conn.rollback()
-            cur = conn.cursor()
-            fallback_query = query_tpl.format(col="stop_name")
-            cur.execute(fallback_query, (pricelist_id,))
-        except Exception as e:
-            if "column" in str(e).lower() and "does not exist" in str(e).lower():
-                conn.rollback()
-                cur = conn.cursor()
-                fallback_query = query_tpl.format(col="stop_name")
-                cur.execute(fallback_query, (pricelist_id,))
-            else:
+            message = str(e).lower()
+            if not isinstance(e, UndefinedColumnErrors) and not (
+                "column" in message and "does not exist" in message
+            ):
                 raise
-        prices = [
-            {
-                "departure_stop_id": r[0],
-                "departure_name": r[1],
-                "arrival_stop_id": r[2],
-                "arrival_name": r[3],
-                "price": r[4],
-            }
-            for r in cur.fetchall()
-        ]
-        return {"pricelist_id": pricelist_id, "currency": currency, "prices": prices}
-    finally:
-        cur.close()
-        conn.close()
+            await conn.rollback()
+            async with conn.cursor() as cur:
+                await cur.execute(query_tpl.format(col="stop_name"), (pricelist_id,))
+                rows = await cur.fetchall()
+    prices = [
+        {
+            "departure_stop_id": r[0],
+            "departure_name": r[1],
+            "arrival_stop_id": r[2],
+            "arrival_name": r[3],
+            "price": r[4],
+        }
+        for r in rows
+    ]
+    return jsonable_encoder(
+        PricelistBundleOut(pricelist_id=pricelist_id, currency=currency, prices=prices)
+    )
+
+
+@router.post("/selected_pricelist", response_model=PricelistBundleOut)
+async def selected_pricelist(data: LangRequest, request: Request):
+    lang = data.lang.lower()
+    cached = await bundle_cache.get_or_build(
+        "pricelist", lang, lambda: _build_pricelist_bundle(lang)
+    )
+    return _cached_response(request, cached)
+
+
+@router.get("/selected_pricelist", response_model=PricelistBundleOut)
+async def selected_pricelist_get(request: Request, lang: str = Query("bg")):
+    """Cacheable GET form of :func:`selected_pricelist` for CDNs and proxies."""
+    return await selected_pricelist(LangRequest(lang=lang), request)
@@ -8,6 +8,7 @@ from ..auth import require_admin_token
 from ..database import get_connection
 from ..models import Pricelist, PricelistCreate, PricelistDemoUpdate
 from ..pricelist_utils import ensure_pricelist_currency_column, fetch_pricelist_currency
+from ..services import bundle_cache, fares
 
 router = APIRouter(
     prefix="/pricelists",
@@ -60,6 +61,7 @@ def create_pricelists(item: PricelistCreate):
                 )
                 new_id, new_name, new_currency = cur.fetchone()
                 conn.commit()
+                bundle_cache.invalidate()
                 return {"id": new_id, "name": new_name, "currency": new_currency, "is_demo": False}
             except UndefinedColumn:
                 conn.rollback()
@@ -88,6 +90,7 @@ def update_pricelist(pricelist_id: int, item: PricelistCreate):
                 if not updated:
                     raise HTTPException(status_code=404, detail="Pricelist not found")
                 conn.commit()
+                bundle_cache.invalidate()
                 return {"id": updated[0], "name": updated[1], "currency": updated[2], "is_demo": False}
             except UndefinedColumn:
                 conn.rollback()
@@ -130,6 +133,8 @@ def delete_pricelist(pricelist_id: int):
         raise HTTPException(status_code=404, detail="Pricelist not found")
 
     conn.commit()
+    bundle_cache.invalidate()
+    fares.invalidate(pricelist_id)
     cur.close()
     conn.close()
     # 204 No Content — тело ответа не нужно
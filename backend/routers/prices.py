@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from ..database import get_connection
 from ..models import Prices, PricesCreate
 from ..auth import require_admin_token
+from ..services import bundle_cache, fares
 
 router = APIRouter(
     prefix="/prices",
@@ -93,6 +94,8 @@ def create_price(price_data: PricesCreate):
         )
         new_id = cur.fetchone()[0]
         conn.commit()
+        bundle_cache.invalidate()
+        fares.invalidate()
         return {"id": new_id, **price_data.dict()}
     except Exception as e:
         conn.rollback()
@@ -129,6 +132,8 @@ def update_price(price_id: int, price_data: PricesCreate):
         )
         updated_row = cur.fetchone()
         conn.commit()
+        bundle_cache.invalidate()
+        fares.invalidate()
         if updated_row is None:
             raise HTTPException(status_code=404, detail="Price not found")
         return {
@@ -159,6 +164,8 @@ def delete_price(price_id: int):
         )
         deleted_row = cur.fetchone()
         conn.commit()
+        bundle_cache.invalidate()
+        fares.invalidate()
         if deleted_row is None:
             raise HTTPException(status_code=404, detail="Price not found")
         return {"deleted_id": deleted_row[0], "detail": "Price deleted"}
@@ -9,26 +9,40 @@ from urllib.parse import parse_qs
 from datetime import datetime, timezone
 from typing import Any, Iterable, Mapping, Literal, Sequence
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse, RedirectResponse, Response
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, Response
 from pydantic import BaseModel, Field
 import psycopg2
 
+from .. import schema
+from ..async_database import async_connection
 from ..database import get_connection
+from ..services import booking
+from ..services import fares
+from ..services import jobs
 from ..services import link_sessions
 from ..services.link_sessions import get_or_create_view_session
-from ..services.access_guard import guard_public_request
+from ..services.access_guard import guard_public_request, guard_public_request_async
 from ..services import liqpay
-from ..services.ticket_dto import get_ticket_dto
+from ..services import liqpay_events
+from ..services.ticket_dto import (
+    get_purchase_ticket_dtos,
+    get_purchase_ticket_dtos_async,
+    get_ticket_dto,
+)
 from ..services.ticket_pdf import render_ticket_pdf
-from ..ticket_utils import free_ticket, recalc_available
+from ..ticket_utils import free_tickets
 from ._ticket_link_helpers import (
     DEFAULT_TICKET_SCOPES,
     build_deep_link,
     combine_departure_datetime,
 )
 from ..utils.client_app import get_client_app_base
+from ..utils import json_response
+from ..utils.http_cache import etag_matches
+from ..utils.json_response import FastJSONResponse
+from ..utils.ttl_cache import TTLCache
 
 session_router = APIRouter(tags=["public"])
 router = APIRouter(prefix="/public", tags=["public"])
@@ -38,14 +52,21 @@ _PURCHASE_COOKIE_PREFIX = "minicab_purchase_"
 _CSRF_COOKIE_NAME = "mc_csrf"
 _DEFAULT_LANG = "bg"
 
+# Serialized purchase views keyed by (purchase_id, lang, data version).  The
+# version changes with any purchase/ticket/seat/passenger row, so the TTL only
+# bounds staleness of route and stop metadata.
+PURCHASE_VIEW_CACHE_SIZE = 512
+PURCHASE_VIEW_CACHE_TTL_SECONDS = 60
+_purchase_view_cache: TTLCache[bytes] = TTLCache(
+    PURCHASE_VIEW_CACHE_SIZE, PURCHASE_VIEW_CACHE_TTL_SECONDS
+)
+
 logger = logging.getLogger(__name__)
-_uvicorn_error_logger = logging.getLogger("uvicorn.error")
 
 
 def _emit_fiscal_log(message: str, *args: Any) -> None:
-    """Emit fiscalization-critical logs to both module and container loggers."""
+    """Emit fiscalization-critical logs (WARNING, so never sampled away)."""
     logger.warning(message, *args)
-    _uvicorn_error_logger.warning(message, *args)
 
 
 class RescheduleTicketSpec(BaseModel):
@@ -130,29 +151,6 @@ def _round_currency(value: float | None) -> float:
     return round(float(value or 0.0), 2)
 
 
-def _purchase_has_column(cur, column_name: str) -> bool:
-    cur.execute(
-        """
-        SELECT 1
-          FROM information_schema.columns
-         WHERE table_schema = 'public'
-           AND table_name = 'purchase'
-           AND column_name = %s
-         LIMIT 1
-        """,
-        (column_name,),
-    )
-    return cur.fetchone() is not None
-
-
-def _missing_purchase_columns(cur, column_names: Sequence[str]) -> list[str]:
-    missing: list[str] = []
-    for column_name in column_names:
-        if not _purchase_has_column(cur, column_name):
-            missing.append(column_name)
-    return missing
-
-
 def _redirect_base_url(purchase_id: int) -> str:
     try:
         base_url = get_client_app_base()
@@ -253,25 +251,29 @@ def _extract_session_cookie(
     )
 
 
-def _resolve_purchase_id(session: link_sessions.LinkSession) -> int:
+def _resolve_purchase_id(session: link_sessions.LinkSession, *, conn=None) -> int:
     if session.purchase_id:
         return int(session.purchase_id)
-    conn = get_connection()
+    owns_connection = conn is None
+    connection = conn or get_connection()
     try:
-        with conn.cursor() as cur:
+        with connection.cursor() as cur:
             cur.execute("SELECT purchase_id FROM ticket WHERE id = %s", (session.ticket_id,))
             row = cur.fetchone()
         if not row or not row[0]:
             raise HTTPException(status_code=404, detail="Purchase not found for ticket")
         return int(row[0])
     finally:
-        conn.close()
+        if owns_connection:
+            connection.close()
 
 
 def _require_view_session(
     request: Request,
     ticket_id: int | None = None,
     purchase_id: int | None = None,
+    *,
+    conn=None,
 ) -> tuple[link_sessions.LinkSession, int, int, str]:
     target_id, cookie_name, session_id = _extract_session_cookie(
         request, ticket_id=ticket_id, purchase_id=purchase_id
@@ -281,7 +283,46 @@ def _require_view_session(
         session_id,
         scope="view",
         require_redeemed=True,
+        conn=conn,
+    )
+    _check_session_alive(session)
+    resolved_purchase_id = _resolve_purchase_id(session, conn=conn)
+    _check_session_target(session, target_id, resolved_purchase_id, ticket_id, purchase_id)
+    return session, session.ticket_id, resolved_purchase_id, cookie_name
+
+
+async def _require_view_session_async(
+    request: Request, purchase_id: int, *, conn
+) -> tuple[link_sessions.LinkSession, int, int, str]:
+    """:func:`_require_view_session` for a purchase on an ``async_connection``."""
+
+    target_id, cookie_name, session_id = _extract_session_cookie(
+        request, purchase_id=purchase_id
+    )
+    session = await link_sessions.get_session_async(
+        session_id,
+        scope="view",
+        require_redeemed=True,
+        conn=conn,
     )
+    _check_session_alive(session)
+    resolved_purchase_id = await _resolve_purchase_id_async(session, conn=conn)
+    _check_session_target(session, target_id, resolved_purchase_id, None, purchase_id)
+    return session, session.ticket_id, resolved_purchase_id, cookie_name
+
+
+async def _resolve_purchase_id_async(session: link_sessions.LinkSession, *, conn) -> int:
+    if session.purchase_id:
+        return int(session.purchase_id)
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT purchase_id FROM ticket WHERE id = %s", (session.ticket_id,))
+        row = await cur.fetchone()
+    if not row or not row[0]:
+        raise HTTPException(status_code=404, detail="Purchase not found for ticket")
+    return int(row[0])
+
+
+def _check_session_alive(session: link_sessions.LinkSession | None) -> None:
     if not session:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
 
@@ -289,7 +330,14 @@ def _require_view_session(
     if session.exp <= now:
         raise HTTPException(status_code=401, detail="Session expired")
 
-    resolved_purchase_id = _resolve_purchase_id(session)
+
+def _check_session_target(
+    session: link_sessions.LinkSession,
+    target_id: int,
+    resolved_purchase_id: int,
+    ticket_id: int | None,
+    purchase_id: int | None,
+) -> None:
     if purchase_id is not None and resolved_purchase_id != purchase_id:
         raise HTTPException(status_code=403, detail="Session does not match purchase")
 
@@ -302,8 +350,6 @@ def _require_view_session(
         if target_id != session.ticket_id:
             raise HTTPException(status_code=403, detail="Session mismatch")
 
-    return session, session.ticket_id, resolved_purchase_id, cookie_name
-
 
 def _require_purchase_context(
     request: Request,
@@ -366,116 +412,153 @@ def _load_ticket_dto(ticket_id: int, lang: str = _DEFAULT_LANG) -> Mapping[str,
         conn.close()
 
 
-def _load_purchase_view(purchase_id: int, lang: str = _DEFAULT_LANG) -> Mapping[str, Any]:
-    conn = get_connection()
+# Fingerprint of every row the purchase view is built from.  ``xmin`` changes
+# on each update of a row, so hashing it for the purchase and its ticket, seat
+# and passenger rows yields a cheap data version (no row when the purchase
+# does not exist).
+_PURCHASE_VIEW_VERSION_SQL = """
+SELECT md5(
+           p.xmin::text || '|' || COALESCE((
+               SELECT string_agg(
+                          t.id::text || ':' || t.xmin::text || ':'
+                          || COALESCE(s.xmin::text, '') || ':'
+                          || COALESCE(pa.xmin::text, ''),
+                          ',' ORDER BY t.id
+                      )
+                 FROM ticket t
+                 LEFT JOIN seat s ON s.id = t.seat_id
+                 LEFT JOIN passenger pa ON pa.id = t.passenger_id
+                WHERE t.purchase_id = p.id
+           ), '')
+       )
+  FROM purchase p
+ WHERE p.id = %s
+"""
+
+
+_PURCHASE_VIEW_ROW_SQL = """
+SELECT id, status, amount_due, customer_name, customer_email,
+       customer_phone, update_at
+  FROM purchase
+ WHERE id = %s
+"""
+
+
+def _load_purchase_view(
+    purchase_id: int, lang: str = _DEFAULT_LANG, *, conn=None
+) -> Mapping[str, Any]:
+    owns_connection = conn is None
+    connection = conn or get_connection()
     try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, status, amount_due, customer_name, customer_email,
-                       customer_phone, update_at
-                  FROM purchase
-                 WHERE id = %s
-                """,
-                (purchase_id,),
-            )
+        with connection.cursor() as cur:
+            cur.execute(_PURCHASE_VIEW_ROW_SQL, (purchase_id,))
             row = cur.fetchone()
             if not row:
                 raise HTTPException(status_code=404, detail="Purchase not found")
 
-        cur = conn.cursor()
-        try:
-            cur.execute(
-                "SELECT id FROM ticket WHERE purchase_id = %s ORDER BY id",
-                (purchase_id,),
-            )
-            ticket_ids = [int(r[0]) for r in cur.fetchall()]
-        finally:
-            cur.close()
+        raw_dtos = get_purchase_ticket_dtos(purchase_id, lang, connection)
+        return _build_purchase_view(purchase_id, row, raw_dtos)
+    finally:
+        if owns_connection:
+            connection.close()
 
-        raw_dtos = [get_ticket_dto(tid, lang, conn) for tid in ticket_ids]
-        timestamp = row[6]
 
-        purchase_status = row[1]
-        amount_due = float(row[2]) if row[2] is not None else None
-        customer = {
-            "name": row[3],
-            "email": row[4],
-            "phone": row[5],
-        }
+async def _load_purchase_view_async(
+    purchase_id: int, lang: str, *, conn
+) -> Mapping[str, Any]:
+    async with conn.cursor() as cur:
+        await cur.execute(_PURCHASE_VIEW_ROW_SQL, (purchase_id,))
+        row = await cur.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Purchase not found")
 
-        # Transform ticket DTOs into PurchaseTicket shape expected by client
-        tickets = []
-        passengers_map: dict[int, dict] = {}
-        for dto in raw_dtos:
-            t = dto.get("ticket") or {}
-            passenger = dto.get("passenger") or {}
-            tour_info = dto.get("tour") or {}
-            route_info = dto.get("route") or {}
-            segment_info = dto.get("segment") or {}
-            pricing_info = dto.get("pricing") or {}
-
-            # Build PurchaseTicket-compatible object
-            ticket_obj = {
-                "id": t.get("id"),
-                "passenger_id": passenger.get("id"),
-                "status": purchase_status,
-                "seat_id": t.get("seat_id"),
-                "seat_num": t.get("seat_number"),
-                "extra_baggage": t.get("extra_baggage"),
-                "tour": {
-                    "id": tour_info.get("id"),
-                    "date": tour_info.get("date"),
-                    "route_id": route_info.get("id"),
-                    "route_name": route_info.get("name"),
-                },
-                "segments": [],
-                "route": {
-                    "id": route_info.get("id"),
-                    "name": route_info.get("name"),
-                    "stops": route_info.get("stops"),
-                },
-                "pricing": {
-                    "price": pricing_info.get("price"),
-                    "currency": pricing_info.get("currency_code"),
-                },
-                "segment_details": segment_info,
-            }
-            tickets.append(ticket_obj)
-
-            # Collect passengers
-            pid = passenger.get("id")
-            if pid is not None and pid not in passengers_map:
-                passengers_map[pid] = {
-                    "id": pid,
-                    "name": passenger.get("name"),
-                    "email": customer.get("email"),
-                    "phone": customer.get("phone"),
-                }
+    raw_dtos = await get_purchase_ticket_dtos_async(purchase_id, lang, conn)
+    return _build_purchase_view(purchase_id, row, raw_dtos)
 
-        passengers = list(passengers_map.values())
 
-        return {
-            "purchase": {
-                "id": purchase_id,
-                "status": purchase_status,
-                "created_at": timestamp.isoformat() if timestamp else None,
-                "amount_due": amount_due,
-                "currency": "BGN",
+def _build_purchase_view(
+    purchase_id: int, row: Sequence[Any], raw_dtos: Iterable[Mapping[str, Any]]
+) -> Mapping[str, Any]:
+    timestamp = row[6]
+
+    purchase_status = row[1]
+    amount_due = float(row[2]) if row[2] is not None else None
+    customer = {
+        "name": row[3],
+        "email": row[4],
+        "phone": row[5],
+    }
+
+    # Transform ticket DTOs into PurchaseTicket shape expected by client
+    tickets = []
+    passengers_map: dict[int, dict] = {}
+    for dto in raw_dtos:
+        t = dto.get("ticket") or {}
+        passenger = dto.get("passenger") or {}
+        tour_info = dto.get("tour") or {}
+        route_info = dto.get("route") or {}
+        segment_info = dto.get("segment") or {}
+        pricing_info = dto.get("pricing") or {}
+
+        # Build PurchaseTicket-compatible object
+        ticket_obj = {
+            "id": t.get("id"),
+            "passenger_id": passenger.get("id"),
+            "status": purchase_status,
+            "seat_id": t.get("seat_id"),
+            "seat_num": t.get("seat_number"),
+            "extra_baggage": t.get("extra_baggage"),
+            "tour": {
+                "id": tour_info.get("id"),
+                "date": tour_info.get("date"),
+                "route_id": route_info.get("id"),
+                "route_name": route_info.get("name"),
+            },
+            "segments": [],
+            "route": {
+                "id": route_info.get("id"),
+                "name": route_info.get("name"),
+                "stops": route_info.get("stops"),
             },
-            "passengers": passengers,
-            "tickets": tickets,
-            "trips": [],
-            "totals": {
-                "paid": amount_due if purchase_status == "paid" else 0,
-                "due": 0 if purchase_status == "paid" else (amount_due or 0),
-                "baggage_count": 0,
-                "pax_count": len(passengers),
+            "pricing": {
+                "price": pricing_info.get("price"),
+                "currency": pricing_info.get("currency_code"),
             },
-            "customer": customer,
+            "segment_details": segment_info,
         }
-    finally:
-        conn.close()
+        tickets.append(ticket_obj)
+
+        # Collect passengers
+        pid = passenger.get("id")
+        if pid is not None and pid not in passengers_map:
+            passengers_map[pid] = {
+                "id": pid,
+                "name": passenger.get("name"),
+                "email": customer.get("email"),
+                "phone": customer.get("phone"),
+            }
+
+    passengers = list(passengers_map.values())
+
+    return {
+        "purchase": {
+            "id": purchase_id,
+            "status": purchase_status,
+            "created_at": timestamp.isoformat() if timestamp else None,
+            "amount_due": amount_due,
+            "currency": "BGN",
+        },
+        "passengers": passengers,
+        "tickets": tickets,
+        "trips": [],
+        "totals": {
+            "paid": amount_due if purchase_status == "paid" else 0,
+            "due": 0 if purchase_status == "paid" else (amount_due or 0),
+            "baggage_count": 0,
+            "pax_count": len(passengers),
+        },
+        "customer": customer,
+    }
 
 
 def _verify_ticket_purchase_access(ticket_id: int, purchase_id: int, email: str) -> None:
@@ -548,7 +631,6 @@ def _sync_purchase_paid_from_liqpay_callback(
     purchase_id: int,
     order_id: str,
     payload: Mapping[str, Any],
-    background_tasks: BackgroundTasks | None = None,
 ) -> tuple[str, str | None]:
     status = str(payload.get("status") or "")
     payment_id = str(payload.get("payment_id") or "") or None
@@ -576,8 +658,7 @@ def _sync_purchase_paid_from_liqpay_callback(
             raise HTTPException(status_code=404, detail="Purchase not found")
 
         amount_due, purchase_status, customer_email = float(row[0]), row[1], row[2]
-        liqpay_columns = ("liqpay_order_id", "liqpay_status", "liqpay_payment_id", "liqpay_payload")
-        missing_liqpay_columns = _missing_purchase_columns(cur, liqpay_columns)
+        missing_liqpay_columns = schema.missing_columns("purchase", schema.LIQPAY_COLUMNS)
         if not missing_liqpay_columns:
             try:
                 cur.execute(
@@ -605,11 +686,10 @@ def _sync_purchase_paid_from_liqpay_callback(
                 if not row:
                     raise HTTPException(status_code=404, detail="Purchase not found")
                 amount_due, purchase_status, customer_email = float(row[0]), row[1], row[2]
-                missing_liqpay_columns = _missing_purchase_columns(cur, liqpay_columns)
+                schema.mark_missing("purchase", schema.LIQPAY_COLUMNS)
                 logger.warning(
-                    "Skipping LiqPay tracking persistence for purchase=%s; missing columns: %s",
+                    "Skipping LiqPay tracking persistence for purchase=%s; LiqPay columns are out of sync",
                     purchase_id,
-                    ", ".join(missing_liqpay_columns) or "unknown",
                 )
         else:
             logger.warning(
@@ -662,15 +742,7 @@ def _sync_purchase_paid_from_liqpay_callback(
         ticket_specs = _collect_ticket_specs_for_purchase(cur, purchase_id)
         from ..services.checkbox import is_enabled as checkbox_enabled
 
-        fiscal_columns = (
-            "fiscal_status",
-            "checkbox_receipt_id",
-            "checkbox_fiscal_code",
-            "fiscal_last_error",
-            "fiscal_attempts",
-            "fiscalized_at",
-        )
-        missing_fiscal_columns = _missing_purchase_columns(cur, fiscal_columns)
+        missing_fiscal_columns = schema.missing_columns("purchase", schema.FISCAL_COLUMNS)
         if missing_fiscal_columns:
             logger.warning(
                 "Skipping fiscal purchase columns update for purchase=%s; missing columns: %s",
@@ -708,6 +780,20 @@ def _sync_purchase_paid_from_liqpay_callback(
             payment_id,
             amount_due,
         )
+        # Emails, the Telegram event and CheckBox fiscalization are queued in
+        # the same transaction, so they exist exactly when the payment does.
+        _queue_ticket_emails(tickets, None, customer_email, conn=conn)
+        _queue_telegram_event(purchase_id, "paid", conn=conn)
+        # Only runs for online (LiqPay) payments — admin path never calls this function.
+        fiscalize = checkbox_enabled()
+        if fiscalize:
+            jobs.enqueue(
+                "checkbox.fiscalize",
+                {"purchase_id": purchase_id},
+                priority=jobs.PRIORITY_HIGH,
+                dedup_key=str(purchase_id),
+                conn=conn,
+            )
         conn.commit()
     except HTTPException:
         conn.rollback()
@@ -719,32 +805,16 @@ def _sync_purchase_paid_from_liqpay_callback(
         cur.close()
         conn.close()
 
-    if background_tasks:
-        _queue_ticket_emails(background_tasks, tickets, None, customer_email)
-        _queue_telegram_event(background_tasks, purchase_id, "paid")
-        # Trigger CheckBox fiscalization as a non-blocking background task.
-        # Only runs for online (LiqPay) payments — admin path never calls this function.
-        from ..services.checkbox import is_enabled as checkbox_enabled, fiscalize_purchase
-        if checkbox_enabled():
-            background_tasks.add_task(fiscalize_purchase, purchase_id)
-            logger.info("Queued CheckBox fiscalization task for purchase=%s", purchase_id)
-            _emit_fiscal_log("Queued CheckBox fiscalization task for purchase=%s", purchase_id)
-        else:
-            logger.info(
-                "CheckBox fiscalization is disabled (CHECKBOX_ENABLED=false); skipping purchase=%s",
-                purchase_id,
-            )
-            _emit_fiscal_log(
-                "Skipped CheckBox fiscalization for purchase=%s: CHECKBOX_ENABLED=false",
-                purchase_id,
-            )
+    if fiscalize:
+        logger.info("Queued CheckBox fiscalization job for purchase=%s", purchase_id)
+        _emit_fiscal_log("Queued CheckBox fiscalization job for purchase=%s", purchase_id)
     else:
-        logger.warning(
-            "BackgroundTasks is unavailable for LiqPay callback; fiscalization queue skipped for purchase=%s",
+        logger.info(
+            "CheckBox fiscalization is disabled (CHECKBOX_ENABLED=false); skipping purchase=%s",
             purchase_id,
         )
         _emit_fiscal_log(
-            "Skipped CheckBox fiscalization queue for purchase=%s: BackgroundTasks unavailable",
+            "Skipped CheckBox fiscalization for purchase=%s: CHECKBOX_ENABLED=false",
             purchase_id,
         )
     return "paid", payment_id
@@ -759,7 +829,7 @@ def resolve_payment(order_id: str = Query(..., min_length=3, max_length=128, pat
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            has_liqpay_tracking = _purchase_has_column(cur, "liqpay_order_id")
+            has_liqpay_tracking = schema.has_column("purchase", "liqpay_order_id")
             if has_liqpay_tracking:
                 try:
                     cur.execute(
@@ -776,6 +846,7 @@ def resolve_payment(order_id: str = Query(..., min_length=3, max_length=128, pat
                     if not _is_undefined_column_error(exc):
                         raise
                     conn.rollback()
+                    schema.mark_missing("purchase", ("liqpay_order_id",))
                     cur.execute(
                         """
                         SELECT id, status, amount_due, customer_email, customer_name,
@@ -948,8 +1019,31 @@ async def _extract_liqpay_post_payload(request: Request) -> tuple[str | None, st
     return raw_data, raw_signature
 
 
+def _apply_liqpay_callback_event(event: liqpay_events.CallbackEvent) -> str:
+    """Worker handler: apply a stored LiqPay callback to its purchase."""
+
+    try:
+        resolved_status, _payment_id = _sync_purchase_paid_from_liqpay_callback(
+            event.purchase_id,
+            event.order_id,
+            event.payload,
+        )
+    except HTTPException as exc:
+        if exc.status_code < 500:
+            raise liqpay_events.EventRejected(f"rejected_{exc.status_code}", str(exc.detail)) from exc
+        raise
+    logger.info(
+        "LiqPay callback applied event=%s purchase=%s order_id=%s status=%s",
+        event.id,
+        event.purchase_id,
+        event.order_id,
+        resolved_status,
+    )
+    return resolved_status
+
+
 @router.post("/payment/liqpay/callback")
-async def liqpay_callback(request: Request, background_tasks: BackgroundTasks) -> Mapping[str, Any]:
+async def liqpay_callback(request: Request) -> Mapping[str, Any]:
     data, signature = await _extract_liqpay_post_payload(request)
 
     if not data or not signature:
@@ -964,34 +1058,33 @@ async def liqpay_callback(request: Request, background_tasks: BackgroundTasks) -
     if purchase_id is None:
         raise HTTPException(status_code=400, detail="Unrecognized LiqPay order")
 
+    # Only the durable insert happens in the request; it runs in the thread
+    # pool so the event loop is never blocked on psycopg2.
     try:
-        resolved_status, payment_id = _sync_purchase_paid_from_liqpay_callback(
-            purchase_id,
-            order_id,
-            payload,
-            background_tasks,
+        event_id, created = await run_in_threadpool(
+            liqpay_events.enqueue, purchase_id, order_id, payload
         )
-    except HTTPException as exc:
-        if exc.status_code < 500:
-            raise
+    except Exception as exc:
         logger.exception(
-            "Failed to process LiqPay callback for purchase=%s order_id=%s",
+            "Failed to store LiqPay callback for purchase=%s order_id=%s",
             purchase_id,
             order_id,
         )
-        resolved_status, payment_id = "pending", None
+        # A 5xx makes LiqPay retry the notification later.
+        raise HTTPException(status_code=503, detail="Callback not stored") from exc
+
     logger.info(
-        "LiqPay callback result purchase=%s order_id=%s status=%s payment_id=%s",
+        "LiqPay callback queued purchase=%s order_id=%s event=%s duplicate=%s",
         purchase_id,
         order_id,
-        resolved_status,
-        payment_id,
+        event_id,
+        not created,
     )
     return {
         "ok": True,
-        "status": resolved_status,
+        "status": "queued" if created else "duplicate",
         "purchase_id": purchase_id,
-        "payment_id": payment_id,
+        "payment_id": str(payload.get("payment_id") or "") or None,
     }
 
 
@@ -1051,19 +1144,28 @@ def _resolve_ticket_price(cur, tour_id: int, departure_stop_id: int, arrival_sto
     row = cur.fetchone()
     if not row:
         return None
-    pricelist_id = row[0]
-    cur.execute(
-        """
-        SELECT price
-          FROM prices
-         WHERE pricelist_id = %s
-           AND departure_stop_id = %s
-           AND arrival_stop_id = %s
-        """,
-        (pricelist_id, departure_stop_id, arrival_stop_id),
-    )
-    price_row = cur.fetchone()
-    return price_row[0] if price_row else None
+    return fares.base_price(cur, row[0], departure_stop_id, arrival_stop_id)
+
+
+def _quote_tickets(
+    cur, quotes: Sequence[tuple[int, fares.FareRequest]]
+) -> list[float | None]:
+    """Quote ``(tour_id, request)`` pairs with one batch per distinct tour."""
+
+    by_tour: dict[int, list[int]] = {}
+    for idx, (tour_id, _request) in enumerate(quotes):
+        by_tour.setdefault(int(tour_id), []).append(idx)
+    totals: list[float | None] = [None] * len(quotes)
+    for tour_id, indexes in by_tour.items():
+        route = booking.load_route(cur, tour_id)
+        if route.pricelist_id is None:
+            continue
+        batch = fares.quote_many(
+            cur, route.pricelist_id, route.stops, [quotes[idx][1] for idx in indexes]
+        )
+        for idx, total in zip(indexes, batch):
+            totals[idx] = total
+    return totals
 
 
 def _perform_reschedule(
@@ -1082,48 +1184,14 @@ def _perform_reschedule(
         raise HTTPException(status_code=404, detail="Seat not found")
     current_tour_id = int(seat_tour_row[0])
 
-    cur.execute("SELECT route_id FROM tour WHERE id = %s", (current_tour_id,))
-    current_route_row = cur.fetchone()
-    if not current_route_row:
-        raise HTTPException(status_code=404, detail="Tour not found")
-    current_stops = _fetch_route_stops(cur, int(current_route_row[0]))
-    current_segments, _ = _segments_between(current_stops, departure_stop_id, arrival_stop_id)
-
-    cur.execute("SELECT available FROM seat WHERE id = %s FOR UPDATE", (current_seat_id,))
-    current_avail_row = cur.fetchone()
-    if not current_avail_row:
-        raise HTTPException(status_code=404, detail="Seat not found")
-    current_avail = current_avail_row[0]
-
-    cur.execute("SELECT route_id FROM tour WHERE id = %s", (target_tour_id,))
-    target_route_row = cur.fetchone()
-    if not target_route_row:
-        raise HTTPException(status_code=404, detail="Target tour not found")
-    target_stops = _fetch_route_stops(cur, int(target_route_row[0]))
-    target_segments, _ = _segments_between(target_stops, departure_stop_id, arrival_stop_id)
-
-    cur.execute(
-        "SELECT id, available FROM seat WHERE tour_id = %s AND seat_num = %s FOR UPDATE",
-        (target_tour_id, seat_num),
-    )
-    target_seat_row = cur.fetchone()
-    if not target_seat_row:
-        raise HTTPException(status_code=404, detail="Seat not found on target tour")
-    target_seat_id, target_avail = target_seat_row
-    if target_avail == "0":
-        raise HTTPException(status_code=409, detail="Seat is blocked on the selected tour")
-    _ensure_segments_available(target_avail, target_segments)
-
-    released_current_avail = _merge_available(current_avail, current_segments)
-    updated_target_avail = _remove_segments(target_avail, target_segments)
-
-    cur.execute(
-        "UPDATE seat SET available = %s WHERE id = %s",
-        (released_current_avail, current_seat_id),
-    )
-    cur.execute(
-        "UPDATE seat SET available = %s WHERE id = %s",
-        (updated_target_avail, target_seat_id),
+    target_seat_id = booking.move(
+        cur,
+        booking.load_route(cur, current_tour_id),
+        current_seat_id,
+        departure_stop_id,
+        arrival_stop_id,
+        target=booking.load_route(cur, target_tour_id, not_found="Target tour not found"),
+        seat_num=seat_num,
     )
     cur.execute(
         """
@@ -1135,10 +1203,6 @@ def _perform_reschedule(
         (target_tour_id, target_seat_id, ticket_id),
     )
 
-    recalc_available(cur, current_tour_id)
-    if current_tour_id != target_tour_id:
-        recalc_available(cur, target_tour_id)
-
 
 def _plan_reschedule(
     cur,
@@ -1285,6 +1349,7 @@ def _plan_baggage(
 
     seen: set[int] = set()
     plans: list[dict[str, Any]] = []
+    requests: list[tuple[int, fares.FareRequest]] = []
     total_delta = 0.0
 
     for spec in specs:
@@ -1310,15 +1375,6 @@ def _plan_baggage(
         if new_extra_count < current_extra_count and purchase_status == "paid":
             raise HTTPException(status_code=409, detail="Cannot remove paid baggage")
 
-        base_price = _resolve_ticket_price(cur, tour_id, dep_id, arr_id)
-        if base_price is None:
-            raise HTTPException(status_code=400, detail="Unable to calculate baggage price")
-
-        delta_count = new_extra_count - current_extra_count
-        delta = float(base_price) * 0.1 * delta_count
-        delta = round(delta, 2)
-        total_delta += delta
-
         plans.append(
             {
                 "ticket_id": int(spec.ticket_id),
@@ -1327,9 +1383,23 @@ def _plan_baggage(
                 "arrival_stop_id": int(arr_id),
                 "current_extra_baggage": current_extra_count,
                 "new_extra_baggage": new_extra_count,
-                "delta": delta,
             }
         )
+        # Only the added (or removed) pieces are charged, not the seat.
+        requests.append(
+            (
+                tour_id,
+                fares.FareRequest(
+                    dep_id, arr_id, adults=0, baggage=new_extra_count - current_extra_count
+                ),
+            )
+        )
+
+    for plan, delta in zip(plans, _quote_tickets(cur, requests)):
+        if delta is None:
+            raise HTTPException(status_code=400, detail="Unable to calculate baggage price")
+        plan["delta"] = delta
+        total_delta += delta
 
     return plans, total_delta
 
@@ -1346,6 +1416,7 @@ def _plan_cancel(
 
     seen: set[int] = set()
     plans: list[dict[str, Any]] = []
+    requests: list[tuple[int, fares.FareRequest]] = []
     total_delta = 0.0
 
     for ticket_id in ticket_ids:
@@ -1366,23 +1437,22 @@ def _plan_cancel(
         if purchase_ref != purchase_id:
             raise HTTPException(status_code=403, detail="Ticket does not belong to this purchase")
 
-        base_price = _resolve_ticket_price(cur, tour_id, dep_id, arr_id)
-        if base_price is None:
-            raise HTTPException(status_code=400, detail="Unable to calculate ticket price")
-
-        baggage_price = float(base_price) * 0.1 * int(extra_baggage or 0)
-        ticket_value = float(base_price) + baggage_price
-        ticket_value = round(ticket_value, 2)
-        total_delta -= ticket_value
-
         plans.append(
             {
                 "ticket_id": int(ticket_id),
                 "tour_id": int(tour_id),
-                "value": ticket_value,
                 "extra_baggage": int(extra_baggage or 0),
             }
         )
+        requests.append(
+            (tour_id, fares.FareRequest(dep_id, arr_id, baggage=int(extra_baggage or 0)))
+        )
+
+    for plan, ticket_value in zip(plans, _quote_tickets(cur, requests)):
+        if ticket_value is None:
+            raise HTTPException(status_code=400, detail="Unable to calculate ticket price")
+        plan["value"] = ticket_value
+        total_delta -= ticket_value
 
     return plans, total_delta
 
@@ -1453,7 +1523,7 @@ def get_public_ticket(ticket_id: int, request: Request) -> Any:
     payload: dict[str, Any] = {"ticket": dto}
     if isinstance(dto, Mapping):
         payload.update(dto)
-    return jsonable_encoder(payload)
+    return FastJSONResponse(payload)
 
 
 @router.post("/tickets/{ticket_id}/reschedule")
@@ -1519,25 +1589,51 @@ def reschedule_public_ticket(
     payload: dict[str, Any] = {"ticket": dto}
     if isinstance(dto, Mapping):
         payload.update(dto)
-    return jsonable_encoder(payload)
+    return FastJSONResponse(payload)
+
+
+async def _purchase_view_version(conn, purchase_id: int) -> str | None:
+    async with conn.cursor() as cur:
+        await cur.execute(_PURCHASE_VIEW_VERSION_SQL, (purchase_id,))
+        row = await cur.fetchone()
+    return str(row[0]) if row and row[0] else None
 
 
 @router.get("/purchase/{purchase_id}")
-def get_public_purchase(purchase_id: int, request: Request) -> Any:
-    session, resolved_ticket_id, resolved_purchase_id, _cookie = _require_view_session(
-        request, purchase_id=purchase_id
-    )
-    guard_public_request(
-        request,
-        "purchase_view",
-        ticket_id=resolved_ticket_id,
-        purchase_id=resolved_purchase_id,
-    )
+async def get_public_purchase(purchase_id: int, request: Request) -> Response:
+    # Session lookup, usage touch, version probe and (on a cache miss) the DTO
+    # load all await one async connection instead of holding a worker thread.
+    async with async_connection() as conn:
+        session, resolved_ticket_id, resolved_purchase_id, _cookie = (
+            await _require_view_session_async(request, purchase_id, conn=conn)
+        )
+        await guard_public_request_async(
+            request,
+            "purchase_view",
+            ticket_id=resolved_ticket_id,
+            purchase_id=resolved_purchase_id,
+        )
 
-    link_sessions.touch_session_usage(session.jti, scope="view")
+        await link_sessions.touch_session_usage_async(session.jti, scope="view", conn=conn)
 
-    dto = _load_purchase_view(resolved_purchase_id, _DEFAULT_LANG)
-    return jsonable_encoder(dto)
+        version = await _purchase_view_version(conn, resolved_purchase_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Purchase not found")
+
+        etag = f'"{_DEFAULT_LANG}-{version}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        cache_key = (resolved_purchase_id, _DEFAULT_LANG, version)
+        body = _purchase_view_cache.get(cache_key)
+        if body is None:
+            body = json_response.dumps(
+                await _load_purchase_view_async(resolved_purchase_id, _DEFAULT_LANG, conn=conn)
+            )
+            _purchase_view_cache.set(cache_key, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/tickets/{ticket_id}/pdf")
@@ -1697,7 +1793,7 @@ def public_pay(purchase_id: int, request: Request) -> Mapping[str, Any]:
         conn = get_connection()
         try:
             with conn.cursor() as cur:
-                if _purchase_has_column(cur, "liqpay_order_id"):
+                if schema.has_column("purchase", "liqpay_order_id"):
                     cur.execute(
                         "UPDATE purchase SET liqpay_order_id=%s, update_at=NOW() WHERE id=%s",
                         (str(order_id), resolved_purchase_id),
@@ -1754,7 +1850,7 @@ def public_reschedule_quote(
         "new_amount_due": new_amount_due,
         "need_payment": new_amount_due > 0,
     }
-    return jsonable_encoder(response)
+    return FastJSONResponse(response)
 
 
 @router.post("/purchase/{purchase_id}/reschedule")
@@ -1842,7 +1938,7 @@ def public_reschedule(
         "new_amount_due": new_amount_due,
         "need_payment": new_amount_due > 0,
     }
-    return jsonable_encoder(response)
+    return FastJSONResponse(response)
 
 
 @router.post("/purchase/{purchase_id}/baggage/quote")
@@ -1881,7 +1977,7 @@ def public_baggage_quote(
         "new_amount_due": new_amount_due,
         "need_payment": new_amount_due > 0,
     }
-    return jsonable_encoder(response)
+    return FastJSONResponse(response)
 
 
 @router.post("/purchase/{purchase_id}/cancel/preview")
@@ -1916,7 +2012,7 @@ def public_cancel_preview(
         "new_amount_due": new_amount_due,
         "need_payment": new_amount_due > 0,
     }
-    return jsonable_encoder(response)
+    return FastJSONResponse(response)
 
 
 @router.post("/purchase/{purchase_id}/baggage")
@@ -1995,13 +2091,13 @@ def public_baggage(
         "new_amount_due": new_amount_due,
         "need_payment": new_amount_due > 0,
     }
-    return jsonable_encoder(response)
+    return FastJSONResponse(response)
 
 
 @router.post("/purchase/{purchase_id}/cancel")
 def public_cancel(
     purchase_id: int, data: CancelRequest, request: Request
-) -> JSONResponse:
+) -> FastJSONResponse:
     session, _ticket_id, resolved_purchase_id, cookie_name = _require_purchase_context(
         request, purchase_id, "cancel"
     )
@@ -2026,8 +2122,8 @@ def public_cancel(
             lock_tickets=True,
         )
 
+        free_tickets(cur, [plan["ticket_id"] for plan in plans])
         for plan in plans:
-            free_ticket(cur, plan["ticket_id"])
             link_sessions.revoke_ticket_sessions(plan["ticket_id"], conn=conn)
 
         cur.execute(
@@ -2065,6 +2161,9 @@ def public_cancel(
         cur.close()
         conn.close()
 
+    for plan in plans:
+        link_sessions.forget_ticket_sessions(plan["ticket_id"])
+
     payload = {
         "cancelled_ticket_ids": [plan["ticket_id"] for plan in plans],
         "amount_delta": round(delta, 2),
@@ -2072,7 +2171,7 @@ def public_cancel(
         "new_amount_due": new_amount_due,
         "remaining_tickets": remaining_tickets,
     }
-    response = JSONResponse(jsonable_encoder(payload))
+    response = FastJSONResponse(payload)
     if remaining_tickets == 0:
         response.set_cookie(
             _purchase_cookie_name(resolved_purchase_id),
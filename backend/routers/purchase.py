@@ -3,13 +3,16 @@ from typing import List, Literal, Sequence, cast
 import datetime
 
 import logging
-from threading import Lock
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, EmailStr, Field
 
 from ..auth import optional_scope, require_admin_token, require_scope
+from .. import schema
 from ..database import get_connection
-from ..ticket_utils import free_ticket
+from ..ticket_utils import free_tickets
+from ..services import booking
+from ..services import fares
+from ..services import jobs
 from ..services import link_sessions
 from ._ticket_link_helpers import (
     TicketIssueSpec,
@@ -21,34 +24,16 @@ from ._ticket_link_helpers import (
 from ..services import ticket_links
 from ..services import liqpay
 from ..services import telegram
+from ..services import telegram_outbox
 from ..services.access_guard import guard_public_request
-from ..services.email import render_ticket_email, send_ticket_email
+from ..services.mail_queue import enqueue_ticket_emails
 from ..services.ticket_dto import get_ticket_dto
-from ..services.ticket_pdf import render_ticket_pdf
+from ..utils.json_response import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
 ADMIN_PAY_METHOD = "offline"
 
-_action_hint_lock = Lock()
-_pending_sql_hints: List[str] = []
-
-
-def _record_sql_hint(fragment: str) -> None:
-    with _action_hint_lock:
-        _pending_sql_hints.append(fragment)
-
-
-def _flush_sql_hints(cur) -> None:
-    with _action_hint_lock:
-        hints = list(_pending_sql_hints)
-        _pending_sql_hints.clear()
-    if not hints:
-        return
-    if hasattr(cur, "queries") and isinstance(getattr(cur, "queries"), list):
-        for hint in hints:
-            cur.queries.append((hint, None))
-
 router = APIRouter(prefix="/purchase", tags=["purchase"])
 # second router exposing simplified endpoints without the /purchase prefix
 actions_router = APIRouter(tags=["purchase"])
@@ -116,7 +101,6 @@ def _log_action(
         f"/* action:{action} */ INSERT INTO sales (purchase_id, category, amount, actor, method) VALUES (%s,%s,%s,%s,%s)",
         (purchase_id, action, amount, by or "system", method),
     )
-    _record_sql_hint(f"INSERT INTO sales {action}")
 
 
 def _resolve_actor(request: Request) -> tuple[str, str | None]:
@@ -175,23 +159,8 @@ def _validate_purchase_payable(amount_due: float, status: str) -> None:
         raise HTTPException(409, f"Purchase is {normalized_status}")
 
 
-def _purchase_has_column(cur, column_name: str) -> bool:
-    cur.execute(
-        """
-        SELECT 1
-          FROM information_schema.columns
-         WHERE table_schema = 'public'
-           AND table_name = 'purchase'
-           AND column_name = %s
-         LIMIT 1
-        """,
-        (column_name,),
-    )
-    return cur.fetchone() is not None
-
-
 def _save_liqpay_order_id(cur, purchase_id: int, order_id: str) -> None:
-    if not _purchase_has_column(cur, "liqpay_order_id"):
+    if not schema.has_column("purchase", "liqpay_order_id"):
         logger.warning(
             "Skipping LiqPay order_id persistence for purchase=%s because column liqpay_order_id is missing",
             purchase_id,
@@ -204,81 +173,42 @@ def _save_liqpay_order_id(cur, purchase_id: int, order_id: str) -> None:
 
 
 def _queue_ticket_emails(
-    background_tasks: BackgroundTasks,
     tickets: Sequence[TicketLinkResult],
     lang: str | None,
     recipient: str | None,
+    *,
+    conn,
 ) -> None:
-    """Schedule background tasks to send ticket emails for issued links."""
-    if not background_tasks or not tickets or not recipient:
+    """Queue PDF pre-rendering and ticket emails for issued links.
+
+    Runs on the purchase's ``conn`` before it commits, so the outbox rows and
+    jobs exist exactly when the tickets do.
+    """
+    if not tickets or not recipient:
         return
 
-    lang_value = (lang or "bg").lower()
+    items = []
     for ticket in tickets:
         ticket_id = ticket.get("ticket_id") if isinstance(ticket, dict) else None
         deep_link = ticket.get("deep_link") if isinstance(ticket, dict) else None
         if ticket_id is None or not deep_link:
             continue
-        background_tasks.add_task(
-            _send_ticket_email_task,
-            ticket_id,
-            recipient,
-            lang_value,
-            deep_link,
-        )
-
-
-def _send_ticket_email_task(
-    ticket_id: int,
-    recipient: str,
-    lang: str,
-    deep_link: str,
-) -> None:
-    """Background task that renders PDF and sends ticket email."""
-    lang_value = (lang or "bg").lower()
-
-    conn = None
-    cur = None
-    try:
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            _flush_sql_hints(cur)
-        finally:
-            if cur is not None:
-                try:
-                    cur.close()
-                except Exception:
-                    pass
-    except Exception:  # pragma: no cover
-        logger.exception("Failed to acquire database connection for ticket %s", ticket_id)
+        items.append((ticket_id, deep_link))
+    if not items:
         return
 
-    dto = None
-    try:
-        dto = get_ticket_dto(ticket_id, lang_value, conn)
-    except ValueError:
-        logger.warning("Ticket %s not found while preparing email", ticket_id)
-        return
-    except Exception:  # pragma: no cover
-        logger.exception("Failed to load ticket DTO for ticket %s", ticket_id)
-        return
-    finally:
-        if conn is not None:
-            conn.close()
-
-    try:
-        pdf_bytes = render_ticket_pdf(dto, deep_link)
-    except Exception:
-        logger.exception("Failed to render PDF for ticket %s", ticket_id)
-        return
-
-    try:
-        subject, html_body = render_ticket_email(dto, deep_link, lang_value)
-        send_ticket_email(recipient, subject, html_body, pdf_bytes)
-        logger.info("Sent ticket email for ticket %s to %s", ticket_id, recipient)
-    except Exception:
-        logger.exception("Failed to send ticket email for ticket %s", ticket_id)
+    lang_value = (lang or "bg").lower()
+    enqueue_ticket_emails(items, recipient, lang_value, conn=conn)
+    jobs.enqueue_many(
+        "ticket_pdf.prerender",
+        [
+            {"ticket_id": ticket_id, "lang": lang_value, "deep_link": deep_link}
+            for ticket_id, deep_link in items
+        ],
+        priority=jobs.PRIORITY_HIGH,
+        dedup_keys=[f"{ticket_id}:{lang_value}" for ticket_id, _ in items],
+        conn=conn,
+    )
 
 
 _TELEGRAM_EVENT_ICONS = {
@@ -530,14 +460,19 @@ def _capture_purchase_snapshot(conn, purchase_id: int) -> dict | None:
     return snapshot
 
 
-def _send_telegram_event_task(
+def _record_telegram_event(
     purchase_id: int,
     event_type: str,
     snapshot: dict | None = None,
-) -> None:
-    """Background task: build and send a Telegram notification for an event."""
+) -> bool:
+    """Build the Telegram notification for an event and add it to the outbox.
+
+    The outbox worker sends it as part of the chat's next digest.  Returns
+    ``False`` only when the message could not be stored, so the job can be
+    retried.
+    """
     if not telegram.is_enabled():
-        return
+        return True
 
     conn = None
     try:
@@ -545,18 +480,27 @@ def _send_telegram_event_task(
             conn = get_connection()
         except Exception:
             logger.exception("Failed to acquire DB connection for telegram event purchase=%s", purchase_id)
-            return
+            return False
 
         try:
             message = _build_telegram_message(conn, purchase_id, event_type, snapshot)
         except Exception:
             logger.exception("Failed to build telegram message for purchase=%s event=%s", purchase_id, event_type)
-            return
+            return True
 
         if not message:
-            return
+            return True
 
-        telegram.send_message(message)
+        try:
+            telegram_outbox.enqueue(
+                message, purchase_id=purchase_id, event_type=event_type, conn=conn
+            )
+            conn.commit()
+        except Exception:
+            logger.exception("Failed to store telegram event for purchase=%s event=%s", purchase_id, event_type)
+            conn.rollback()
+            return False
+        return True
     finally:
         if conn is not None:
             try:
@@ -566,17 +510,22 @@ def _send_telegram_event_task(
 
 
 def _queue_telegram_event(
-    background_tasks: BackgroundTasks | None,
     purchase_id: int,
     event_type: str,
     snapshot: dict | None = None,
+    *,
+    conn,
 ) -> None:
-    """Schedule a Telegram notification background task for an event."""
-    if not background_tasks or not purchase_id:
+    """Queue a Telegram notification job for an event in the caller's transaction."""
+    if not purchase_id:
         return
     if not telegram.is_enabled():
         return
-    background_tasks.add_task(_send_telegram_event_task, purchase_id, event_type, snapshot)
+    jobs.enqueue(
+        "telegram.purchase_event",
+        {"purchase_id": purchase_id, "event_type": event_type, "snapshot": snapshot},
+        conn=conn,
+    )
 
 
 def _create_purchase(
@@ -597,70 +546,25 @@ def _create_purchase(
         raise HTTPException(400, "Seat numbers and extra baggage count mismatch")
 
     # Determine route/pricelist and ordered stops
-    cur.execute(
-        "SELECT route_id, pricelist_id, date FROM tour WHERE id=%s",
-        (data.tour_id,),
-    )
-    row = cur.fetchone()
-    if not row:
+    route = booking.load_route(cur, data.tour_id)
+    if route.pricelist_id is None:
         raise HTTPException(404, "Tour not found")
+    pricelist_id = route.pricelist_id
+    tour_date = route.date or datetime.date.today()
+    route.positions(data.departure_stop_id, data.arrival_stop_id)
 
-    route_id = row[0]
-    pricelist_id = row[1] if len(row) > 1 else None
-    tour_date = row[2] if len(row) > 2 else None
-
-    if pricelist_id is None:
-        cur.execute("SELECT pricelist_id FROM tour WHERE id=%s", (data.tour_id,))
-        extra = cur.fetchone()
-        if extra and len(extra) >= 1 and extra[0] is not None:
-            pricelist_id = extra[0]
-        else:
-            raise HTTPException(404, "Tour not found")
-    if tour_date is None:
-        tour_date = datetime.date.today()
-
-    cur.execute(
-        'SELECT stop_id, departure_time FROM routestop WHERE route_id=%s ORDER BY "order"',
-        (route_id,),
+    base_price = fares.base_price(
+        cur, pricelist_id, data.departure_stop_id, data.arrival_stop_id
     )
-    stop_rows = cur.fetchall()
-    if not stop_rows:
-        cur.execute(
-            'SELECT stop_id FROM routestop WHERE route_id=%s ORDER BY "order"',
-            (route_id,),
-        )
-        stop_rows = cur.fetchall()
-    stops: List[int] = []
-    stop_departures: dict[int, datetime.time | None] = {}
-    for stop_row in stop_rows or []:
-        stop_id = stop_row[0]
-        stops.append(stop_id)
-        departure_time = stop_row[1] if len(stop_row) > 1 else None
-        stop_departures[stop_id] = departure_time
-    if data.departure_stop_id not in stops or data.arrival_stop_id not in stops:
-        raise HTTPException(400, "Invalid stops for this route")
-    idx_from = stops.index(data.departure_stop_id)
-    idx_to = stops.index(data.arrival_stop_id)
-    if idx_from >= idx_to:
-        raise HTTPException(400, "Arrival must come after departure")
-    segments = [str(i + 1) for i in range(idx_from, idx_to)]
-
-    cur.execute(
-        """
-        SELECT price FROM prices
-         WHERE pricelist_id=%s AND departure_stop_id=%s AND arrival_stop_id=%s
-        """,
-        (pricelist_id, data.departure_stop_id, data.arrival_stop_id),
-    )
-    price_row = cur.fetchone()
-    if not price_row:
+    if base_price is None:
         raise HTTPException(404, "Price not found")
-    base_price = float(price_row[0])
     baggage_count = sum(1 for b in baggage_list if b)
-    total_price = base_price * (
-        data.adult_count + data.discount_count * 0.95 + 0.1 * baggage_count
+    total_price = fares.fare_total(
+        base_price,
+        adults=data.adult_count,
+        discounted=data.discount_count,
+        baggage=baggage_count,
     )
-    total_price = round(total_price, 2)
 
     purchase_id = data.purchase_id
     new_amount = total_price
@@ -707,31 +611,20 @@ def _create_purchase(
             ),
         )
         purchase_id = cur.fetchone()[0]
-        _record_sql_hint("INSERT INTO purchase")
 
-    # 2) create passenger and ticket for each seat
+    # 2) book all seats at once, then create passenger and ticket for each
+    seat_ids = booking.allocate(
+        cur, route, data.seat_nums, data.departure_stop_id, data.arrival_stop_id
+    )
+    departure_dt = combine_departure_datetime(
+        tour_date, route.departures.get(data.departure_stop_id)
+    )
     ticket_specs: List[TicketIssueSpec] = []
 
-    for seat_num, name, bag in zip(data.seat_nums, data.passenger_names, baggage_list):
+    for seat_id, name, bag in zip(seat_ids, data.passenger_names, baggage_list):
         cur.execute("INSERT INTO passenger (name) VALUES (%s) RETURNING id", (name,))
         passenger_id = cur.fetchone()[0]
 
-        cur.execute(
-            "SELECT id, available FROM seat WHERE tour_id=%s AND seat_num=%s",
-            (data.tour_id, seat_num),
-        )
-        seat_row = cur.fetchone()
-        if not seat_row:
-            raise HTTPException(404, "Seat not found")
-        seat_id, avail_str = seat_row
-        if avail_str == "0":
-            raise HTTPException(400, "Seat is blocked")
-
-        # ensure all required segments are free
-        for seg in segments:
-            if seg not in (avail_str or ""):
-                raise HTTPException(400, "Seat is already occupied on this segment")
-
         cur.execute(
             """
             INSERT INTO ticket
@@ -750,10 +643,6 @@ def _create_purchase(
             ),
         )
         ticket_id = cur.fetchone()[0]
-
-        departure_dt = combine_departure_datetime(
-            tour_date, stop_departures.get(data.departure_stop_id)
-        )
         ticket_specs.append(
             cast(
                 TicketIssueSpec,
@@ -765,38 +654,6 @@ def _create_purchase(
             )
         )
 
-        # update seat availability
-        new_avail = "".join(ch for ch in avail_str if ch not in segments)
-        if not new_avail:
-            new_avail = "0"
-        cur.execute("UPDATE seat SET available=%s WHERE id=%s", (new_avail, seat_id))
-
-        # decrement counters in available table for overlapping segments
-        cur.execute(
-            """
-            UPDATE available
-               SET seats = seats - 1
-             WHERE tour_id = %s
-               AND (
-                 (SELECT "order" FROM routestop WHERE route_id=%s AND stop_id=departure_stop_id)
-                 < (SELECT "order" FROM routestop WHERE route_id=%s AND stop_id=%s)
-               )
-               AND (
-                 (SELECT "order" FROM routestop WHERE route_id=%s AND stop_id=arrival_stop_id)
-                 > (SELECT "order" FROM routestop WHERE route_id=%s AND stop_id=%s)
-               );
-            """,
-            (
-                data.tour_id,
-                route_id,
-                route_id,
-                data.arrival_stop_id,
-                route_id,
-                route_id,
-                data.departure_stop_id,
-            ),
-        )
-
     _log_action(
         cur,
         purchase_id,
@@ -809,7 +666,7 @@ def _create_purchase(
 
 
 @router.post("/", response_model=PurchaseOut)
-def create_purchase(data: PurchaseCreate, background_tasks: BackgroundTasks):
+def create_purchase(data: PurchaseCreate):
     conn = get_connection()
     cur = conn.cursor()
     ticket_specs: List[TicketIssueSpec] = []
@@ -818,6 +675,8 @@ def create_purchase(data: PurchaseCreate, background_tasks: BackgroundTasks):
         purchase_id, amount_due, ticket_specs = _create_purchase(cur, data, "reserved")
         tickets = issue_ticket_links(ticket_specs, data.lang, conn=conn)
         tickets = enrich_ticket_link_results(tickets, data.lang, conn=conn)
+        _queue_ticket_emails(tickets, data.lang, data.passenger_email, conn=conn)
+        _queue_telegram_event(purchase_id, "reserved", conn=conn)
         conn.commit()
     except HTTPException:
         conn.rollback()
@@ -829,8 +688,6 @@ def create_purchase(data: PurchaseCreate, background_tasks: BackgroundTasks):
         cur.close()
         conn.close()
 
-    _queue_ticket_emails(background_tasks, tickets, data.lang, data.passenger_email)
-    _queue_telegram_event(background_tasks, purchase_id, "reserved")
     return {"purchase_id": purchase_id, "amount_due": amount_due, "tickets": tickets}
 
 
@@ -838,7 +695,6 @@ def create_purchase(data: PurchaseCreate, background_tasks: BackgroundTasks):
 def pay_purchase(
     purchase_id: int,
     request: Request,
-    background_tasks: BackgroundTasks,
     context=Depends(require_scope("pay")),
 ):
     conn = get_connection()
@@ -871,6 +727,8 @@ def pay_purchase(
         cur.execute("UPDATE purchase SET status='paid', update_at=NOW() WHERE id=%s", (purchase_id,))
         _log_action(cur, purchase_id, "paid", amount_due, by=actor, method=ADMIN_PAY_METHOD)
         tickets = issue_ticket_links(ticket_specs, None, conn=conn)
+        _queue_ticket_emails(tickets, None, customer_email, conn=conn)
+        _queue_telegram_event(purchase_id, "paid", conn=conn)
         conn.commit()
         if jti:
             logger.info("Purchase %s paid with token jti=%s", purchase_id, jti)
@@ -884,15 +742,11 @@ def pay_purchase(
         cur.close()
         conn.close()
 
-    _queue_ticket_emails(background_tasks, tickets, None, customer_email)
-    _queue_telegram_event(background_tasks, purchase_id, "paid")
-
 
 @router.post("/{purchase_id}/cancel", status_code=204)
 def cancel_purchase(
     purchase_id: int,
     request: Request,
-    background_tasks: BackgroundTasks,
     context=Depends(require_scope("cancel")),
 ):
     conn = get_connection()
@@ -914,11 +768,11 @@ def cancel_purchase(
         if telegram.is_enabled():
             telegram_snapshot = _capture_purchase_snapshot(conn, purchase_id)
 
-        for t_id in tickets:
-            free_ticket(cur, t_id)
+        free_tickets(cur, tickets)
 
         cur.execute("UPDATE purchase SET status='cancelled', update_at=NOW() WHERE id=%s", (purchase_id,))
         _log_action(cur, purchase_id, "cancelled", 0, by=actor)
+        _queue_telegram_event(purchase_id, "cancelled", telegram_snapshot, conn=conn)
         conn.commit()
         if jti:
             logger.info("Purchase %s cancelled with token jti=%s", purchase_id, jti)
@@ -932,8 +786,6 @@ def cancel_purchase(
         cur.close()
         conn.close()
 
-    _queue_telegram_event(background_tasks, purchase_id, "cancelled", telegram_snapshot)
-
 
 # --- Public endpoints without /purchase prefix ---
 
@@ -971,7 +823,7 @@ class PurchaseCheckoutOut(PurchaseOut):
     summary="Public booking (step 1 for external sales)",
     description="Creates a reserved purchase. For external sales continue with POST /pay (LiqPay).",
 )
-def book_seat(data: PurchaseCreate, request: Request, background_tasks: BackgroundTasks):
+def book_seat(data: PurchaseCreate, request: Request):
     guard_public_request(request, "book")
 
     conn = get_connection()
@@ -982,6 +834,8 @@ def book_seat(data: PurchaseCreate, request: Request, background_tasks: Backgrou
         purchase_id, amount_due, ticket_specs = _create_purchase(cur, data, "reserved")
         tickets = issue_ticket_links(ticket_specs, data.lang, conn=conn)
         tickets = enrich_ticket_link_results(tickets, data.lang, conn=conn)
+        _queue_ticket_emails(tickets, data.lang, data.passenger_email, conn=conn)
+        _queue_telegram_event(purchase_id, "reserved", conn=conn)
         conn.commit()
     except HTTPException:
         conn.rollback()
@@ -993,10 +847,6 @@ def book_seat(data: PurchaseCreate, request: Request, background_tasks: Backgrou
         cur.close()
         conn.close()
 
-    _queue_ticket_emails(background_tasks, tickets, data.lang, data.passenger_email)
-    _queue_telegram_event(background_tasks, purchase_id, "reserved")
-    from starlette.responses import JSONResponse
-
     from .public import _CSRF_COOKIE_NAME, _generate_csrf_token, _purchase_cookie_name
 
     opaque = tickets[0]["deep_link"].split("/q/")[-1] if tickets else None
@@ -1024,7 +874,7 @@ def book_seat(data: PurchaseCreate, request: Request, background_tasks: Backgrou
     if remaining <= 0:
         remaining = 60
 
-    response = JSONResponse(response_data)
+    response = FastJSONResponse(response_data)
     response.set_cookie(
         _purchase_cookie_name(purchase_id),
         session.jti,
@@ -1052,7 +902,6 @@ def book_seat(data: PurchaseCreate, request: Request, background_tasks: Backgrou
 )
 def purchase_and_pay(
     data: PurchaseCreate,
-    background_tasks: BackgroundTasks,
     _admin=Depends(require_admin_token),
 ):
     conn = get_connection()
@@ -1066,6 +915,8 @@ def purchase_and_pay(
         )
         tickets = issue_ticket_links(ticket_specs, data.lang, conn=conn)
         tickets = enrich_ticket_link_results(tickets, data.lang, conn=conn)
+        _queue_ticket_emails(tickets, data.lang, data.passenger_email, conn=conn)
+        _queue_telegram_event(purchase_id, "paid", conn=conn)
         conn.commit()
     except HTTPException:
         conn.rollback()
@@ -1077,8 +928,6 @@ def purchase_and_pay(
         cur.close()
         conn.close()
 
-    _queue_ticket_emails(background_tasks, tickets, data.lang, data.passenger_email)
-    _queue_telegram_event(background_tasks, purchase_id, "paid")
     return {"purchase_id": purchase_id, "amount_due": amount_due, "tickets": tickets}
 
 
@@ -1094,7 +943,6 @@ def purchase_and_pay(
 def public_purchase_and_pay(
     data: PurchaseCreate,
     request: Request,
-    background_tasks: BackgroundTasks,
 ):
     guard_public_request(request, "purchase")
 
@@ -1118,6 +966,8 @@ def public_purchase_and_pay(
         if order_id:
             _save_liqpay_order_id(cur, purchase_id, str(order_id))
 
+        _queue_ticket_emails(tickets, data.lang, data.passenger_email, conn=conn)
+        _queue_telegram_event(purchase_id, "reserved", conn=conn)
         conn.commit()
     except HTTPException:
         conn.rollback()
@@ -1129,11 +979,6 @@ def public_purchase_and_pay(
         cur.close()
         conn.close()
 
-    _queue_ticket_emails(background_tasks, tickets, data.lang, data.passenger_email)
-    _queue_telegram_event(background_tasks, purchase_id, "reserved")
-
-    from starlette.responses import JSONResponse
-
     from .public import _CSRF_COOKIE_NAME, _generate_csrf_token, _purchase_cookie_name
 
     opaque = tickets[0]["deep_link"].split("/q/")[-1] if tickets else None
@@ -1162,7 +1007,7 @@ def public_purchase_and_pay(
     if remaining <= 0:
         remaining = 60
 
-    response = JSONResponse(response_data)
+    response = FastJSONResponse(response_data)
     response.set_cookie(
         _purchase_cookie_name(purchase_id),
         session.jti,
@@ -1262,7 +1107,6 @@ def pay_booking(
 def cancel_booking(
     purchase_id: int,
     request: Request,
-    background_tasks: BackgroundTasks,
     context=Depends(optional_scope("cancel")),
 ):
     conn = get_connection()
@@ -1279,11 +1123,11 @@ def cancel_booking(
         if telegram.is_enabled():
             telegram_snapshot = _capture_purchase_snapshot(conn, purchase_id)
 
-        for t_id in tickets:
-            free_ticket(cur, t_id)
+        free_tickets(cur, tickets)
 
         cur.execute("UPDATE purchase SET status='cancelled', update_at=NOW() WHERE id=%s", (purchase_id,))
         _log_action(cur, purchase_id, "cancelled", 0, by=actor)
+        _queue_telegram_event(purchase_id, "cancelled", telegram_snapshot, conn=conn)
         conn.commit()
         if jti:
             logger.info("Purchase %s cancelled with token jti=%s", purchase_id, jti)
@@ -1297,14 +1141,11 @@ def cancel_booking(
         cur.close()
         conn.close()
 
-    _queue_telegram_event(background_tasks, purchase_id, "cancelled", telegram_snapshot)
-
 
 @actions_router.post("/refund/{purchase_id}", status_code=204)
 def refund_purchase(
     purchase_id: int,
     request: Request,
-    background_tasks: BackgroundTasks,
     context=Depends(optional_scope("cancel")),
 ):
     conn = get_connection()
@@ -1329,6 +1170,7 @@ def refund_purchase(
 
         cur.execute("UPDATE purchase SET status='refunded', update_at=NOW() WHERE id=%s", (purchase_id,))
         _log_action(cur, purchase_id, "refunded", 0, by=actor)
+        _queue_telegram_event(purchase_id, "refunded", telegram_snapshot, conn=conn)
         conn.commit()
         for token_jti in revoked_jtis:
             ticket_links.revoke(token_jti)
@@ -1343,5 +1185,3 @@ def refund_purchase(
     finally:
         cur.close()
         conn.close()
-
-    _queue_telegram_event(background_tasks, purchase_id, "refunded", telegram_snapshot)
@@ -1,9 +1,14 @@
+import json
+from datetime import date, datetime, timedelta
+
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from ..database import get_connection
 from ..auth import require_admin_token
 from ..models import PurchaseLog
+from ..services.mail_queue import ticket_delivery_status
+from ..utils.json_response import FastJSONResponse
 
 router = APIRouter(
     prefix="/admin/purchases",
@@ -30,13 +35,77 @@ class PurchaseRow(BaseModel):
     status: str
     deadline: Optional[str]
     payment_method: str
+    ticket_count: Optional[int] = None
+
+_LIST_COLUMNS = """
+              pu.id,
+              pu.update_at,
+              pu.customer_name,
+              pu.customer_email,
+              pu.customer_phone,
+              pu.amount_due,
+              pu.status,
+              pu.deadline,
+              pu.payment_method
+"""
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _estimate_total(cur, where_clause: str, params: list) -> Optional[int]:
+    """Return the planner's row estimate for the filtered purchase set.
+
+    ``COUNT(*)`` over the whole history is exactly the cost the paginated list
+    is meant to avoid, so by default the admin UI only gets an estimate taken
+    from ``EXPLAIN``.  It is accurate enough for "~N results" style hints.
+    """
+
+    cur.execute(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM purchase pu {where_clause}",
+        tuple(params),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    plan = row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
 
 @router.get("/", response_model=List[PurchaseRow])
 def list_purchases(
     status: Optional[str] = Query(None, description="Filter by status"),
     email: Optional[str] = Query(None, description="Filter by customer email"),
+    email_prefix: Optional[str] = Query(
+        None, min_length=1, description="Filter by customer email prefix (case-insensitive)"
+    ),
+    phone: Optional[str] = Query(
+        None, min_length=1, description="Filter by customer phone (digits are compared)"
+    ),
     order_id: Optional[int] = Query(None, description="Filter by purchase id"),
+    date_from: Optional[date] = Query(None, description="Last update on or after this date"),
+    date_to: Optional[date] = Query(None, description="Last update on or before this date"),
+    after_id: Optional[int] = Query(
+        None, ge=1, description="Cursor: return purchases with id lower than this value"
+    ),
+    limit: int = Query(100, ge=1, le=500),
+    include_ticket_counts: bool = Query(False, description="Inline ticket count per purchase"),
+    exact_total: bool = Query(False, description="Count matching rows exactly instead of estimating"),
 ):
+    """Return one page of purchases, newest first.
+
+    Pagination is keyset based: pass the ``X-Next-After-Id`` header of the
+    previous page as ``after_id`` to continue.  ``X-Total-Count`` carries the
+    number of purchases matching the filters (an estimate unless
+    ``exact_total`` is set).
+    """
+
     conn = get_connection()
     cur = conn.cursor()
     try:
@@ -48,53 +117,119 @@ def list_purchases(
         if email:
             conditions.append("pu.customer_email = %s")
             params.append(email)
+        if email_prefix:
+            conditions.append("lower(pu.customer_email) LIKE %s")
+            params.append(_escape_like(email_prefix.strip().lower()) + "%")
+        if phone:
+            digits = "".join(ch for ch in phone if ch.isdigit())
+            if digits:
+                conditions.append("regexp_replace(pu.customer_phone, '[^0-9]', '', 'g') = %s")
+                params.append(digits)
         if order_id:
             conditions.append("pu.id = %s")
             params.append(order_id)
+        if date_from:
+            conditions.append("pu.update_at >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("pu.update_at < %s")
+            params.append(date_to + timedelta(days=1))
         where_clause = ""
         if conditions:
             where_clause = "WHERE " + " AND ".join(conditions)
 
-        cur.execute(
-            f"""
-            SELECT
-              pu.id,
-              pu.update_at,
-              pu.customer_name,
-              pu.customer_email,
-              pu.customer_phone,
-              pu.amount_due,
-              pu.status,
-              pu.deadline,
-              pu.payment_method
-            FROM purchase pu
-            {where_clause}
-            ORDER BY pu.id DESC
-            """,
-            tuple(params),
-        )
+        if exact_total:
+            cur.execute(f"SELECT COUNT(*) FROM purchase pu {where_clause}", tuple(params))
+            count_row = cur.fetchone()
+            total = int(count_row[0]) if count_row else None
+        else:
+            total = _estimate_total(cur, where_clause, params)
+
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if after_id is not None:
+            page_conditions.append("pu.id < %s")
+            page_params.append(after_id)
+        page_where = ""
+        if page_conditions:
+            page_where = "WHERE " + " AND ".join(page_conditions)
+        # One extra row tells us whether another page exists.
+        page_params.append(limit + 1)
+
+        if include_ticket_counts:
+            cur.execute(
+                f"""
+                WITH page AS (
+                    SELECT {_LIST_COLUMNS}
+                      FROM purchase pu
+                      {page_where}
+                     ORDER BY pu.id DESC
+                     LIMIT %s
+                )
+                SELECT page.*, COALESCE(tc.ticket_count, 0)
+                  FROM page
+                  LEFT JOIN (
+                        SELECT t.purchase_id, COUNT(*) AS ticket_count
+                          FROM ticket t
+                         WHERE t.purchase_id IN (SELECT id FROM page)
+                         GROUP BY t.purchase_id
+                  ) tc ON tc.purchase_id = page.id
+                 ORDER BY page.id DESC
+                """,
+                tuple(page_params),
+            )
+        else:
+            cur.execute(
+                f"""
+                SELECT {_LIST_COLUMNS}
+                FROM purchase pu
+                {page_where}
+                ORDER BY pu.id DESC
+                LIMIT %s
+                """,
+                tuple(page_params),
+            )
         rows = cur.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         purchases = []
         for r in rows:
-            purchases.append(
-                {
-                    "id": r[0],
-                    "created_at": r[1].isoformat() if r[1] else None,
-                    "customer_name": r[2],
-                    "customer_email": r[3],
-                    "customer_phone": r[4],
-                    "amount_due": float(r[5]) if r[5] is not None else 0.0,
-                    "status": r[6],
-                    "deadline": r[7].isoformat() if r[7] else None,
-                    "payment_method": r[8],
-                }
-            )
-        return purchases
+            item = {
+                "id": r[0],
+                "created_at": r[1].isoformat() if r[1] else None,
+                "customer_name": r[2],
+                "customer_email": r[3],
+                "customer_phone": r[4],
+                "amount_due": float(r[5]) if r[5] is not None else 0.0,
+                "status": r[6],
+                "deadline": r[7].isoformat() if r[7] else None,
+                "payment_method": r[8],
+                "ticket_count": int(r[9] or 0) if include_ticket_counts else None,
+            }
+            purchases.append(item)
+
+        headers = {}
+        if total is not None:
+            headers["X-Total-Count"] = str(total)
+        if has_more and purchases:
+            headers["X-Next-After-Id"] = str(purchases[-1]["id"])
+        # Rows are built in PurchaseRow's shape already; encode them directly
+        # instead of validating up to 500 models per page.
+        return FastJSONResponse(purchases, headers=headers)
     finally:
         cur.close()
         conn.close()
 
 
+class TicketEmailStatus(BaseModel):
+    """Latest ``email_outbox`` state of a ticket's email."""
+
+    status: str
+    attempts: int
+    sent_at: Optional[datetime]
+    last_error: Optional[str]
+
+
 class TicketInfo(BaseModel):
     id: int
     tour_id: int
@@ -109,6 +244,7 @@ class TicketInfo(BaseModel):
     to_stop_name: Optional[str]
     purchase_id: int
     extra_baggage: int
+    email: Optional[TicketEmailStatus] = None
 
 
 class PurchaseInfo(BaseModel):
@@ -155,6 +291,9 @@ def purchase_info(purchase_id: int):
             }
             for r in t_rows
         ]
+        delivery = ticket_delivery_status([t["id"] for t in tickets], conn=conn)
+        for ticket in tickets:
+            ticket["email"] = delivery.get(ticket["id"])
 
         cur.execute(
             """
@@ -4,6 +4,7 @@ from typing import Optional
 from datetime import datetime
 from ..database import get_connection
 from ..auth import require_admin_token
+from ..utils.json_response import FastJSONResponse
 
 router = APIRouter(
     prefix="/report",
@@ -143,7 +144,7 @@ def get_report(filters: ReportFilters):
                 "arrival_stop_name": row[11]
             })
 
-        return {"summary": summary, "tickets": tickets}
+        return FastJSONResponse({"summary": summary, "tickets": tickets})
 
     except Exception as e:
         conn.rollback()
@@ -5,6 +5,7 @@ from typing import Optional, List
 from datetime import time
 from pydantic import BaseModel
 from ..database import get_connection  # Предполагается, что у вас есть database.py
+from ..services import bundle_cache
 
 router = APIRouter(
     prefix="/routes",
@@ -88,6 +89,7 @@ def create_route(route_data: RouteCreate):
     )
     new_id = cur.fetchone()[0]
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     return {"id": new_id, "name": route_data.name, "is_demo": route_data.is_demo}
@@ -109,6 +111,7 @@ def update_route(route_id: int, route_data: RouteCreate):
     )
     row = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if not row:
@@ -127,6 +130,7 @@ def delete_route(route_id: int):
     cur.execute("DELETE FROM route WHERE id=%s RETURNING id;", (route_id,))
     deleted = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if not deleted:
@@ -151,6 +155,7 @@ def update_route_demo(route_id: int, data: RouteDemoUpdate):
     )
     row = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if not row:
@@ -205,6 +210,7 @@ def create_route_stop(route_id: int, data: RouteStopCreate):
     )
     new_id = cur.fetchone()[0]
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     return {
@@ -229,6 +235,7 @@ def update_route_stop(route_id: int, routestop_id: int, data: RouteStopCreate):
     )
     row = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if not row:
@@ -253,6 +260,7 @@ def delete_route_stop(route_id: int, routestop_id: int):
     )
     deleted = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if not deleted:
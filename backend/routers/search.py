@@ -1,9 +1,24 @@
-from fastapi import APIRouter, Query, Response
-from ..database import get_connection
+import hashlib
+import os
+from datetime import date, timedelta
+from typing import List, Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from ..async_database import async_connection
 from ..models import LangRequest
+from ..services import tour_search
+from ..utils.http_cache import etag_matches
+from ..utils.ttl_cache import TTLCache
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+# Calendar windows are cached briefly: seat counts change with every booking.
+CALENDAR_MAX_DAYS = 62
+CALENDAR_CACHE_TTL_SECONDS = float(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "30"))
+_calendar_cache: TTLCache[tuple[bytes, str]] = TTLCache(1024, CALENDAR_CACHE_TTL_SECONDS)
+
 
 class DeparturesRequest(LangRequest):
     seats: int = 1
@@ -14,6 +29,26 @@ class ArrivalsRequest(LangRequest):
     seats: int = 1
 
 
+# Batched tour search limits (legs per request, days per leg window).
+TOUR_SEARCH_MAX_LEGS = 8
+TOUR_SEARCH_MAX_DAYS = 14
+
+
+class TourSearchLeg(BaseModel):
+    departure_stop_id: int
+    arrival_stop_id: int
+    date_from: date
+    date_to: Optional[date] = None
+    # Roundtrip: the same pair searched back (arrival -> departure).
+    return_date_from: Optional[date] = None
+    return_date_to: Optional[date] = None
+
+
+class TourSearchRequest(BaseModel):
+    seats: int = Field(1, ge=1)
+    legs: List[TourSearchLeg] = Field(..., min_length=1)
+
+
 @router.options("/departures")
 def departures_options() -> Response:
     """Preflight request handler for departures search."""
@@ -21,33 +56,32 @@ def departures_options() -> Response:
 
 
 @router.post("/departures")
-def get_departures(data: DeparturesRequest):
+async def get_departures(data: DeparturesRequest):
     lang = data.lang.lower()
     seats = data.seats
     lang_columns = {"en": "stop_en", "bg": "stop_bg", "ua": "stop_ua"}
     col = lang_columns.get(lang, "stop_name")
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT DISTINCT departure_stop_id FROM available WHERE seats >= %s
-        """,
-        (seats,),
-    )
-    departure_stops = [row[0] for row in cur.fetchall()]
-
-    if departure_stops:
-        cur.execute(
-            f"SELECT id, COALESCE({col}, stop_name) FROM stop WHERE id = ANY(%s)",
-            (departure_stops,),
-        )
-        stops_list = [{"id": row[0], "stop_name": row[1]} for row in cur.fetchall()]
-    else:
-        stops_list = []
+    async with async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT DISTINCT departure_stop_id FROM available WHERE seats >= %s
+                """,
+                (seats,),
+            )
+            departure_stops = [row[0] for row in await cur.fetchall()]
+
+            if departure_stops:
+                await cur.execute(
+                    f"SELECT id, COALESCE({col}, stop_name) FROM stop WHERE id = ANY(%s)",
+                    (departure_stops,),
+                )
+                stops_list = [
+                    {"id": row[0], "stop_name": row[1]} for row in await cur.fetchall()
+                ]
+            else:
+                stops_list = []
 
-    cur.close()
-    conn.close()
     return stops_list
 
 
@@ -58,54 +92,165 @@ def arrivals_options() -> Response:
 
 
 @router.post("/arrivals")
-def get_arrivals(data: ArrivalsRequest):
+async def get_arrivals(data: ArrivalsRequest):
     lang = data.lang.lower()
     departure_stop_id = data.departure_stop_id
     seats = data.seats
     lang_columns = {"en": "stop_en", "bg": "stop_bg", "ua": "stop_ua"}
     col = lang_columns.get(lang, "stop_name")
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT DISTINCT arrival_stop_id FROM available
-        WHERE departure_stop_id = %s AND seats >= %s
-        """,
-        (departure_stop_id, seats),
-    )
-    arrival_stops = [row[0] for row in cur.fetchall()]
-
-    if arrival_stops:
-        cur.execute(
-            f"SELECT id, COALESCE({col}, stop_name) FROM stop WHERE id = ANY(%s)",
-            (arrival_stops,),
-        )
-        stops_list = [{"id": row[0], "stop_name": row[1]} for row in cur.fetchall()]
-    else:
-        stops_list = []
+    async with async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT DISTINCT arrival_stop_id FROM available
+                WHERE departure_stop_id = %s AND seats >= %s
+                """,
+                (departure_stop_id, seats),
+            )
+            arrival_stops = [row[0] for row in await cur.fetchall()]
+
+            if arrival_stops:
+                await cur.execute(
+                    f"SELECT id, COALESCE({col}, stop_name) FROM stop WHERE id = ANY(%s)",
+                    (arrival_stops,),
+                )
+                stops_list = [
+                    {"id": row[0], "stop_name": row[1]} for row in await cur.fetchall()
+                ]
+            else:
+                stops_list = []
 
-    cur.close()
-    conn.close()
     return stops_list
 
 @router.get("/dates")
-def get_dates(departure_stop_id: int, arrival_stop_id: int, seats: int = Query(1)):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT DISTINCT t.date
-        FROM tour t
-        JOIN available a ON a.tour_id = t.id
-        WHERE a.departure_stop_id = %s AND a.arrival_stop_id = %s AND a.seats >= %s
-        ORDER BY t.date
-        """,
-        (departure_stop_id, arrival_stop_id, seats),
-    )
-    dates = [row[0] for row in cur.fetchall()]
-
-    cur.close()
-    conn.close()
+async def get_dates(departure_stop_id: int, arrival_stop_id: int, seats: int = Query(1)):
+    async with async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT DISTINCT t.date
+                FROM tour t
+                JOIN available a ON a.tour_id = t.id
+                WHERE a.departure_stop_id = %s AND a.arrival_stop_id = %s AND a.seats >= %s
+                ORDER BY t.date
+                """,
+                (departure_stop_id, arrival_stop_id, seats),
+            )
+            dates = [row[0] for row in await cur.fetchall()]
+
     return dates
+
+
+def _group_by_day(tours: list[dict], start: date, end: date) -> list[dict]:
+    days: dict[date, dict] = {}
+    day = start
+    while day <= end:
+        days[day] = {"date": day.isoformat(), "min_price": None, "tours": []}
+        day += timedelta(days=1)
+    for tour in tours:
+        entry = days[tour["date"]]
+        entry["tours"].append(tour)
+        if entry["min_price"] is None or tour["price"] < entry["min_price"]:
+            entry["min_price"] = tour["price"]
+    return list(days.values())
+
+
+@router.get("/calendar")
+async def get_calendar(
+    request: Request,
+    departure_stop_id: int,
+    arrival_stop_id: int,
+    start: date,
+    end: date,
+    seats: int = Query(1, ge=1),
+):
+    """Tours per day for a date window: times, seats left, price and day minimum.
+
+    The window (at most ``CALENDAR_MAX_DAYS`` days) is one leg of
+    :func:`tour_search.search`; days without tours are included with an
+    empty ``tours`` list.
+    """
+    if end < start:
+        raise HTTPException(400, "end must not be before start")
+    if (end - start).days + 1 > CALENDAR_MAX_DAYS:
+        raise HTTPException(400, f"Window is limited to {CALENDAR_MAX_DAYS} days")
+
+    key = (departure_stop_id, arrival_stop_id, seats, start, end)
+    cached = _calendar_cache.get(key)
+    if cached is None:
+        (tours,) = await tour_search.search(
+            [tour_search.Leg(departure_stop_id, arrival_stop_id, start, end)], seats
+        )
+        days = _group_by_day(tours, start, end)
+        for day in days:
+            day["seats"] = sum(tour["seats"] for tour in day["tours"])
+        body = orjson.dumps(days)
+        cached = (body, f'"c-{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+        _calendar_cache.set(key, cached)
+    body, etag = cached
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(CALENDAR_CACHE_TTL_SECONDS)}",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _search_window(date_from: date, date_to: Optional[date]) -> tuple[date, date]:
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(400, "date_to must not be before date_from")
+    if (date_to - date_from).days + 1 > TOUR_SEARCH_MAX_DAYS:
+        raise HTTPException(400, f"Window is limited to {TOUR_SEARCH_MAX_DAYS} days")
+    return date_from, date_to
+
+
+@router.post("/tours")
+async def search_tour_legs(data: TourSearchRequest) -> Response:
+    """Tours for several legs and date windows, grouped per leg and day.
+
+    Each leg may carry a return window, searched in the opposite direction.
+    All legs are resolved by one query (legs seen in the last few seconds
+    come from the search cache), so the public site no longer needs a call
+    per day and direction.
+    """
+    if len(data.legs) > TOUR_SEARCH_MAX_LEGS:
+        raise HTTPException(400, f"At most {TOUR_SEARCH_MAX_LEGS} legs per request")
+
+    queries: list[tour_search.Leg] = []
+    for leg in data.legs:
+        queries.append(
+            tour_search.Leg(
+                leg.departure_stop_id,
+                leg.arrival_stop_id,
+                *_search_window(leg.date_from, leg.date_to),
+            )
+        )
+        if leg.return_date_from is not None:
+            queries.append(
+                tour_search.Leg(
+                    leg.arrival_stop_id,
+                    leg.departure_stop_id,
+                    *_search_window(leg.return_date_from, leg.return_date_to),
+                )
+            )
+        elif leg.return_date_to is not None:
+            raise HTTPException(400, "return_date_to needs return_date_from")
+
+    results = iter(zip(queries, await tour_search.search(queries, data.seats)))
+    legs = []
+    for leg in data.legs:
+        outbound, tours = next(results)
+        entry = {
+            "departure_stop_id": leg.departure_stop_id,
+            "arrival_stop_id": leg.arrival_stop_id,
+            "outbound": _group_by_day(tours, outbound.date_from, outbound.date_to),
+            "return": None,
+        }
+        if leg.return_date_from is not None:
+            inbound, tours = next(results)
+            entry["return"] = _group_by_day(tours, inbound.date_from, inbound.date_to)
+        legs.append(entry)
+    return Response(content=orjson.dumps({"legs": legs}), media_type="application/json")
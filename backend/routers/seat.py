@@ -5,6 +5,7 @@ from typing import List, Dict, Optional
 from pydantic import BaseModel
 from ..database import get_connection
 from ..auth import require_admin_token
+from ..services.seat_occupancy import SeatOccupancy, span_mask
 from ..ticket_utils import recalc_available
 
 router = APIRouter(prefix="/seat", tags=["seat"])
@@ -53,7 +54,7 @@ def get_seat_layout(
         stops = [r[0] for r in cur.fetchall()]
 
         # 3) если клиентский режим — вычисляем нужные сегменты
-        segments: List[str] = []
+        required = 0
         if not adminMode:
             if departure_stop_id not in stops or arrival_stop_id not in stops:
                 raise HTTPException(400, "Invalid stops for this route")
@@ -62,7 +63,7 @@ def get_seat_layout(
             if idx_from >= idx_to:
                 raise HTTPException(400, "Arrival must come after departure")
             # сегмент i соответствует промежутку stops[i]→stops[i+1], нумеруем с 1
-            segments = [str(i+1) for i in range(idx_from, idx_to)]
+            required = span_mask(idx_from, idx_to)
 
         # 4) забираем все места рейса
         cur.execute(
@@ -82,8 +83,11 @@ def get_seat_layout(
             )
             sold = {r[0] for r in cur.fetchall()}
 
+        # клиент: свободность всех мест на нужных сегментах одной проверкой маски
+        free = SeatOccupancy(seats).free_flags(required) if not adminMode else None
+
         result: List[Dict] = []
-        for seat_id, seat_num, avail_str in seats:
+        for index, (seat_id, seat_num, avail_str) in enumerate(seats):
             status: str
             if adminMode:
                 if seat_num in sold:
@@ -92,9 +96,7 @@ def get_seat_layout(
                     # если строка "0" — полностью заблокировано, иначе — available
                     status = "blocked" if avail_str == "0" else "available"
             else:
-                # клиент: проверяем, что все нужные сегменты есть в available
-                ok = all(seg in (avail_str or "") for seg in segments)
-                status = "available" if ok else "blocked"
+                status = "available" if free[index] else "blocked"
 
             result.append({
                 "seat_id": seat_id,
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from ..database import get_connection
 from ..models import Stop, StopCreate
 from ..auth import require_admin_token
+from ..services import bundle_cache
 
 router = APIRouter(
     prefix="/stops",
@@ -55,6 +56,7 @@ def create_stop(stop_data: StopCreate):
     )
     row = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     return {
@@ -116,6 +118,7 @@ def update_stop(stop_id: int, stop_data: StopCreate):
     )
     updated_row = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if updated_row is None:
@@ -137,6 +140,7 @@ def delete_stop(stop_id: int):
     cur.execute("DELETE FROM stop WHERE id = %s RETURNING id;", (stop_id,))
     deleted_row = cur.fetchone()
     conn.commit()
+    bundle_cache.invalidate()
     cur.close()
     conn.close()
     if deleted_row is None:
@@ -1,6 +1,6 @@
 # backend/app/routers/ticket.py
 
-from typing import Any, Dict, List, Optional, Tuple, cast
+from typing import Any, Dict, List, Optional, cast
 
 from datetime import datetime
 from pathlib import Path
@@ -21,9 +21,10 @@ from ._ticket_link_helpers import (
 from ..services.ticket_dto import get_ticket_dto
 from ..services.ticket_pdf import render_ticket_html, render_ticket_pdf
 from ..services.link_sessions import get_or_create_view_session
+from ..services import booking
 from ..services import ticket_links
 from ..services.access_guard import guard_public_request
-from ..ticket_utils import recalc_available
+from ..services.seat_occupancy import SeatOccupancy
 from ..utils.client_app import get_client_app_base
 
 logger = logging.getLogger(__name__)
@@ -244,50 +245,6 @@ def _resolve_actor(request: Request) -> tuple[str, str | None]:
     return actor, jti
 
 
-def _fetch_route_stops(cur, route_id: int) -> List[int]:
-    cur.execute(
-        'SELECT stop_id FROM routestop WHERE route_id = %s ORDER BY "order"',
-        (route_id,),
-    )
-    rows = cur.fetchall()
-    if not rows:
-        raise HTTPException(400, "Route has no stops configured")
-    return [int(row[0]) for row in rows]
-
-
-def _segments_between(
-    stops: List[int], departure_stop_id: int, arrival_stop_id: int
-) -> Tuple[List[str], List[Tuple[int, int]]]:
-    if departure_stop_id not in stops or arrival_stop_id not in stops:
-        raise HTTPException(400, "Invalid stops for this route")
-    idx_from = stops.index(departure_stop_id)
-    idx_to = stops.index(arrival_stop_id)
-    if idx_from >= idx_to:
-        raise HTTPException(400, "Arrival must come after departure")
-    segment_tokens = [str(i + 1) for i in range(idx_from, idx_to)]
-    segment_pairs = [(stops[i], stops[i + 1]) for i in range(idx_from, idx_to)]
-    return segment_tokens, segment_pairs
-
-
-def _merge_available(avail: Optional[str], segments: List[str]) -> str:
-    base = "" if not avail or avail == "0" else avail
-    merged = sorted(set(base + "".join(segments)), key=int)
-    return "".join(merged) if merged else "0"
-
-
-def _remove_segments(avail: Optional[str], segments: List[str]) -> str:
-    base = "" if not avail or avail == "0" else avail
-    updated = "".join(ch for ch in base if ch not in segments)
-    return updated or "0"
-
-
-def _ensure_segments_available(avail: Optional[str], segments: List[str]) -> None:
-    base = "" if not avail or avail == "0" else avail
-    for seg in segments:
-        if seg not in base:
-            raise HTTPException(409, "Seat is already occupied on the selected segment")
-
-
 def _determine_scopes(context) -> set[str]:
     if getattr(context, "is_admin", False):
         return {"view", "download", "pay", "cancel", "edit", "seat", "reschedule"}
@@ -419,35 +376,20 @@ def update_ticket_details(
             raise HTTPException(404, "Ticket not found")
         passenger_id, seat_id, tour_id, current_dep, current_arr = row
 
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (tour_id,))
-        route_row = cur.fetchone()
-        if not route_row:
-            raise HTTPException(404, "Tour not found")
-        route_id = int(route_row[0])
-        stops = _fetch_route_stops(cur, route_id)
-
         new_dep = data.departure_stop_id or current_dep
         new_arr = data.arrival_stop_id or current_arr
 
         segments_changed = new_dep != current_dep or new_arr != current_arr
         if segments_changed:
-            old_segments, _ = _segments_between(stops, current_dep, current_arr)
-            new_segments, _ = _segments_between(stops, new_dep, new_arr)
-
-            cur.execute(
-                "SELECT available FROM seat WHERE id = %s FOR UPDATE",
-                (seat_id,),
-            )
-            seat_row = cur.fetchone()
-            if not seat_row:
-                raise HTTPException(404, "Seat not found")
-            avail_str = seat_row[0]
-            interim = _merge_available(avail_str, old_segments)
-            _ensure_segments_available(interim, new_segments)
-            final_avail = _remove_segments(interim, new_segments)
-            cur.execute(
-                "UPDATE seat SET available = %s WHERE id = %s",
-                (final_avail, seat_id),
+            route = booking.load_route(cur, tour_id)
+            booking.move(
+                cur,
+                route,
+                seat_id,
+                current_dep,
+                current_arr,
+                target_departure_stop_id=new_dep,
+                target_arrival_stop_id=new_arr,
             )
 
         if data.passenger_name is not None:
@@ -473,9 +415,6 @@ def update_ticket_details(
                 params,
             )
 
-        if segments_changed:
-            recalc_available(cur, tour_id)
-
         conn.commit()
         if jti:
             logger.info("Ticket %s updated with token jti=%s by %s", ticket_id, jti, actor)
@@ -524,56 +463,19 @@ def change_ticket_seat(
             raise HTTPException(404, "Ticket not found")
         current_seat_id, tour_id, dep_id, arr_id = row
 
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (tour_id,))
-        route_row = cur.fetchone()
-        if not route_row:
-            raise HTTPException(404, "Tour not found")
-        stops = _fetch_route_stops(cur, int(route_row[0]))
-        segments, _ = _segments_between(stops, dep_id, arr_id)
-
-        cur.execute(
-            "SELECT available FROM seat WHERE id = %s FOR UPDATE",
-            (current_seat_id,),
+        route = booking.load_route(cur, tour_id)
+        new_seat_id = booking.move(
+            cur, route, current_seat_id, dep_id, arr_id, seat_num=data.seat_num
         )
-        current_seat_row = cur.fetchone()
-        if not current_seat_row:
-            raise HTTPException(404, "Seat not found")
-        current_avail = current_seat_row[0]
-
-        cur.execute(
-            "SELECT id, available FROM seat WHERE tour_id = %s AND seat_num = %s FOR UPDATE",
-            (tour_id, data.seat_num),
-        )
-        new_seat_row = cur.fetchone()
-        if not new_seat_row:
-            raise HTTPException(404, "Seat not found")
-        new_seat_id, new_avail = new_seat_row
-
         if new_seat_id == current_seat_id:
             conn.rollback()
             return _load_ticket_details(ticket_id, request, context)
 
-        if new_avail == "0":
-            raise HTTPException(400, "Seat is blocked")
-        _ensure_segments_available(new_avail, segments)
-
-        released_avail = _merge_available(current_avail, segments)
-        updated_new_avail = _remove_segments(new_avail, segments)
-
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (released_avail, current_seat_id),
-        )
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (updated_new_avail, new_seat_id),
-        )
         cur.execute(
             "UPDATE ticket SET seat_id = %s WHERE id = %s",
             (new_seat_id, ticket_id),
         )
 
-        recalc_available(cur, tour_id)
         conn.commit()
         if jti:
             logger.info(
@@ -628,56 +530,16 @@ def reschedule_ticket(
             raise HTTPException(404, "Ticket not found")
         current_seat_id, current_tour_id, current_dep, current_arr = ticket_row
 
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (current_tour_id,))
-        current_route_row = cur.fetchone()
-        if not current_route_row:
-            raise HTTPException(404, "Tour not found")
-        current_stops = _fetch_route_stops(cur, int(current_route_row[0]))
-        current_segments, _ = _segments_between(
-            current_stops, current_dep, current_arr
-        )
-
-        cur.execute(
-            "SELECT available FROM seat WHERE id = %s FOR UPDATE",
-            (current_seat_id,),
-        )
-        current_seat_row = cur.fetchone()
-        if not current_seat_row:
-            raise HTTPException(404, "Seat not found")
-        current_avail = current_seat_row[0]
-
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (data.tour_id,))
-        target_route_row = cur.fetchone()
-        if not target_route_row:
-            raise HTTPException(404, "Target tour not found")
-        target_stops = _fetch_route_stops(cur, int(target_route_row[0]))
-        target_segments, _ = _segments_between(
-            target_stops, data.departure_stop_id, data.arrival_stop_id
-        )
-
-        cur.execute(
-            "SELECT id, available FROM seat WHERE tour_id = %s AND seat_num = %s FOR UPDATE",
-            (data.tour_id, data.seat_num),
-        )
-        target_seat_row = cur.fetchone()
-        if not target_seat_row:
-            raise HTTPException(404, "Seat not found on target tour")
-        target_seat_id, target_avail = target_seat_row
-        if target_avail == "0":
-            raise HTTPException(400, "Seat is blocked on target tour")
-
-        _ensure_segments_available(target_avail, target_segments)
-
-        released_current_avail = _merge_available(current_avail, current_segments)
-        updated_target_avail = _remove_segments(target_avail, target_segments)
-
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (released_current_avail, current_seat_id),
-        )
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (updated_target_avail, target_seat_id),
+        target_seat_id = booking.move(
+            cur,
+            booking.load_route(cur, current_tour_id),
+            current_seat_id,
+            current_dep,
+            current_arr,
+            target=booking.load_route(cur, data.tour_id, not_found="Target tour not found"),
+            seat_num=data.seat_num,
+            target_departure_stop_id=data.departure_stop_id,
+            target_arrival_stop_id=data.arrival_stop_id,
         )
         cur.execute(
             """
@@ -697,10 +559,6 @@ def reschedule_ticket(
             ),
         )
 
-        recalc_available(cur, current_tour_id)
-        if data.tour_id != current_tour_id:
-            recalc_available(cur, data.tour_id)
-
         conn.commit()
         if jti:
             logger.info(
@@ -754,12 +612,9 @@ def get_ticket_seat_map(
         dep_id = departure_stop_id or ticket_dep
         arr_id = arrival_stop_id or ticket_arr
 
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (tour_id,))
-        route_row = cur.fetchone()
-        if not route_row:
-            raise HTTPException(404, "Tour not found")
-        stops = _fetch_route_stops(cur, int(route_row[0]))
-        segments, segment_pairs = _segments_between(stops, dep_id, arr_id)
+        route = booking.load_route(cur, tour_id)
+        required = route.span(dep_id, arr_id)
+        segment_pairs = route.segment_pairs(dep_id, arr_id)
 
         cur.execute(
             "SELECT id, seat_num, available FROM seat WHERE tour_id = %s ORDER BY seat_num",
@@ -767,10 +622,9 @@ def get_ticket_seat_map(
         )
         seats = cur.fetchall()
 
+        free = SeatOccupancy(seats).free_flags(required)
         seat_list: List[Dict[str, Any]] = []
-        for s_id, seat_num, avail_str in seats:
-            available_segments = "" if not avail_str or avail_str == "0" else avail_str
-            is_available = all(seg in available_segments for seg in segments)
+        for (s_id, seat_num, _avail_str), is_available in zip(seats, free):
             if s_id == seat_id:
                 status = "selected"
             elif is_available:
@@ -804,54 +658,20 @@ def create_ticket(data: TicketCreate):
     cur = conn.cursor()
     ticket_spec: TicketIssueSpec | None = None
     try:
-        # --- 1) Проверяем рейс и получаем route_id ---
-        cur.execute("SELECT route_id, date FROM tour WHERE id = %s", (data.tour_id,))
-        row = cur.fetchone()
-        if not row:
-            raise HTTPException(404, "Tour not found")
-        route_id, tour_date = row
-
-        # --- 2) Ищем место и получаем строку available (строку-сегменты) ---
-        cur.execute(
-            "SELECT id, available FROM seat WHERE tour_id = %s AND seat_num = %s",
-            (data.tour_id, data.seat_num),
-        )
-        seat_row = cur.fetchone()
-        if not seat_row:
-            raise HTTPException(404, "Seat not found")
-        seat_id, avail_str = seat_row
-        if avail_str == "0":
-            raise HTTPException(400, "Seat is blocked")
-
-        # --- 3) Получаем список остановок по порядку для маршрута ---
-        cur.execute(
-            "SELECT stop_id, departure_time FROM routestop WHERE route_id = %s ORDER BY \"order\"",
-            (route_id,),
+        # --- 1) Рейс и остановки, бронируем место (seat.available + available) ---
+        route = booking.load_route(cur, data.tour_id)
+        (seat_id,) = booking.allocate(
+            cur, route, [data.seat_num], data.departure_stop_id, data.arrival_stop_id
         )
-        stop_rows = cur.fetchall()
-        stops = [r[0] for r in stop_rows]
-        stop_departures = {r[0]: r[1] for r in stop_rows}
-        if data.departure_stop_id not in stops or data.arrival_stop_id not in stops:
-            raise HTTPException(400, "Invalid stops for this route")
-        idx_from = stops.index(data.departure_stop_id)
-        idx_to   = stops.index(data.arrival_stop_id)
-        if idx_from >= idx_to:
-            raise HTTPException(400, "Arrival must come after departure")
-
-        # --- 4) Проверяем, что все нужные сегменты свободны в seat.available ---
-        segments = [str(i + 1) for i in range(idx_from, idx_to)]
-        for seg in segments:
-            if seg not in avail_str:
-                raise HTTPException(400, "Seat is already occupied on this segment")
-
-        # --- 5) Создаём запись в passenger ---
+
+        # --- 2) Создаём запись в passenger ---
         cur.execute(
             "INSERT INTO passenger (name) VALUES (%s) RETURNING id",
             (data.passenger_name,),
         )
         passenger_id = cur.fetchone()[0]
 
-        # --- 6) Создаём билет ---
+        # --- 3) Создаём билет ---
         cur.execute(
             """
             INSERT INTO ticket
@@ -871,7 +691,7 @@ def create_ticket(data: TicketCreate):
         )
         ticket_id = cur.fetchone()[0]
         departure_dt = combine_departure_datetime(
-            tour_date, stop_departures.get(data.departure_stop_id)
+            route.date, route.departures.get(data.departure_stop_id)
         )
         ticket_spec = cast(
             TicketIssueSpec,
@@ -882,47 +702,6 @@ def create_ticket(data: TicketCreate):
             },
         )
 
-        # --- 7) Обновляем seat.available, убирая из строки занятые сегменты ---
-        new_avail = "".join(ch for ch in avail_str if ch not in segments)
-        if not new_avail:
-            new_avail = "0"
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (new_avail, seat_id),
-        )
-
-        # --- 8) Единым UPDATE уменьшаем seats в таблице available
-        #     для всех комбинированных поездок, чьи от–до остановки
-        #     пересекаются с купленным отрезком ---
-        cur.execute(
-            """
-            UPDATE available
-               SET seats = seats - 1
-             WHERE tour_id = %s
-               -- позиция начала available < позиция конца билета
-               AND (
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=departure_stop_id)
-                 <
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=%s)
-               )
-               -- позиция конца available > позиция начала билета
-               AND (
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=arrival_stop_id)
-                 >
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=%s)
-               );
-            """,
-            (
-                data.tour_id,
-                route_id, route_id, data.arrival_stop_id,
-                route_id, route_id, data.departure_stop_id,
-            ),
-        )
-
         conn.commit()
 
     except HTTPException:
@@ -1054,65 +833,11 @@ def delete_ticket(ticket_id: int):
             raise HTTPException(404, "Ticket not found")
         tour_id, seat_id, passenger_id, dep_stop, arr_stop = row
 
-        # 2) Получаем route_id
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (tour_id,))
-        rr = cur.fetchone()
-        if not rr:
-            raise HTTPException(500, "Tour not found")
-        route_id = rr[0]
-
-        # 3) Восстанавливаем строку seat.available
-        cur.execute("SELECT available FROM seat WHERE id = %s", (seat_id,))
-        avail_str = cur.fetchone()[0] or ""
-        # находим порядок сегментов, которые нужно вернуть
-        cur.execute(
-            "SELECT \"order\" FROM routestop WHERE route_id=%s AND stop_id=%s",
-            (route_id, dep_stop),
-        )
-        idx_from = cur.fetchone()[0] - 1  # -1, потому что segments считаем от 1
-        cur.execute(
-            "SELECT \"order\" FROM routestop WHERE route_id=%s AND stop_id=%s",
-            (route_id, arr_stop),
-        )
-        idx_to = cur.fetchone()[0] - 1
-        segments = [str(i + 1) for i in range(idx_from, idx_to)]
-
-        merged = sorted(set(list(avail_str) + segments), key=lambda x: int(x))
-        new_avail = "".join(merged) if merged else "0"
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (new_avail, seat_id),
-        )
-
-        # 4) Единым UPDATE возвращаем seats для всех overlapping available
-        cur.execute(
-            """
-            UPDATE available
-               SET seats = seats + 1
-             WHERE tour_id = %s
-               AND (
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=departure_stop_id)
-                 <
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=%s)
-               )
-               AND (
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=arrival_stop_id)
-                 >
-                 (SELECT "order" FROM routestop
-                  WHERE route_id=%s AND stop_id=%s)
-               );
-            """,
-            (
-                tour_id,
-                route_id, route_id, arr_stop,
-                route_id, route_id, dep_stop,
-            ),
-        )
+        # 2) Возвращаем место: seat.available и счётчики available
+        route = booking.load_route(cur, tour_id)
+        booking.release(cur, [(route, seat_id, dep_stop, arr_stop)])
 
-        # 5) Удаляем запись о билете и пассажира
+        # 3) Удаляем запись о билете и пассажира
         cur.execute("DELETE FROM ticket WHERE id = %s", (ticket_id,))
         cur.execute("DELETE FROM passenger WHERE id = %s", (passenger_id,))
 
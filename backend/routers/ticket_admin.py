@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Query, Depends
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from ..database import get_connection
+from ..services import booking
 from ..auth import require_admin_token
 
 router = APIRouter(
@@ -225,9 +226,8 @@ def reassign_ticket_admin(data: TicketReassign):
 def delete_ticket_admin(ticket_id: int):
     """
     Удаляем билет (паспорт остаётся) и возвращаем места:
-      1) восстанавливаем seat.available по сегментам
-      2) увеличиваем seats в таблице available только по сегментам
-      3) удаляем запись ticket
+      1) восстанавливаем seat.available и счётчики available (booking.release)
+      2) удаляем запись ticket
     """
     conn = get_connection()
     cur = conn.cursor()
@@ -243,42 +243,10 @@ def delete_ticket_admin(ticket_id: int):
             raise HTTPException(404, "Ticket not found")
         tour_id, seat_id, dep, arr = row
 
-        # маршрут и остановки
-        cur.execute("SELECT route_id FROM tour WHERE id = %s", (tour_id,))
-        route_id = cur.fetchone()[0]
-        cur.execute("""
-            SELECT stop_id FROM routestop
-            WHERE route_id = %s ORDER BY "order"
-        """, (route_id,))
-        stops = [r[0] for r in cur.fetchall()]
-
-        idx_from = stops.index(dep)
-        idx_to   = stops.index(arr)
-        if idx_from >= idx_to:
-            raise HTTPException(400, "Invalid ticket stops")
-
-        segments = [str(i+1) for i in range(idx_from, idx_to)]
-
-        # вернуть seat.available
-        cur.execute("SELECT available FROM seat WHERE id = %s", (seat_id,))
-        old_avail = cur.fetchone()[0] or ""
-        merged = sorted(set(old_avail + "".join(segments)), key=int)
-        new_avail = "".join(merged) if merged else "0"
-        cur.execute(
-            "UPDATE seat SET available = %s WHERE id = %s",
-            (new_avail, seat_id)
-        )
-
-        # увеличить available.seats по сегментам
-        for i in range(idx_from, idx_to):
-            d, a = stops[i], stops[i+1]
-            cur.execute("""
-                UPDATE available
-                   SET seats = seats + 1
-                 WHERE tour_id = %s
-                   AND departure_stop_id = %s
-                   AND arrival_stop_id   = %s
-            """, (tour_id, d, a))
+        # вернуть seat.available и счётчики available
+        route = booking.load_route(cur, tour_id)
+        route.positions(dep, arr)
+        booking.release(cur, [(route, seat_id, dep, arr)])
 
         # удалить билет
         cur.execute("DELETE FROM ticket WHERE id = %s", (ticket_id,))
@@ -7,6 +7,7 @@ from datetime import date
 from ..database import get_connection
 from ..auth import require_admin_token
 from ..models import BookingTermsEnum
+from ..services import fares, tour_search
 from ..ticket_utils import recalc_available
 
 # Основные административные действия над рейсами требуют токен администратора.
@@ -40,9 +41,33 @@ class TourOut(BaseModel):
         from_attributes = True
 
 
+class TourListItem(TourOut):
+    """Tour row enriched with load figures for the planning screen."""
+
+    seats: int = 0
+    sold_seats: int = 0
+    blocked_seats: int = 0
+    free_seats: int = 0
+    reserved_tickets: int = 0
+    paid_tickets: int = 0
+    revenue: float = 0.0
+
+
 class TourListOut(BaseModel):
-    items: List[TourOut]
-    total: int
+    items: List[TourListItem]
+    next_cursor: Optional[str] = None
+
+
+def _parse_tour_cursor(cursor: str) -> tuple[date, int]:
+    """Decode a ``YYYY-MM-DD:id`` keyset cursor produced by :func:`list_tours`."""
+
+    raw_date, sep, raw_id = cursor.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        return date.fromisoformat(raw_date), int(raw_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
 
 
 @router.get("/", response_model=List[TourOut])
@@ -73,12 +98,21 @@ def get_tours(current_admin: dict = Depends(require_admin_token)):
 def list_tours(
     current_admin: dict = Depends(require_admin_token),
     show_past: bool = Query(False, description="Show past tours instead of upcoming"),
-    page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from next_cursor"),
     date: Optional[date] = None,
     route_id: Optional[int] = None,
     booking_terms: Optional[BookingTermsEnum] = None,
 ):
+    """List tours together with occupancy and revenue per tour.
+
+    Load figures come from one aggregated query over the page's seats and
+    tickets, so the planning screen does not have to open every tour.
+    Revenue is what paid purchases were charged (``purchase.amount_due``),
+    not a recomputation from the current pricelist.  Pages are keyed on
+    ``(date, id)``: pass ``next_cursor`` back as ``cursor`` for the next one.
+    """
+
     conn = get_connection()
     cur = conn.cursor()
     try:
@@ -100,33 +134,118 @@ def list_tours(
             conditions.append("booking_terms = %s")
             params.append(booking_terms)
 
-        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+        if cursor:
+            after_date, after_id = _parse_tour_cursor(cursor)
+            conditions.append("(date, id) > (%s, %s)")
+            params.extend([after_date, after_id])
+        page_where = " WHERE " + " AND ".join(conditions)
+        # One extra row tells whether another page follows.
+        params.extend([page_size + 1, fares.BAGGAGE_MULTIPLIER])
 
-        cur.execute(f"SELECT COUNT(*) FROM tour{where_clause}", tuple(params))
-        total = cur.fetchone()[0]
-
-        query = (
-            "SELECT id, route_id, pricelist_id, date, layout_variant, booking_terms FROM tour"
-            f"{where_clause} ORDER BY date"
+        cur.execute(
+            f"""
+            WITH page AS (
+                SELECT id, route_id, pricelist_id, date, layout_variant, booking_terms, seats
+                  FROM tour{page_where}
+                 ORDER BY date, id
+                 LIMIT %s
+            ),
+            seat_stats AS (
+                SELECT s.tour_id,
+                       COUNT(*) FILTER (
+                           WHERE s.available = '0'
+                             AND NOT EXISTS (SELECT 1 FROM ticket t WHERE t.seat_id = s.id)
+                       ) AS blocked_seats
+                  FROM seat s
+                 WHERE s.tour_id IN (SELECT id FROM page)
+                 GROUP BY s.tour_id
+            ),
+            ticket_stats AS (
+                SELECT t.tour_id,
+                       COUNT(DISTINCT t.seat_id) AS sold_seats,
+                       COUNT(*) FILTER (WHERE pu.status = 'reserved') AS reserved_tickets,
+                       COUNT(*) FILTER (WHERE pu.status = 'paid') AS paid_tickets
+                  FROM ticket t
+                  JOIN page ON page.id = t.tour_id
+                  LEFT JOIN purchase pu ON pu.id = t.purchase_id
+                 GROUP BY t.tour_id
+            ),
+            -- Every ticket of the paid purchases touching the page, weighted
+            -- by its list fare so a purchase spanning several tours (e.g. a
+            -- return trip) splits what was actually charged between them.
+            paid_tickets AS (
+                SELECT t.tour_id, t.purchase_id, pu.amount_due,
+                       COALESCE(pr.price * (1 + %s * COALESCE(t.extra_baggage, 0)), 0)
+                           AS weight
+                  FROM purchase pu
+                  JOIN ticket t ON t.purchase_id = pu.id
+                  JOIN tour tr ON tr.id = t.tour_id
+                  LEFT JOIN prices pr ON pr.pricelist_id = tr.pricelist_id
+                                     AND pr.departure_stop_id = t.departure_stop_id
+                                     AND pr.arrival_stop_id = t.arrival_stop_id
+                 WHERE pu.status = 'paid'
+                   AND pu.id IN (
+                       SELECT t2.purchase_id FROM ticket t2 JOIN page ON page.id = t2.tour_id
+                   )
+            ),
+            revenue_stats AS (
+                SELECT tour_id, SUM(share) AS revenue
+                  FROM (
+                      SELECT tour_id,
+                             COALESCE(amount_due, 0) * CASE
+                                 WHEN SUM(weight) OVER w > 0 THEN weight / SUM(weight) OVER w
+                                 ELSE 1.0 / COUNT(*) OVER w
+                             END AS share
+                        FROM paid_tickets
+                      WINDOW w AS (PARTITION BY purchase_id)
+                  ) shares
+                 WHERE tour_id IN (SELECT id FROM page)
+                 GROUP BY tour_id
+            )
+            SELECT page.id, page.route_id, page.pricelist_id, page.date,
+                   page.layout_variant, page.booking_terms, page.seats,
+                   COALESCE(ts.sold_seats, 0), COALESCE(ss.blocked_seats, 0),
+                   COALESCE(ts.reserved_tickets, 0), COALESCE(ts.paid_tickets, 0),
+                   COALESCE(rs.revenue, 0)
+              FROM page
+              LEFT JOIN seat_stats ss ON ss.tour_id = page.id
+              LEFT JOIN ticket_stats ts ON ts.tour_id = page.id
+              LEFT JOIN revenue_stats rs ON rs.tour_id = page.id
+             ORDER BY page.date, page.id
+            """,
+            tuple(params),
         )
-        query_params = list(params)
-        query += " LIMIT %s OFFSET %s"
-        query_params.extend([page_size, (page - 1) * page_size])
+        rows = cur.fetchall()
+        has_more = len(rows) > page_size
+        items = []
+        for r in rows[:page_size]:
+            seats = int(r[6] or 0)
+            sold = int(r[7])
+            blocked = int(r[8])
+            items.append(
+                {
+                    "id": r[0],
+                    "route_id": r[1],
+                    "pricelist_id": r[2],
+                    "date": r[3],
+                    "layout_variant": r[4],
+                    "booking_terms": r[5],
+                    "seats": seats,
+                    "sold_seats": sold,
+                    "blocked_seats": blocked,
+                    "free_seats": max(seats - sold - blocked, 0),
+                    "reserved_tickets": int(r[9]),
+                    "paid_tickets": int(r[10]),
+                    "revenue": round(float(r[11]), 2),
+                }
+            )
 
-        cur.execute(query, tuple(query_params))
-        items = [
-            {
-                "id": r[0],
-                "route_id": r[1],
-                "pricelist_id": r[2],
-                "date": r[3],
-                "layout_variant": r[4],
-                "booking_terms": r[5],
-            }
-            for r in cur.fetchall()
-        ]
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = f"{last['date'].isoformat()}:{last['id']}"
 
-        return {"items": items, "total": total}
+        return {"items": items, "next_cursor": next_cursor}
     finally:
         cur.close()
         conn.close()
@@ -168,9 +287,9 @@ def create_tour(tour: TourCreate, current_admin: dict = Depends(require_admin_to
         if len(stops) < 2:
             raise HTTPException(400, "Route must have at least 2 stops")
 
-        # Формируем все возможные сегменты маршрута (i < j)
+        # Формируем все возможные сегменты маршрута (i < j) с их позициями
         all_segments = [
-            (stops[i], stops[j])
+            (stops[i], stops[j], i, j)
             for i in range(len(stops) - 1)
             for j in range(i + 1, len(stops))
         ]
@@ -185,14 +304,16 @@ def create_tour(tour: TourCreate, current_admin: dict = Depends(require_admin_to
         active_count = len(tour.active_seats)
 
         # Заполняем таблицу available
-        for dep, arr in all_segments:
+        for dep, arr, dep_order, arr_order in all_segments:
             if (dep, arr) in valid_segments:
                 cur.execute(
                     """
-                    INSERT INTO available (tour_id, departure_stop_id, arrival_stop_id, seats)
-                    VALUES (%s, %s, %s, %s)
+                    INSERT INTO available
+                           (tour_id, departure_stop_id, arrival_stop_id, seats,
+                            departure_order, arrival_order)
+                    VALUES (%s, %s, %s, %s, %s, %s)
                     """,
-                    (tour_id, dep, arr, active_count),
+                    (tour_id, dep, arr, active_count, dep_order, arr_order),
                 )
 
         # Создаём записи мест
@@ -365,59 +486,15 @@ def update_tour(
 
 
 @router.get("/search")
-def search_tours(
+async def search_tours(
     departure_stop_id: int,
     arrival_stop_id: int,
     date: date,
     seats: int = 1,
 ):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            SELECT t.id,
-                   t.date,
-                   a.seats,
-                   t.layout_variant,
-                   rs_dep.departure_time,
-                   rs_arr.arrival_time,
-                   p.price
-              FROM tour t
-              JOIN available a ON a.tour_id = t.id
-              JOIN routestop rs_dep ON rs_dep.route_id = t.route_id AND rs_dep.stop_id = %s
-              JOIN routestop rs_arr ON rs_arr.route_id = t.route_id AND rs_arr.stop_id = %s
-              JOIN prices p ON p.pricelist_id = t.pricelist_id
-                             AND p.departure_stop_id = %s
-                             AND p.arrival_stop_id = %s
-             WHERE a.departure_stop_id=%s
-               AND a.arrival_stop_id=%s
-               AND t.date=%s
-               AND a.seats>=%s
-            """,
-            (
-                departure_stop_id,
-                arrival_stop_id,
-                departure_stop_id,
-                arrival_stop_id,
-                departure_stop_id,
-                arrival_stop_id,
-                date,
-                seats,
-            ),
-        )
-        return [
-            {
-                "id": r[0],
-                "date": r[1],
-                "seats": r[2],
-                "layout_variant": r[3],
-                "departure_time": r[4].strftime("%H:%M") if r[4] else None,
-                "arrival_time": r[5].strftime("%H:%M") if r[5] else None,
-                "price": float(r[6]),
-            }
-            for r in cur.fetchall()
-        ]
-    finally:
-        cur.close()
-        conn.close()
+    """Tours for one day; see ``POST /search/tours`` for several days and legs."""
+
+    (tours,) = await tour_search.search(
+        [tour_search.Leg(departure_stop_id, arrival_stop_id, date, date)], seats
+    )
+    return tours
@@ -0,0 +1,167 @@
+"""Schema capability registry.
+
+:func:`backend.database.run_migrations` applies ``db/migrations`` at startup
+and then calls :func:`load`, which reads the catalog once and keeps the
+column sets of the tables the application probes.  Request handlers consult
+the cached flags here instead of querying ``information_schema``.
+
+While the registry is not loaded (database unavailable at import, test
+doubles) column checks are optimistic: the migrations create every column,
+and callers keep their ``UndefinedColumn`` fallbacks, which report a desync
+through :func:`mark_missing` so later requests skip the column directly.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACKED_TABLES = (
+    "purchase",
+    "pricelist",
+    "link_sessions",
+    "ticket_link_tokens",
+    "otp_challenge",
+    "op_token",
+)
+
+LIQPAY_COLUMNS = ("liqpay_order_id", "liqpay_status", "liqpay_payment_id", "liqpay_payload")
+FISCAL_COLUMNS = (
+    "fiscal_status",
+    "checkbox_receipt_id",
+    "checkbox_fiscal_code",
+    "fiscal_last_error",
+    "fiscal_attempts",
+    "fiscalized_at",
+)
+
+_lock = threading.Lock()
+_columns: Optional[Dict[str, FrozenSet[str]]] = None
+_version: Optional[str] = None
+
+
+def load(cur) -> bool:
+    """Read tracked table columns and the schema version using ``cur``.
+
+    Returns ``True`` when the catalog looked real (the ``purchase`` table was
+    found); otherwise the registry stays unloaded.
+    """
+
+    global _columns, _version
+    cur.execute(
+        """
+        SELECT table_name, column_name
+          FROM information_schema.columns
+         WHERE table_schema = current_schema()
+           AND table_name = ANY(%s)
+        """,
+        (list(TRACKED_TABLES),),
+    )
+    collected: Dict[str, set] = {}
+    for table_name, column_name in cur.fetchall() or []:
+        collected.setdefault(str(table_name), set()).add(str(column_name))
+    if "purchase" not in collected:
+        return False
+
+    cur.execute("SELECT version FROM schema_version WHERE id = 1")
+    row = cur.fetchone()
+    with _lock:
+        _columns = {table: frozenset(cols) for table, cols in collected.items()}
+        _version = str(row[0]) if row and row[0] else None
+    logger.info("Schema registry loaded (version=%s)", _version)
+    return True
+
+
+def is_loaded() -> bool:
+    return _columns is not None
+
+
+def version() -> Optional[str]:
+    """Name of the last applied migration, when known."""
+
+    return _version
+
+
+def has_table(table: str) -> bool:
+    columns = _columns
+    if columns is None:
+        return True
+    return table in columns
+
+
+def has_column(table: str, column: str) -> bool:
+    columns = _columns
+    if columns is None:
+        return True
+    return column in columns.get(table, frozenset())
+
+
+def missing_columns(table: str, names: Iterable[str]) -> List[str]:
+    return [name for name in names if not has_column(table, name)]
+
+
+def purchase_has_liqpay_tracking() -> bool:
+    return not missing_columns("purchase", LIQPAY_COLUMNS)
+
+
+def purchase_has_fiscal_columns() -> bool:
+    return not missing_columns("purchase", FISCAL_COLUMNS)
+
+
+def mark_missing(table: str, names: Iterable[str]) -> None:
+    """Record columns found missing at runtime (e.g. after UndefinedColumn)."""
+
+    global _columns
+    drop = set(names)
+    with _lock:
+        if _columns is None:
+            return
+        current = _columns.get(table)
+        if current is None:
+            return
+        _columns = {**_columns, table: frozenset(current - drop)}
+
+
+def mark_present(table: str, names: Iterable[str]) -> None:
+    """Record columns added at runtime (e.g. by an on-demand ALTER TABLE)."""
+
+    global _columns
+    with _lock:
+        if _columns is None:
+            return
+        current = _columns.get(table, frozenset())
+        _columns = {**_columns, table: frozenset(current | set(names))}
+
+
+def override(columns: Optional[Dict[str, Iterable[str]]], schema_version: Optional[str] = None) -> None:
+    """Replace the registry contents (``None`` unloads it).  Used by tests."""
+
+    global _columns, _version
+    with _lock:
+        _columns = (
+            None
+            if columns is None
+            else {table: frozenset(cols) for table, cols in columns.items()}
+        )
+        _version = schema_version
+
+
+__all__ = [
+    "FISCAL_COLUMNS",
+    "LIQPAY_COLUMNS",
+    "TRACKED_TABLES",
+    "has_column",
+    "has_table",
+    "is_loaded",
+    "load",
+    "mark_missing",
+    "mark_present",
+    "missing_columns",
+    "override",
+    "purchase_has_fiscal_columns",
+    "purchase_has_liqpay_tracking",
+    "version",
+]
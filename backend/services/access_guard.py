@@ -3,63 +3,181 @@
 from __future__ import annotations
 
 import logging
+import math
+import os
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
 from threading import Lock
 from typing import Optional
 
 from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
 from ..auth import RequestContext
 
 logger = logging.getLogger("backend.public_access")
 
 
-# Rate limiting parameters (can be monkeypatched in tests)
+# Rate limiting parameters (can be monkeypatched in tests).  Each key gets a
+# token bucket holding RATE_LIMIT_MAX_REQUESTS + RATE_LIMIT_BURST tokens that
+# refills at RATE_LIMIT_MAX_REQUESTS per RATE_LIMIT_WINDOW_SECONDS.
 RATE_LIMIT_MAX_REQUESTS = 10
 RATE_LIMIT_WINDOW_SECONDS = 10
 RATE_LIMIT_BURST = 3
-RATE_LIMIT_DELAY_SECONDS = 0.25
 
+# In-memory store bounds: keys are spread over lock-striped shards, each an
+# LRU capped at RATE_LIMIT_SHARD_CAPACITY entries.
+RATE_LIMIT_SHARDS = 16
+RATE_LIMIT_SHARD_CAPACITY = 4096
 
-@dataclass
-class _RateLimitEntry:
-    count: int
-    window_start: float
+# "memory" (per process) or "postgres" (shared by all workers).
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
 
-
-_rate_limit_store: dict[str, _RateLimitEntry] = {}
-_rate_limit_lock = Lock()
 _time_fn = time.monotonic
-_sleep_fn = time.sleep
+
+
+def _bucket_capacity() -> float:
+    return float(max(1, RATE_LIMIT_MAX_REQUESTS + RATE_LIMIT_BURST))
+
+
+def _refill_rate() -> float:
+    return max(RATE_LIMIT_MAX_REQUESTS, 1) / max(float(RATE_LIMIT_WINDOW_SECONDS), 1e-6)
+
+
+def _retry_after(tokens: float, rate: float) -> float:
+    return max((1.0 - tokens) / rate, 0.0)
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.buckets: "OrderedDict[str, list[float]]" = OrderedDict()
+
+
+class MemoryRateLimiter:
+    """Per-process token buckets in lock-striped, LRU-bounded shards."""
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS) -> None:
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+
+    def acquire(self, key: str) -> float:
+        """Take one token for ``key``; return 0 or the seconds to wait."""
+
+        capacity = _bucket_capacity()
+        rate = _refill_rate()
+        now = _time_fn()
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                bucket = [capacity, now]
+                shard.buckets[key] = bucket
+                while len(shard.buckets) > RATE_LIMIT_SHARD_CAPACITY:
+                    shard.buckets.popitem(last=False)
+            else:
+                shard.buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return _retry_after(bucket[0], rate)
+
+    def reset(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+
+    def __len__(self) -> int:
+        return sum(len(shard.buckets) for shard in self._shards)
+
+
+class PostgresRateLimiter:
+    """Token buckets in the ``rate_limit_bucket`` table (migration 027).
+
+    A single UPSERT refills and consumes atomically, so the limit holds across
+    uvicorn workers and hosts.  Database errors fall back to ``fallback``.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, fallback: MemoryRateLimiter) -> None:
+        self._fallback = fallback
+        self._calls = 0
+        self._calls_lock = Lock()
+
+    def acquire(self, key: str) -> float:
+        from ..database import get_connection
+
+        capacity = _bucket_capacity()
+        rate = _refill_rate()
+        try:
+            conn = get_connection()
+        except Exception:
+            logger.warning("Rate limit store unavailable; using in-process limiter", exc_info=True)
+            return self._fallback.acquire(key)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO rate_limit_bucket AS b (key, tokens, allowed, updated_at)
+                    VALUES (%(key)s, %(capacity)s - 1, TRUE, clock_timestamp())
+                    ON CONFLICT (key) DO UPDATE
+                       SET tokens = CASE
+                               WHEN LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s) >= 1
+                               THEN LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s) - 1
+                               ELSE LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s)
+                           END,
+                           allowed = LEAST(%(capacity)s, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s) >= 1,
+                           updated_at = clock_timestamp()
+                    RETURNING allowed, tokens
+                    """,
+                    {"key": key, "capacity": capacity, "rate": rate},
+                )
+                allowed, tokens = cur.fetchone()
+                if self._should_prune():
+                    cur.execute(
+                        "DELETE FROM rate_limit_bucket WHERE updated_at < NOW() - make_interval(secs => %s)",
+                        (capacity / rate * 2,),
+                    )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.warning("Rate limit store failed; using in-process limiter", exc_info=True)
+            return self._fallback.acquire(key)
+        finally:
+            conn.close()
+        return 0.0 if allowed else _retry_after(float(tokens), rate)
+
+    def _should_prune(self) -> bool:
+        with self._calls_lock:
+            self._calls += 1
+            return self._calls % self.PRUNE_EVERY == 0
+
+
+_memory_limiter = MemoryRateLimiter()
+_postgres_limiter = PostgresRateLimiter(_memory_limiter)
 
 
 def reset_rate_limit_state() -> None:
     """Clear rate limit counters (useful for tests)."""
 
-    with _rate_limit_lock:
-        _rate_limit_store.clear()
+    _memory_limiter.reset()
 
 
 def _enforce_rate_limit(key: str) -> None:
-    """Check rate limit counters for the provided key."""
-
-    now = _time_fn()
-    with _rate_limit_lock:
-        entry = _rate_limit_store.get(key)
-        if entry and now - entry.window_start <= RATE_LIMIT_WINDOW_SECONDS:
-            entry.count += 1
-        else:
-            entry = _RateLimitEntry(count=1, window_start=now)
-        _rate_limit_store[key] = entry
-        count = entry.count
-
-    if count > RATE_LIMIT_MAX_REQUESTS:
-        delay = RATE_LIMIT_DELAY_SECONDS * min(count - RATE_LIMIT_MAX_REQUESTS, RATE_LIMIT_BURST)
-        if delay > 0:
-            _sleep_fn(delay)
-        if count >= RATE_LIMIT_MAX_REQUESTS + RATE_LIMIT_BURST:
-            raise HTTPException(status_code=429, detail="Too many requests")
+    """Consume a token for ``key`` or reject with 429 and Retry-After."""
+
+    limiter = _postgres_limiter if RATE_LIMIT_BACKEND == "postgres" else _memory_limiter
+    wait = limiter.acquire(key)
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
 
 
 def _extract_ip(request: Request) -> str:
@@ -98,6 +216,7 @@ def guard_public_request(
         rate_key = f"{rate_key}:ticket:{ticket_id}"
     _enforce_rate_limit(f"{scope}:{rate_key}")
 
+    # Sampled via LOG_SAMPLE_RATES=backend.public_access=<rate> (see log_config).
     logger.info(
         "Public access scope=%s ip=%s token=%s ticket_id=%s purchase_id=%s",
         scope,
@@ -105,10 +224,39 @@ def guard_public_request(
         token_id or "-",
         ticket_id,
         purchase_id,
+        extra={
+            "scope": scope,
+            "ip": ip,
+            "token": token_id or "-",
+            "ticket_id": ticket_id,
+            "purchase_id": purchase_id,
+        },
     )
 
 
+async def guard_public_request_async(
+    request: Request,
+    scope: str,
+    *,
+    ticket_id: Optional[int] = None,
+    purchase_id: Optional[int] = None,
+) -> None:
+    """:func:`guard_public_request` for async endpoints.
+
+    The in-memory limiter runs inline; the postgres limiter needs a blocking
+    connection and goes through the threadpool.
+    """
+
+    if RATE_LIMIT_BACKEND == "postgres":
+        await run_in_threadpool(
+            guard_public_request, request, scope, ticket_id=ticket_id, purchase_id=purchase_id
+        )
+        return
+    guard_public_request(request, scope, ticket_id=ticket_id, purchase_id=purchase_id)
+
+
 __all__ = [
     "guard_public_request",
+    "guard_public_request_async",
     "reset_rate_limit_state",
 ]
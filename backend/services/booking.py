@@ -0,0 +1,316 @@
+"""Booking kernel: allocate, release and move seat spans on tours.
+
+Every router that books, cancels or moves tickets goes through here so the
+seat bookkeeping lives in one place:
+
+* ``seat.available`` holds the free segments of a seat (see
+  :mod:`.seat_occupancy`); a booking removes the segments of its span, a
+  release adds them back.
+* ``available.seats`` counts, per (departure, arrival) stop pair of a tour,
+  the seats free on the whole pair.  Instead of the per-ticket correlated
+  ``UPDATE ... (SELECT "order" FROM routestop ...)``, the exact change of every
+  pair is derived from the old and new seat bitsets in Python and applied
+  with one ``UPDATE ... FROM unnest(...)`` keyed on the precomputed
+  ``(tour_id, departure_order, arrival_order)`` route positions.
+
+Each operation, whatever the number of seats, runs three statements: lock
+the seats (one ``SELECT ... FOR UPDATE`` in id order, so concurrent
+bookings cannot deadlock), write the changed seats, and adjust the
+counters.  :func:`load_route` resolves a tour's stops in one more query.
+
+Errors are :class:`BookingError` (an ``HTTPException``) so routers can let
+them propagate like their own validation errors.
+"""
+
+from __future__ import annotations
+
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from .seat_occupancy import availability_mask, available_string, span_mask
+
+
+class BookingError(HTTPException):
+    """A seat operation that cannot be carried out."""
+
+
+class SeatNotFound(BookingError):
+    def __init__(self, detail: str = "Seat not found") -> None:
+        super().__init__(404, detail)
+
+
+class SeatBlocked(BookingError):
+    def __init__(self, detail: str = "Seat is blocked") -> None:
+        super().__init__(400, detail)
+
+
+class SeatUnavailable(BookingError):
+    def __init__(self, detail: str = "Seat is already occupied on the selected segment") -> None:
+        super().__init__(409, detail)
+
+
+@dataclass(frozen=True)
+class TourRoute:
+    """A tour with its route's stops in order."""
+
+    tour_id: int
+    route_id: int
+    pricelist_id: Optional[int]
+    date: Optional[datetime.date]
+    stops: Tuple[int, ...]
+    departures: Mapping[int, Optional[datetime.time]]
+
+    def positions(self, departure_stop_id: int, arrival_stop_id: int) -> Tuple[int, int]:
+        if departure_stop_id not in self.stops or arrival_stop_id not in self.stops:
+            raise BookingError(400, "Invalid stops for this route")
+        idx_from = self.stops.index(departure_stop_id)
+        idx_to = self.stops.index(arrival_stop_id)
+        if idx_from >= idx_to:
+            raise BookingError(400, "Arrival must come after departure")
+        return idx_from, idx_to
+
+    def span(self, departure_stop_id: int, arrival_stop_id: int) -> int:
+        """Segment bitset between two stops of the route."""
+
+        return span_mask(*self.positions(departure_stop_id, arrival_stop_id))
+
+    def segment_pairs(self, departure_stop_id: int, arrival_stop_id: int) -> List[Tuple[int, int]]:
+        idx_from, idx_to = self.positions(departure_stop_id, arrival_stop_id)
+        return [(self.stops[i], self.stops[i + 1]) for i in range(idx_from, idx_to)]
+
+    def position_pairs(self) -> List[Tuple[int, int, int]]:
+        """Every ``(departure_order, arrival_order, span)`` the ``available`` table can hold."""
+
+        return [
+            (i, j, span_mask(i, j))
+            for i in range(len(self.stops))
+            for j in range(i + 1, len(self.stops))
+        ]
+
+
+def load_route(cur, tour_id: int, *, not_found: str = "Tour not found") -> TourRoute:
+    """Load a tour and its ordered stops in one query."""
+
+    cur.execute(
+        """
+        SELECT t.route_id, t.pricelist_id, t.date, rs.stop_id, rs.departure_time
+          FROM tour t
+          LEFT JOIN routestop rs ON rs.route_id = t.route_id
+         WHERE t.id = %s
+         ORDER BY rs."order"
+        """,
+        (tour_id,),
+    )
+    rows = cur.fetchall()
+    if not rows:
+        raise BookingError(404, not_found)
+    stops = tuple(int(row[3]) for row in rows if row[3] is not None)
+    if not stops:
+        raise BookingError(400, "Route has no stops configured")
+    return TourRoute(
+        tour_id=tour_id,
+        route_id=int(rows[0][0]),
+        pricelist_id=rows[0][1],
+        date=rows[0][2],
+        stops=stops,
+        departures={int(row[3]): row[4] for row in rows if row[3] is not None},
+    )
+
+
+# (tour_id, seat_id or None, seat_num or None, span)
+_Allocation = Tuple[int, Optional[int], Optional[int], int]
+
+
+def _apply(
+    cur,
+    routes: Mapping[int, TourRoute],
+    releases: Sequence[Tuple[int, int]],
+    allocations: Sequence[_Allocation],
+) -> List[int]:
+    """Release ``(seat_id, span)`` pairs, then allocate; returns allocated seat ids."""
+
+    by_seat_num = [(tour_id, seat_num) for tour_id, seat_id, seat_num, _ in allocations if seat_id is None]
+    cur.execute(
+        """
+        SELECT id, tour_id, seat_num, available
+          FROM seat
+         WHERE id = ANY(%s)
+            OR (tour_id, seat_num) IN (SELECT * FROM unnest(%s::int[], %s::int[]))
+         ORDER BY id
+           FOR UPDATE
+        """,
+        (
+            sorted(
+                {seat_id for seat_id, _ in releases}
+                | {seat_id for _, seat_id, _, _ in allocations if seat_id is not None}
+            ),
+            [tour_id for tour_id, _ in by_seat_num],
+            [seat_num for _, seat_num in by_seat_num],
+        ),
+    )
+    seat_tours: Dict[int, int] = {}
+    seat_ids_by_num: Dict[Tuple[int, int], int] = {}
+    blocked: set[int] = set()
+    before: Dict[int, int] = {}
+    for seat_id, tour_id, seat_num, available in cur.fetchall():
+        seat_tours[seat_id] = tour_id
+        seat_ids_by_num[(tour_id, seat_num)] = seat_id
+        before[seat_id] = availability_mask(available)
+        if not available or available == "0":
+            blocked.add(seat_id)
+    masks = dict(before)
+
+    for seat_id, span in releases:
+        if seat_id not in masks:
+            raise SeatNotFound()
+        masks[seat_id] |= span
+        blocked.discard(seat_id)
+
+    allocated: List[int] = []
+    for tour_id, seat_id, seat_num, span in allocations:
+        if seat_id is None:
+            seat_id = seat_ids_by_num.get((tour_id, seat_num))
+        if seat_id is None or seat_id not in masks:
+            raise SeatNotFound()
+        if seat_id in blocked:
+            raise SeatBlocked()
+        if masks[seat_id] & span != span:
+            raise SeatUnavailable()
+        masks[seat_id] &= ~span
+        allocated.append(seat_id)
+
+    changed = sorted(seat_id for seat_id, mask in masks.items() if mask != before[seat_id])
+    if not changed:
+        return allocated
+
+    cur.execute(
+        """
+        UPDATE seat
+           SET available = v.available
+          FROM unnest(%s::int[], %s::text[]) AS v(id, available)
+         WHERE seat.id = v.id
+        """,
+        (changed, [available_string(masks[seat_id]) for seat_id in changed]),
+    )
+
+    deltas: Dict[Tuple[int, int, int], int] = defaultdict(int)
+    for seat_id in changed:
+        tour_id = seat_tours[seat_id]
+        old, new = before[seat_id], masks[seat_id]
+        for idx_from, idx_to, span in routes[tour_id].position_pairs():
+            if (old ^ new) & span:
+                deltas[(tour_id, idx_from, idx_to)] += (new & span == span) - (old & span == span)
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        keys = sorted(deltas)
+        cur.execute(
+            """
+            UPDATE available a
+               SET seats = a.seats + d.delta
+              FROM unnest(%s::int[], %s::int[], %s::int[], %s::int[])
+                   AS d(tour_id, dep_order, arr_order, delta)
+             WHERE a.tour_id = d.tour_id
+               AND a.departure_order = d.dep_order
+               AND a.arrival_order = d.arr_order
+            """,
+            (
+                [key[0] for key in keys],
+                [key[1] for key in keys],
+                [key[2] for key in keys],
+                [deltas[key] for key in keys],
+            ),
+        )
+    return allocated
+
+
+def allocate(
+    cur,
+    route: TourRoute,
+    seat_nums: Sequence[int],
+    departure_stop_id: int,
+    arrival_stop_id: int,
+) -> List[int]:
+    """Book ``seat_nums`` between two stops; returns their seat ids in order."""
+
+    span = route.span(departure_stop_id, arrival_stop_id)
+    return _apply(
+        cur,
+        {route.tour_id: route},
+        [],
+        [(route.tour_id, None, int(seat_num), span) for seat_num in seat_nums],
+    )
+
+
+def release(cur, holds: Sequence[Tuple[TourRoute, int, int, int]]) -> None:
+    """Free ``(route, seat_id, departure_stop_id, arrival_stop_id)`` holds.
+
+    Holds whose stops are no longer on the route are skipped.
+    """
+
+    routes: Dict[int, TourRoute] = {}
+    releases: List[Tuple[int, int]] = []
+    for route, seat_id, departure_stop_id, arrival_stop_id in holds:
+        try:
+            span = route.span(departure_stop_id, arrival_stop_id)
+        except BookingError:
+            continue
+        routes[route.tour_id] = route
+        releases.append((seat_id, span))
+    if releases:
+        _apply(cur, routes, releases, [])
+
+
+def move(
+    cur,
+    source: TourRoute,
+    seat_id: int,
+    departure_stop_id: int,
+    arrival_stop_id: int,
+    *,
+    target: Optional[TourRoute] = None,
+    seat_num: Optional[int] = None,
+    target_departure_stop_id: Optional[int] = None,
+    target_arrival_stop_id: Optional[int] = None,
+) -> int:
+    """Move a hold to another seat, span and/or tour; returns the new seat id.
+
+    Anything not given stays as it is: ``target`` defaults to ``source``, the
+    seat to ``seat_id`` and the stops to the current ones.  The old span is
+    released before the new one is checked, so a seat can be moved onto a
+    span overlapping its own.
+    """
+
+    target = target or source
+    target_span = target.span(
+        target_departure_stop_id or departure_stop_id,
+        target_arrival_stop_id or arrival_stop_id,
+    )
+    allocation: _Allocation = (
+        (target.tour_id, seat_id, None, target_span)
+        if seat_num is None
+        else (target.tour_id, None, int(seat_num), target_span)
+    )
+    (new_seat_id,) = _apply(
+        cur,
+        {source.tour_id: source, target.tour_id: target},
+        [(seat_id, source.span(departure_stop_id, arrival_stop_id))],
+        [allocation],
+    )
+    return new_seat_id
+
+
+__all__ = [
+    "BookingError",
+    "SeatBlocked",
+    "SeatNotFound",
+    "SeatUnavailable",
+    "TourRoute",
+    "allocate",
+    "load_route",
+    "move",
+    "release",
+]
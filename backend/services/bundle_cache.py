@@ -0,0 +1,93 @@
+"""Pre-serialized responses for the public bundle endpoints.
+
+``/selected_route`` and ``/selected_pricelist`` are requested on every load
+of the public site while their data only changes when an admin edits the
+bundle, a route, a stop or a price.  Responses are cached per endpoint and
+language as orjson bytes with a content ETag.  Admin mutations in this
+process call :func:`invalidate`; other worker processes pick changes up once
+their entries expire (:data:`BUNDLE_CACHE_TTL_SECONDS`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from ..utils.ttl_cache import TTLCache
+
+BUNDLE_CACHE_TTL_SECONDS = float(os.getenv("BUNDLE_CACHE_TTL_SECONDS", "60"))
+BUNDLE_CACHE_SIZE = 64
+# ``max-age`` advertised to browsers and shared caches (CDN, nginx).
+BUNDLE_HTTP_MAX_AGE_SECONDS = int(os.getenv("BUNDLE_HTTP_MAX_AGE_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={BUNDLE_HTTP_MAX_AGE_SECONDS}",
+            "Vary": "Accept-Encoding",
+        }
+
+
+_cache: TTLCache[CachedResponse] = TTLCache(BUNDLE_CACHE_SIZE, BUNDLE_CACHE_TTL_SECONDS)
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def serialize(payload: Any) -> CachedResponse:
+    body = orjson.dumps(payload)
+    digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+    return CachedResponse(body=body, etag=f'"b-{digest}"')
+
+
+async def get_or_build(
+    kind: str,
+    lang: str,
+    build: Callable[[], Awaitable[Any]],
+) -> CachedResponse:
+    """Return the cached response for ``(kind, lang)``, building it if needed.
+
+    ``build`` returns a JSON-compatible payload.  A result built while an
+    invalidation happened is returned but not stored.
+    """
+
+    key = (kind, lang)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    generation = _generation
+    response = serialize(await build())
+    with _generation_lock:
+        if generation == _generation:
+            _cache.set(key, response)
+    return response
+
+
+def invalidate() -> None:
+    """Drop every cached bundle response (call after admin mutations)."""
+
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        _cache.clear()
+
+
+__all__ = [
+    "BUNDLE_CACHE_TTL_SECONDS",
+    "BUNDLE_HTTP_MAX_AGE_SECONDS",
+    "CachedResponse",
+    "get_or_build",
+    "invalidate",
+    "serialize",
+]
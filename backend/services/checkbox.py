@@ -13,13 +13,15 @@ from typing import Any
 
 import httpx
 
+from .. import schema
+from . import fares
+
 logger = logging.getLogger(__name__)
-_uvicorn_error_logger = logging.getLogger("uvicorn.error")
 
 
 def _emit_fiscal_log(message: str, *args: Any) -> None:
+    """Emit fiscalization-critical logs (WARNING, so never sampled away)."""
     logger.warning(message, *args)
-    _uvicorn_error_logger.warning(message, *args)
 
 # ---------------------------------------------------------------------------
 # Configuration helpers
@@ -118,31 +120,8 @@ def get_cashier_shift_status(token: str) -> tuple[int, dict[str, Any] | None]:
 
 
 
-def _purchase_has_column(cur, column_name: str) -> bool:
-    cur.execute(
-        """
-        SELECT 1
-          FROM information_schema.columns
-         WHERE table_schema = current_schema()
-           AND table_name = 'purchase'
-           AND column_name = %s
-         LIMIT 1
-        """,
-        (column_name,),
-    )
-    return cur.fetchone() is not None
-
-
-def _has_required_fiscal_columns(cur) -> tuple[bool, list[str]]:
-    required = (
-        "fiscal_status",
-        "checkbox_receipt_id",
-        "checkbox_fiscal_code",
-        "fiscal_last_error",
-        "fiscal_attempts",
-        "fiscalized_at",
-    )
-    missing = [name for name in required if not _purchase_has_column(cur, name)]
+def _has_required_fiscal_columns() -> tuple[bool, list[str]]:
+    missing = schema.missing_columns("purchase", schema.FISCAL_COLUMNS)
     return (len(missing) == 0, missing)
 
 # ---------------------------------------------------------------------------
@@ -321,7 +300,7 @@ def _load_purchase_receipt_items(cur, purchase_id: int) -> tuple[list[dict[str,
 
         extra_bag = int(extra_baggage or 0)
         if extra_bag > 0:
-            baggage_price_kopecks = int(round(float(base_price) * 0.1 * extra_bag * 100))
+            baggage_price_kopecks = int(round(fares.baggage_price(base_price, extra_bag) * 100))
             items.append({
                 "good": {
                     "code": f"{_ticket_id}-bag",
@@ -358,7 +337,7 @@ def fiscalize_purchase(purchase_id: int) -> None:
     conn = get_connection()
     cur = conn.cursor()
     try:
-        has_columns, missing_columns = _has_required_fiscal_columns(cur)
+        has_columns, missing_columns = _has_required_fiscal_columns()
         if not has_columns:
             logger.warning(
                 "Skipping fiscalization for purchase=%s; missing columns: %s",
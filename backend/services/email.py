@@ -6,10 +6,13 @@ import logging
 import os
 import smtplib
 import ssl
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from email.message import EmailMessage
 from pathlib import Path
-from typing import Any, Mapping, Tuple
+from typing import Any, Callable, List, Mapping, Sequence, Tuple
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
@@ -163,30 +166,73 @@ def render_ticket_email(
     return subject, html
 
 
-def send_ticket_email(
+@dataclass(frozen=True)
+class SMTPSettings:
+    host: str
+    port: int
+    username: str | None
+    password: str | None
+    from_email: str
+    from_name: str | None
+
+    @property
+    def sender(self) -> str:
+        return f"{self.from_name} <{self.from_email}>" if self.from_name else self.from_email
+
+
+def load_smtp_settings() -> SMTPSettings:
+    """Read SMTP settings from the environment.
+
+    Raises :class:`EmailConfigurationError` when a required variable is unset.
+    """
+
+    host = _get_env("SMTP_HOST")
+    port_raw = _get_env("SMTP_PORT")
+    username = _get_env("SMTP_USERNAME", required=False)
+    password = _get_env("SMTP_PASSWORD", required=False)
+    from_email = _get_env("SMTP_FROM")
+    from_name = _get_env("SMTP_FROM_NAME", required=False)
+    return SMTPSettings(
+        host=host,
+        port=int(port_raw) if port_raw else 587,
+        username=username,
+        password=password,
+        from_email=from_email,
+        from_name=from_name,
+    )
+
+
+def open_smtp(settings: SMTPSettings) -> smtplib.SMTP:
+    """Open an SMTP session: TLS (implicit on port 465, STARTTLS otherwise) and login."""
+
+    context = ssl.create_default_context()
+    if settings.port == 465:
+        server = smtplib.SMTP_SSL(settings.host, settings.port, timeout=30, context=context)
+    else:
+        server = smtplib.SMTP(settings.host, settings.port, timeout=30)
+    try:
+        if settings.port != 465:
+            server.starttls(context=context)
+        if settings.username and settings.password:
+            server.login(settings.username, settings.password)
+    except BaseException:
+        server.close()
+        raise
+    return server
+
+
+def build_ticket_message(
+    settings: SMTPSettings,
     to: str,
     subject: str,
     html_body: str,
     pdf_bytes: bytes | None,
-) -> None:
-    """Send a ticket email with the provided HTML body and PDF attachment."""
-
-    try:
-        host = _get_env("SMTP_HOST")
-        port_raw = _get_env("SMTP_PORT")
-        username = _get_env("SMTP_USERNAME", required=False)
-        password = _get_env("SMTP_PASSWORD", required=False)
-        from_email = _get_env("SMTP_FROM")
-        from_name = _get_env("SMTP_FROM_NAME", required=False)
-    except EmailConfigurationError:
-        logger.info("Skipping ticket email delivery because SMTP is not configured")
-        return
-
-    port = int(port_raw) if port_raw else 587
+) -> EmailMessage:
+    """Build the ticket email with the HTML body and the PDF attached."""
 
     message = EmailMessage()
     message["Subject"] = subject
-    message["From"] = f"{from_name} <{from_email}>" if from_name else from_email
+    message["From"] = settings.sender
     message["To"] = to
     message.set_content(
         "This email requires an HTML-compatible client to display the ticket."
@@ -204,28 +250,180 @@ def send_ticket_email(
             subtype="pdf",
             filename=filename,
         )
+    return message
 
-    context = ssl.create_default_context()
-    use_ssl = port == 465
 
-    if use_ssl:
-        smtp_cls = smtplib.SMTP_SSL
-        smtp_kwargs = {"context": context}
-    else:
-        smtp_cls = smtplib.SMTP
-        smtp_kwargs = {}
+def send_ticket_email(
+    to: str,
+    subject: str,
+    html_body: str,
+    pdf_bytes: bytes | None,
+) -> None:
+    """Send a ticket email with the provided HTML body and PDF attachment.
+
+    Opens a dedicated SMTP session; bulk delivery goes through
+    :mod:`backend.services.mail_queue` instead.
+    """
 
     try:
-        with smtp_cls(host, port, timeout=30, **smtp_kwargs) as server:
-            if not use_ssl:
-                server.starttls(context=context)
-            if username and password:
-                server.login(username, password)
+        settings = load_smtp_settings()
+    except EmailConfigurationError:
+        logger.info("Skipping ticket email delivery because SMTP is not configured")
+        return
+
+    message = build_ticket_message(settings, to, subject, html_body, pdf_bytes)
+    try:
+        server = open_smtp(settings)
+        with server:
             server.send_message(message)
     except (smtplib.SMTPException, OSError) as exc:
         logger.warning("Failed to send ticket email to %s: %s", to, exc)
 
 
+class SMTPPool:
+    """Authenticated SMTP sessions kept open between sends.
+
+    Up to ``size`` sessions are open at once; callers beyond that wait.  A
+    session is replaced after ``max_messages`` sends, after ``max_idle``
+    seconds unused (servers drop idle clients), when the settings change, or
+    when it fails with a connection error.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        *,
+        max_messages: int = 100,
+        max_idle: float = 60.0,
+        opener: Callable[[SMTPSettings], smtplib.SMTP] = open_smtp,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_messages = max_messages
+        self.max_idle = max_idle
+        self._opener = opener
+        self._idle: List[_PooledSession] = []
+        self._open = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self, settings: SMTPSettings) -> "_PooledSession":
+        with self._cond:
+            while True:
+                while self._idle:
+                    session = self._idle.pop()
+                    if session.reusable(settings, self.max_messages, self.max_idle):
+                        return session
+                    self._open -= 1
+                    session.close()
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                self._cond.wait()
+        try:
+            return _PooledSession(settings, self._opener(settings))
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, session: "_PooledSession", broken: bool) -> None:
+        with self._cond:
+            if broken:
+                self._open -= 1
+            else:
+                session.last_used = time.monotonic()
+                self._idle.append(session)
+            self._cond.notify()
+        if broken:
+            session.close()
+
+    def send_many(
+        self,
+        settings: SMTPSettings,
+        messages: Sequence[EmailMessage],
+    ) -> List[Exception | None]:
+        """Send ``messages`` over one pooled session.
+
+        Returns one entry per message: ``None`` when it was accepted, the
+        exception otherwise.  A dropped connection is reopened once and the
+        remaining messages continue on the new session.
+        """
+
+        results: List[Exception | None] = []
+        session = self._acquire(settings)
+        broken = False
+        try:
+            for message in messages:
+                for attempt in (1, 2):
+                    try:
+                        session.server.send_message(message)
+                        session.sent += 1
+                        results.append(None)
+                        break
+                    except smtplib.SMTPServerDisconnected as exc:
+                        self._release(session, broken=True)
+                        session = None
+                        if attempt == 2:
+                            results.append(exc)
+                            break
+                        try:
+                            session = self._acquire(settings)
+                        except (smtplib.SMTPException, OSError) as open_exc:
+                            results.append(open_exc)
+                            break
+                    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as exc:
+                        # Rejected by the server (recipient, size, ...);
+                        # the session itself is still usable.
+                        results.append(exc)
+                        break
+                    except (smtplib.SMTPException, OSError) as exc:
+                        broken = True
+                        results.append(exc)
+                        break
+                if session is None or broken:
+                    break
+        finally:
+            if session is not None:
+                self._release(session, broken)
+        # Messages not attempted after a broken session share its error.
+        error = next((r for r in reversed(results) if r is not None), None)
+        results.extend([error] * (len(messages) - len(results)))
+        return results
+
+    def close(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for session in idle:
+            session.close()
+
+
+class _PooledSession:
+    __slots__ = ("settings", "server", "sent", "last_used")
+
+    def __init__(self, settings: SMTPSettings, server: smtplib.SMTP) -> None:
+        self.settings = settings
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def reusable(self, settings: SMTPSettings, max_messages: int, max_idle: float) -> bool:
+        return (
+            self.settings == settings
+            and self.sent < max_messages
+            and time.monotonic() - self.last_used < max_idle
+        )
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
 def send_otp_email(to: str, code: str, lang: str | None = None) -> None:
     """Send a lightweight OTP message to the passenger email."""
 
@@ -272,6 +470,11 @@ def send_otp_email(to: str, code: str, lang: str | None = None) -> None:
 
 __all__ = [
     "EmailConfigurationError",
+    "SMTPPool",
+    "SMTPSettings",
+    "build_ticket_message",
+    "load_smtp_settings",
+    "open_smtp",
     "render_ticket_email",
     "send_ticket_email",
     "send_otp_email",
@@ -0,0 +1,234 @@
+"""Fare engine: pricelists as in-memory matrices plus the fare rules.
+
+A pricelist is loaded with one query into a dense ``n x n`` matrix with one
+slot per stop id, so pricing a segment is two dict lookups and an array read.
+For a route the matrix is projected once onto the route's stop order
+(:meth:`FareMatrix.for_route`), and :func:`quote_many` prices many
+``(departure, arrival, passengers)`` requests against that projection in one
+pass.  Matrices are cached per pricelist; :func:`invalidate` is called by
+``routers/prices.py`` and ``routers/pricelist.py`` after writes, and the TTL
+bounds staleness for writes made by other processes.  A pair missing from the
+matrix falls back to a point lookup, so newly added prices are never reported
+as missing.
+
+Fare rules live here as well: discounted passengers pay
+:data:`DISCOUNT_MULTIPLIER` of the base price and each extra baggage piece
+costs :data:`BAGGAGE_MULTIPLIER` of it.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.ttl_cache import TTLCache
+
+DISCOUNT_MULTIPLIER = 0.95
+BAGGAGE_MULTIPLIER = 0.1
+
+MATRIX_CACHE_TTL_SECONDS = float(os.getenv("FARE_MATRIX_TTL_SECONDS", "300"))
+MATRIX_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class FareRequest:
+    departure_stop_id: int
+    arrival_stop_id: int
+    adults: int = 1
+    discounted: int = 0
+    baggage: int = 0
+
+
+class FareMatrix:
+    """Base prices of one pricelist, one matrix slot per stop id."""
+
+    __slots__ = ("pricelist_id", "slots", "_prices", "_size", "_routes")
+
+    def __init__(
+        self,
+        pricelist_id: int,
+        rows: Iterable[Tuple[int, int, object]],
+    ) -> None:
+        rows = [(int(dep), int(arr), price) for dep, arr, price in rows if price is not None]
+        stop_ids = sorted({dep for dep, _arr, _p in rows} | {arr for _dep, arr, _p in rows})
+        self.pricelist_id = pricelist_id
+        self.slots: Dict[int, int] = {stop_id: idx for idx, stop_id in enumerate(stop_ids)}
+        self._size = len(stop_ids)
+        self._prices = array("d", [math.nan]) * (self._size * self._size)
+        for dep, arr, price in rows:
+            self._prices[self.slots[dep] * self._size + self.slots[arr]] = float(price)
+        self._routes: Dict[Tuple[int, ...], RouteFares] = {}
+
+    def __len__(self) -> int:
+        return sum(1 for value in self._prices if not math.isnan(value))
+
+    def price(self, departure_stop_id: int, arrival_stop_id: int) -> Optional[float]:
+        dep = self.slots.get(departure_stop_id)
+        arr = self.slots.get(arrival_stop_id)
+        if dep is None or arr is None:
+            return None
+        value = self._prices[dep * self._size + arr]
+        return None if math.isnan(value) else value
+
+    def for_route(self, stops: Sequence[int]) -> "RouteFares":
+        """The matrix projected onto ``stops`` (a route's stops in order)."""
+
+        key = tuple(int(stop_id) for stop_id in stops)
+        route = self._routes.get(key)
+        if route is None:
+            route = RouteFares(self, key)
+            self._routes[key] = route
+        return route
+
+
+class RouteFares:
+    """Base prices of one pricelist indexed by a route's stop positions."""
+
+    __slots__ = ("pricelist_id", "stops", "positions", "_prices", "_size")
+
+    def __init__(self, matrix: FareMatrix, stops: Tuple[int, ...]) -> None:
+        self.pricelist_id = matrix.pricelist_id
+        self.stops = stops
+        self.positions: Dict[int, int] = {stop_id: idx for idx, stop_id in enumerate(stops)}
+        self._size = len(stops)
+        self._prices = array(
+            "d",
+            (
+                math.nan if price is None else price
+                for price in (matrix.price(dep, arr) for dep in stops for arr in stops)
+            ),
+        )
+
+    def prices(self, pairs: Sequence[Tuple[int, int]]) -> List[Optional[float]]:
+        """Base prices for many ``(departure, arrival)`` stop ids at once."""
+
+        positions, size, matrix = self.positions, self._size, self._prices
+        result: List[Optional[float]] = []
+        for dep_id, arr_id in pairs:
+            dep = positions.get(dep_id)
+            arr = positions.get(arr_id)
+            value = matrix[dep * size + arr] if dep is not None and arr is not None else math.nan
+            result.append(None if math.isnan(value) else value)
+        return result
+
+
+_matrices: TTLCache[FareMatrix] = TTLCache(MATRIX_CACHE_SIZE, MATRIX_CACHE_TTL_SECONDS)
+
+
+def load_matrix(cur, pricelist_id: int) -> FareMatrix:
+    cur.execute(
+        """
+        SELECT departure_stop_id, arrival_stop_id, price
+          FROM prices
+         WHERE pricelist_id = %s
+        """,
+        (pricelist_id,),
+    )
+    return FareMatrix(pricelist_id, cur.fetchall() or [])
+
+
+def get_matrix(cur, pricelist_id: int) -> FareMatrix:
+    matrix = _matrices.get(pricelist_id)
+    if matrix is None:
+        matrix = load_matrix(cur, pricelist_id)
+        _matrices.set(pricelist_id, matrix)
+    return matrix
+
+
+def invalidate(pricelist_id: int | None = None) -> None:
+    """Forget cached matrices (all of them when ``pricelist_id`` is None)."""
+
+    if pricelist_id is None:
+        _matrices.clear()
+    else:
+        _matrices.pop(pricelist_id)
+
+
+def base_price(
+    cur, pricelist_id: int, departure_stop_id: int, arrival_stop_id: int
+) -> Optional[float]:
+    """Base price of a segment, or ``None`` when the pricelist lacks it."""
+
+    price = get_matrix(cur, pricelist_id).price(departure_stop_id, arrival_stop_id)
+    if price is not None:
+        return price
+    cur.execute(
+        """
+        SELECT price FROM prices
+         WHERE pricelist_id=%s AND departure_stop_id=%s AND arrival_stop_id=%s
+        """,
+        (pricelist_id, departure_stop_id, arrival_stop_id),
+    )
+    row = cur.fetchone()
+    if not row or row[0] is None:
+        return None
+    # A price added after the matrix was loaded: reload it next time.
+    invalidate(pricelist_id)
+    return float(row[0])
+
+
+def baggage_price(base: float, pieces: int) -> float:
+    return float(base) * BAGGAGE_MULTIPLIER * int(pieces or 0)
+
+
+def ticket_value(base: float, baggage: int = 0, *, discounted: bool = False) -> float:
+    """Price of one ticket with ``baggage`` extra pieces."""
+
+    fare = float(base) * (DISCOUNT_MULTIPLIER if discounted else 1.0)
+    return round(fare + baggage_price(base, baggage), 2)
+
+
+def fare_total(base: float, *, adults: int, discounted: int = 0, baggage: int = 0) -> float:
+    """Total for a group travelling on the same segment."""
+
+    return round(
+        float(base) * (adults + discounted * DISCOUNT_MULTIPLIER + BAGGAGE_MULTIPLIER * baggage),
+        2,
+    )
+
+
+def quote_many(
+    cur, pricelist_id: int, stops: Sequence[int], requests: Sequence[FareRequest]
+) -> List[Optional[float]]:
+    """Totals for many requests on one route (``None`` = no price).
+
+    ``stops`` are the route's stops in order; a request whose stops are not
+    both on the route gets ``None``.
+    """
+
+    route = get_matrix(cur, pricelist_id).for_route(stops)
+    bases = route.prices([(r.departure_stop_id, r.arrival_stop_id) for r in requests])
+    totals: List[Optional[float]] = []
+    for base, r in zip(bases, requests):
+        if (
+            base is None
+            and r.departure_stop_id in route.positions
+            and r.arrival_stop_id in route.positions
+        ):
+            base = base_price(cur, pricelist_id, r.departure_stop_id, r.arrival_stop_id)
+        totals.append(
+            None
+            if base is None
+            else fare_total(base, adults=r.adults, discounted=r.discounted, baggage=r.baggage)
+        )
+    return totals
+
+
+__all__ = [
+    "BAGGAGE_MULTIPLIER",
+    "DISCOUNT_MULTIPLIER",
+    "FareMatrix",
+    "FareRequest",
+    "RouteFares",
+    "base_price",
+    "baggage_price",
+    "fare_total",
+    "get_matrix",
+    "invalidate",
+    "load_matrix",
+    "quote_many",
+    "ticket_value",
+]
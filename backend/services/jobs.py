@@ -0,0 +1,371 @@
+"""Durable background job queue backed by ``job_queue``.
+
+Request handlers call :func:`enqueue` instead of FastAPI ``BackgroundTasks``;
+the work then survives restarts and runs in the worker process
+(``python -m backend.worker``) rather than next to live requests.  Workers
+claim due jobs in priority order with ``FOR UPDATE SKIP LOCKED`` and take a
+lease (``locked_until``) so a crashed worker's jobs become claimable again.
+Handlers run outside any transaction.  A job is deleted when its handler
+returns; failures are retried with exponential backoff and, after
+``max_attempts`` or a :class:`JobRejected`, moved to ``job_dead_letter``.
+
+Handlers are registered per kind with :func:`handler`; see
+``backend/job_handlers.py``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
+
+from ..database import get_connection
+from ..log_config import get_request_id, request_context
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first.
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 50
+PRIORITY_LOW = 90
+
+# Worker tunables (can be monkeypatched in tests)
+MAX_ATTEMPTS = 8
+BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+RETRY_BASE_SECONDS = 15
+RETRY_MAX_SECONDS = 3600
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Payload key carrying the enqueuing request's id (see backend.log_config).
+REQUEST_ID_KEY = "_request_id"
+
+_handlers: Dict[str, Callable[["Job"], None]] = {}
+_wakeup = threading.Event()
+
+
+class JobRejected(Exception):
+    """Raised by a handler when a job can never succeed (no retry)."""
+
+
+@dataclass(frozen=True)
+class Job:
+    id: int
+    kind: str
+    payload: Mapping[str, Any]
+    priority: int
+    attempts: int
+    max_attempts: int
+
+
+def handler(kind: str) -> Callable[[Callable[[Job], None]], Callable[[Job], None]]:
+    """Register the function handling jobs of ``kind``."""
+
+    def decorator(func: Callable[[Job], None]) -> Callable[[Job], None]:
+        _handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def _with_request_id(payload: Mapping[str, Any] | None) -> dict:
+    """Copy ``payload``, remembering the enqueuing request for log correlation."""
+
+    data = dict(payload or {})
+    request_id = get_request_id()
+    if request_id is not None:
+        data.setdefault(REQUEST_ID_KEY, request_id)
+    return data
+
+
+def enqueue(
+    kind: str,
+    payload: Mapping[str, Any] | None = None,
+    *,
+    priority: int = PRIORITY_NORMAL,
+    delay_seconds: float = 0,
+    max_attempts: int | None = None,
+    dedup_key: str | None = None,
+    conn=None,
+) -> Optional[int]:
+    """Queue a job; returns its id, or ``None`` when ``dedup_key`` is already queued.
+
+    Pass ``conn`` to enqueue inside the caller's transaction (the job then
+    only becomes visible when the caller commits).
+    """
+
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO job_queue (kind, payload, priority, max_attempts, run_at, dedup_key)
+                VALUES (%s, %s, %s, %s, NOW() + make_interval(secs => %s), %s)
+                ON CONFLICT (kind, dedup_key) WHERE dedup_key IS NOT NULL DO NOTHING
+                RETURNING id
+                """,
+                (
+                    kind,
+                    json.dumps(_with_request_id(payload), default=str),
+                    priority,
+                    max_attempts or MAX_ATTEMPTS,
+                    delay_seconds,
+                    dedup_key,
+                ),
+            )
+            row = cur.fetchone()
+        if owns_connection:
+            connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+
+    if row is not None:
+        _wakeup.set()
+        return int(row[0])
+    return None
+
+
+def enqueue_many(
+    kind: str,
+    payloads: Sequence[Mapping[str, Any]],
+    *,
+    priority: int = PRIORITY_NORMAL,
+    dedup_keys: Sequence[str | None] | None = None,
+    conn=None,
+) -> list[int]:
+    """Queue several jobs of one kind with a single insert; returns the new ids."""
+
+    if not payloads:
+        return []
+    keys = list(dedup_keys) if dedup_keys is not None else [None] * len(payloads)
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO job_queue (kind, payload, priority, max_attempts, dedup_key)
+                SELECT %s, p.payload::jsonb, %s, %s, p.dedup_key
+                  FROM unnest(%s::text[], %s::text[]) AS p(payload, dedup_key)
+                ON CONFLICT (kind, dedup_key) WHERE dedup_key IS NOT NULL DO NOTHING
+                RETURNING id
+                """,
+                (
+                    kind,
+                    priority,
+                    MAX_ATTEMPTS,
+                    [json.dumps(_with_request_id(payload), default=str) for payload in payloads],
+                    keys,
+                ),
+            )
+            ids = [int(row[0]) for row in cur.fetchall()]
+        if owns_connection:
+            connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+
+    if ids:
+        _wakeup.set()
+    return ids
+
+
+def _claim(cur, limit: int, kinds: Sequence[str] | None) -> list[Job]:
+    cur.execute(
+        """
+        UPDATE job_queue q
+           SET attempts = q.attempts + 1,
+               locked_until = NOW() + make_interval(secs => %s),
+               locked_by = %s
+          FROM (
+                SELECT id FROM job_queue
+                 WHERE run_at <= NOW()
+                   AND (locked_until IS NULL OR locked_until < NOW())
+                   AND (%s::text[] IS NULL OR kind = ANY(%s::text[]))
+                 ORDER BY priority, run_at, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+               ) due
+         WHERE q.id = due.id
+        RETURNING q.id, q.kind, q.payload, q.priority, q.attempts, q.max_attempts
+        """,
+        (LEASE_SECONDS, WORKER_ID, kinds, kinds, limit),
+    )
+    jobs = []
+    for row in cur.fetchall():
+        payload = row[2]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        jobs.append(
+            Job(
+                id=int(row[0]),
+                kind=row[1],
+                payload=payload or {},
+                priority=int(row[3]),
+                attempts=int(row[4]),
+                max_attempts=int(row[5]),
+            )
+        )
+    jobs.sort(key=lambda job: (job.priority, job.id))
+    return jobs
+
+
+def _retry_delay(attempts: int) -> int:
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def _complete(cur, job: Job) -> None:
+    cur.execute("DELETE FROM job_queue WHERE id = %s", (job.id,))
+
+
+def _dead_letter(cur, job: Job, error: str) -> None:
+    logger.warning(
+        "Job %s kind=%s moved to dead letter after %s attempt(s): %s",
+        job.id,
+        job.kind,
+        job.attempts,
+        error,
+    )
+    cur.execute(
+        """
+        WITH moved AS (
+            DELETE FROM job_queue WHERE id = %s
+            RETURNING id, kind, payload, priority, attempts, created_at
+        )
+        INSERT INTO job_dead_letter (id, kind, payload, priority, attempts, last_error, created_at)
+        SELECT id, kind, payload, priority, attempts, %s, created_at FROM moved
+        ON CONFLICT (id) DO NOTHING
+        """,
+        (job.id, error[:1000]),
+    )
+
+
+def _retry(cur, job: Job, error: str) -> None:
+    cur.execute(
+        """
+        UPDATE job_queue
+           SET locked_until = NULL, locked_by = NULL, last_error = %s,
+               run_at = NOW() + make_interval(secs => %s)
+         WHERE id = %s
+        """,
+        (error[:1000], _retry_delay(job.attempts), job.id),
+    )
+
+
+def _run(job: Job) -> tuple[str, str | None]:
+    func = _handlers.get(job.kind)
+    if func is None:
+        return "dead", f"no handler registered for {job.kind!r}"
+    # Log under the id of the request that queued the job.
+    with request_context(job.payload.get(REQUEST_ID_KEY) or f"job-{job.id}"):
+        try:
+            func(job)
+        except JobRejected as exc:
+            return "dead", str(exc) or "rejected"
+        except Exception as exc:
+            logger.exception("Job %s kind=%s failed (attempt %s)", job.id, job.kind, job.attempts)
+            error = f"{type(exc).__name__}: {exc}"
+            return ("dead" if job.attempts >= job.max_attempts else "retry"), error
+    return "done", None
+
+
+def process_pending(*, limit: int | None = None, kinds: Sequence[str] | None = None) -> int:
+    """Run up to ``limit`` due jobs; returns how many were claimed.
+
+    The claim is committed before any handler runs so slow handlers never
+    hold row locks; each outcome is committed as soon as it is known.
+    """
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            jobs = _claim(cur, limit or BATCH_SIZE, list(kinds) if kinds else None)
+        conn.commit()
+        for job in jobs:
+            outcome, error = _run(job)
+            with conn.cursor() as cur:
+                if outcome == "done":
+                    _complete(cur, job)
+                elif outcome == "retry":
+                    _retry(cur, job, error or "")
+                else:
+                    _dead_letter(cur, job, error or "")
+            conn.commit()
+        return len(jobs)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def requeue_dead(job_id: int, *, conn=None) -> Optional[int]:
+    """Move a dead-lettered job back to the queue with fresh attempts."""
+
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                WITH revived AS (
+                    DELETE FROM job_dead_letter WHERE id = %s
+                    RETURNING kind, payload, priority
+                )
+                INSERT INTO job_queue (kind, payload, priority, max_attempts)
+                SELECT kind, payload, priority, %s FROM revived
+                RETURNING id
+                """,
+                (job_id, MAX_ATTEMPTS),
+            )
+            row = cur.fetchone()
+        if owns_connection:
+            connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+    if row is not None:
+        _wakeup.set()
+        return int(row[0])
+    return None
+
+
+def run_worker(
+    *,
+    kinds: Sequence[str] | None = None,
+    stop: threading.Event | None = None,
+) -> None:
+    """Run jobs until ``stop`` is set; wakes early when this process enqueues."""
+
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        _wakeup.wait(POLL_INTERVAL_SECONDS)
+        _wakeup.clear()
+        try:
+            while not stop.is_set() and process_pending(kinds=kinds) >= BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("Job worker iteration failed")
+
+
+__all__ = [
+    "Job",
+    "JobRejected",
+    "PRIORITY_HIGH",
+    "PRIORITY_LOW",
+    "PRIORITY_NORMAL",
+    "enqueue",
+    "enqueue_many",
+    "handler",
+    "process_pending",
+    "requeue_dead",
+    "run_worker",
+]
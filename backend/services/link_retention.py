@@ -0,0 +1,201 @@
+"""Retention for ``link_sessions`` and ``ticket_link_tokens``.
+
+Every ticket issuance and re-issue adds rows to both tables and nothing
+removed them, so lookups and revocations worked over an ever-growing heap.
+:func:`run_once` deletes rows that expired or were revoked more than the
+grace period ago, in small committed batches.  With ``LINK_RETENTION_ARCHIVE``
+the rows are moved to ``*_archive`` tables instead; with
+``LINK_RETENTION_DRY_RUN`` eligible rows are only counted.  ``backend.worker``
+calls :func:`run_once` every :data:`INTERVAL_SECONDS`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from ..database import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+GRACE_DAYS = int(os.getenv("LINK_RETENTION_GRACE_DAYS", "30"))
+BATCH_SIZE = int(os.getenv("LINK_RETENTION_BATCH_SIZE", "500"))
+MAX_BATCHES_PER_RUN = 200
+BATCH_PAUSE_SECONDS = 0.05
+INTERVAL_SECONDS = int(os.getenv("LINK_RETENTION_INTERVAL_SECONDS", "3600"))
+DRY_RUN = _env_flag("LINK_RETENTION_DRY_RUN")
+ARCHIVE = _env_flag("LINK_RETENTION_ARCHIVE")
+
+
+@dataclass(frozen=True)
+class _Policy:
+    table: str
+    key: str
+    expires: str
+    revoked: str
+
+
+POLICIES = (
+    _Policy("link_sessions", "jti", "exp", "revoked"),
+    _Policy("ticket_link_tokens", "jti", "expires_at", "revoked_at"),
+)
+
+
+@dataclass
+class TableStats:
+    eligible: int = 0
+    deleted: int = 0
+    archived: int = 0
+    batches: int = 0
+
+
+@dataclass
+class RunStats:
+    started_at: datetime
+    dry_run: bool
+    archive: bool
+    duration_seconds: float = 0.0
+    tables: Dict[str, TableStats] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+_metrics_lock = threading.Lock()
+_last_run: Optional[RunStats] = None
+_totals: Dict[str, int] = {"runs": 0, "failures": 0, "deleted": 0, "archived": 0}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _eligible_clause(policy: _Policy) -> str:
+    return f"({policy.expires} < %s OR {policy.revoked} < %s)"
+
+
+def _count_eligible(cur, policy: _Policy, cutoff: datetime) -> int:
+    cur.execute(
+        f"SELECT COUNT(*) FROM {policy.table} WHERE {_eligible_clause(policy)}",
+        (cutoff, cutoff),
+    )
+    row = cur.fetchone()
+    return int(row[0]) if row and row[0] else 0
+
+
+def _purge_batch(cur, policy: _Policy, cutoff: datetime, limit: int, archive: bool) -> int:
+    doomed = f"""
+        DELETE FROM {policy.table}
+         WHERE {policy.key} IN (
+               SELECT {policy.key} FROM {policy.table}
+                WHERE {_eligible_clause(policy)}
+                LIMIT %s
+                  FOR UPDATE SKIP LOCKED
+         )
+    """
+    if archive:
+        cur.execute(
+            f"""
+            WITH moved AS ({doomed} RETURNING *)
+            INSERT INTO {policy.table}_archive SELECT * FROM moved
+            """,
+            (cutoff, cutoff, limit),
+        )
+    else:
+        cur.execute(doomed, (cutoff, cutoff, limit))
+    return int(cur.rowcount or 0)
+
+
+def run_once(
+    *,
+    grace: timedelta | None = None,
+    batch_size: int | None = None,
+    dry_run: bool | None = None,
+    archive: bool | None = None,
+) -> RunStats:
+    """Apply the retention policy to every table and record metrics."""
+
+    dry_run = DRY_RUN if dry_run is None else dry_run
+    archive = ARCHIVE if archive is None else archive
+    limit = batch_size or BATCH_SIZE
+    cutoff = _utcnow() - (timedelta(days=GRACE_DAYS) if grace is None else grace)
+    stats = RunStats(started_at=_utcnow(), dry_run=dry_run, archive=archive)
+    started = time.monotonic()
+
+    conn = get_connection()
+    try:
+        for policy in POLICIES:
+            table_stats = stats.tables.setdefault(policy.table, TableStats())
+            if dry_run:
+                with conn.cursor() as cur:
+                    table_stats.eligible = _count_eligible(cur, policy, cutoff)
+                conn.rollback()
+                continue
+            for _ in range(MAX_BATCHES_PER_RUN):
+                with conn.cursor() as cur:
+                    removed = _purge_batch(cur, policy, cutoff, limit, archive)
+                conn.commit()
+                table_stats.batches += 1
+                table_stats.eligible += removed
+                if archive:
+                    table_stats.archived += removed
+                else:
+                    table_stats.deleted += removed
+                if removed < limit:
+                    break
+                time.sleep(BATCH_PAUSE_SECONDS)
+    except Exception as exc:
+        conn.rollback()
+        stats.error = str(exc)
+        raise
+    finally:
+        conn.close()
+        stats.duration_seconds = round(time.monotonic() - started, 3)
+        _record(stats)
+
+    return stats
+
+
+def _record(stats: RunStats) -> None:
+    global _last_run
+    with _metrics_lock:
+        _last_run = stats
+        _totals["runs"] += 1
+        if stats.error:
+            _totals["failures"] += 1
+        for table_stats in stats.tables.values():
+            _totals["deleted"] += table_stats.deleted
+            _totals["archived"] += table_stats.archived
+    logger.info(
+        "Link retention run: dry_run=%s archive=%s duration=%.3fs tables=%s error=%s",
+        stats.dry_run,
+        stats.archive,
+        stats.duration_seconds,
+        {name: asdict(t) for name, t in stats.tables.items()},
+        stats.error,
+    )
+
+
+def metrics() -> Dict[str, object]:
+    """Cumulative counters and the last run, as plain data."""
+
+    with _metrics_lock:
+        last = asdict(_last_run) if _last_run is not None else None
+        return {**_totals, "last_run": last}
+
+
+__all__ = [
+    "POLICIES",
+    "RunStats",
+    "TableStats",
+    "metrics",
+    "run_once",
+]
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import logging
 import os
 import secrets
 import threading
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
-from typing import Iterable, Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
+from starlette.concurrency import run_in_threadpool
+
+from .. import schema
 from ..database import get_connection
+from ..utils.ttl_cache import TTLCache
 
 _DEFAULT_TTL_DAYS = 7
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(frozen=True)
 class LinkSession:
@@ -28,11 +36,41 @@ class LinkSession:
 _SCHEMA_READY = False
 _SCHEMA_LOCK = threading.Lock()
 
+# Active sessions by jti.  Revocations issued by this process drop entries
+# right away; revocations from other processes are honoured once the entry
+# expires, so the TTL bounds the revocation lag.
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("LINK_AUTH_CACHE_TTL_SECONDS", "30"))
+SESSION_CACHE_SIZE = 4096
+_session_cache: TTLCache[LinkSession] = TTLCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS)
+
+# ``used`` timestamps are buffered and written in one UPDATE per flush.
+USAGE_FLUSH_INTERVAL_SECONDS = 5.0
+USAGE_FLUSH_BATCH = 200
+_pending_usage: dict[str, datetime] = {}
+_usage_lock = threading.Lock()
+_last_usage_flush = time.monotonic()
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+_CURRENT_COLUMNS = frozenset(
+    {"jti", "ticket_id", "purchase_id", "scope", "exp", "redeemed", "used", "revoked", "created_at"}
+)
+_LEGACY_COLUMNS = frozenset({"id", "expires_at", "revoked_at", "opaque", "token"})
+
+
+def _registry_has_current_layout() -> bool:
+    """True when the startup schema registry already saw the current table."""
+
+    if not schema.is_loaded() or not schema.has_table("link_sessions"):
+        return False
+    return all(schema.has_column("link_sessions", c) for c in _CURRENT_COLUMNS) and not any(
+        schema.has_column("link_sessions", c) for c in _LEGACY_COLUMNS
+    )
+
+
 def _ensure_schema(connection) -> None:
     """Ensure the ``link_sessions`` table exists and is up to date."""
 
@@ -40,6 +78,10 @@ def _ensure_schema(connection) -> None:
     if _SCHEMA_READY:
         return
 
+    if _registry_has_current_layout():
+        _SCHEMA_READY = True
+        return
+
     with _SCHEMA_LOCK:
         if _SCHEMA_READY:
             return
@@ -308,37 +350,76 @@ def get_or_create_view_session(
                 pass
 
 
-def redeem_session(
-    opaque: str,
+def get_or_create_view_sessions(
+    requests: Iterable[Tuple[int, Optional[int], Optional[datetime]]],
     *,
-    scope: str | None = None,
+    lang: str,
+    scopes: Iterable[str] | None = None,
     conn=None,
-) -> Optional[LinkSession]:
+) -> Dict[int, Tuple[str, datetime]]:
+    """Bulk variant of :func:`get_or_create_view_session`.
+
+    ``requests`` holds ``(ticket_id, purchase_id, departure_dt)`` tuples.
+    Active sessions for every ticket are fetched with one query and the
+    missing ones are created with one multi-row INSERT, so issuing links for
+    a whole purchase costs two round trips.  Returns ``{ticket_id: (opaque,
+    exp)}``.
+    """
+
+    pending: Dict[int, Tuple[Optional[int], Optional[datetime]]] = {}
+    for ticket_id, purchase_id, departure_dt in requests:
+        if ticket_id <= 0:
+            raise ValueError("ticket_id must be positive")
+        pending.setdefault(int(ticket_id), (purchase_id, departure_dt))
+    if not pending:
+        return {}
+
     owns_connection = conn is None
     connection = conn or get_connection()
+
     try:
         _ensure_schema(connection)
-        params = [opaque]
-        condition = ""
-        if scope:
-            condition = " AND scope = %s"
-            params.append(scope)
+        sessions: Dict[int, Tuple[str, datetime]] = {}
         with connection.cursor() as cur:
             cur.execute(
-                f"""
-                UPDATE link_sessions
-                   SET redeemed = COALESCE(redeemed, NOW())
-                 WHERE jti = %s{condition}
+                """
+                SELECT DISTINCT ON (ticket_id) ticket_id, jti, exp
+                  FROM link_sessions
+                 WHERE ticket_id = ANY(%s)
+                   AND scope = 'view'
                    AND revoked IS NULL
                    AND exp > NOW()
-                RETURNING jti, ticket_id, purchase_id, scope, exp, redeemed, used, revoked, created_at
+                 ORDER BY ticket_id, exp DESC
                 """,
-                params,
+                (list(pending),),
             )
-            row = cur.fetchone()
+            for ticket_id, jti, exp in cur.fetchall() or []:
+                sessions[int(ticket_id)] = (jti, exp)
+
+            missing = [ticket_id for ticket_id in pending if ticket_id not in sessions]
+            if missing:
+                cur.execute(
+                    """
+                    INSERT INTO link_sessions (jti, ticket_id, purchase_id, scope, exp)
+                    SELECT v.jti, v.ticket_id, v.purchase_id, 'view', v.exp
+                      FROM unnest(%s::text[], %s::int[], %s::int[], %s::timestamptz[])
+                           AS v(jti, ticket_id, purchase_id, exp)
+                    RETURNING ticket_id, jti, exp
+                    """,
+                    (
+                        [_generate_opaque() for _ in missing],
+                        missing,
+                        [pending[ticket_id][0] for ticket_id in missing],
+                        [_compute_expiration(pending[ticket_id][1]) for ticket_id in missing],
+                    ),
+                )
+                for ticket_id, jti, exp in cur.fetchall() or []:
+                    sessions[int(ticket_id)] = (jti, exp)
+                if any(ticket_id not in sessions for ticket_id in missing):
+                    raise RuntimeError("Failed to create link session")
         if owns_connection:
             connection.commit()
-        return _row_to_session(row) if row else None
+        return sessions
     finally:
         if owns_connection:
             try:
@@ -347,15 +428,15 @@ def redeem_session(
                 pass
 
 
-def get_session(
+def redeem_session(
     opaque: str,
     *,
     scope: str | None = None,
-    require_redeemed: bool = False,
     conn=None,
 ) -> Optional[LinkSession]:
     owns_connection = conn is None
     connection = conn or get_connection()
+    generation = _session_cache.generation
     try:
         _ensure_schema(connection)
         params = [opaque]
@@ -366,21 +447,25 @@ def get_session(
         with connection.cursor() as cur:
             cur.execute(
                 f"""
-                SELECT jti, ticket_id, purchase_id, scope, exp, redeemed, used, revoked, created_at
-                  FROM link_sessions
+                UPDATE link_sessions
+                   SET redeemed = COALESCE(redeemed, NOW())
                  WHERE jti = %s{condition}
                    AND revoked IS NULL
+                   AND exp > NOW()
+                RETURNING jti, ticket_id, purchase_id, scope, exp, redeemed, used, revoked, created_at
                 """,
                 params,
             )
             row = cur.fetchone()
+        if owns_connection:
+            connection.commit()
         if not row:
             return None
         session = _row_to_session(row)
-        if session.exp <= _utcnow():
-            return None
-        if require_redeemed and session.redeemed is None:
-            return None
+        if owns_connection:
+            # A caller's transaction may still roll back; only committed
+            # redemptions are cached.
+            _session_cache.set(session.jti, session, generation=generation)
         return session
     finally:
         if owns_connection:
@@ -390,37 +475,196 @@ def get_session(
                 pass
 
 
+_SESSION_SELECT = """
+SELECT jti, ticket_id, purchase_id, scope, exp, redeemed, used, revoked, created_at
+  FROM link_sessions
+ WHERE jti = %s
+   AND revoked IS NULL
+"""
+
+
+def _load_session(connection, opaque: str) -> Optional[LinkSession]:
+    _ensure_schema(connection)
+    with connection.cursor() as cur:
+        cur.execute(_SESSION_SELECT, (opaque,))
+        row = cur.fetchone()
+    return _row_to_session(row) if row else None
+
+
+def _check_session(
+    session: LinkSession, scope: str | None, require_redeemed: bool
+) -> Optional[LinkSession]:
+    if scope and session.scope != scope:
+        return None
+    if session.exp <= _utcnow():
+        return None
+    if require_redeemed and session.redeemed is None:
+        return None
+    return session
+
+
+def get_session(
+    opaque: str,
+    *,
+    scope: str | None = None,
+    require_redeemed: bool = False,
+    conn=None,
+) -> Optional[LinkSession]:
+    session = _session_cache.get(opaque)
+    if session is None:
+        generation = _session_cache.generation
+        owns_connection = conn is None
+        connection = conn or get_connection()
+        try:
+            session = _load_session(connection, opaque)
+        finally:
+            if owns_connection:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+        if session is None:
+            return None
+        if session.redeemed is not None:
+            # Unredeemed sessions may be redeemed by another process.
+            _session_cache.set(opaque, session, generation=generation)
+
+    return _check_session(session, scope, require_redeemed)
+
+
+async def get_session_async(
+    opaque: str,
+    *,
+    scope: str | None = None,
+    require_redeemed: bool = False,
+    conn,
+) -> Optional[LinkSession]:
+    """Awaitable :func:`get_session` on an ``async_connection``.
+
+    Until the table layout is known to be current the lookup goes through
+    :func:`get_session` in the threadpool, which may still have to run DDL.
+    """
+
+    session = _session_cache.get(opaque)
+    if session is None:
+        if not (_SCHEMA_READY or _registry_has_current_layout()):
+            return await run_in_threadpool(
+                get_session, opaque, scope=scope, require_redeemed=require_redeemed
+            )
+        generation = _session_cache.generation
+        async with conn.cursor() as cur:
+            await cur.execute(_SESSION_SELECT, (opaque,))
+            row = await cur.fetchone()
+        if row is None:
+            return None
+        session = _row_to_session(row)
+        if session.redeemed is not None:
+            _session_cache.set(opaque, session, generation=generation)
+
+    return _check_session(session, scope, require_redeemed)
+
+
+def _buffer_usage(session: LinkSession) -> tuple[LinkSession, bool]:
+    """Buffer the ``used`` timestamp; the flag tells whether a flush is due."""
+
+    now = _utcnow()
+    with _usage_lock:
+        _pending_usage[session.jti] = now
+        due = (
+            len(_pending_usage) >= USAGE_FLUSH_BATCH
+            or time.monotonic() - _last_usage_flush >= USAGE_FLUSH_INTERVAL_SECONDS
+        )
+    return replace(session, used=now), due
+
+
 def touch_session_usage(
     opaque: str,
     *,
     scope: str | None = None,
     conn=None,
 ) -> Optional[LinkSession]:
+    """Record that the session was used.
+
+    The timestamp is buffered and persisted by :func:`flush_session_usage`,
+    either once the buffer is large or old enough or from the background
+    flush loop, so a request does not pay for its own UPDATE.
+    """
+
+    session = get_session(opaque, scope=scope, conn=conn)
+    if session is None:
+        return None
+    session, due = _buffer_usage(session)
+    if due:
+        flush_session_usage()
+    return session
+
+
+async def touch_session_usage_async(
+    opaque: str,
+    *,
+    scope: str | None = None,
+    conn,
+) -> Optional[LinkSession]:
+    """Awaitable :func:`touch_session_usage`; a due flush runs in the threadpool."""
+
+    session = await get_session_async(opaque, scope=scope, conn=conn)
+    if session is None:
+        return None
+    session, due = _buffer_usage(session)
+    if due:
+        await run_in_threadpool(flush_session_usage)
+    return session
+
+
+def flush_session_usage(conn=None) -> int:
+    """Write buffered ``used`` timestamps in a single statement.
+
+    Returns the number of sessions submitted.  On failure the timestamps are
+    put back into the buffer so the next flush retries them.
+    """
+
+    global _last_usage_flush
+    with _usage_lock:
+        batch = dict(_pending_usage)
+        _pending_usage.clear()
+        _last_usage_flush = time.monotonic()
+    if not batch:
+        return 0
+
+    jtis = list(batch)
+    used = [batch[jti] for jti in jtis]
     owns_connection = conn is None
-    connection = conn or get_connection()
+    try:
+        connection = conn or get_connection()
+    except Exception:
+        logger.exception("Failed to acquire connection for session usage flush")
+        _requeue_usage(batch)
+        return 0
     try:
         _ensure_schema(connection)
-        params = [opaque]
-        condition = ""
-        if scope:
-            condition = " AND scope = %s"
-            params.append(scope)
         with connection.cursor() as cur:
             cur.execute(
-                f"""
-                UPDATE link_sessions
-                   SET used = NOW()
-                 WHERE jti = %s{condition}
-                   AND revoked IS NULL
-                   AND exp > NOW()
-                RETURNING jti, ticket_id, purchase_id, scope, exp, redeemed, used, revoked, created_at
+                """
+                UPDATE link_sessions AS ls
+                   SET used = GREATEST(COALESCE(ls.used, v.used), v.used)
+                  FROM unnest(%s::text[], %s::timestamptz[]) AS v(jti, used)
+                 WHERE ls.jti = v.jti
+                   AND ls.revoked IS NULL
                 """,
-                params,
+                (jtis, used),
             )
-            row = cur.fetchone()
         if owns_connection:
             connection.commit()
-        return _row_to_session(row) if row else None
+        return len(jtis)
+    except Exception:
+        logger.exception("Failed to flush usage for %d link sessions", len(jtis))
+        if owns_connection:
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+        _requeue_usage(batch)
+        return 0
     finally:
         if owns_connection:
             try:
@@ -429,6 +673,28 @@ def touch_session_usage(
                 pass
 
 
+def _requeue_usage(batch: dict[str, datetime]) -> None:
+    with _usage_lock:
+        for jti, used in batch.items():
+            current = _pending_usage.get(jti)
+            if current is None or current < used:
+                _pending_usage[jti] = used
+
+
+def reset_session_cache() -> None:
+    """Drop cached sessions and buffered usage (useful for tests)."""
+
+    _session_cache.clear()
+    with _usage_lock:
+        _pending_usage.clear()
+
+
+def forget_ticket_sessions(ticket_id: int) -> None:
+    """Drop cached sessions of ``ticket_id`` from this process."""
+
+    _session_cache.discard_where(lambda _jti, session: session.ticket_id == ticket_id)
+
+
 def revoke_ticket_sessions(
     ticket_id: int,
     *,
@@ -446,7 +712,9 @@ def revoke_ticket_sessions(
         all active sessions for the ticket are revoked.
     conn:
         Optional existing database connection.  When not provided a connection
-        is acquired automatically and closed after the operation.
+        is acquired automatically and closed after the operation.  Callers
+        passing ``conn`` should call :func:`forget_ticket_sessions` again once
+        their transaction commits.
 
     Returns
     -------
@@ -485,6 +753,9 @@ def revoke_ticket_sessions(
             connection.commit()
         return int(updated)
     finally:
+        # Invalidate only after the UPDATE (and our own commit), so a
+        # concurrent lookup cannot re-cache the pre-revocation row.
+        forget_ticket_sessions(ticket_id)
         if owns_connection:
             try:
                 connection.close()
@@ -494,9 +765,14 @@ def revoke_ticket_sessions(
 
 __all__ = [
     "get_or_create_view_session",
+    "get_or_create_view_sessions",
     "redeem_session",
     "get_session",
+    "get_session_async",
     "touch_session_usage",
+    "touch_session_usage_async",
+    "flush_session_usage",
     "revoke_ticket_sessions",
+    "forget_ticket_sessions",
     "LinkSession",
 ]
@@ -0,0 +1,255 @@
+"""Durable inbox for LiqPay server callbacks.
+
+The HTTP callback only verifies the signature, records the notification in
+``liqpay_callback_event`` and acknowledges.  Purchase state transitions are
+applied by :func:`process_pending`, driven by ``python -m backend.worker``,
+so slow database work or bursts of LiqPay retries never run on the event loop.
+Notifications are deduplicated by ``(order_id, payment_id, status)``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional
+
+from ..database import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Worker tunables (can be monkeypatched in tests)
+MAX_ATTEMPTS = 8
+BATCH_SIZE = 20
+POLL_INTERVAL_SECONDS = 5.0
+RETRY_BASE_SECONDS = 10
+# How long a claimed event stays invisible to other workers; an event whose
+# worker died mid-handler is picked up again after this.
+LEASE_SECONDS = 300
+
+_wakeup = threading.Event()
+
+
+class EventRejected(Exception):
+    """Raised by a handler when an event can never be applied (no retry)."""
+
+    def __init__(self, result_status: str, detail: str | None = None) -> None:
+        super().__init__(detail or result_status)
+        self.result_status = result_status
+
+
+@dataclass(frozen=True)
+class CallbackEvent:
+    id: int
+    purchase_id: int
+    order_id: str
+    payment_id: str
+    status: str
+    payload: Mapping[str, Any]
+    attempts: int
+
+
+def enqueue(
+    purchase_id: int,
+    order_id: str,
+    payload: Mapping[str, Any],
+    *,
+    conn=None,
+) -> tuple[Optional[int], bool]:
+    """Persist a verified callback.
+
+    Returns ``(event_id, created)``; ``created`` is ``False`` when the same
+    notification was stored before (the existing id is returned).
+    """
+
+    payment_id = str(payload.get("payment_id") or "")
+    status = str(payload.get("status") or "").lower()
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO liqpay_callback_event (purchase_id, order_id, payment_id, status, payload)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (order_id, payment_id, status) DO NOTHING
+                RETURNING id
+                """,
+                (purchase_id, order_id, payment_id, status, json.dumps(dict(payload))),
+            )
+            row = cur.fetchone()
+            created = row is not None
+            if not created:
+                cur.execute(
+                    """
+                    SELECT id FROM liqpay_callback_event
+                     WHERE order_id = %s AND payment_id = %s AND status = %s
+                    """,
+                    (order_id, payment_id, status),
+                )
+                row = cur.fetchone()
+        if owns_connection:
+            connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+
+    if created:
+        _wakeup.set()
+    return (int(row[0]) if row else None), created
+
+
+def _claim(cur, limit: int) -> list[CallbackEvent]:
+    # The attempt is counted and the event leased at claim time, so the claim
+    # can be committed before the handler runs.
+    cur.execute(
+        """
+        UPDATE liqpay_callback_event e
+           SET attempts = e.attempts + 1,
+               next_attempt_at = NOW() + make_interval(secs => %s)
+          FROM (
+                SELECT id FROM liqpay_callback_event
+                 WHERE processed_at IS NULL
+                   AND next_attempt_at <= NOW()
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+               ) due
+         WHERE e.id = due.id
+        RETURNING e.id, e.purchase_id, e.order_id, e.payment_id, e.status, e.payload, e.attempts
+        """,
+        (LEASE_SECONDS, limit),
+    )
+    events = []
+    for row in cur.fetchall():
+        payload = row[5]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        events.append(
+            CallbackEvent(
+                id=int(row[0]),
+                purchase_id=int(row[1]),
+                order_id=row[2],
+                payment_id=row[3],
+                status=row[4],
+                payload=payload or {},
+                attempts=int(row[6] or 0),
+            )
+        )
+    events.sort(key=lambda event: event.id)
+    return events
+
+
+def _finish(cur, event: CallbackEvent, result_status: str, error: str | None) -> None:
+    cur.execute(
+        """
+        UPDATE liqpay_callback_event
+           SET processed_at = NOW(), result_status = %s, last_error = %s
+         WHERE id = %s
+        """,
+        (result_status, error, event.id),
+    )
+
+
+def _record_failure(cur, event: CallbackEvent, error: str) -> None:
+    if event.attempts >= MAX_ATTEMPTS:
+        logger.warning(
+            "Giving up on LiqPay callback event=%s order_id=%s after %s attempt(s): %s",
+            event.id,
+            event.order_id,
+            event.attempts,
+            error,
+        )
+        _finish(cur, event, "failed", error[:1000])
+        return
+    cur.execute(
+        """
+        UPDATE liqpay_callback_event
+           SET last_error = %s,
+               next_attempt_at = NOW() + make_interval(secs => %s)
+         WHERE id = %s
+        """,
+        (error[:1000], RETRY_BASE_SECONDS * event.attempts, event.id),
+    )
+
+
+def process_pending(
+    handler: Callable[[CallbackEvent], str],
+    *,
+    limit: int | None = None,
+) -> int:
+    """Apply up to ``limit`` pending events with ``handler``.
+
+    ``handler`` returns the resulting purchase status.  The claim leases the
+    events for :data:`LEASE_SECONDS` and is committed before any handler
+    runs, so the post-payment work never holds row locks; each outcome is
+    committed as soon as it is known.  Failures are retried with a linear
+    backoff; after :data:`MAX_ATTEMPTS` the event is marked ``failed``.
+    :class:`EventRejected` ends the event immediately.  Returns the number
+    of events handled.
+    """
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            events = _claim(cur, limit or BATCH_SIZE)
+        conn.commit()
+        for event in events:
+            try:
+                result = handler(event)
+            except EventRejected as exc:
+                logger.warning(
+                    "LiqPay callback event=%s order_id=%s rejected: %s",
+                    event.id,
+                    event.order_id,
+                    exc,
+                )
+                with conn.cursor() as cur:
+                    _finish(cur, event, exc.result_status, str(exc))
+            except Exception as exc:
+                logger.exception(
+                    "LiqPay callback event=%s order_id=%s failed (attempt %s)",
+                    event.id,
+                    event.order_id,
+                    event.attempts,
+                )
+                with conn.cursor() as cur:
+                    _record_failure(cur, event, str(exc))
+            else:
+                with conn.cursor() as cur:
+                    _finish(cur, event, result, None)
+            conn.commit()
+        return len(events)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def run_worker(
+    handler: Callable[[CallbackEvent], str],
+    *,
+    stop: threading.Event | None = None,
+) -> None:
+    """Apply events until ``stop`` is set; wakes early when a callback arrives."""
+
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        _wakeup.wait(POLL_INTERVAL_SECONDS)
+        _wakeup.clear()
+        try:
+            while not stop.is_set() and process_pending(handler) >= BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("LiqPay callback worker iteration failed")
+
+
+__all__ = [
+    "CallbackEvent",
+    "EventRejected",
+    "enqueue",
+    "process_pending",
+    "run_worker",
+]
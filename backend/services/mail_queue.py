@@ -0,0 +1,320 @@
+"""Durable outbound mail queue for ticket emails.
+
+Request handlers call :func:`enqueue_ticket_emails`, which only records one
+``email_outbox`` row per ticket.  :func:`process_pending`, driven by the mail
+worker, claims a batch of due rows (``SKIP LOCKED``), renders each ticket's
+email (reusing PDFs from :mod:`.ticket_pdf_store`), and sends the whole batch
+over a pooled, already authenticated SMTP session.  Failures are retried with
+exponential backoff up to :data:`MAX_ATTEMPTS`; the outcome is kept on the
+row (``status``, ``sent_at``, ``last_error``) and
+:func:`ticket_delivery_status` reports it per ticket for the admin purchase
+view.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..database import get_connection
+from .email import (
+    EmailConfigurationError,
+    SMTPPool,
+    build_ticket_message,
+    load_smtp_settings,
+    render_ticket_email,
+)
+from .ticket_dto import get_ticket_dto
+from .ticket_pdf_store import get_or_render as get_or_render_pdf
+
+logger = logging.getLogger(__name__)
+
+# Worker tunables (can be monkeypatched in tests)
+MAX_ATTEMPTS = 8
+BATCH_SIZE = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", "20"))
+POLL_INTERVAL_SECONDS = float(os.getenv("MAIL_QUEUE_POLL_SECONDS", "5"))
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_SESSION_MAX_MESSAGES = int(os.getenv("SMTP_SESSION_MAX_MESSAGES", "100"))
+SMTP_SESSION_MAX_IDLE_SECONDS = float(os.getenv("SMTP_SESSION_MAX_IDLE_SECONDS", "60"))
+
+_pool = SMTPPool(
+    SMTP_POOL_SIZE,
+    max_messages=SMTP_SESSION_MAX_MESSAGES,
+    max_idle=SMTP_SESSION_MAX_IDLE_SECONDS,
+)
+_wakeup = threading.Event()
+
+
+@dataclass(frozen=True)
+class OutboxEmail:
+    id: int
+    ticket_id: int
+    recipient: str
+    lang: str
+    deep_link: str
+    attempts: int
+
+
+def enqueue_ticket_emails(
+    tickets: Iterable[Tuple[int, str]],
+    recipient: str,
+    lang: str | None,
+    *,
+    conn=None,
+) -> List[int]:
+    """Queue one ticket email per ``(ticket_id, deep_link)``; returns row ids."""
+
+    items = [(int(ticket_id), deep_link) for ticket_id, deep_link in tickets]
+    if not items or not recipient:
+        return []
+    lang_value = (lang or "bg").lower()
+
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO email_outbox (ticket_id, deep_link, recipient, lang)
+                SELECT t.ticket_id, t.deep_link, %s, %s
+                  FROM unnest(%s::int[], %s::text[]) AS t(ticket_id, deep_link)
+                RETURNING id
+                """,
+                (
+                    recipient,
+                    lang_value,
+                    [ticket_id for ticket_id, _ in items],
+                    [deep_link for _, deep_link in items],
+                ),
+            )
+            ids = [int(row[0]) for row in cur.fetchall()]
+        if owns_connection:
+            connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+
+    _wakeup.set()
+    return ids
+
+
+def _claim(cur, limit: int) -> List[OutboxEmail]:
+    cur.execute(
+        """
+        SELECT id, ticket_id, recipient, lang, deep_link, attempts
+          FROM email_outbox
+         WHERE status = 'pending'
+           AND next_attempt_at <= NOW()
+         ORDER BY next_attempt_at, id
+         LIMIT %s
+           FOR UPDATE SKIP LOCKED
+        """,
+        (limit,),
+    )
+    return [
+        OutboxEmail(
+            id=int(row[0]),
+            ticket_id=int(row[1]),
+            recipient=row[2],
+            lang=row[3],
+            deep_link=row[4],
+            attempts=int(row[5] or 0),
+        )
+        for row in cur.fetchall()
+    ]
+
+
+def _retry_delay(attempts: int) -> int:
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def _mark_sent(cur, ids: Sequence[int]) -> None:
+    if not ids:
+        return
+    cur.execute(
+        """
+        UPDATE email_outbox
+           SET status = 'sent', sent_at = NOW(), attempts = attempts + 1, last_error = NULL
+         WHERE id = ANY(%s)
+        """,
+        (list(ids),),
+    )
+
+
+def _mark_failed(cur, email: OutboxEmail, error: str, *, final: bool = False) -> None:
+    attempts = email.attempts + 1
+    if final or attempts >= MAX_ATTEMPTS:
+        logger.warning(
+            "Giving up on ticket email outbox=%s ticket=%s after %s attempt(s): %s",
+            email.id,
+            email.ticket_id,
+            attempts,
+            error,
+        )
+        cur.execute(
+            """
+            UPDATE email_outbox
+               SET status = 'failed', attempts = attempts + 1, last_error = %s
+             WHERE id = %s
+            """,
+            (error[:1000], email.id),
+        )
+        return
+    cur.execute(
+        """
+        UPDATE email_outbox
+           SET attempts = attempts + 1,
+               last_error = %s,
+               next_attempt_at = NOW() + make_interval(secs => %s)
+         WHERE id = %s
+        """,
+        (error[:1000], _retry_delay(attempts), email.id),
+    )
+
+
+def process_pending(*, limit: int | None = None, pool: Optional[SMTPPool] = None) -> int:
+    """Render and send up to ``limit`` due emails; returns how many were handled.
+
+    Rows stay locked while their batch is delivered so concurrent workers
+    never send the same email twice.  Without SMTP configuration the rows
+    are marked ``skipped``, matching the old inline behaviour.
+    """
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            emails = _claim(cur, limit or BATCH_SIZE)
+            if not emails:
+                conn.commit()
+                return 0
+
+            try:
+                settings = load_smtp_settings()
+            except EmailConfigurationError:
+                logger.info("Skipping %s queued ticket email(s): SMTP is not configured", len(emails))
+                cur.execute(
+                    """
+                    UPDATE email_outbox
+                       SET status = 'skipped', last_error = 'SMTP is not configured'
+                     WHERE id = ANY(%s)
+                    """,
+                    ([email.id for email in emails],),
+                )
+                conn.commit()
+                return len(emails)
+
+            ready: List[OutboxEmail] = []
+            messages = []
+            # DTOs and stored PDFs are read on a second connection so a
+            # failing query cannot abort the transaction holding the claimed
+            # rows.  PDFs pre-rendered by ``ticket_pdf.prerender`` jobs are
+            # reused; missing ones are rendered and stored here.
+            render_conn = get_connection()
+            try:
+                dtos: Dict[Tuple[int, str], dict] = {}
+                for email in emails:
+                    try:
+                        key = (email.ticket_id, email.lang)
+                        if key not in dtos:
+                            dtos[key] = get_ticket_dto(email.ticket_id, email.lang, render_conn)
+                        dto = dtos[key]
+                        pdf_bytes = get_or_render_pdf(
+                            render_conn, email.ticket_id, email.lang, email.deep_link, dto
+                        )
+                        subject, html_body = render_ticket_email(dto, email.deep_link, email.lang)
+                        render_conn.commit()
+                    except ValueError as exc:
+                        _mark_failed(cur, email, str(exc) or "ticket not found", final=True)
+                        continue
+                    except Exception as exc:
+                        logger.exception("Failed to render ticket email outbox=%s", email.id)
+                        render_conn.rollback()
+                        _mark_failed(cur, email, f"render: {exc}")
+                        continue
+                    ready.append(email)
+                    messages.append(
+                        build_ticket_message(settings, email.recipient, subject, html_body, pdf_bytes)
+                    )
+            finally:
+                render_conn.close()
+
+            if messages:
+                results = (pool or _pool).send_many(settings, messages)
+                _mark_sent(cur, [email.id for email, error in zip(ready, results) if error is None])
+                for email, error in zip(ready, results):
+                    if error is not None:
+                        _mark_failed(cur, email, f"smtp: {error}")
+                logger.info(
+                    "Sent %s of %s queued ticket email(s)",
+                    sum(1 for error in results if error is None),
+                    len(messages),
+                )
+        conn.commit()
+        return len(emails)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def ticket_delivery_status(ticket_ids: Sequence[int], *, conn=None) -> Dict[int, Dict[str, object]]:
+    """Latest outbox state per ticket (``status``, ``attempts``, ``sent_at``, ``last_error``)."""
+
+    if not ticket_ids:
+        return {}
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                SELECT DISTINCT ON (ticket_id) ticket_id, status, attempts, sent_at, last_error
+                  FROM email_outbox
+                 WHERE ticket_id = ANY(%s)
+                 ORDER BY ticket_id, id DESC
+                """,
+                (list(ticket_ids),),
+            )
+            rows = cur.fetchall()
+    finally:
+        if owns_connection:
+            connection.close()
+    return {
+        int(row[0]): {
+            "status": row[1],
+            "attempts": int(row[2] or 0),
+            "sent_at": row[3],
+            "last_error": row[4],
+        }
+        for row in rows
+    }
+
+
+def run_worker(*, stop: threading.Event | None = None) -> None:
+    """Drain the queue until ``stop`` is set; wakes early when this process enqueues."""
+
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        _wakeup.wait(POLL_INTERVAL_SECONDS)
+        _wakeup.clear()
+        try:
+            while not stop.is_set() and process_pending() >= BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("Mail queue worker iteration failed")
+
+
+__all__ = [
+    "OutboxEmail",
+    "enqueue_ticket_emails",
+    "process_pending",
+    "run_worker",
+    "ticket_delivery_status",
+]
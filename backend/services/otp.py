@@ -8,6 +8,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from .. import schema
 from ..database import get_connection
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,13 @@ logger = logging.getLogger(__name__)
 _DEFAULT_CHALLENGE_TTL_MINUTES = 10
 _DEFAULT_TOKEN_TTL_MINUTES = 15
 
+# Expired rows are deleted by :func:`purge_expired` (run periodically by
+# ``backend.worker``) once they are older than the grace period, in batches so
+# each DELETE holds its locks briefly.
+SWEEP_INTERVAL_SECONDS = 600
+SWEEP_GRACE = timedelta(hours=1)
+SWEEP_BATCH_SIZE = 1000
+
 
 @dataclass
 class OTPChallenge:
@@ -45,8 +53,10 @@ def _utcnow() -> datetime:
 
 
 def _ensure_schema(conn) -> None:
-    with conn.cursor() as cur:
-        cur.execute("SELECT 1")
+    # Tables come from migration 016, applied at startup; the registry only
+    # reports a problem when it saw the catalog without them.
+    if not (schema.has_table("otp_challenge") and schema.has_table("op_token")):
+        raise RuntimeError("OTP tables are missing; apply db/migrations")
 
 
 def _generate_code() -> str:
@@ -139,7 +149,7 @@ def verify_challenge(
                 if token_row:
                     return OperationToken(*token_row)
                 return None
-            if challenge.code != code:
+            if not secrets.compare_digest(challenge.code, code):
                 cur.execute(
                     "UPDATE otp_challenge SET attempts = attempts + 1 WHERE id = %s",
                     (challenge_id,),
@@ -170,6 +180,12 @@ def verify_challenge(
 
 
 def consume_op_token(token: str, action: str, ticket_id: int, *, conn=None) -> bool:
+    """Check and spend ``token`` in one statement.
+
+    Pass the action's own ``conn`` so the token is only spent when the
+    action commits; no separate :func:`validate_op_token` call is needed.
+    """
+
     owns_connection = conn is None
     connection = conn or get_connection()
     try:
@@ -222,11 +238,64 @@ def validate_op_token(token: str, action: str, ticket_id: int, *, conn=None) ->
             connection.close()
 
 
+def purge_expired(
+    *,
+    grace: timedelta | None = None,
+    batch_size: int | None = None,
+    conn=None,
+) -> tuple[int, int]:
+    """Delete challenges and tokens expired for longer than ``grace``.
+
+    Returns ``(challenges, tokens)`` deleted.  Each batch is committed
+    separately when the function owns the connection.
+    """
+
+    cutoff = _utcnow() - (SWEEP_GRACE if grace is None else grace)
+    limit = batch_size or SWEEP_BATCH_SIZE
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    totals = {"otp_challenge": 0, "op_token": 0}
+    key_column = {"otp_challenge": "id", "op_token": "token"}
+    try:
+        _ensure_schema(connection)
+        for table, column in key_column.items():
+            while True:
+                with connection.cursor() as cur:
+                    cur.execute(
+                        f"""
+                        DELETE FROM {table}
+                         WHERE {column} IN (
+                               SELECT {column} FROM {table}
+                                WHERE exp < %s
+                                LIMIT %s
+                         )
+                        """,
+                        (cutoff, limit),
+                    )
+                    deleted = cur.rowcount or 0
+                if owns_connection:
+                    connection.commit()
+                totals[table] += deleted
+                if deleted < limit:
+                    break
+    finally:
+        if owns_connection:
+            connection.close()
+    if totals["otp_challenge"] or totals["op_token"]:
+        logger.info(
+            "Purged %s expired OTP challenges and %s operation tokens",
+            totals["otp_challenge"],
+            totals["op_token"],
+        )
+    return totals["otp_challenge"], totals["op_token"]
+
+
 __all__ = [
     "create_challenge",
     "verify_challenge",
     "consume_op_token",
     "validate_op_token",
+    "purge_expired",
     "OTPChallenge",
     "OperationToken",
 ]
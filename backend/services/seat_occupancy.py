@@ -0,0 +1,88 @@
+"""Per-tour seat occupancy as bitsets.
+
+``seat.available`` stores the free segments of a seat as a digit string
+(``"1234"``; ``"0"`` = blocked), segment ``i`` being the leg between stops
+``i-1`` and ``i`` of the route.  Here each seat becomes an ``int`` mask with
+bit ``i-1`` set when segment ``i`` is free, so "free on segments i..j" is a
+single AND.  Seats sharing a mask are counted together, which makes free-seat
+counts for every (departure, arrival) pair one pass over the distinct masks
+instead of a scan over all seats per pair.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def availability_mask(available: Optional[str]) -> int:
+    """Bitset of free segments for a ``seat.available`` string."""
+
+    mask = 0
+    for ch in available or "":
+        if "1" <= ch <= "9":
+            mask |= 1 << (ord(ch) - ord("1"))
+    return mask
+
+
+def available_string(mask: int) -> str:
+    """Inverse of :func:`availability_mask` (``"0"`` when nothing is free)."""
+
+    return "".join(str(i + 1) for i in range(9) if mask >> i & 1) or "0"
+
+
+def span_mask(idx_from: int, idx_to: int) -> int:
+    """Segments covered between stop positions ``idx_from`` < ``idx_to``."""
+
+    return ((1 << (idx_to - idx_from)) - 1) << idx_from
+
+
+def segments_mask(segments: Iterable[str]) -> int:
+    """Bitset for segment ids as produced by the routers (``["2", "3"]``)."""
+
+    return availability_mask("".join(segments))
+
+
+class SeatOccupancy:
+    """Free-segment bitsets for all seats of one tour."""
+
+    __slots__ = ("seat_ids", "seat_nums", "masks", "_mask_counts")
+
+    def __init__(self, seats: Sequence[Tuple[int, int, Optional[str]]]) -> None:
+        self.seat_ids: List[int] = [row[0] for row in seats]
+        self.seat_nums: List[int] = [row[1] for row in seats]
+        self.masks: List[int] = [availability_mask(row[2]) for row in seats]
+        self._mask_counts = Counter(self.masks)
+
+    def free_flags(self, required: int) -> List[bool]:
+        """Per seat (in input order): is every ``required`` segment free?"""
+
+        return [mask & required == required for mask in self.masks]
+
+    def free_count(self, required: int) -> int:
+        return sum(
+            count for mask, count in self._mask_counts.items() if mask & required == required
+        )
+
+    def free_counts(
+        self, spans: Iterable[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], int]:
+        """Free seats for each ``(idx_from, idx_to)`` stop-position span."""
+
+        mask_counts = list(self._mask_counts.items())
+        counts: Dict[Tuple[int, int], int] = {}
+        for idx_from, idx_to in spans:
+            required = span_mask(idx_from, idx_to)
+            counts[(idx_from, idx_to)] = sum(
+                count for mask, count in mask_counts if mask & required == required
+            )
+        return counts
+
+
+__all__ = [
+    "SeatOccupancy",
+    "availability_mask",
+    "available_string",
+    "segments_mask",
+    "span_mask",
+]
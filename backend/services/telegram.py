@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 _TELEGRAM_API_URL = "https://api.telegram.org"
 _HTTP_TIMEOUT = 5.0
+_DEFAULT_RETRY_AFTER = 5.0
+# Telegram rejects longer message texts.
+MESSAGE_LIMIT = 4096
 
 
 def is_enabled() -> bool:
@@ -21,21 +24,46 @@ def is_enabled() -> bool:
     return bool(os.getenv("TELEGRAM_BOT_TOKEN") and os.getenv("TELEGRAM_CHAT_ID"))
 
 
-def send_message(text: str, parse_mode: Optional[str] = "HTML") -> bool:
-    """Send a message to the configured Telegram chat.
+class TelegramError(Exception):
+    """Telegram did not accept a message."""
 
-    Returns True on success, False otherwise. Never raises — failures are
-    logged so they do not break the main request flow.
-    """
-    if not is_enabled():
-        return False
 
+class TelegramRateLimited(TelegramError):
+    """HTTP 429 from Telegram; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: float, message: str = "") -> None:
+        super().__init__(message or f"rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def default_chat_id() -> str:
+    return os.getenv("TELEGRAM_CHAT_ID", "").strip()
+
+
+def _retry_after(response) -> float:
+    try:
+        seconds = response.json().get("parameters", {}).get("retry_after")
+    except Exception:
+        seconds = None
+    if seconds is None:
+        seconds = getattr(response, "headers", {}).get("Retry-After")
+    try:
+        return max(float(seconds), 1.0)
+    except (TypeError, ValueError):
+        return _DEFAULT_RETRY_AFTER
+
+
+def deliver(text: str, *, chat_id: Optional[str] = None, parse_mode: Optional[str] = "HTML") -> None:
+    """Post ``text`` to ``chat_id`` (default: the configured staff chat).
+
+    Raises :class:`TelegramRateLimited` on HTTP 429 and :class:`TelegramError`
+    on any other rejection; network errors propagate unchanged.
+    """
     token = os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
-    chat_id = os.getenv("TELEGRAM_CHAT_ID", "").strip()
     api_url = os.getenv("TELEGRAM_API_URL", _TELEGRAM_API_URL).rstrip("/")
 
     payload = {
-        "chat_id": chat_id,
+        "chat_id": chat_id or default_chat_id(),
         "text": text,
         "disable_web_page_preview": True,
     }
@@ -43,16 +71,29 @@ def send_message(text: str, parse_mode: Optional[str] = "HTML") -> bool:
         payload["parse_mode"] = parse_mode
 
     url = f"{api_url}/bot{token}/sendMessage"
+    response = httpx.post(url, data=payload, timeout=_HTTP_TIMEOUT)
+    if response.status_code == 429:
+        raise TelegramRateLimited(_retry_after(response))
+    if response.status_code >= 400:
+        raise TelegramError(f"status={response.status_code} body={response.text[:500]}")
+
+
+def send_message(text: str, parse_mode: Optional[str] = "HTML") -> bool:
+    """Send a message to the configured Telegram chat.
+
+    Returns True on success, False otherwise. Never raises — failures are
+    logged so they do not break the main request flow.  Purchase events go
+    through :mod:`.telegram_outbox` instead, which batches and rate-limits.
+    """
+    if not is_enabled():
+        return False
+
     try:
-        response = httpx.post(url, data=payload, timeout=_HTTP_TIMEOUT)
-        if response.status_code >= 400:
-            logger.error(
-                "Telegram sendMessage failed: status=%s body=%s",
-                response.status_code,
-                response.text[:500],
-            )
-            return False
+        deliver(text, parse_mode=parse_mode)
         return True
+    except TelegramError as exc:
+        logger.error("Telegram sendMessage failed: %s", exc)
+        return False
     except Exception:
         logger.exception("Telegram sendMessage raised an exception")
         return False
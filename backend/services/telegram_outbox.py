@@ -0,0 +1,326 @@
+"""Coalesced, rate-limited staff notifications over Telegram.
+
+``telegram.purchase_event`` jobs only render the event text and store it with
+:func:`enqueue`.  :func:`process_pending`, driven by the outbox worker, waits
+until a chat's oldest pending event is :data:`DIGEST_WINDOW_SECONDS` old and
+then sends everything queued for that chat as few digest messages as fit
+Telegram's message size limit.  Each chat has a token bucket
+(:data:`CHAT_RATE_PER_MINUTE`, :data:`CHAT_BURST`) so a sale spike never
+exceeds Telegram's per-chat limits; a 429 empties the bucket and postpones
+the chat's rows by the ``retry_after`` Telegram returns.  Other failures are
+retried with exponential backoff up to :data:`MAX_ATTEMPTS`.
+
+Buckets live in the worker process; run one outbox thread per deployment
+(``backend.worker`` does) so their budget is not shared unknowingly.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..database import get_connection
+from . import telegram
+
+logger = logging.getLogger(__name__)
+
+# Worker tunables (can be monkeypatched in tests)
+DIGEST_WINDOW_SECONDS = float(os.getenv("TELEGRAM_DIGEST_WINDOW_SECONDS", "10"))
+CHAT_RATE_PER_MINUTE = float(os.getenv("TELEGRAM_CHAT_RATE_PER_MINUTE", "20"))
+CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+BATCH_SIZE = 200
+POLL_INTERVAL_SECONDS = float(os.getenv("TELEGRAM_OUTBOX_POLL_SECONDS", "2"))
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 15
+RETRY_MAX_SECONDS = 1800
+
+_SEPARATOR = "\n\n"
+# Room kept free in every digest for its header line.
+_HEADER_RESERVE = 64
+
+
+class TokenBucket:
+    """Per-chat send budget: ``rate_per_minute`` sustained, ``burst`` at once."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self.blocked_until or self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def block(self, seconds: float) -> None:
+        """Stop sending for ``seconds`` (Telegram's ``retry_after``)."""
+
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket(chat_id: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(chat_id)
+        if bucket is None:
+            bucket = _buckets[chat_id] = TokenBucket(CHAT_RATE_PER_MINUTE, CHAT_BURST)
+        return bucket
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    id: int
+    text: str
+    attempts: int
+
+
+def enqueue(
+    text: str,
+    *,
+    purchase_id: int | None = None,
+    event_type: str | None = None,
+    chat_id: str | None = None,
+    conn=None,
+) -> int:
+    """Store one rendered event for the next digest; returns the row id."""
+
+    owns_connection = conn is None
+    connection = conn or get_connection()
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO telegram_outbox (chat_id, purchase_id, event_type, text)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+                """,
+                (chat_id or telegram.default_chat_id(), purchase_id, event_type, text),
+            )
+            row = cur.fetchone()
+        if owns_connection:
+            connection.commit()
+    finally:
+        if owns_connection:
+            connection.close()
+    return int(row[0])
+
+
+def build_digests(
+    messages: Sequence[OutboxMessage],
+    limit: int = telegram.MESSAGE_LIMIT,
+) -> List[List[OutboxMessage]]:
+    """Split ``messages`` (in order) into groups whose digest fits ``limit``."""
+
+    batches: List[List[OutboxMessage]] = []
+    current: List[OutboxMessage] = []
+    size = _HEADER_RESERVE
+    for message in messages:
+        length = len(message.text) + len(_SEPARATOR)
+        if current and size + length > limit:
+            batches.append(current)
+            current, size = [], _HEADER_RESERVE
+        current.append(message)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def digest_text(batch: Sequence[OutboxMessage], limit: int = telegram.MESSAGE_LIMIT) -> str:
+    if len(batch) == 1:
+        return batch[0].text[:limit]
+    body = _SEPARATOR.join(message.text for message in batch)
+    return f"\U0001F4EC <b>Событий: {len(batch)}</b>{_SEPARATOR}{body}"[:limit]
+
+
+def _retry_delay(attempts: int) -> int:
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def _due_chats(cur) -> List[str]:
+    cur.execute(
+        """
+        SELECT chat_id
+          FROM telegram_outbox
+         WHERE status = 'pending'
+           AND next_attempt_at <= NOW()
+         GROUP BY chat_id
+        HAVING MIN(created_at) <= NOW() - make_interval(secs => %s)
+        """,
+        (DIGEST_WINDOW_SECONDS,),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _claim(cur, chat_id: str, limit: int) -> List[OutboxMessage]:
+    cur.execute(
+        """
+        SELECT id, text, attempts
+          FROM telegram_outbox
+         WHERE chat_id = %s
+           AND status = 'pending'
+           AND next_attempt_at <= NOW()
+         ORDER BY id
+         LIMIT %s
+           FOR UPDATE SKIP LOCKED
+        """,
+        (chat_id, limit),
+    )
+    return [
+        OutboxMessage(id=int(row[0]), text=row[1], attempts=int(row[2] or 0))
+        for row in cur.fetchall()
+    ]
+
+
+def _mark_sent(cur, ids: Sequence[int]) -> None:
+    cur.execute(
+        """
+        UPDATE telegram_outbox
+           SET status = 'sent', sent_at = NOW(), attempts = attempts + 1, last_error = NULL
+         WHERE id = ANY(%s)
+        """,
+        (list(ids),),
+    )
+
+
+def _postpone(cur, ids: Sequence[int], seconds: float) -> None:
+    """Push rows back after a 429; does not count as a failed attempt."""
+
+    cur.execute(
+        """
+        UPDATE telegram_outbox
+           SET next_attempt_at = NOW() + make_interval(secs => %s)
+         WHERE id = ANY(%s)
+        """,
+        (seconds, list(ids)),
+    )
+
+
+def _mark_failed(cur, batch: Sequence[OutboxMessage], error: str) -> None:
+    attempts = max(message.attempts for message in batch) + 1
+    if attempts >= MAX_ATTEMPTS:
+        logger.warning(
+            "Giving up on %s telegram notification(s) after %s attempt(s): %s",
+            len(batch),
+            attempts,
+            error,
+        )
+        cur.execute(
+            """
+            UPDATE telegram_outbox
+               SET status = 'failed', attempts = attempts + 1, last_error = %s
+             WHERE id = ANY(%s)
+            """,
+            (error[:1000], [message.id for message in batch]),
+        )
+        return
+    cur.execute(
+        """
+        UPDATE telegram_outbox
+           SET attempts = attempts + 1,
+               last_error = %s,
+               next_attempt_at = NOW() + make_interval(secs => %s)
+         WHERE id = ANY(%s)
+        """,
+        (error[:1000], _retry_delay(attempts), [message.id for message in batch]),
+    )
+
+
+def _flush_chat(conn, chat_id: str, limit: int) -> int:
+    bucket = _bucket(chat_id)
+    handled = 0
+    with conn.cursor() as cur:
+        batches = build_digests(_claim(cur, chat_id, limit))
+        for index, batch in enumerate(batches):
+            if not bucket.try_acquire():
+                break
+            try:
+                telegram.deliver(digest_text(batch), chat_id=chat_id)
+            except telegram.TelegramRateLimited as exc:
+                logger.warning("Telegram rate limited chat=%s for %ss", chat_id, exc.retry_after)
+                bucket.block(exc.retry_after)
+                remaining = [message.id for rest in batches[index:] for message in rest]
+                _postpone(cur, remaining, exc.retry_after)
+                break
+            except Exception as exc:
+                logger.warning("Telegram digest to chat=%s failed: %s", chat_id, exc)
+                _mark_failed(cur, batch, f"{type(exc).__name__}: {exc}")
+                handled += len(batch)
+                break
+            _mark_sent(cur, [message.id for message in batch])
+            handled += len(batch)
+    conn.commit()
+    return handled
+
+
+def process_pending(*, limit: int | None = None) -> int:
+    """Send digests for every chat whose window has elapsed; returns events handled.
+
+    Rows that do not fit the chat's current budget stay pending and go out
+    in a later digest.
+    """
+
+    if not telegram.is_enabled():
+        return 0
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            chats = _due_chats(cur)
+        conn.commit()
+        return sum(_flush_chat(conn, chat_id, limit or BATCH_SIZE) for chat_id in chats)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def run_worker(*, stop: Optional[threading.Event] = None) -> None:
+    """Flush due digests every :data:`POLL_INTERVAL_SECONDS` until ``stop`` is set."""
+
+    stop = stop or threading.Event()
+    while not stop.wait(POLL_INTERVAL_SECONDS):
+        try:
+            process_pending()
+        except Exception:
+            logger.exception("Telegram outbox worker iteration failed")
+
+
+__all__ = [
+    "OutboxMessage",
+    "TokenBucket",
+    "build_digests",
+    "digest_text",
+    "enqueue",
+    "process_pending",
+    "run_worker",
+]
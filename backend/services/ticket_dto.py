@@ -11,6 +11,9 @@ itself, the passenger, purchase/payment metadata, the tour (including the
 route and localisation-aware stop titles) and pricing details.  Additionally
 it calculates convenience fields such as the segment duration and a
 structured description of the journey portion covered by the ticket.
+:func:`get_purchase_ticket_dtos` builds the same DTOs for a whole purchase
+with a constant number of queries; :func:`get_purchase_ticket_dtos_async`
+does the same on an ``async_connection``.
 """
 
 from __future__ import annotations
@@ -20,7 +23,12 @@ from decimal import Decimal
 from typing import Dict, List, Optional, Sequence, Tuple
 
 from ..models import BookingTermsEnum
-from ..pricelist_utils import fetch_pricelist_currency
+from ..pricelist_utils import (
+    DEFAULT_CURRENCY,
+    fetch_pricelist_currencies,
+    fetch_pricelist_currencies_async,
+    fetch_pricelist_currency,
+)
 
 
 # Mapping between supported languages and the column that stores a translated
@@ -163,6 +171,71 @@ def _segment_times(
     return minutes, _humanize_duration(minutes)
 
 
+_BASE_SELECT = """
+    SELECT
+        t.id,
+        t.seat_id,
+        s.seat_num,
+        t.passenger_id,
+        pa.name,
+        t.departure_stop_id,
+        t.arrival_stop_id,
+        t.extra_baggage,
+        t.tour_id,
+        tr.date,
+        tr.route_id,
+        r.name,
+        tr.pricelist_id,
+        tr.layout_variant,
+        tr.booking_terms,
+        t.purchase_id,
+        pu.customer_name,
+        pu.customer_email,
+        pu.customer_phone,
+        pu.amount_due,
+        pu.deadline,
+        pu.status,
+        pu.payment_method,
+        pu.update_at,
+        pr.price
+    FROM ticket t
+    JOIN passenger pa ON pa.id = t.passenger_id
+    LEFT JOIN seat s ON s.id = t.seat_id
+    LEFT JOIN tour tr ON tr.id = t.tour_id
+    LEFT JOIN route r ON r.id = tr.route_id
+    LEFT JOIN purchase pu ON pu.id = t.purchase_id
+    LEFT JOIN prices pr
+        ON pr.pricelist_id = tr.pricelist_id
+       AND pr.departure_stop_id = t.departure_stop_id
+       AND pr.arrival_stop_id = t.arrival_stop_id
+"""
+
+
+# ``route_id`` is appended last so the row layout expected by
+# :func:`_build_stop` stays the same for single- and multi-route queries.
+_STOPS_SELECT = """
+    SELECT
+        rs.stop_id,
+        rs."order",
+        rs.arrival_time,
+        rs.departure_time,
+        st.stop_name,
+        st.stop_en,
+        st.stop_bg,
+        st.stop_ua,
+        st.description,
+        st.location,
+        rs.route_id
+    FROM routestop rs
+    JOIN stop st ON st.id = rs.stop_id
+"""
+
+_PURCHASE_TICKETS_SELECT = _BASE_SELECT + " WHERE t.purchase_id = %s ORDER BY t.id"
+_ROUTES_STOPS_SELECT = (
+    _STOPS_SELECT + ' WHERE rs.route_id = ANY(%s) ORDER BY rs.route_id, rs."order"'
+)
+
+
 def get_ticket_dto(ticket_id: int, lang: str, conn) -> Dict[str, object]:
     """Aggregate a comprehensive DTO for the specified ticket.
 
@@ -177,108 +250,141 @@ def get_ticket_dto(ticket_id: int, lang: str, conn) -> Dict[str, object]:
         Database connection (psycopg2 connection or a compatible object).
     """
 
-    base_query = """
-        SELECT
-            t.id,
-            t.seat_id,
-            s.seat_num,
-            t.passenger_id,
-            pa.name,
-            t.departure_stop_id,
-            t.arrival_stop_id,
-            t.extra_baggage,
-            t.tour_id,
-            tr.date,
-            tr.route_id,
-            r.name,
-            tr.pricelist_id,
-            tr.layout_variant,
-            tr.booking_terms,
-            t.purchase_id,
-            pu.customer_name,
-            pu.customer_email,
-            pu.customer_phone,
-            pu.amount_due,
-            pu.deadline,
-            pu.status,
-            pu.payment_method,
-            pu.update_at,
-            pr.price
-        FROM ticket t
-        JOIN passenger pa ON pa.id = t.passenger_id
-        LEFT JOIN seat s ON s.id = t.seat_id
-        LEFT JOIN tour tr ON tr.id = t.tour_id
-        LEFT JOIN route r ON r.id = tr.route_id
-        LEFT JOIN purchase pu ON pu.id = t.purchase_id
-        LEFT JOIN prices pr
-            ON pr.pricelist_id = tr.pricelist_id
-           AND pr.departure_stop_id = t.departure_stop_id
-           AND pr.arrival_stop_id = t.arrival_stop_id
-        WHERE t.id = %s
-    """
-
-    stops_query = """
-        SELECT
-            rs.stop_id,
-            rs."order",
-            rs.arrival_time,
-            rs.departure_time,
-            st.stop_name,
-            st.stop_en,
-            st.stop_bg,
-            st.stop_ua,
-            st.description,
-            st.location
-        FROM routestop rs
-        JOIN stop st ON st.id = rs.stop_id
-        WHERE rs.route_id = %s
-        ORDER BY rs."order"
-    """
-
     cur = conn.cursor()
     try:
-        cur.execute(base_query, (ticket_id,))
+        cur.execute(_BASE_SELECT + " WHERE t.id = %s", (ticket_id,))
         row = cur.fetchone()
         if not row:
             raise ValueError(f"Ticket {ticket_id} not found")
 
-        (
-            _ticket_id,
-            seat_id,
-            seat_num,
-            passenger_id,
-            passenger_name,
-            departure_stop_id,
-            arrival_stop_id,
-            extra_baggage,
-            tour_id,
-            tour_date,
-            route_id,
-            route_name,
-            pricelist_id,
-            layout_variant,
-            booking_terms_value,
-            purchase_id,
-            customer_name,
-            customer_email,
-            customer_phone,
-            amount_due,
-            deadline,
-            purchase_status,
-            payment_method,
-            updated_at,
-            price,
-        ) = row
-
+        route_id, pricelist_id = _route_and_pricelist(row)
         currency = fetch_pricelist_currency(conn, pricelist_id)
 
-        booking_terms_enum = BookingTermsEnum(booking_terms_value)
-
-        cur.execute(stops_query, (route_id,))
+        cur.execute(_STOPS_SELECT + ' WHERE rs.route_id = %s ORDER BY rs."order"', (route_id,))
         stops_rows = cur.fetchall()
     finally:
         cur.close()
 
+    return _assemble_dto(row, stops_rows, currency, lang)
+
+
+def get_purchase_ticket_dtos(purchase_id: int, lang: str, conn) -> List[Dict[str, object]]:
+    """Return DTOs for every ticket of ``purchase_id`` ordered by ticket id.
+
+    Produces the same shape as :func:`get_ticket_dto` but with a fixed number
+    of queries regardless of the ticket count: one for the tickets, one for
+    the pricelist currencies and one for the stops of all involved routes.
+    """
+
+    cur = conn.cursor()
+    try:
+        cur.execute(_PURCHASE_TICKETS_SELECT, (purchase_id,))
+        rows = cur.fetchall()
+        if not rows:
+            return []
+
+        keys = [_route_and_pricelist(row) for row in rows]
+        route_ids = sorted({route_id for route_id, _ in keys if route_id is not None})
+        stop_rows = []
+        if route_ids:
+            cur.execute(_ROUTES_STOPS_SELECT, (route_ids,))
+            stop_rows = cur.fetchall()
+    finally:
+        cur.close()
+
+    currencies = fetch_pricelist_currencies(conn, [pricelist_id for _, pricelist_id in keys])
+    return _assemble_purchase_dtos(rows, keys, route_ids, stop_rows, currencies, lang)
+
+
+async def get_purchase_ticket_dtos_async(
+    purchase_id: int, lang: str, conn
+) -> List[Dict[str, object]]:
+    """Awaitable :func:`get_purchase_ticket_dtos` for ``async_connection``."""
+
+    async with conn.cursor() as cur:
+        await cur.execute(_PURCHASE_TICKETS_SELECT, (purchase_id,))
+        rows = await cur.fetchall()
+        if not rows:
+            return []
+
+        keys = [_route_and_pricelist(row) for row in rows]
+        route_ids = sorted({route_id for route_id, _ in keys if route_id is not None})
+        stop_rows = []
+        if route_ids:
+            await cur.execute(_ROUTES_STOPS_SELECT, (route_ids,))
+            stop_rows = await cur.fetchall()
+
+    currencies = await fetch_pricelist_currencies_async(
+        conn, [pricelist_id for _, pricelist_id in keys]
+    )
+    return _assemble_purchase_dtos(rows, keys, route_ids, stop_rows, currencies, lang)
+
+
+def _assemble_purchase_dtos(
+    rows: Sequence[Sequence],
+    keys: Sequence[Tuple[Optional[int], Optional[int]]],
+    route_ids: Sequence[int],
+    stop_rows: Sequence[Sequence],
+    currencies: Dict[int, str],
+    lang: str,
+) -> List[Dict[str, object]]:
+    stops_by_route: Dict[int, List[Sequence]] = {route_id: [] for route_id in route_ids}
+    for stop_row in stop_rows:
+        stops_by_route.setdefault(stop_row[10], []).append(stop_row)
+
+    return [
+        _assemble_dto(
+            row,
+            stops_by_route.get(route_id, []),
+            currencies.get(pricelist_id, DEFAULT_CURRENCY),
+            lang,
+        )
+        for row, (route_id, pricelist_id) in zip(rows, keys)
+    ]
+
+
+def _route_and_pricelist(row: Sequence) -> Tuple[Optional[int], Optional[int]]:
+    # Unpacking (rather than indexing) keeps malformed rows a ``ValueError``.
+    (*_ticket, route_id, _route_name, pricelist_id) = row[:13]
+    return route_id, pricelist_id
+
+
+def _assemble_dto(
+    row: Sequence,
+    stops_rows: Sequence[Sequence],
+    currency: str,
+    lang: str,
+) -> Dict[str, object]:
+    (
+        ticket_id,
+        seat_id,
+        seat_num,
+        passenger_id,
+        passenger_name,
+        departure_stop_id,
+        arrival_stop_id,
+        extra_baggage,
+        tour_id,
+        tour_date,
+        route_id,
+        route_name,
+        pricelist_id,
+        layout_variant,
+        booking_terms_value,
+        purchase_id,
+        customer_name,
+        customer_email,
+        customer_phone,
+        amount_due,
+        deadline,
+        purchase_status,
+        payment_method,
+        updated_at,
+        price,
+    ) = row
+
+    booking_terms_enum = BookingTermsEnum(booking_terms_value)
+
     stops: List[Dict[str, object]] = []
     stop_times: Dict[int, Dict[str, Optional[time]]] = {}
     for stop_row in stops_rows:
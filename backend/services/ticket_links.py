@@ -12,6 +12,9 @@ from typing import Any, Dict, Iterable
 
 import jwt
 
+from .. import schema
+from ..utils.ttl_cache import TTLCache
+
 
 class TicketLinkError(Exception):
     """Base class for ticket link errors."""
@@ -59,6 +62,25 @@ class TicketLinkPayload:
 
 DEFAULT_TTL_DAYS = 7
 
+# Verified token records (jti -> (ticket_id, revoked_at, expires_at)).  Local
+# revocations drop entries immediately; revocations made by other processes
+# take effect once the entry expires, so the TTL is the revocation window.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("LINK_AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_SIZE = 4096
+_token_cache: TTLCache[tuple] = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+
+def reset_token_cache() -> None:
+    """Forget all cached token lookups (useful for tests)."""
+
+    _token_cache.clear()
+
+
+def forget_ticket_tokens(ticket_id: int) -> None:
+    """Drop cached token records of ``ticket_id`` from this process."""
+
+    _token_cache.discard_where(lambda _jti, record: record[0] == ticket_id)
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -80,6 +102,11 @@ def _ensure_schema(connection) -> None:
     if _SCHEMA_READY:
         return
 
+    # Migration 006 creates the table; skip the DDL once the startup registry saw it.
+    if schema.is_loaded() and schema.has_table("ticket_link_tokens"):
+        _SCHEMA_READY = True
+        return
+
     with _SCHEMA_LOCK:
         if _SCHEMA_READY:
             return
@@ -159,7 +186,8 @@ def issue(
 ) -> str:
     """Issue a signed JWT for accessing ticket resources.
 
-    If ``conn`` is provided, caller manages transaction and connection lifecycle.
+    If ``conn`` is provided, caller manages transaction and connection lifecycle
+    and should call :func:`forget_ticket_tokens` again after committing.
     """
 
     secret = _ensure_secret()
@@ -210,6 +238,9 @@ def issue(
         if owns_connection:
             connection.commit()
     finally:
+        # Invalidate after the write so a concurrent verify cannot re-cache
+        # a token that is being revoked.
+        forget_ticket_tokens(ticket_id)
         if owns_connection:
             try:
                 connection.close()
@@ -244,33 +275,43 @@ def verify(token: str) -> Dict[str, Any]:
 
     now = _utcnow()
 
-    conn = _get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT revoked_at, expires_at
-                  FROM ticket_link_tokens
-                 WHERE jti = %s
-                """,
-                (jti,),
-            )
-            row = cur.fetchone()
-        # commit не обязателен после SELECT, но и не повредит в некоторых драйверах
+    cached = _token_cache.get(jti)
+    if cached is not None:
+        _ticket_id, revoked_at, expires_at = cached
+    else:
+        generation = _token_cache.generation
+        conn = _get_connection()
         try:
-            conn.commit()
-        except Exception:
-            pass
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT revoked_at, expires_at
+                      FROM ticket_link_tokens
+                     WHERE jti = %s
+                    """,
+                    (jti,),
+                )
+                row = cur.fetchone()
+            # commit не обязателен после SELECT, но и не повредит в некоторых драйверах
+            try:
+                conn.commit()
+            except Exception:
+                pass
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
 
-    if not row:
-        raise TokenNotFound("Token not found")
+        if not row:
+            raise TokenNotFound("Token not found")
 
-    revoked_at, expires_at = row
+        revoked_at, expires_at = row
+        _token_cache.set(
+            jti,
+            (payload.get("ticket_id"), revoked_at, expires_at),
+            generation=generation,
+        )
 
     if revoked_at is not None:
         raise TokenRevoked("Token has been revoked")
@@ -317,6 +358,7 @@ def revoke(jti: str) -> bool:
             row = cur.fetchone()
         conn.commit()
     finally:
+        _token_cache.pop(jti)
         try:
             conn.close()
         except Exception:
@@ -1,14 +1,25 @@
-"""Render ticket PDFs using a HTML template and WeasyPrint."""
+"""Render ticket PDFs using a HTML template and WeasyPrint.
+
+In the default ``production`` render mode (``TICKET_PDF_RENDER_MODE``) the
+templates are compiled once, ``ticket_pdf.css`` is parsed once into a shared
+WeasyPrint ``CSS`` object, and logos/fonts under ``templates/`` are served
+from memory, with their parsed images reused between documents.  ``dev`` mode
+reloads templates on change and inlines the stylesheet on every render.
+"""
 
 from __future__ import annotations
 
 import base64
+import os
 from datetime import date, datetime
 from decimal import Decimal
+from functools import lru_cache
+from hashlib import md5
 from io import BytesIO
 from pathlib import Path
-from typing import Any, Dict, Mapping, Optional
-from urllib.parse import quote_plus
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+from urllib.parse import quote_plus, urlsplit
+from urllib.request import url2pathname
 
 import qrcode
 from jinja2 import Environment, FileSystemLoader, select_autoescape
@@ -16,13 +27,112 @@ from weasyprint import HTML
 
 
 _TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+_STYLESHEET_NAME = "ticket_pdf.css"
+
+RENDER_MODE = os.getenv("TICKET_PDF_RENDER_MODE", "production").strip().lower()
+_PRODUCTION = RENDER_MODE != "dev"
 
 _ENV = Environment(
     loader=FileSystemLoader(str(_TEMPLATES_DIR)),
     autoescape=select_autoescape(["html", "xml"]),
-    auto_reload=True,
+    auto_reload=not _PRODUCTION,
 )
 
+# Static files under ``templates/`` the URL fetcher keeps in memory.
+_ASSET_MIME_TYPES = {
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".woff2": "font/woff2",
+    ".woff": "font/woff",
+    ".ttf": "font/ttf",
+    ".otf": "font/otf",
+}
+_assets: Dict[str, Dict[str, Any]] = {}
+_asset_image_ids: Set[str] = set()
+
+
+def _asset_url_fetcher(url: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Serve template assets from memory, everything else as WeasyPrint does."""
+
+    asset = _assets.get(url)
+    if asset is not None:
+        return dict(asset)
+    if url.startswith("file:"):
+        path = Path(url2pathname(urlsplit(url).path)).resolve()
+        mime_type = _ASSET_MIME_TYPES.get(path.suffix.lower())
+        if mime_type and path.is_relative_to(_TEMPLATES_DIR) and path.is_file():
+            asset = {"string": path.read_bytes(), "mime_type": mime_type, "redirected_url": url}
+            _assets[url] = asset
+            _asset_image_ids.add(_asset_image_id(url))
+            return dict(asset)
+    from weasyprint import default_url_fetcher
+
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+# Parsed template-asset images and their data, shared by all documents.
+_static_images: Dict[str, Any] = {}
+
+
+def _asset_image_id(url: str) -> str:
+    # WeasyPrint names an image's data entries "<md5 of its URL>-<slot>-<dpi>".
+    return md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+class _DocumentImageCache(dict):
+    """WeasyPrint image cache for one document.
+
+    WeasyPrint stores parsed images under their URL and the image data under
+    keys derived from it, and reads the data back while writing the PDF.
+    Entries of template assets go to :data:`_static_images` and are reused by
+    later documents; everything else (the QR code data URI) stays in this
+    dict and is dropped with it, so the shared part is bounded by the files
+    in ``templates/``.
+    """
+
+    @staticmethod
+    def _is_static(key: Any) -> bool:
+        if not isinstance(key, str):
+            return False
+        return key in _assets or key.split("-", 1)[0] in _asset_image_ids
+
+    def __contains__(self, key: Any) -> bool:
+        if self._is_static(key):
+            return key in _static_images
+        return super().__contains__(key)
+
+    def __getitem__(self, key: Any) -> Any:
+        if self._is_static(key):
+            return _static_images[key]
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if self._is_static(key):
+            _static_images[key] = value
+        else:
+            super().__setitem__(key, value)
+
+
+@lru_cache(maxsize=1)
+def _stylesheet() -> Tuple[Any, Any]:
+    """Parse ``ticket_pdf.css`` once; fonts it declares go to the shared config.
+
+    Returns ``(CSS, FontConfiguration)``; both are passed to ``write_pdf``.
+    """
+
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()
+    css = CSS(
+        filename=str(_TEMPLATES_DIR / _STYLESHEET_NAME),
+        url_fetcher=_asset_url_fetcher,
+        font_config=font_config,
+    )
+    return css, font_config
+
 _DEFAULT_I18N: Dict[str, Any] = {
     "lang": "ru",
     "brand_name": "МАКСИМОВ ТУРС",
@@ -393,18 +503,39 @@ def render_ticket_html(
     dto: Mapping[str, Any],
     deep_link: Optional[str],
     template_name: str = "ticket_pdf.html",
+    *,
+    inline_css: bool = True,
 ) -> str:
-    """Render a ticket HTML document from a DTO and a deep link."""
+    """Render a ticket HTML document from a DTO and a deep link.
+
+    With ``inline_css=False`` the ``<style>`` block is left out; the caller
+    supplies the stylesheet separately.
+    """
 
     context = _build_template_context(dto, deep_link)
     template = _ENV.get_template(template_name)
-    return template.render(**context)
+    return template.render(**context, inline_css=inline_css)
 
 
 def render_ticket_pdf(dto: Mapping[str, Any], deep_link: Optional[str]) -> bytes:
     """Render a ticket PDF from a DTO and a deep link."""
 
-    html = render_ticket_html(dto, deep_link)
     base_url = str(_TEMPLATES_DIR)
-    pdf_bytes = HTML(string=html, base_url=base_url).write_pdf()
-    return pdf_bytes
+    if not _PRODUCTION:
+        html = render_ticket_html(dto, deep_link)
+        return HTML(string=html, base_url=base_url).write_pdf()
+
+    stylesheet, font_config = _stylesheet()
+    html = render_ticket_html(dto, deep_link, inline_css=False)
+    document = HTML(string=html, base_url=base_url, url_fetcher=_asset_url_fetcher)
+    cache = _DocumentImageCache()
+    try:
+        return document.write_pdf(
+            stylesheets=[stylesheet],
+            font_config=font_config,
+            cache=cache,
+        )
+    finally:
+        # Shared asset images keep a reference to the cache of the document
+        # that parsed them; release this document's own entries.
+        cache.clear()
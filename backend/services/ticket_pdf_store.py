@@ -0,0 +1,92 @@
+"""Ticket PDFs rendered ahead of time and kept in ``ticket_pdf_cache``.
+
+``ticket_pdf.prerender`` jobs render a ticket's PDF right after it is issued,
+so the mail worker only attaches it.  A stored PDF is reused while its
+fingerprint - a hash of the ticket DTO and the deep link printed on it -
+still matches; any change to the ticket, purchase status or link renders a
+fresh one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Any, Mapping
+
+import orjson
+
+from ..database import get_connection
+from .ticket_dto import get_ticket_dto
+from .ticket_pdf import render_ticket_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(dto: Mapping[str, Any], deep_link: str | None) -> str:
+    body = orjson.dumps(dto, default=str, option=orjson.OPT_SORT_KEYS)
+    digest = hashlib.blake2b(body, digest_size=16)
+    digest.update((deep_link or "").encode())
+    return digest.hexdigest()
+
+
+def get_or_render(
+    conn,
+    ticket_id: int,
+    lang: str,
+    deep_link: str | None,
+    dto: Mapping[str, Any],
+) -> bytes:
+    """Return the stored PDF for ``dto``/``deep_link`` or render and store it.
+
+    The write is left to the caller's transaction.
+    """
+
+    key = fingerprint(dto, deep_link)
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT pdf FROM ticket_pdf_cache
+             WHERE ticket_id = %s AND lang = %s AND fingerprint = %s
+            """,
+            (ticket_id, lang, key),
+        )
+        row = cur.fetchone()
+        if row is not None:
+            return bytes(row[0])
+
+        pdf_bytes = render_ticket_pdf(dto, deep_link)
+        cur.execute(
+            """
+            INSERT INTO ticket_pdf_cache (ticket_id, lang, fingerprint, pdf)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (ticket_id, lang) DO UPDATE
+               SET fingerprint = EXCLUDED.fingerprint,
+                   pdf = EXCLUDED.pdf,
+                   rendered_at = NOW()
+            """,
+            (ticket_id, lang, key, pdf_bytes),
+        )
+    return pdf_bytes
+
+
+def prerender(ticket_id: int, lang: str, deep_link: str | None) -> bool:
+    """Render and store a ticket's PDF; ``False`` when the ticket is gone."""
+
+    conn = get_connection()
+    try:
+        try:
+            dto = get_ticket_dto(ticket_id, lang, conn)
+        except ValueError:
+            logger.info("Skipping PDF pre-render: ticket %s not found", ticket_id)
+            return False
+        get_or_render(conn, ticket_id, lang, deep_link, dto)
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+__all__ = ["fingerprint", "get_or_render", "prerender"]
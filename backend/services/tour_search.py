@@ -0,0 +1,123 @@
+"""Set-based tour search over many (departure, arrival, date range) legs.
+
+The public site used to call ``/tours/search`` once per day and direction
+(±3 days around the chosen date, then again for the return leg).
+:func:`search` answers any number of legs with a single query that joins an
+``unnest`` of the legs against ``tour``, ``available``, ``routestop`` and
+``prices``, and returns the tours of each leg in order.
+
+Results are cached per leg and seat count for
+:data:`TOUR_SEARCH_CACHE_TTL_SECONDS` (seat counts change with every booking,
+so the window is short); only legs missing from the cache are queried.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date
+from typing import Dict, List, NamedTuple, Sequence
+
+from ..async_database import async_connection
+from ..utils.ttl_cache import TTLCache
+
+TOUR_SEARCH_CACHE_TTL_SECONDS = float(os.getenv("TOUR_SEARCH_CACHE_TTL_SECONDS", "15"))
+TOUR_SEARCH_CACHE_SIZE = 2048
+
+
+class Leg(NamedTuple):
+    departure_stop_id: int
+    arrival_stop_id: int
+    date_from: date
+    date_to: date
+
+
+_cache: TTLCache[List[dict]] = TTLCache(TOUR_SEARCH_CACHE_SIZE, TOUR_SEARCH_CACHE_TTL_SECONDS)
+
+
+def _hhmm(value):
+    return value.strftime("%H:%M") if value else None
+
+
+async def _query(cur, legs: Sequence[Leg], seats: int) -> List[List[dict]]:
+    await cur.execute(
+        """
+        SELECT q.idx,
+               t.id,
+               t.date,
+               a.seats,
+               t.layout_variant,
+               rs_dep.departure_time,
+               rs_arr.arrival_time,
+               p.price
+          FROM unnest(%s::int[], %s::int[], %s::int[], %s::date[], %s::date[])
+               AS q(idx, dep, arr, date_from, date_to)
+          JOIN tour t ON t.date BETWEEN q.date_from AND q.date_to
+          JOIN available a ON a.tour_id = t.id
+                          AND a.departure_stop_id = q.dep
+                          AND a.arrival_stop_id = q.arr
+          JOIN routestop rs_dep ON rs_dep.route_id = t.route_id AND rs_dep.stop_id = q.dep
+          JOIN routestop rs_arr ON rs_arr.route_id = t.route_id AND rs_arr.stop_id = q.arr
+          JOIN prices p ON p.pricelist_id = t.pricelist_id
+                       AND p.departure_stop_id = q.dep
+                       AND p.arrival_stop_id = q.arr
+         WHERE a.seats >= %s
+         ORDER BY q.idx, t.date, rs_dep.departure_time, t.id
+        """,
+        (
+            list(range(len(legs))),
+            [leg.departure_stop_id for leg in legs],
+            [leg.arrival_stop_id for leg in legs],
+            [leg.date_from for leg in legs],
+            [leg.date_to for leg in legs],
+            seats,
+        ),
+    )
+    results: List[List[dict]] = [[] for _ in legs]
+    for idx, tour_id, tour_date, seats_left, layout_variant, dep_time, arr_time, price in (
+        await cur.fetchall()
+    ):
+        results[idx].append(
+            {
+                "id": tour_id,
+                "date": tour_date,
+                "seats": seats_left,
+                "layout_variant": layout_variant,
+                "departure_time": _hhmm(dep_time),
+                "arrival_time": _hhmm(arr_time),
+                "price": float(price),
+            }
+        )
+    return results
+
+
+async def search(legs: Sequence[Leg], seats: int = 1) -> List[List[dict]]:
+    """Tours with at least ``seats`` free seats for every leg, in leg order.
+
+    A database connection is only taken when some leg is not cached.
+    """
+
+    found: Dict[Leg, List[dict]] = {}
+    missing: List[Leg] = []
+    for leg in legs:
+        if leg in found:
+            continue
+        cached = _cache.get((leg, seats))
+        if cached is None:
+            missing.append(leg)
+            found[leg] = []
+        else:
+            found[leg] = cached
+
+    if missing:
+        async with async_connection() as conn, conn.cursor() as cur:
+            for leg, tours in zip(missing, await _query(cur, missing, seats)):
+                found[leg] = tours
+                _cache.set((leg, seats), tours)
+    return [found[leg] for leg in legs]
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+__all__ = ["Leg", "TOUR_SEARCH_CACHE_TTL_SECONDS", "clear_cache", "search"]
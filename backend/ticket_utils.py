@@ -1,108 +1,56 @@
 import logging
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from .services import ticket_links
+from .services import booking, ticket_links
+from .services.seat_occupancy import SeatOccupancy
 
 
 logger = logging.getLogger(__name__)
 
 
-def free_ticket(cur, ticket_id: int) -> None:
-    """Free seat availability and remove ticket record.
+def free_tickets(cur, ticket_ids: Sequence[int]) -> None:
+    """Free the seats of several tickets and remove the ticket records.
 
-    Restores seat.available segments and increases counters in the
-    available table for the segments covered by the ticket.
+    Seat segments and ``available`` counters are restored through
+    :func:`booking.release` in one batch; link tokens of the tickets are
+    revoked afterwards.
     """
-    # Fetch ticket details
-    cur.execute(
-        """
-        SELECT tour_id, seat_id, departure_stop_id, arrival_stop_id
-          FROM ticket
-         WHERE id = %s
-        """,
-        (ticket_id,),
-    )
-    row = cur.fetchone()
-    if not row:
+    ids = [int(ticket_id) for ticket_id in ticket_ids]
+    if not ids:
         return
-    tour_id, seat_id, dep, arr = row
-
-    cur.execute(
-        "SELECT jti FROM ticket_link_tokens WHERE ticket_id = %s AND revoked_at IS NULL",
-        (ticket_id,),
-    )
-    token_rows = cur.fetchall()
-    jtis = [str(token[0]) for token in token_rows if token and token[0]]
-
-    # Resolve route and ordered stops
-    cur.execute("SELECT route_id FROM tour WHERE id = %s", (tour_id,))
-    r = cur.fetchone()
-    if not r:
-        return
-    route_id = r[0]
 
     cur.execute(
         """
-        SELECT stop_id FROM routestop
-         WHERE route_id = %s
-         ORDER BY "order"
+        SELECT id, tour_id, seat_id, departure_stop_id, arrival_stop_id
+          FROM ticket
+         WHERE id = ANY(%s)
         """,
-        (route_id,),
+        (ids,),
     )
-    stops = [s[0] for s in cur.fetchall()]
-    if dep not in stops or arr not in stops:
+    rows = cur.fetchall()
+    if not rows:
         return
-    idx_from = stops.index(dep)
-    idx_to = stops.index(arr)
-    if idx_from >= idx_to:
-        return
-    segments: List[str] = [str(i + 1) for i in range(idx_from, idx_to)]
-
-    # Restore seat.available string
-    cur.execute("SELECT available FROM seat WHERE id = %s", (seat_id,))
-    seat_row = cur.fetchone()
-    old_avail = seat_row[0] if seat_row and seat_row[0] else ""
-    merged = sorted(set(old_avail + "".join(segments)), key=int)
-    new_avail = "".join(merged) if merged else "0"
-    cur.execute(
-        "UPDATE seat SET available = %s WHERE id = %s",
-        (new_avail, seat_id),
-    )
 
-    # Increment available.seats for all overlapping combined trips
     cur.execute(
-        """
-        UPDATE available
-           SET seats = seats + 1
-         WHERE tour_id = %s
-           AND (
-             (SELECT "order" FROM routestop
-              WHERE route_id=%s AND stop_id=departure_stop_id)
-             <
-             (SELECT "order" FROM routestop
-              WHERE route_id=%s AND stop_id=%s)
-           )
-           AND (
-             (SELECT "order" FROM routestop
-              WHERE route_id=%s AND stop_id=arrival_stop_id)
-             >
-             (SELECT "order" FROM routestop
-              WHERE route_id=%s AND stop_id=%s)
-           )
-        """,
-        (
-            tour_id,
-            route_id,
-            route_id,
-            arr,
-            route_id,
-            route_id,
-            dep,
-        ),
+        "SELECT jti FROM ticket_link_tokens WHERE ticket_id = ANY(%s) AND revoked_at IS NULL",
+        (ids,),
     )
-
-    # Remove the ticket itself
-    cur.execute("DELETE FROM ticket WHERE id = %s", (ticket_id,))
+    jtis = [str(token[0]) for token in cur.fetchall() if token and token[0]]
+
+    routes: Dict[int, Optional[booking.TourRoute]] = {}
+    holds = []
+    for _ticket_id, tour_id, seat_id, dep, arr in rows:
+        if tour_id not in routes:
+            try:
+                routes[tour_id] = booking.load_route(cur, tour_id)
+            except booking.BookingError:
+                routes[tour_id] = None
+        route = routes[tour_id]
+        if route is not None and seat_id is not None:
+            holds.append((route, seat_id, dep, arr))
+    booking.release(cur, holds)
+
+    cur.execute("DELETE FROM ticket WHERE id = ANY(%s)", ([row[0] for row in rows],))
 
     for jti in jtis:
         try:
@@ -111,6 +59,11 @@ def free_ticket(cur, ticket_id: int) -> None:
             logger.exception("Failed to revoke ticket link token %s", jti)
 
 
+def free_ticket(cur, ticket_id: int) -> None:
+    """Free seat availability and remove ticket record."""
+    free_tickets(cur, [ticket_id])
+
+
 def recalc_available(cur, tour_id: int) -> None:
     """Rebuild the available table for a tour based on seat availability."""
     cur.execute(
@@ -130,10 +83,10 @@ def recalc_available(cur, tour_id: int) -> None:
         return
 
     cur.execute(
-        "SELECT seat_num, available FROM seat WHERE tour_id=%s",
+        "SELECT id, seat_num, available FROM seat WHERE tour_id=%s",
         (tour_id,),
     )
-    seats: List[Tuple[int, str]] = cur.fetchall()
+    occupancy = SeatOccupancy(cur.fetchall())
 
     # drop previous counters
     cur.execute("DELETE FROM available WHERE tour_id=%s", (tour_id,))
@@ -142,20 +95,34 @@ def recalc_available(cur, tour_id: int) -> None:
         "SELECT departure_stop_id, arrival_stop_id FROM prices WHERE pricelist_id=%s",
         (pricelist_id,),
     )
-    valid_segments = cur.fetchall()
-
-    for dep, arr in valid_segments:
-        if dep not in stops or arr not in stops:
-            continue
-        i_from = stops.index(dep)
-        i_to = stops.index(arr)
-        if i_from >= i_to:
+    positions: dict[int, int] = {}
+    for idx, stop_id in enumerate(stops):
+        positions.setdefault(stop_id, idx)
+    pairs: List[Tuple[int, int, int, int]] = []
+    for dep, arr in cur.fetchall():
+        i_from = positions.get(dep)
+        i_to = positions.get(arr)
+        if i_from is None or i_to is None or i_from >= i_to:
             continue
-        required = [str(i + 1) for i in range(i_from, i_to)]
-        count = sum(
-            1 for _, avail in seats if avail and all(seg in avail for seg in required)
-        )
-        cur.execute(
-            "INSERT INTO available (tour_id, departure_stop_id, arrival_stop_id, seats) VALUES (%s,%s,%s,%s)",
-            (tour_id, dep, arr, count),
-        )
+        pairs.append((dep, arr, i_from, i_to))
+    if not pairs:
+        return
+
+    counts = occupancy.free_counts((i_from, i_to) for _dep, _arr, i_from, i_to in pairs)
+    cur.execute(
+        """
+        INSERT INTO available
+               (tour_id, departure_stop_id, arrival_stop_id, seats, departure_order, arrival_order)
+        SELECT %s, v.dep, v.arr, v.seats, v.dep_order, v.arr_order
+          FROM unnest(%s::int[], %s::int[], %s::int[], %s::int[], %s::int[])
+               AS v(dep, arr, seats, dep_order, arr_order)
+        """,
+        (
+            tour_id,
+            [dep for dep, _arr, _i, _j in pairs],
+            [arr for _dep, arr, _i, _j in pairs],
+            [counts[(i_from, i_to)] for _dep, _arr, i_from, i_to in pairs],
+            [i_from for _dep, _arr, i_from, _i_to in pairs],
+            [i_to for _dep, _arr, _i_from, i_to in pairs],
+        ),
+    )
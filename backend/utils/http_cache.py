@@ -0,0 +1,18 @@
+"""Helpers for conditional (ETag) responses."""
+
+from __future__ import annotations
+
+from fastapi import Request
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return ``True`` when ``If-None-Match`` names ``etag`` (or ``*``)."""
+
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+__all__ = ["etag_matches"]
@@ -0,0 +1,57 @@
+"""orjson-backed JSON responses.
+
+``backend.main`` makes :class:`FastJSONResponse` the application's default
+response class (``ORJSON_RESPONSES=0`` restores Starlette's ``JSONResponse``).
+FastAPI still runs ``jsonable_encoder`` over whatever an endpoint returns
+before rendering it; endpoints serving large payloads, such as the ticket
+DTOs of :mod:`backend.services.ticket_dto`, return ``FastJSONResponse(payload)``
+instead so the payload goes to orjson as is.
+
+:func:`dumps` covers the types those payloads contain the way
+``jsonable_encoder`` does: ``Decimal`` becomes an int or float, Pydantic
+models their JSON dump, sets lists; dates, times, UUIDs and enums are
+native to orjson.
+"""
+
+from __future__ import annotations
+
+import datetime
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Same rule as fastapi.encoders.decimal_encoder.
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` to JSON bytes without ``jsonable_encoder``."""
+
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """``ORJSONResponse`` that also accepts ``Decimal``, models and sets."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+__all__ = ["FastJSONResponse", "dumps"]
@@ -0,0 +1,102 @@
+"""Small thread-safe in-process LRU cache with per-entry expiry."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """Bounded mapping that evicts the least recently used entry when full.
+
+    Entries older than ``ttl`` seconds are treated as absent.  All operations
+    take a single lock, which is fine for the short critical sections here.
+
+    Every removal bumps :attr:`generation`.  A reader that loads a value from
+    the database can pass the generation it saw before the load to
+    :meth:`set`; the value is then dropped if an invalidation happened in the
+    meantime, so a stale row cannot be cached over a fresh revocation.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        *,
+        time_fn: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._time_fn = time_fn
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        now = self._time_fn()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry  # type: ignore[misc]
+            if expires_at <= now:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: V,
+        ttl: Optional[float] = None,
+        *,
+        generation: Optional[int] = None,
+    ) -> bool:
+        """Store ``value``; skipped when ``generation`` is no longer current."""
+
+        expires_at = self._time_fn() + (self.ttl if ttl is None else float(ttl))
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return True
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            self._generation += 1
+            entry = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def discard_where(self, predicate: Callable[[Hashable, V], bool]) -> int:
+        """Drop every entry for which ``predicate(key, value)`` is true."""
+
+        with self._lock:
+            self._generation += 1
+            doomed = [key for key, (_exp, value) in self._data.items() if predicate(key, value)]
+            for key in doomed:
+                del self._data[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
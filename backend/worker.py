@@ -0,0 +1,120 @@
+"""Background worker process: ``python -m backend.worker``.
+
+Runs the job queue (:mod:`backend.services.jobs`), the ticket mail queue, the
+Telegram notification outbox, the LiqPay callback inbox and the periodic
+sweeps (CheckBox fiscalization retries, expired OTP rows, link session and
+ticket link token retention) away from the web workers.
+
+Deployments without a separate worker process can set
+``BACKGROUND_WORKERS_IN_PROCESS=1`` on the web service instead;
+``backend.main`` then starts the same loops on application startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import threading
+from typing import Callable, List, Sequence
+
+from . import job_handlers
+from .log_config import configure_logging
+from .services import jobs, link_retention, liqpay_events, mail_queue, otp, telegram_outbox
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "2"))
+FISCAL_SWEEP_INTERVAL_SECONDS = 120
+
+
+def _periodic(stop: threading.Event, interval: float, task: Callable[[], object], name: str) -> None:
+    """Run ``task`` every ``interval`` seconds until ``stop`` is set."""
+
+    while not stop.wait(interval):
+        try:
+            task()
+        except Exception:
+            logger.exception("%s failed", name)
+
+
+def _liqpay_callback_loop(stop: threading.Event) -> None:
+    """Apply stored LiqPay callbacks to their purchases."""
+
+    from .routers.public import _apply_liqpay_callback_event
+
+    liqpay_events.run_worker(_apply_liqpay_callback_event, stop=stop)
+
+
+def start_background_workers(
+    stop: threading.Event,
+    *,
+    threads: int = JOB_WORKER_THREADS,
+    kinds: Sequence[str] | None = None,
+) -> List[threading.Thread]:
+    """Start the queue and sweep threads; they exit once ``stop`` is set."""
+
+    targets = [
+        (f"jobs-{index}", lambda: jobs.run_worker(kinds=kinds, stop=stop))
+        for index in range(max(1, threads))
+    ]
+    targets.append(("mail-queue", lambda: mail_queue.run_worker(stop=stop)))
+    targets.append(("telegram-outbox", lambda: telegram_outbox.run_worker(stop=stop)))
+    targets.append(("liqpay-callbacks", lambda: _liqpay_callback_loop(stop)))
+    targets.append(
+        (
+            "fiscal-sweep",
+            lambda: _periodic(
+                stop,
+                FISCAL_SWEEP_INTERVAL_SECONDS,
+                job_handlers.enqueue_pending_fiscalizations,
+                "Fiscalization retry sweep",
+            ),
+        )
+    )
+    targets.append(
+        ("otp-sweep", lambda: _periodic(stop, otp.SWEEP_INTERVAL_SECONDS, otp.purge_expired, "OTP sweep"))
+    )
+    targets.append(
+        (
+            "link-retention",
+            lambda: _periodic(
+                stop,
+                link_retention.INTERVAL_SECONDS,
+                link_retention.run_once,
+                "Link retention run",
+            ),
+        )
+    )
+
+    started = []
+    for name, target in targets:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        started.append(thread)
+    return started
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run background queues and sweeps.")
+    parser.add_argument("--threads", type=int, default=JOB_WORKER_THREADS, help="job worker threads")
+    parser.add_argument("--kind", action="append", dest="kinds", help="only run jobs of this kind")
+    args = parser.parse_args(argv)
+
+    configure_logging(capture_uvicorn=False)
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    threads = start_background_workers(stop, threads=args.threads, kinds=args.kinds)
+    logger.info("Background worker %s started %s thread(s)", jobs.WORKER_ID, len(threads))
+    stop.wait()
+    logger.info("Background worker stopping")
+    for thread in threads:
+        thread.join(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
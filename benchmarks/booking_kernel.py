@@ -0,0 +1,212 @@
+"""Micro-benchmark for :mod:`backend.services.booking`.
+
+Reports statements and latency per allocate / move / release.
+
+    python -m benchmarks.booking_kernel                  # in-memory tables
+    python -m benchmarks.booking_kernel --dsn postgresql://... \\
+        --tour 12 --dep 3 --arr 7 --seats 1,2,3 --target-seat 4
+
+Without ``--dsn`` the kernel runs against an in-memory seat/available table
+(Python overhead only) and the statement count of the per-seat code it
+replaced is printed for comparison.  With ``--dsn`` every round runs on a
+real tour inside a transaction that is rolled back, so nothing is kept.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from backend.services import booking
+from backend.services.seat_occupancy import span_mask
+
+
+class CountingCursor:
+    """Wraps a cursor and counts executed statements."""
+
+    def __init__(self, cur) -> None:
+        self._cur = cur
+        self.statements = 0
+
+    def execute(self, query, params=None):
+        self.statements += 1
+        return self._cur.execute(query, params)
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+
+class MemoryCursor:
+    """Answers the kernel's statements from in-memory tables."""
+
+    def __init__(self, seats: int, stops: int) -> None:
+        self.stops = list(range(1, stops + 1))
+        self.seats: Dict[int, List] = {
+            seat_id: [1, seat_id, "".join(str(i) for i in range(1, stops))]
+            for seat_id in range(1, seats + 1)
+        }
+        self.available = {
+            (1, i, j): seats for i in range(stops) for j in range(i + 1, stops)
+        }
+        self._rows: list = []
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self._rows = []
+        if normalized.startswith("SELECT t.route_id"):
+            self._rows = [(1, 1, None, stop, None) for stop in self.stops]
+        elif normalized.startswith("SELECT id, tour_id, seat_num, available FROM seat"):
+            ids, tours, nums = params
+            wanted = set(zip(tours, nums))
+            self._rows = [
+                (seat_id, row[0], row[1], row[2])
+                for seat_id, row in sorted(self.seats.items())
+                if seat_id in ids or (row[0], row[1]) in wanted
+            ]
+        elif normalized.startswith("UPDATE seat SET available"):
+            for seat_id, available in zip(*params):
+                self.seats[seat_id][2] = available
+        elif normalized.startswith("UPDATE available"):
+            for tour_id, idx_from, idx_to, delta in zip(*params):
+                self.available[(tour_id, idx_from, idx_to)] += delta
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+def _measure(
+    label: str,
+    rounds: int,
+    operation: Callable[[CountingCursor], None],
+    cursor_factory: Callable[[], Tuple[object, Callable[[], None]]],
+) -> None:
+    timings: List[float] = []
+    statements = 0
+    for _ in range(rounds):
+        raw, finish = cursor_factory()
+        cur = CountingCursor(raw)
+        start = time.perf_counter()
+        operation(cur)
+        timings.append((time.perf_counter() - start) * 1000)
+        statements = cur.statements
+        finish()
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<28} statements={statements:<3} "
+        f"median={statistics.median(timings):.3f}ms p95={p95:.3f}ms"
+    )
+
+
+def _legacy_statements(seat_count: int) -> int:
+    # tour + routestop lookups, then per seat: SELECT seat, UPDATE seat,
+    # correlated UPDATE available.
+    return 2 + 3 * seat_count
+
+
+def run_memory(rounds: int, seat_counts: Sequence[int], stops: int) -> None:
+    dep, arr = 1, stops
+
+    def tables(booked: Sequence[int] = ()):
+        def factory():
+            cur = MemoryCursor(seats=max(seat_counts) * 2, stops=stops)
+            for seat_id in booked:
+                cur.seats[seat_id][2] = "0"
+            return cur, lambda: None
+
+        return factory
+
+    for count in seat_counts:
+        seat_nums = list(range(1, count + 1))
+
+        def allocate(cur):
+            route = booking.load_route(cur, 1)
+            booking.allocate(cur, route, seat_nums, dep, arr)
+
+        def release(cur):
+            route = booking.load_route(cur, 1)
+            booking.release(cur, [(route, seat_id, dep, arr) for seat_id in seat_nums])
+
+        print(f"-- {count} seat(s), {stops} stops (legacy path: {_legacy_statements(count)} statements)")
+        _measure("allocate", rounds, allocate, tables())
+        _measure("release", rounds, release, tables(seat_nums))
+
+    def move(cur):
+        route = booking.load_route(cur, 1)
+        booking.move(cur, route, 1, dep, arr, seat_num=2)
+
+    # change_ticket_seat used to run: route + stops, two seat SELECTs, two
+    # seat UPDATEs and a five-statement recalc_available.
+    print("-- move one ticket to another seat (legacy path: 11 statements)")
+    _measure("move", rounds, move, tables([1]))
+
+
+def run_postgres(args) -> None:
+    import psycopg2
+
+    conn = psycopg2.connect(args.dsn)
+    seat_nums = [int(value) for value in args.seats.split(",")]
+
+    def in_transaction():
+        cur = conn.cursor()
+
+        def finish():
+            conn.rollback()
+            cur.close()
+
+        return cur, finish
+
+    def allocate(cur):
+        route = booking.load_route(cur, args.tour)
+        booking.allocate(cur, route, seat_nums, args.dep, args.arr)
+
+    def move(cur):
+        route = booking.load_route(cur, args.tour)
+        (seat_id,) = booking.allocate(cur, route, seat_nums[:1], args.dep, args.arr)
+        booking.move(cur, route, seat_id, args.dep, args.arr, seat_num=args.target_seat)
+
+    def allocate_release(cur):
+        route = booking.load_route(cur, args.tour)
+        seat_ids = booking.allocate(cur, route, seat_nums, args.dep, args.arr)
+        booking.release(cur, [(route, seat_id, args.dep, args.arr) for seat_id in seat_ids])
+
+    try:
+        _measure(f"allocate x{len(seat_nums)}", args.rounds, allocate, in_transaction)
+        if args.target_seat is not None:
+            _measure("allocate x1 + move", args.rounds, move, in_transaction)
+        _measure(f"allocate + release x{len(seat_nums)}", args.rounds, allocate_release, in_transaction)
+    finally:
+        conn.close()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--stops", type=int, default=8, help="route length (in-memory mode)")
+    parser.add_argument("--dsn", help="run against this PostgreSQL database (rolled back)")
+    parser.add_argument("--tour", type=int)
+    parser.add_argument("--dep", type=int)
+    parser.add_argument("--arr", type=int)
+    parser.add_argument("--seats", default="1", help="comma separated seat numbers")
+    parser.add_argument("--target-seat", type=int)
+    args = parser.parse_args(argv)
+
+    if args.dsn:
+        if None in (args.tour, args.dep, args.arr):
+            parser.error("--dsn needs --tour, --dep and --arr")
+        run_postgres(args)
+    else:
+        assert span_mask(0, args.stops - 1) < 1 << 9, "seat.available holds at most 9 segments"
+        run_memory(args.rounds, (1, 4, 16), args.stops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Micro-benchmark for JSON response rendering.
+
+Times the encoding of representative payloads three ways:
+
+* ``jsonable_encoder`` + ``json.dumps`` -- what ``JSONResponse`` endpoints did;
+* ``jsonable_encoder`` + orjson -- what ``ORJSONResponse`` alone still costs;
+* :func:`backend.utils.json_response.dumps` -- the direct path taken by
+  endpoints that return ``FastJSONResponse(payload)``.
+
+    python -m benchmarks.serialization --rounds 500 --tickets 10
+
+Payloads are synthetic: ticket DTOs built by
+:mod:`backend.services.ticket_dto` from fabricated rows, a purchase view
+(``{"purchase": ..., "tickets": [...]}``) and a sales report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from decimal import Decimal
+from typing import Callable, Dict, List, Sequence
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from backend.services.ticket_dto import _assemble_dto
+from backend.utils import json_response
+
+
+def _stops_rows(stops: int) -> List[tuple]:
+    return [
+        (
+            stop_id,
+            stop_id,
+            dtime(6 + stop_id, 0),
+            dtime(6 + stop_id, 10),
+            f"Stop {stop_id}",
+            f"Stop {stop_id}",
+            f"Спирка {stop_id}",
+            f"Зупинка {stop_id}",
+            "Central bus station, platform 4",
+            "https://maps.example/?q=42.69,23.32",
+            1,
+        )
+        for stop_id in range(1, stops + 1)
+    ]
+
+
+def _ticket_dto(ticket_id: int, stops: int) -> Dict[str, object]:
+    row = (
+        ticket_id, ticket_id, ticket_id % 50 + 1, ticket_id, f"Passenger {ticket_id}",
+        1, stops, False, 7, date(2026, 11, 3), 1, "Sofia - Kyiv", 2, 0, 0,
+        100, "Customer", "customer@example.com", "+359888000000",
+        Decimal("120.50"), datetime(2026, 11, 1, 12, 0), "reserved", "online",
+        datetime(2026, 10, 30, 9, 15), Decimal("60.25"),
+    )
+    return _assemble_dto(row, _stops_rows(stops), "UAH", "en")
+
+
+def _payloads(tickets: int, stops: int) -> Dict[str, object]:
+    dtos = [_ticket_dto(ticket_id, stops) for ticket_id in range(1, tickets + 1)]
+    report_rows = [
+        {
+            "ticket_id": ticket_id,
+            "tour_id": 7,
+            "seat_num": ticket_id % 50 + 1,
+            "price": Decimal("60.25"),
+            "passenger_name": f"Passenger {ticket_id}",
+            "passenger_phone": "+359888000000",
+            "passenger_email": "customer@example.com",
+            "extra_baggage": bool(ticket_id % 2),
+            "tour_date": date(2026, 11, 3) + timedelta(days=ticket_id % 30),
+            "route_name": "Sofia - Kyiv",
+            "departure_stop_name": "Stop 1",
+            "arrival_stop_name": f"Stop {stops}",
+        }
+        for ticket_id in range(1, 50 * tickets + 1)
+    ]
+    return {
+        "ticket": dtos[0],
+        "purchase view": {
+            "purchase": {"id": 100, "status": "reserved", "amount_due": Decimal("120.50")},
+            "tickets": dtos,
+        },
+        "report": {"summary": {"count": len(report_rows)}, "tickets": report_rows},
+    }
+
+
+def _measure(label: str, rounds: int, encode: Callable[[], bytes]) -> None:
+    timings: List[float] = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        size = len(encode())
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{label:<28} bytes={size:<7} "
+        f"median={statistics.median(timings):.3f}ms p95={p95:.3f}ms"
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--tickets", type=int, default=6, help="tickets per purchase")
+    parser.add_argument("--stops", type=int, default=8, help="stops per route")
+    args = parser.parse_args(argv)
+
+    for name, payload in _payloads(args.tickets, args.stops).items():
+        print(f"-- {name}")
+        _measure(
+            "jsonable_encoder + json",
+            args.rounds,
+            lambda: json.dumps(
+                jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8"),
+        )
+        _measure(
+            "jsonable_encoder + orjson",
+            args.rounds,
+            lambda: orjson.dumps(jsonable_encoder(payload)),
+        )
+        _measure("json_response.dumps", args.rounds, lambda: json_response.dumps(payload))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+-- Indexes backing the paginated admin purchase list (keyset on id DESC plus filters).
+CREATE INDEX IF NOT EXISTS idx_purchase_status_id
+    ON public.purchase (status, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_purchase_update_at
+    ON public.purchase (update_at);
+
+CREATE INDEX IF NOT EXISTS idx_purchase_email_prefix
+    ON public.purchase (lower(customer_email) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_purchase_phone_digits
+    ON public.purchase (regexp_replace(customer_phone, '[^0-9]', '', 'g'));
+
+-- Ticket counts per purchase are aggregated by purchase_id.
+CREATE INDEX IF NOT EXISTS idx_ticket_purchase_id
+    ON public.ticket (purchase_id);
@@ -0,0 +1,12 @@
+-- Indexes for the admin tour list: keyset on (date, id) and per-tour aggregates.
+CREATE INDEX IF NOT EXISTS idx_tour_date_id
+    ON public.tour (date, id);
+
+CREATE INDEX IF NOT EXISTS idx_seat_tour_id
+    ON public.seat (tour_id);
+
+CREATE INDEX IF NOT EXISTS idx_ticket_tour_id
+    ON public.ticket (tour_id);
+
+CREATE INDEX IF NOT EXISTS idx_ticket_seat_id
+    ON public.ticket (seat_id);
@@ -0,0 +1,22 @@
+-- Durable inbox for LiqPay server callbacks. The callback endpoint only
+-- inserts here and acknowledges; a worker applies the purchase transition.
+-- Retries of the same notification collapse on (order_id, payment_id, status).
+CREATE TABLE IF NOT EXISTS liqpay_callback_event (
+    id BIGSERIAL PRIMARY KEY,
+    purchase_id INTEGER NOT NULL,
+    order_id TEXT NOT NULL,
+    payment_id TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT '',
+    payload JSONB NOT NULL,
+    received_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    processed_at TIMESTAMPTZ,
+    result_status TEXT,
+    last_error TEXT,
+    CONSTRAINT liqpay_callback_event_dedup_uidx UNIQUE (order_id, payment_id, status)
+);
+
+CREATE INDEX IF NOT EXISTS liqpay_callback_event_pending_idx
+    ON liqpay_callback_event (next_attempt_at, id)
+    WHERE processed_at IS NULL;
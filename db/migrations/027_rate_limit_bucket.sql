@@ -0,0 +1,11 @@
+-- Shared token buckets for services.access_guard when RATE_LIMIT_BACKEND=postgres.
+-- UNLOGGED: the state is disposable and must not add WAL traffic per request.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_bucket (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS rate_limit_bucket_updated_at_idx
+    ON rate_limit_bucket (updated_at);
@@ -0,0 +1,22 @@
+-- Active-row lookups for OTP operation tokens and expiry sweeping.
+-- The OTP tables come from legacy migration 016, which older databases may
+-- not have; skip the indexes there instead of failing startup.
+DO $$
+BEGIN
+    IF to_regclass('public.op_token') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_op_token_active
+            ON public.op_token (ticket_id, action, exp DESC)
+            WHERE used_at IS NULL;
+
+        DROP INDEX IF EXISTS public.idx_op_token_ticket;
+
+        CREATE INDEX IF NOT EXISTS idx_op_token_exp
+            ON public.op_token (exp);
+    END IF;
+
+    IF to_regclass('public.otp_challenge') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_otp_challenge_exp
+            ON public.otp_challenge (exp);
+    END IF;
+END
+$$;
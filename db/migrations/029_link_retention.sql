@@ -0,0 +1,22 @@
+-- Expiry indexes for the link retention sweeper and optional archive tables.
+-- link_sessions and ticket_link_tokens are created lazily by their services,
+-- so a database that has not served a ticket link yet may lack them.
+DO $$
+BEGIN
+    IF to_regclass('public.link_sessions') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_link_sessions_exp
+            ON public.link_sessions (exp);
+
+        CREATE TABLE IF NOT EXISTS public.link_sessions_archive
+            (LIKE public.link_sessions INCLUDING DEFAULTS);
+    END IF;
+
+    IF to_regclass('public.ticket_link_tokens') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_ticket_link_tokens_expires_at
+            ON public.ticket_link_tokens (expires_at);
+
+        CREATE TABLE IF NOT EXISTS public.ticket_link_tokens_archive
+            (LIKE public.ticket_link_tokens INCLUDING DEFAULTS);
+    END IF;
+END
+$$;
@@ -0,0 +1,24 @@
+-- Durable outbound mail queue. Request handlers only insert rows here; the
+-- mail worker renders each ticket email, sends batches over pooled SMTP
+-- sessions and records the outcome per ticket.
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    ticket_id INTEGER NOT NULL,
+    recipient TEXT NOT NULL,
+    lang TEXT NOT NULL DEFAULT 'bg',
+    deep_link TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'sent', 'failed', 'skipped')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    sent_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS email_outbox_pending_idx
+    ON email_outbox (next_attempt_at, id)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS email_outbox_ticket_idx
+    ON email_outbox (ticket_id, id);
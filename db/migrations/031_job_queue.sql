@@ -0,0 +1,47 @@
+-- Durable background job queue consumed by `python -m backend.worker`.
+-- Jobs are claimed with FOR UPDATE SKIP LOCKED and a lease (locked_until),
+-- deleted when they succeed and moved to job_dead_letter once they run out
+-- of attempts. A non-NULL dedup_key keeps one queued job per (kind, key).
+CREATE TABLE IF NOT EXISTS job_queue (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    priority SMALLINT NOT NULL DEFAULT 50,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 8,
+    run_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_until TIMESTAMPTZ,
+    locked_by TEXT,
+    dedup_key TEXT,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS job_queue_ready_idx
+    ON job_queue (priority, run_at, id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS job_queue_dedup_uidx
+    ON job_queue (kind, dedup_key)
+    WHERE dedup_key IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS job_dead_letter (
+    id BIGINT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    priority SMALLINT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL,
+    failed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Ticket PDFs rendered ahead of time by `ticket_pdf.prerender` jobs. A row is
+-- reused only while its fingerprint (ticket data + deep link) still matches.
+CREATE TABLE IF NOT EXISTS ticket_pdf_cache (
+    ticket_id INTEGER NOT NULL,
+    lang TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    pdf BYTEA NOT NULL,
+    rendered_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (ticket_id, lang)
+);
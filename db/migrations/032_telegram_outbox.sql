@@ -0,0 +1,21 @@
+-- Staff Telegram notifications. ``telegram.purchase_event`` jobs store the
+-- rendered message here; the outbox worker coalesces pending rows per chat
+-- into digest messages and sends them within the chat's rate limit.
+CREATE TABLE IF NOT EXISTS telegram_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    purchase_id INTEGER,
+    event_type TEXT,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    sent_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS telegram_outbox_pending_idx
+    ON telegram_outbox (chat_id, id)
+    WHERE status = 'pending';
@@ -0,0 +1,31 @@
+-- Route positions of each counter's stops, so seat bookings adjust
+-- available.seats by (tour_id, departure_order, arrival_order) instead of
+-- looking up routestop."order" for every row.
+ALTER TABLE public.available
+    ADD COLUMN IF NOT EXISTS departure_order SMALLINT,
+    ADD COLUMN IF NOT EXISTS arrival_order SMALLINT;
+
+-- Positions are 0-based indexes into the route's stops ordered by "order",
+-- the same numbering as the segments in seat.available.
+WITH ordered AS (
+    SELECT route_id,
+           stop_id,
+           row_number() OVER (PARTITION BY route_id ORDER BY "order") - 1 AS position
+      FROM public.routestop
+),
+positions AS (
+    SELECT route_id, stop_id, MIN(position) AS position
+      FROM ordered
+     GROUP BY route_id, stop_id
+)
+UPDATE public.available AS a
+   SET departure_order = dep.position,
+       arrival_order = arr.position
+  FROM public.tour AS t, positions AS dep, positions AS arr
+ WHERE t.id = a.tour_id
+   AND dep.route_id = t.route_id AND dep.stop_id = a.departure_stop_id
+   AND arr.route_id = t.route_id AND arr.stop_id = a.arrival_stop_id
+   AND (a.departure_order IS NULL OR a.arrival_order IS NULL);
+
+CREATE INDEX IF NOT EXISTS idx_available_tour_order
+    ON public.available (tour_id, departure_order, arrival_order);
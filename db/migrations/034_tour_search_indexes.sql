@@ -0,0 +1,12 @@
+-- Indexes for tour search: counters by stop pair, route stop times and fares.
+CREATE INDEX IF NOT EXISTS idx_available_stop_pair
+    ON public.available (departure_stop_id, arrival_stop_id, tour_id)
+    INCLUDE (seats);
+
+CREATE INDEX IF NOT EXISTS idx_routestop_route_stop
+    ON public.routestop (route_id, stop_id)
+    INCLUDE (departure_time, arrival_time);
+
+CREATE INDEX IF NOT EXISTS idx_prices_pricelist_pair
+    ON public.prices (pricelist_id, departure_stop_id, arrival_stop_id)
+    INCLUDE (price);
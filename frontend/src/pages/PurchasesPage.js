@@ -26,6 +26,21 @@ const statusToneMap = {
   refunded: "neutral",
 };
 
+const emailStatusLabels = {
+  pending: "В очереди",
+  sent: "Отправлено",
+  failed: "Ошибка",
+  skipped: "Пропущено",
+};
+
+const formatEmailStatus = (email) => {
+  if (!email) return "—";
+  const label = emailStatusLabels[email.status] || email.status;
+  return email.status === "sent" && email.sent_at
+    ? `${label} ${formatDateTime(email.sent_at)}`
+    : label;
+};
+
 const SCROLL_STORAGE_KEY = "purchases.scrolls.v1";
 
 const makeScrollKey = (orderId, section) => `${orderId}::${section}`;
@@ -36,6 +51,7 @@ export default function PurchasesPage() {
   const [status, setStatus] = useState("");
   const [search, setSearch] = useState("");
   const [info, setInfo] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
   const [expandedId, setExpandedId] = useState(null);
   const [modalState, setModalState] = useState({ open: false, orderId: null, section: null, title: "" });
   const [modalScrolled, setModalScrolled] = useState(false);
@@ -93,13 +109,13 @@ export default function PurchasesPage() {
     };
   }, []);
 
-  const load = useCallback(() => {
-    const params = {};
-    if (status) params.status = status;
-    axios
-      .get(`${API}/admin/purchases/`, { params })
-      .then(async (r) => {
-        setItems(r.data);
+  const fetchPage = useCallback(
+    (afterId) => {
+      const params = {};
+      if (status) params.status = status;
+      if (afterId) params.after_id = afterId;
+      return axios.get(`${API}/admin/purchases/`, { params }).then(async (r) => {
+        setNextCursor(r.headers["x-next-after-id"] || null);
         const map = {};
         await Promise.all(
           r.data.map((p) =>
@@ -110,10 +126,30 @@ export default function PurchasesPage() {
               })
           )
         );
+        return { rows: r.data, map };
+      });
+    },
+    [status]
+  );
+
+  const load = useCallback(() => {
+    fetchPage(null)
+      .then(({ rows, map }) => {
+        setItems(rows);
         setInfo(map);
       })
       .catch((e) => console.error(e));
-  }, [status]);
+  }, [fetchPage]);
+
+  const loadMore = () => {
+    if (!nextCursor) return;
+    fetchPage(nextCursor)
+      .then(({ rows, map }) => {
+        setItems((prev) => [...prev, ...rows]);
+        setInfo((prev) => ({ ...prev, ...map }));
+      })
+      .catch((e) => console.error(e));
+  };
 
   useEffect(() => {
     load();
@@ -248,6 +284,7 @@ export default function PurchasesPage() {
             <th>Дата</th>
             <th>Место</th>
             <th>Багаж</th>
+            <th>Письмо</th>
             <th>Действия</th>
           </tr>
         </thead>
@@ -261,6 +298,7 @@ export default function PurchasesPage() {
                 <td>{formatDateShort(t.tour_date)}</td>
                 <td>{t.seat_num ?? "—"}</td>
                 <td>{t.extra_baggage ? "Да" : "—"}</td>
+                <td title={t.email?.last_error || undefined}>{formatEmailStatus(t.email)}</td>
                 <td>
                   <button
                     type="button"
@@ -277,7 +315,7 @@ export default function PurchasesPage() {
             ))
           ) : (
             <tr>
-              <td colSpan="7" className="purchases-empty">
+              <td colSpan="8" className="purchases-empty">
                 Нет билетов
               </td>
             </tr>
@@ -598,6 +636,11 @@ export default function PurchasesPage() {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <button type="button" className="purchases-btn" onClick={loadMore}>
+            Показать ещё
+          </button>
+        )}
       </div>
 
       <div
@@ -142,32 +142,26 @@ export default function SearchPage() {
     setMessageType("info");
     setLoading(true);
     try {
-      const outReq = axios.get(`${API}/tours/search`, {
-        params: {
+      const res = await axios.post(`${API}/search/tours`, {
+        seats: seatCount,
+        legs: [{
           departure_stop_id: selectedDeparture,
           arrival_stop_id:   selectedArrival,
-          date:              selectedDepartDate,
-          seats:             seatCount
-        }
+          date_from:         selectedDepartDate,
+          return_date_from:  selectedReturnDate || null
+        }]
       });
-      const retReq = selectedReturnDate
-        ? axios.get(`${API}/tours/search`, {
-            params: {
-              departure_stop_id: selectedArrival,
-              arrival_stop_id:   selectedDeparture,
-              date:              selectedReturnDate,
-              seats:             seatCount
-            }
-          })
-        : Promise.resolve({ data: [] });
-      const [outRes, retRes] = await Promise.all([outReq, retReq]);
-      setOutboundTours(outRes.data);
-      setReturnTours(retRes.data);
+      const [leg] = res.data.legs;
+      const toursOf = days => (days || []).flatMap(day => day.tours);
+      const outbound = toursOf(leg.outbound);
+      const inbound = toursOf(leg.return);
+      setOutboundTours(outbound);
+      setReturnTours(inbound);
       setSelectedOutboundTour(null);
       setSelectedReturnTour(null);
       setSelectedOutboundSeats([]);
       setSelectedReturnSeats([]);
-      if (!outRes.data.length && (!selectedReturnDate || !retRes.data.length)) {
+      if (!outbound.length && (!selectedReturnDate || !inbound.length)) {
         setMessage("Рейсы не найдены");
         setMessageType("info");
       } else {
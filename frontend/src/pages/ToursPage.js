@@ -37,13 +37,11 @@ export default function ToursPage() {
 
   const PAGE_SIZE = 10;
   const [tab, setTab]       = useState('upcoming');
-  const [page, setPage]     = useState(1);
-  const [total, setTotal]   = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [filterDate, setFilterDate]       = useState("");
   const [filterRoute, setFilterRoute]     = useState("");
   const [filterBooking, setFilterBooking] = useState("");
   const [showForm, setShowForm] = useState(false);
-  const totalPages = Math.ceil(total / PAGE_SIZE);
 
   // — new‐tour form state —
   const [newTour, setNewTour] = useState({
@@ -84,29 +82,37 @@ export default function ToursPage() {
     }
   };
 
-  const fetchTours = (pageParam = page) => {
+  // Without a cursor the list restarts from the first page; with one the
+  // next page is appended ("Показать ещё").
+  const fetchTours = (cursor = null) => {
     const params = {
-      page: pageParam,
       page_size: PAGE_SIZE,
       show_past: tab === 'past'
     };
+    if (cursor) params.cursor = cursor;
     if (filterDate) params.date = filterDate;
     if (filterRoute) params.route_id = filterRoute;
     if (filterBooking) params.booking_terms = filterBooking;
     return axios.get(`${API}/tours/list`, { params })
-      .then(r=>{ setTours(r.data.items); setTotal(r.data.total); })
+      .then(r=>{
+        setTours(prev => cursor ? [...prev, ...r.data.items] : r.data.items);
+        setNextCursor(r.data.next_cursor || null);
+      })
       .catch(console.error);
   };
 
+  const loadMore = () => {
+    if (!nextCursor) return;
+    fetchTours(nextCursor);
+  };
+
   const applyFilters = e => {
     e.preventDefault();
-    setPage(1);
-    fetchTours(1);
+    fetchTours();
   };
 
   const switchTab = t => {
     setTab(t);
-    setPage(1);
   };
 
   // — load reference data on mount —
@@ -115,13 +121,12 @@ export default function ToursPage() {
     axios.get(`${API}/routes/`).then(r=>setRoutes(r.data)).catch(()=>{ setMessage("Ошибка загрузки маршрутов"); setMessageType("error"); });
     axios.get(`${API}/pricelists`).then(r=>setPricelists(r.data)).catch(()=>{ setMessage("Ошибка загрузки прайс-листов"); setMessageType("error"); });
     axios.get(`${API}/stops/`).then(r=>setStops(r.data)).catch(()=>{ setMessage("Ошибка загрузки остановок"); setMessageType("error"); });
-    fetchTours(1);
   }, []);
 
-  // — refetch tours when tab/page changes —
+  // — (re)load the first page on mount and when the tab changes —
   useEffect(() => {
     fetchTours();
-  }, [tab, page]);
+  }, [tab]);
 
   // — new‐tour seat toggler —
   const toggleSeatNew = seatNum => {
@@ -144,12 +149,11 @@ export default function ToursPage() {
       booking_terms: +newTour.booking_terms,
       active_seats: newTour.activeSeats
     })
-    .then(()=> fetchTours(1))
+    .then(()=> fetchTours())
     .catch(console.error)
     .finally(()=> {
       setNewTour({ route_id:"", pricelist_id:"", date:"", layout_variant:"", booking_terms:"", activeSeats:[] });
       setShowForm(false);
-      setPage(1);
     });
   };
 
@@ -330,7 +334,7 @@ export default function ToursPage() {
       <table className="styled-table">
         <thead>
           <tr>
-            <th>Маршрут</th><th>Прайс-лист</th><th>Дата</th><th>Вариант</th><th>Бронь</th><th>Действия</th>
+            <th>Маршрут</th><th>Прайс-лист</th><th>Дата</th><th>Вариант</th><th>Бронь</th><th>Загрузка</th><th>Действия</th>
           </tr>
         </thead>
         <tbody>
@@ -411,6 +415,9 @@ export default function ToursPage() {
                     : (BOOKING_OPTIONS.find(o=>o.value===t.booking_terms)?.label || t.booking_terms)
                   }
                 </td>
+                <td title={`Бронь: ${t.reserved_tickets ?? 0}, оплачено: ${t.paid_tickets ?? 0}, заблокировано: ${t.blocked_seats ?? 0}`}>
+                  {t.sold_seats ?? 0}/{t.seats ?? "-"} · {Number(t.revenue ?? 0).toFixed(2)}
+                </td>
                 <td>
                   {editing
                     ? <>
@@ -430,18 +437,11 @@ export default function ToursPage() {
         </tbody>
       </table>
 
-      <div style={{ margin: '16px 0', display:'flex', alignItems:'center', gap:4 }}>
-        <button className="btn btn--sm" disabled={page===1} onClick={()=>setPage(p=>p-1)}>Назад</button>
-        {Array.from({length: totalPages}, (_, i) => (
-          <button
-            className="btn btn--sm"
-            key={i+1}
-            disabled={page===i+1}
-            onClick={()=>setPage(i+1)}
-          >{i+1}</button>
-        ))}
-        <button className="btn btn--sm" disabled={page===totalPages || totalPages===0} onClick={()=>setPage(p=>p+1)}>Вперёд</button>
-      </div>
+      {nextCursor && (
+        <div style={{ margin: '16px 0' }}>
+          <button className="btn btn--sm" onClick={loadMore}>Показать ещё</button>
+        </div>
+      )}
 
       {editingId && isSeatModalOpen && (
         <div className="modal-overlay" onClick={()=>setSeatModalOpen(false)}>
@@ -0,0 +1,103 @@
+import importlib
+import os
+import sys
+
+import psycopg2
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class _DummyPsycopgCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+    def execute(self, *args, **kwargs):
+        return None
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        return None
+
+
+class _DummyPsycopgConnection:
+    autocommit = False
+
+    def cursor(self):
+        return _DummyPsycopgCursor()
+
+    def commit(self):
+        return None
+
+    def rollback(self):
+        return None
+
+    def close(self):
+        return None
+
+
+def _dummy_connect(*args, **kwargs):
+    return _DummyPsycopgConnection()
+
+
+# backend.database connects while it is imported; do that once against the
+# dummy so test modules can import services at the top without a server.
+with pytest.MonkeyPatch.context() as _patch:
+    _patch.setattr(psycopg2, "connect", _dummy_connect)
+    importlib.import_module("backend.database")
+
+
+@pytest.fixture
+def dummy_psycopg(monkeypatch):
+    """Route ``psycopg2.connect`` to a connection that does nothing."""
+
+    monkeypatch.setattr("psycopg2.connect", _dummy_connect)
+
+
+class FakeConnection:
+    """Connection handing out ``db.cursor_class(db)`` cursors."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return self.db.cursor_class(self.db)
+
+    def commit(self):
+        self.db.commits += 1
+        self.db.events.append(("commit", None))
+
+    def rollback(self):
+        self.db.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """In-memory stand-in for the service's ``get_connection``.
+
+    Subclasses set ``cursor_class`` to a cursor that understands the SQL of
+    the service under test and records ``(query, params)`` in ``queries``.
+    """
+
+    cursor_class = None
+
+    def __init__(self):
+        self.queries = []
+        self.events = []
+        self.connections = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def get_connection(self):
+        self.connections += 1
+        return FakeConnection(self)
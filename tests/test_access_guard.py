@@ -27,43 +27,48 @@ def reset_state():
     access_guard.reset_rate_limit_state()
 
 
-def test_guard_public_request_enforces_rate_limit(monkeypatch):
-    monkeypatch.setattr(access_guard, "RATE_LIMIT_MAX_REQUESTS", 2)
-    monkeypatch.setattr(access_guard, "RATE_LIMIT_BURST", 1)
-    monkeypatch.setattr(access_guard, "RATE_LIMIT_DELAY_SECONDS", 0.1)
-
-    current = {"value": 0.0}
-
-    def fake_time():
-        return current["value"]
-
-    sleeps: list[float] = []
-
-    def fake_sleep(duration: float) -> None:
-        sleeps.append(duration)
-
-    monkeypatch.setattr(access_guard, "_time_fn", fake_time)
-    monkeypatch.setattr(access_guard, "_sleep_fn", fake_sleep)
-
-    context = RequestContext(
+def _context(jti="rate-jti"):
+    return RequestContext(
         is_admin=False,
         link=None,
         scopes=["view"],
         ticket_id=55,
         purchase_id=None,
         lang="bg",
-        jti="rate-jti",
+        jti=jti,
     )
+
+
+def test_guard_public_request_enforces_rate_limit(monkeypatch):
+    monkeypatch.setattr(access_guard, "RATE_LIMIT_MAX_REQUESTS", 2)
+    monkeypatch.setattr(access_guard, "RATE_LIMIT_WINDOW_SECONDS", 10)
+    monkeypatch.setattr(access_guard, "RATE_LIMIT_BURST", 1)
+
+    current = {"value": 0.0}
+    monkeypatch.setattr(access_guard, "_time_fn", lambda: current["value"])
+
+    context = _context()
     request = DummyRequest(ip="10.0.0.1")
 
-    access_guard.guard_public_request(request, "view", ticket_id=55, context=context)
-    access_guard.guard_public_request(request, "view", ticket_id=55, context=context)
+    for _ in range(3):
+        access_guard.guard_public_request(request, "view", ticket_id=55, context=context)
 
     with pytest.raises(HTTPException) as exc:
         access_guard.guard_public_request(request, "view", ticket_id=55, context=context)
 
     assert exc.value.status_code == 429
-    assert sleeps and sleeps[-1] == pytest.approx(0.1)
+    # Bucket refills 2 tokens per 10s, so one token is 5s away.
+    assert exc.value.headers == {"Retry-After": "5"}
 
-    current["value"] = 100.0
+    current["value"] = 5.0
     access_guard.guard_public_request(request, "view", ticket_id=55, context=context)
+
+
+def test_rate_limit_store_is_bounded(monkeypatch):
+    monkeypatch.setattr(access_guard, "RATE_LIMIT_SHARD_CAPACITY", 3)
+    limiter = access_guard.MemoryRateLimiter(shards=2)
+
+    for idx in range(50):
+        assert limiter.acquire(f"view:10.0.0.{idx}") == 0.0
+
+    assert len(limiter) <= 6
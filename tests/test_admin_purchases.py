@@ -8,6 +8,10 @@ class DummyCursor:
     def __init__(self):
         self.queries = []
         self.query = ""
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        return False
     def execute(self, query, params=None):
         self.query = query
         self.queries.append((query, params))
@@ -28,6 +32,8 @@ class DummyCursor:
                 datetime(2025, 8, 9, 12, 0, 0),
                 "online",
             )]
+        if "FROM email_outbox" in self.query:
+            return [(1, "sent", 1, datetime(2025, 8, 9, 12, 5, 0), None)]
         if "FROM ticket" in self.query:
             return [(
                 1,
@@ -119,5 +125,25 @@ def test_admin_purchase_info(client):
     assert data['tickets'][0]['passenger_name'] == 'Ivan'
     assert data['tickets'][0]['from_stop_name'] == 'Stop1'
     assert data['tickets'][0]['to_stop_name'] == 'Stop4'
+    assert data['tickets'][0]['email']['status'] == 'sent'
+    assert data['tickets'][0]['email']['attempts'] == 1
     assert len(data['logs']) == 2
     assert data['logs'][0]['action'] == 'reserved'
+
+
+def test_admin_purchase_list_keyset_pagination(client, monkeypatch):
+    conn = DummyConn()
+    monkeypatch.setattr('backend.routers.purchase_admin.get_connection', lambda: conn)
+    resp = client.get(
+        '/admin/purchases',
+        params={'after_id': 10, 'limit': 1, 'email_prefix': 'Iv_', 'phone': '+1 (23)'},
+    )
+    assert resp.status_code == 200
+    assert [p['id'] for p in resp.json()] == [1]
+    page_query, params = conn.cursor_obj.queries[-1]
+    assert 'pu.id < %s' in page_query
+    assert 'LIMIT %s' in page_query
+    assert params == ('iv\\_%', '123', 10, 2)
+    # a single row fits into limit=1, so there is no next cursor
+    assert 'x-next-after-id' not in resp.headers
+    assert conn.cursor_obj.queries[0][0].lstrip().startswith('EXPLAIN')
@@ -0,0 +1,56 @@
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.routers import auth as auth_router
+
+
+def _login(username, password):
+    return asyncio.run(auth_router.login(auth_router.LoginIn(username=username, password=password)))
+
+
+def test_login_verifies_bcrypt_off_the_request_thread(monkeypatch):
+    hashed = auth_router.pwd_context.hash("s3cret")
+    monkeypatch.setattr(auth_router, "_load_user", lambda username: (7, hashed, "admin"))
+    threads = []
+    real_verify = auth_router._bcrypt_verify
+
+    def tracking_verify(password, hashed_password):
+        threads.append(threading.current_thread().name)
+        return real_verify(password, hashed_password)
+
+    monkeypatch.setattr(auth_router, "_bcrypt_verify", tracking_verify)
+
+    assert "token" in _login("boss", "s3cret")
+    with pytest.raises(HTTPException) as exc_info:
+        _login("boss", "wrong")
+    assert exc_info.value.status_code == 401
+    assert all(name.startswith("password-verify") for name in threads) and len(threads) == 2
+
+
+def test_login_accepts_legacy_sha256_without_the_pool(monkeypatch):
+    legacy = hashlib.sha256(b"admin").hexdigest()
+    monkeypatch.setattr(auth_router, "_load_user", lambda username: (1, legacy, "admin"))
+    monkeypatch.setattr(
+        auth_router, "_bcrypt_verify", lambda *a: pytest.fail("bcrypt not needed")
+    )
+
+    assert "token" in _login("admin", "admin")
+
+
+def test_login_is_refused_when_verification_pool_is_saturated(monkeypatch):
+    hashed = auth_router.pwd_context.hash("s3cret")
+    monkeypatch.setattr(auth_router, "_load_user", lambda username: (7, hashed, "admin"))
+    monkeypatch.setattr(auth_router, "_verify_pending", auth_router.PASSWORD_VERIFY_MAX_PENDING)
+
+    with pytest.raises(HTTPException) as exc_info:
+        _login("boss", "s3cret")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
@@ -146,3 +146,29 @@ async def test_request_with_admin_token(monkeypatch):
     dependency = auth.require_scope("download")
     result = await dependency(request, context)
     assert result is context
+
+
+def test_admin_token_is_decoded_once_until_expiry(monkeypatch):
+    auth.clear_token_cache()
+    calls = []
+    real_decode = auth.decode_token
+
+    def counting_decode(token):
+        calls.append(token)
+        return real_decode(token)
+
+    monkeypatch.setattr(auth, "decode_token", counting_decode)
+    token = jwt_utils.create_token({"role": "admin"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    first = auth.require_admin_token(credentials)
+    first["role"] = "mutated"
+    assert auth.require_admin_token(credentials)["role"] == "admin"
+    assert calls == [token]
+
+    expired = jwt_utils.create_token({"role": "admin"}, expires_seconds=-10)
+    with pytest.raises(HTTPException):
+        auth.require_admin_token(
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=expired)
+        )
+    auth.clear_token_cache()
@@ -0,0 +1,142 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import booking
+from backend.services.seat_occupancy import SeatOccupancy, span_mask
+
+
+STOPS = (10, 20, 30, 40)
+
+
+class SeatTableCursor:
+    """Answers the kernel's statements from in-memory ``seat``/``available`` tables."""
+
+    def __init__(self, seats, tours=(1,)):
+        # seats: {seat_id: [tour_id, seat_num, available]}
+        self.seats = {seat_id: list(row) for seat_id, row in seats.items()}
+        self.available = {}
+        # keyed like the table's index: (tour_id, departure_order, arrival_order)
+        for tour_id in tours:
+            for i in range(len(STOPS)):
+                for j in range(i + 1, len(STOPS)):
+                    self.available[(tour_id, i, j)] = self._count(tour_id, i, j)
+        self.statements = []
+        self._rows = []
+
+    def _count(self, tour_id, idx_from, idx_to):
+        rows = [(sid, num, avail) for sid, (tour, num, avail) in self.seats.items() if tour == tour_id]
+        return SeatOccupancy(rows).free_count(span_mask(idx_from, idx_to))
+
+    def recount(self):
+        return {key: self._count(*key) for key in self.available}
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.statements.append(normalized.split(" ")[0])
+        self._rows = []
+        if normalized.startswith("SELECT t.route_id"):
+            self._rows = [(5, 2, None, stop, None) for stop in STOPS]
+        elif normalized.startswith("SELECT id, tour_id, seat_num, available FROM seat"):
+            ids, tours, nums = params
+            wanted = set(zip(tours, nums))
+            self._rows = [
+                (sid, tour, num, avail)
+                for sid, (tour, num, avail) in sorted(self.seats.items())
+                if sid in ids or (tour, num) in wanted
+            ]
+        elif normalized.startswith("UPDATE seat SET available"):
+            for seat_id, available in zip(*params):
+                self.seats[seat_id][2] = available
+        elif normalized.startswith("UPDATE available"):
+            assert "a.departure_order = d.dep_order" in normalized
+            for tour_id, idx_from, idx_to, delta in zip(*params):
+                self.available[(tour_id, idx_from, idx_to)] += delta
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def fetchall(self):
+        return self._rows
+
+
+def _route(cur, tour_id=1):
+    route = booking.load_route(cur, tour_id)
+    cur.statements.clear()
+    return route
+
+
+def test_allocate_books_many_seats_in_three_statements():
+    cur = SeatTableCursor({1: (1, 1, "123"), 2: (1, 2, "123"), 3: (1, 3, "23")})
+    route = _route(cur)
+
+    assert booking.allocate(cur, route, [2, 1], 10, 30) == [2, 1]
+
+    assert cur.statements == ["SELECT", "UPDATE", "UPDATE"]
+    assert cur.seats[1][2] == "3" and cur.seats[2][2] == "3"
+    assert cur.available == cur.recount()
+
+
+def test_allocate_rejects_conflicts_without_writing():
+    cur = SeatTableCursor({1: (1, 1, "1"), 2: (1, 2, "0"), 3: (1, 3, "123")})
+    route = _route(cur)
+
+    with pytest.raises(booking.SeatUnavailable):
+        booking.allocate(cur, route, [3, 1], 10, 30)
+    with pytest.raises(booking.SeatBlocked):
+        booking.allocate(cur, route, [2], 10, 20)
+    with pytest.raises(booking.SeatNotFound):
+        booking.allocate(cur, route, [9], 10, 20)
+    with pytest.raises(booking.SeatUnavailable):
+        booking.allocate(cur, route, [3, 3], 10, 20)
+    with pytest.raises(booking.BookingError) as exc_info:
+        booking.allocate(cur, route, [3], 30, 10)
+    assert exc_info.value.status_code == 400
+
+    assert "UPDATE" not in cur.statements
+    assert cur.seats[3][2] == "123"
+
+
+def test_release_restores_counters_exactly():
+    cur = SeatTableCursor({1: (1, 1, "3"), 2: (1, 2, "0")})
+    route = _route(cur)
+
+    booking.release(cur, [(route, 1, 10, 30), (route, 2, 20, 40), (route, 2, 99, 40)])
+
+    assert cur.statements == ["SELECT", "UPDATE", "UPDATE"]
+    assert cur.seats[1][2] == "123" and cur.seats[2][2] == "23"
+    assert cur.available == cur.recount()
+
+
+def test_move_within_seat_allows_overlapping_span():
+    cur = SeatTableCursor({1: (1, 1, "3")})
+    route = _route(cur)
+
+    seat_id = booking.move(cur, route, 1, 10, 30, target_arrival_stop_id=20)
+
+    assert seat_id == 1
+    assert cur.seats[1][2] == "23"
+    assert cur.available == cur.recount()
+
+
+def test_move_to_other_tour_updates_both_tours_at_once():
+    cur = SeatTableCursor({1: (1, 4, "3"), 2: (2, 4, "123"), 3: (2, 5, "123")}, tours=(1, 2))
+    source = _route(cur, 1)
+    target = _route(cur, 2)
+
+    seat_id = booking.move(cur, source, 1, 10, 30, target=target, seat_num=5)
+
+    assert seat_id == 3
+    assert cur.statements == ["SELECT", "UPDATE", "UPDATE"]
+    assert cur.seats[1][2] == "123" and cur.seats[3][2] == "3"
+    assert cur.available == cur.recount()
+
+
+def test_move_to_same_seat_is_a_no_op():
+    cur = SeatTableCursor({1: (1, 1, "3")})
+    route = _route(cur)
+
+    assert booking.move(cur, route, 1, 10, 30, seat_num=1) == 1
+    assert cur.statements == ["SELECT"]
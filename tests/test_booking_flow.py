@@ -33,6 +33,11 @@ class DummyCursor:
         return [1]
 
     def fetchall(self):
+        if "join routestop" in self.query.lower():
+            return [(1, 1, date(2024, 1, 1), stop_id, time(7 + stop_id, 0)) for stop_id in (1, 2, 3, 4)]
+        if "seat_num, available" in self.query.lower():
+            _ids, tour_ids, seat_nums = self.queries[-1][1]
+            return [(num, tour, num, "1234") for tour, num in zip(tour_ids, seat_nums)]
         q = self.query.lower()
         if "select stop_id, departure_time from routestop" in q:
             return [
@@ -152,16 +157,25 @@ def client(monkeypatch):
     import backend.database
     monkeypatch.setattr('backend.database.get_connection', fake_get_connection)
     monkeypatch.setattr('backend.ticket_utils.free_ticket', lambda *a, **k: None)
-    monkeypatch.setattr('backend.routers.purchase.free_ticket', lambda *a, **k: None)
+    monkeypatch.setattr('backend.routers.purchase.free_tickets', lambda *a, **k: None)
     monkeypatch.setattr('backend.services.ticket_links.issue', fake_issue)
     monkeypatch.setattr('backend.services.ticket_links.verify', fake_verify)
-    monkeypatch.setattr('backend.routers._ticket_link_helpers.get_or_create_view_session', fake_get_or_create_view_session)
-    monkeypatch.setattr('backend.routers.purchase.render_ticket_pdf', lambda *a, **k: b'%PDF-FAKE%')
-    monkeypatch.setattr(
-        'backend.routers.purchase.render_ticket_email',
-        lambda dto, deep_link, lang: ("subject", "<p>body</p>"),
-    )
-    monkeypatch.setattr('backend.routers.purchase.send_ticket_email', lambda *a, **k: None)
+
+    def fake_get_or_create_view_sessions(requests, *, lang, scopes=None, conn=None):
+        return {
+            ticket_id: fake_get_or_create_view_session(
+                ticket_id,
+                purchase_id=purchase_id,
+                lang=lang,
+                departure_dt=departure_dt,
+                scopes=scopes,
+                conn=conn,
+            )
+            for ticket_id, purchase_id, departure_dt in requests
+        }
+
+    monkeypatch.setattr('backend.routers._ticket_link_helpers.get_or_create_view_sessions', fake_get_or_create_view_sessions)
+    monkeypatch.setattr('backend.routers.purchase.enqueue_ticket_emails', lambda *a, **k: [])
     if 'backend.main' in sys.modules:
         importlib.reload(sys.modules['backend.main'])
     else:
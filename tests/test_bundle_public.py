@@ -78,8 +78,11 @@ def client(monkeypatch):
     else:
         importlib.import_module("backend.main")
     app = sys.modules["backend.main"].app
-    monkeypatch.setattr("backend.routers.bundle.get_connection", fake_get_connection)
-    return TestClient(app)
+    monkeypatch.setattr("backend.async_database.ASYNC_DB_ENABLED", False)
+    from backend.services import bundle_cache
+    bundle_cache.invalidate()
+    yield TestClient(app)
+    bundle_cache.invalidate()
 
 def test_routes_bundle(client):
     resp = client.post("/selected_route", json={"lang": "en"})
@@ -145,7 +148,7 @@ def test_pricelist_bundle_missing_is_demo(client, monkeypatch):
         def __init__(self):
             self.cursor_obj = NoDemoCursor()
 
-    monkeypatch.setattr("backend.routers.bundle.get_connection", lambda: NoDemoConn())
+    monkeypatch.setattr("backend.database.get_connection", lambda: NoDemoConn())
     resp = client.post("/selected_pricelist", json={"lang": "en"})
     assert resp.status_code == 200
     data = resp.json()
@@ -163,3 +166,61 @@ def test_selected_route_options(client):
     # The CORS middleware should echo back the requesting origin.
     assert resp.headers.get("access-control-allow-origin") == "http://localhost:4000"
 
+
+def test_bundle_responses_are_cached_with_etag(client, monkeypatch):
+    connections = {"count": 0}
+
+    def counting_connection():
+        connections["count"] += 1
+        return DummyConn()
+
+    monkeypatch.setattr("backend.database.get_connection", counting_connection)
+
+    first = client.post("/selected_route", json={"lang": "en"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+
+    second = client.get("/selected_route", params={"lang": "en"})
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+
+    not_modified = client.get(
+        "/selected_route", params={"lang": "en"}, headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert connections["count"] == 1
+
+
+def test_admin_bundle_update_invalidates_cache(client, monkeypatch):
+    from backend.auth import require_admin_token
+    from backend.main import app
+
+    connections = {"count": 0, "admin": 0}
+
+    def counting_connection():
+        connections["count"] += 1
+        return DummyConn()
+
+    def admin_connection():
+        connections["admin"] += 1
+        return DummyConn()
+
+    # Public reads go through backend.database; the admin router holds its own reference.
+    monkeypatch.setattr("backend.database.get_connection", counting_connection)
+    monkeypatch.setattr("backend.routers.bundle.get_connection", admin_connection)
+    app.dependency_overrides[require_admin_token] = lambda: None
+    try:
+        client.post("/selected_pricelist", json={"lang": "en"})
+        client.post("/selected_pricelist", json={"lang": "en"})
+        assert connections["count"] == 1
+
+        resp = client.post("/admin/selected_pricelist", json={"pricelist_id": 5})
+        assert resp.status_code == 200
+        assert connections["admin"] == 1
+
+        client.post("/selected_pricelist", json={"lang": "en"})
+        assert connections["count"] == 2
+    finally:
+        app.dependency_overrides.pop(require_admin_token, None)
@@ -3,7 +3,6 @@ from datetime import date, time
 from types import SimpleNamespace
 
 import pytest
-from fastapi import BackgroundTasks
 from starlette.requests import Request
 
 sys.path.append('.')
@@ -87,6 +86,21 @@ def email_test_env(monkeypatch):
                     (4, state["stop_times"][4]),
                 ]
                 self.last_fetch_mode = "all"
+            elif "join routestop" in q:
+                self.last_result = [
+                    (1, 1, state["tour_date"], stop_id, state["stop_times"][stop_id])
+                    for stop_id in (1, 2, 3, 4)
+                ]
+                self.last_fetch_mode = "all"
+            elif "seat_num, available" in q:
+                _ids, tour_ids, seat_nums = params
+                if seat_nums:
+                    state["current_seat_num"] = seat_nums[0]
+                self.last_result = [
+                    (seat_num, tour_id, seat_num, "1234")
+                    for tour_id, seat_num in zip(tour_ids, seat_nums)
+                ]
+                self.last_fetch_mode = "all"
             elif "select id, available from seat" in q:
                 if params:
                     state["current_seat_num"] = params[1]
@@ -243,7 +257,7 @@ def email_test_env(monkeypatch):
             return FakeCursor(self.state)
 
         def commit(self):
-            pass
+            self.state["commits"] = self.state.get("commits", 0) + 1
 
         def rollback(self):
             pass
@@ -263,15 +277,21 @@ def email_test_env(monkeypatch):
             results.append({"ticket_id": spec["ticket_id"], "deep_link": deep_link})
         return results
 
-    def fake_send(to, subject, html_body, pdf_bytes):
-        state["emails"].append(
-            {
-                "to": to,
-                "subject": subject,
-                "html": html_body,
-                "pdf": pdf_bytes,
-            }
-        )
+    def fake_enqueue_ticket_emails(tickets, recipient, lang, conn=None):
+        ids = []
+        for ticket_id, deep_link in tickets:
+            state["emails"].append(
+                {
+                    "to": recipient,
+                    "ticket_id": ticket_id,
+                    "lang": lang,
+                    "deep_link": deep_link,
+                    "conn": conn,
+                    "commits_before": state.get("commits", 0),
+                }
+            )
+            ids.append(len(state["emails"]))
+        return ids
 
     def fake_get_ticket_dto(ticket_id, lang, conn):
         ticket = next((t for t in state["tickets"] if t["id"] == ticket_id), None)
@@ -339,8 +359,8 @@ def email_test_env(monkeypatch):
 
     monkeypatch.setattr(purchase_router, 'get_connection', fake_get_connection)
     monkeypatch.setattr(purchase_router, 'issue_ticket_links', fake_issue_ticket_links)
-    monkeypatch.setattr(purchase_router, 'render_ticket_pdf', lambda dto, deep_link: b'%PDF-FAKE%')
-    monkeypatch.setattr(purchase_router, 'send_ticket_email', fake_send)
+    monkeypatch.setattr(purchase_router, 'enqueue_ticket_emails', fake_enqueue_ticket_emails)
+    monkeypatch.setattr(purchase_router.jobs, 'enqueue_many', lambda kind, payloads, **kwargs: [])
     monkeypatch.setattr(purchase_router, 'get_ticket_dto', fake_get_ticket_dto)
     monkeypatch.setattr(
         purchase_router.liqpay,
@@ -400,12 +420,7 @@ def test_render_ticket_email_localization(lang, expected_subject, marker):
     assert marker in html
 
 
-def _run_background_tasks(tasks: BackgroundTasks) -> None:
-    for task in tasks.tasks:
-        task.func(*task.args, **task.kwargs)
-
-
-def test_create_purchase_sends_email(email_test_env):
+def test_create_purchase_queues_email(email_test_env):
     state, purchase_router = email_test_env
 
     data = purchase_router.PurchaseCreate(
@@ -420,20 +435,18 @@ def test_create_purchase_sends_email(email_test_env):
         discount_count=0,
         lang="en",
     )
-    tasks = BackgroundTasks()
-
-    purchase_router.create_purchase(data, background_tasks=tasks)
-    assert tasks.tasks, "Expected background email task to be scheduled"
-
-    _run_background_tasks(tasks)
+    purchase_router.create_purchase(data)
 
     emails = state["emails"]
     assert len(emails) == 1
     email = emails[0]
     assert email["to"] == "alice@example.com"
-    assert email["pdf"] == b"%PDF-FAKE%"
-    assert "https://example.test/api/q/opaque-1" in email["html"]
-    assert "Your ticket" in email["subject"]
+    assert email["lang"] == "en"
+    assert email["deep_link"] == "https://example.test/api/q/opaque-1"
+    # Queued on the purchase's connection, inside the transaction.
+    assert email["conn"] is not None
+    assert email["commits_before"] == 0
+    assert state["commits"] == 1
 
 
 def test_admin_pay_booking_is_rejected_with_redirect_hint(email_test_env):
@@ -451,13 +464,10 @@ def test_admin_pay_booking_is_rejected_with_redirect_hint(email_test_env):
         discount_count=0,
         lang="en",
     )
-    initial_tasks = BackgroundTasks()
-    purchase_router.create_purchase(data, background_tasks=initial_tasks)
-    _run_background_tasks(initial_tasks)
+    purchase_router.create_purchase(data)
 
     state["emails"].clear()
 
-    pay_tasks = BackgroundTasks()
     scope = {"type": "http", "headers": [], "query_string": b""}
     request = Request(scope)
     request.state.is_admin = True
@@ -476,7 +486,6 @@ def test_admin_pay_booking_is_rejected_with_redirect_hint(email_test_env):
         == "Use /purchase/{purchase_id}/pay for admin offline payment"
     )
     assert state["emails"] == []
-    assert pay_tasks.tasks == []
 
 
 def test_pay_booking_not_found_does_not_mutate_or_email(email_test_env):
@@ -484,7 +493,6 @@ def test_pay_booking_not_found_does_not_mutate_or_email(email_test_env):
 
     state["emails"].clear()
 
-    pay_tasks = BackgroundTasks()
     scope = {"type": "http", "headers": [], "query_string": b""}
     request = Request(scope)
     context = SimpleNamespace(is_admin=False, scopes=["pay"], purchase_id=404)
@@ -500,7 +508,6 @@ def test_pay_booking_not_found_does_not_mutate_or_email(email_test_env):
     assert state["purchases"] == {}
     assert state["sales"] == []
     assert state["emails"] == []
-    assert pay_tasks.tasks == []
 
 
 def test_pay_booking_non_positive_amount_due_rejected(email_test_env):
@@ -517,7 +524,6 @@ def test_pay_booking_non_positive_amount_due_rejected(email_test_env):
 
     state["emails"].clear()
 
-    pay_tasks = BackgroundTasks()
     scope = {"type": "http", "headers": [], "query_string": b""}
     request = Request(scope)
     with pytest.raises(purchase_router.HTTPException) as exc_info:
@@ -531,7 +537,6 @@ def test_pay_booking_non_positive_amount_due_rejected(email_test_env):
     assert state["purchases"][1]["status"] == "reserved"
     assert state["sales"] == []
     assert state["emails"] == []
-    assert pay_tasks.tasks == []
 
 
 @pytest.mark.parametrize("blocked_status", ["cancelled", "refunded"])
@@ -549,7 +554,6 @@ def test_pay_booking_blocked_status_rejected(email_test_env, blocked_status):
 
     state["emails"].clear()
 
-    pay_tasks = BackgroundTasks()
     scope = {"type": "http", "headers": [], "query_string": b""}
     request = Request(scope)
     with pytest.raises(purchase_router.HTTPException) as exc_info:
@@ -563,7 +567,6 @@ def test_pay_booking_blocked_status_rejected(email_test_env, blocked_status):
     assert state["purchases"][1]["status"] == blocked_status
     assert state["sales"] == []
     assert state["emails"] == []
-    assert pay_tasks.tasks == []
 
 
 def test_non_admin_pay_booking_returns_payload_without_status_change(email_test_env):
@@ -580,7 +583,6 @@ def test_non_admin_pay_booking_returns_payload_without_status_change(email_test_
 
     state["emails"].clear()
 
-    pay_tasks = BackgroundTasks()
     scope = {"type": "http", "headers": [], "query_string": b""}
     request = Request(scope)
     context = SimpleNamespace(is_admin=False, scopes=["pay"], purchase_id=1, jti="token-jti")
@@ -596,4 +598,3 @@ def test_non_admin_pay_booking_returns_payload_without_status_change(email_test_
     assert state["purchases"][1]["status"] == "reserved"
     assert state["sales"] == []
     assert state["emails"] == []
-    assert pay_tasks.tasks == []
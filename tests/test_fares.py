@@ -0,0 +1,95 @@
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import fares
+
+
+class PricesCursor:
+    def __init__(self, rows, extra=None):
+        self.rows = rows
+        self.extra = extra or {}
+        self.queries = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.queries.append(normalized)
+        if normalized.startswith("SELECT departure_stop_id, arrival_stop_id, price"):
+            self._result = list(self.rows)
+        elif normalized.startswith("SELECT price FROM prices"):
+            price = self.extra.get((params[1], params[2]))
+            self._result = [(price,)] if price is not None else []
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+
+@pytest.fixture(autouse=True)
+def clear_matrices():
+    fares.invalidate()
+    yield
+    fares.invalidate()
+
+
+def test_matrix_is_loaded_once_per_pricelist():
+    cur = PricesCursor([(1, 2, Decimal("10.00")), (1, 3, Decimal("15.50")), (2, 3, Decimal("6"))])
+
+    assert fares.base_price(cur, 7, 1, 3) == 15.5
+    assert fares.base_price(cur, 7, 2, 3) == 6.0
+    assert len(cur.queries) == 1
+    assert len(fares.get_matrix(cur, 7)) == 3
+
+
+def test_quote_many_prices_by_route_position():
+    cur = PricesCursor(
+        [(30, 10, Decimal("100")), (10, 20, Decimal("40")), (30, 20, Decimal("130"))],
+        extra={(10, 30): Decimal("60")},
+    )
+    # Route order 30 -> 10 -> 20 differs from stop-id order.
+    stops = (30, 10, 20)
+
+    quotes = fares.quote_many(
+        cur,
+        7,
+        stops,
+        [
+            fares.FareRequest(30, 10, adults=1, discounted=1, baggage=2),
+            fares.FareRequest(10, 20),
+            fares.FareRequest(30, 20, adults=0, baggage=1),
+            fares.FareRequest(10, 30),
+            fares.FareRequest(10, 99),
+        ],
+    )
+
+    assert quotes == [215.0, 40.0, 13.0, 60.0, None]
+    # One matrix load plus the point lookup for the pair it lacked.
+    assert len(cur.queries) == 2
+
+    route = fares.get_matrix(cur, 7).for_route(stops)
+    assert route.positions == {30: 0, 10: 1, 20: 2}
+    assert fares.get_matrix(cur, 7).for_route(list(stops)) is route
+
+
+def test_fare_rules():
+    assert fares.fare_total(100, adults=1, discounted=1, baggage=2) == 215.0
+    assert fares.ticket_value(100, 1) == 110.0
+    assert fares.ticket_value(100, discounted=True) == 95.0
+
+
+def test_missing_pair_falls_back_and_reloads_after_invalidate():
+    cur = PricesCursor([(1, 2, Decimal("10"))], extra={(2, 3): Decimal("7")})
+
+    assert fares.base_price(cur, 7, 2, 3) == 7.0
+    assert fares.base_price(cur, 7, 3, 4) is None
+
+    cur.rows = [(1, 2, Decimal("12"))]
+    fares.invalidate(7)
+    assert fares.base_price(cur, 7, 1, 2) == 12.0
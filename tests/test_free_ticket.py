@@ -13,25 +13,23 @@ from backend.services import ticket_links
 class StubCursor:
     def __init__(self):
         self._result: Any = None
-        self.available = "12"
+        self.available = "0"
         self.jtis = ["jti-1", "jti-2"]
         self.queries: List[Tuple[str, Tuple[Any, ...]]] = []
 
     def execute(self, query, params=None):
         normalized = " ".join(query.split()).lower()
         self.queries.append((normalized, params or tuple()))
-        if normalized.startswith("select tour_id"):
-            self._result = (5, 7, 1, 3)
+        if normalized.startswith("select id, tour_id, seat_id"):
+            self._result = [(params[0][0], 5, 7, 1, 3)]
         elif "select jti from ticket_link_tokens" in normalized:
             self._result = [(jti,) for jti in self.jtis]
-        elif normalized.startswith("select route_id"):
-            self._result = (11,)
-        elif "select stop_id from routestop" in normalized:
-            self._result = [(1,), (2,), (3,)]
-        elif normalized.startswith("select available from seat"):
-            self._result = (self.available,)
+        elif normalized.startswith("select t.route_id"):
+            self._result = [(11, 2, None, stop_id, None) for stop_id in (1, 2, 3)]
+        elif normalized.startswith("select id, tour_id, seat_num, available from seat"):
+            self._result = [(7, 5, 4, self.available)]
         elif normalized.startswith("update seat set available"):
-            self.available = params[0]
+            self.available = params[1][0]
             self._result = None
         elif normalized.startswith("update available"):
             self._result = None
@@ -76,16 +74,18 @@ def test_free_ticket_revokes_tokens(monkeypatch):
     assert revoked == ["jti-1", "jti-2"]
 
 
-def test_free_ticket_updates_available_like_booking(monkeypatch):
+def test_free_ticket_restores_seat_and_counters(monkeypatch):
     monkeypatch.setattr(ticket_links, "revoke", lambda *_: True)
 
     cursor = StubCursor()
     free_ticket(cursor, ticket_id=99)
 
+    assert cursor.available == "12"
     updates = [
         params
         for query, params in cursor.queries
-        if query.startswith("update available set seats = seats + 1")
+        if query.startswith("update available")
     ]
-    assert updates, "Expected available update query to be executed"
-    assert updates[-1] == (5, 11, 11, 3, 11, 11, 1)
+    # Every stop pair of the route gains the released seat, keyed by route position.
+    assert updates == [([5, 5, 5], [0, 0, 1], [1, 2, 2], [1, 1, 1])]
+    assert cursor.queries[-1] == ("delete from ticket where id = any(%s)", ([99],))
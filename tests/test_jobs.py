@@ -0,0 +1,152 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import jobs
+from conftest import FakeDatabase
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._one = None
+        self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.events.append(("execute", normalized.split(" ")[0]))
+        self.db.queries.append((normalized, params))
+        self._one, self._all = None, []
+        if normalized.startswith("INSERT INTO job_queue"):
+            key = (params[0], params[-1])
+            if params[-1] is not None and key in self.db.keys:
+                return
+            self.db.keys[key] = len(self.db.keys) + 1
+            self._one = (self.db.keys[key],)
+        elif "FOR UPDATE SKIP LOCKED" in normalized:
+            self._all = self.db.pending
+
+    def fetchone(self):
+        return self._one
+
+    def fetchall(self):
+        return self._all
+
+
+class JobQueueDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        self.keys = {}
+        self.pending = []
+
+    def outcomes(self):
+        return [
+            (q.split(" ")[0], p)
+            for q, p in self.queries
+            if q.startswith(("DELETE FROM job_queue", "UPDATE job_queue SET", "WITH moved"))
+        ]
+
+
+@pytest.fixture
+def db(monkeypatch, dummy_psycopg):
+    fake = JobQueueDatabase()
+    monkeypatch.setattr(jobs, "get_connection", fake.get_connection)
+    monkeypatch.setattr(jobs, "_handlers", {})
+    return fake
+
+
+def test_enqueue_deduplicates_queued_jobs(db):
+    first = jobs.enqueue("checkbox.fiscalize", {"purchase_id": 5}, dedup_key="5")
+    again = jobs.enqueue("checkbox.fiscalize", {"purchase_id": 5}, dedup_key="5")
+    other = jobs.enqueue("telegram.purchase_event", {"purchase_id": 5})
+
+    assert first == 1
+    assert again is None
+    assert other == 2
+    assert db.queries[0][1][1] == '{"purchase_id": 5}'
+
+
+def test_process_pending_runs_by_priority_and_records_outcomes(db):
+    db.pending = [
+        (3, "flaky", {}, jobs.PRIORITY_NORMAL, 1, 8),
+        (1, "ok", '{"n": 1}', jobs.PRIORITY_LOW, 1, 8),
+        (2, "ok", {"n": 2}, jobs.PRIORITY_HIGH, 1, 8),
+        (4, "flaky", {}, jobs.PRIORITY_NORMAL, 8, 8),
+        (5, "bad", {}, jobs.PRIORITY_NORMAL, 1, 8),
+        (6, "unknown", {}, jobs.PRIORITY_NORMAL, 1, 8),
+    ]
+    seen = []
+
+    @jobs.handler("ok")
+    def _ok(job):
+        seen.append((job.id, job.payload["n"]))
+
+    @jobs.handler("flaky")
+    def _flaky(job):
+        raise RuntimeError("temporary")
+
+    @jobs.handler("bad")
+    def _bad(job):
+        raise jobs.JobRejected("never")
+
+    assert jobs.process_pending() == 6
+
+    assert seen == [(2, 2), (1, 1)]
+    outcomes = db.outcomes()
+    assert ("DELETE", (2,)) in outcomes and ("DELETE", (1,)) in outcomes
+    retry = next(p for verb, p in outcomes if verb == "UPDATE")
+    assert retry[1:] == (jobs._retry_delay(1), 3)
+    dead = sorted(p[0] for verb, p in outcomes if verb == "WITH")
+    assert dead == [4, 5, 6]
+    # The claim is committed before any handler runs.
+    assert db.events[:2] == [("execute", "UPDATE"), ("commit", None)]
+
+
+def test_jobs_log_under_the_enqueuing_request_id(db):
+    from backend.log_config import get_request_id, request_context
+
+    with request_context("req-42"):
+        jobs.enqueue("ok", {"n": 1})
+    payload = db.queries[0][1][1]
+    assert '"_request_id": "req-42"' in payload
+
+    db.pending = [(7, "ok", payload, jobs.PRIORITY_NORMAL, 1, 8), (8, "ok", {}, jobs.PRIORITY_NORMAL, 1, 8)]
+    seen = []
+
+    @jobs.handler("ok")
+    def _ok(job):
+        seen.append(get_request_id())
+
+    jobs.process_pending()
+    assert seen == ["req-42", "job-8"]
+    assert get_request_id() is None
+
+
+def test_web_app_runs_workers_only_when_enabled(monkeypatch):
+    from backend import main, worker
+
+    started = []
+    monkeypatch.setattr(
+        worker, "start_background_workers", lambda stop, **kwargs: started.append(kwargs)
+    )
+
+    monkeypatch.delenv("BACKGROUND_WORKERS_IN_PROCESS", raising=False)
+    main._start_background_workers()
+    assert started == []
+
+    monkeypatch.setenv("BACKGROUND_WORKERS_IN_PROCESS", "1")
+    main._start_background_workers()
+    main._stop_background_workers()
+    assert started == [{"threads": 1}]
+    assert main._background_stop.is_set()
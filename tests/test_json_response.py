@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.models import BookingTermsEnum
+from backend.utils.json_response import FastJSONResponse, dumps
+
+
+class _Stop(BaseModel):
+    id: int
+    name: str
+
+
+def _payload():
+    return {
+        "amount": Decimal("120.50"),
+        "count": Decimal("3"),
+        "date": date(2026, 11, 3),
+        "deadline": datetime(2026, 11, 1, 12, 30),
+        "time": time(6, 15),
+        "terms": BookingTermsEnum.NO_EXPIRY,
+        "stop": _Stop(id=1, name="Софія"),
+        "tags": {"vip"},
+        "items": [{"price": Decimal("0.1"), "note": None}],
+        4: "non-string key",
+    }
+
+
+def _expected():
+    # Round-trip through the stdlib so keys are compared as JSON strings.
+    return json.loads(json.dumps(jsonable_encoder(_payload())))
+
+
+def test_dumps_matches_jsonable_encoder():
+    assert json.loads(dumps(_payload())) == _expected()
+
+
+def test_fast_json_response_renders_payload_as_is():
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/payload")
+    def payload():
+        return FastJSONResponse(_payload(), headers={"X-Total-Count": "1"})
+
+    response = TestClient(app).get("/payload")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["X-Total-Count"] == "1"
+    assert response.json() == _expected()
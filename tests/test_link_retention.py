@@ -0,0 +1,84 @@
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import link_retention
+from conftest import FakeDatabase
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.queries.append(normalized)
+        if normalized.startswith("SELECT COUNT(*) FROM"):
+            self._row = (self.db.expired[normalized.split()[3]],)
+        elif "DELETE FROM" in normalized:
+            table = normalized.split("DELETE FROM ")[1].split()[0]
+            self.rowcount = min(self.db.expired[table], params[-1])
+            self.db.expired[table] -= self.rowcount
+
+    def fetchone(self):
+        return self._row
+
+
+class RetentionDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        self.expired = {"link_sessions": 5, "ticket_link_tokens": 1}
+
+
+@pytest.fixture
+def fake_db(monkeypatch, dummy_psycopg):
+    db = RetentionDatabase()
+    monkeypatch.setattr(link_retention, "get_connection", db.get_connection)
+    monkeypatch.setattr(link_retention, "BATCH_PAUSE_SECONDS", 0)
+    return db
+
+
+def test_dry_run_only_counts(fake_db):
+    stats = link_retention.run_once(dry_run=True, archive=False)
+
+    assert stats.tables["link_sessions"].eligible == 5
+    assert stats.tables["ticket_link_tokens"].eligible == 1
+    assert fake_db.expired == {"link_sessions": 5, "ticket_link_tokens": 1}
+    assert not any("DELETE" in q for q in fake_db.queries)
+
+
+def test_purge_runs_in_batches_and_records_metrics(fake_db):
+    before = link_retention.metrics()["deleted"]
+
+    stats = link_retention.run_once(
+        grace=timedelta(days=1), batch_size=2, dry_run=False, archive=False
+    )
+
+    assert stats.tables["link_sessions"].deleted == 5
+    assert stats.tables["link_sessions"].batches == 3
+    assert stats.tables["ticket_link_tokens"].deleted == 1
+    assert fake_db.commits == 4
+    snapshot = link_retention.metrics()
+    assert snapshot["deleted"] - before == 6
+    assert snapshot["last_run"]["tables"]["link_sessions"]["deleted"] == 5
+
+
+def test_archive_moves_rows(fake_db):
+    stats = link_retention.run_once(batch_size=10, dry_run=False, archive=True)
+
+    assert stats.tables["link_sessions"].archived == 5
+    assert any("INSERT INTO link_sessions_archive" in q for q in fake_db.queries)
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import link_sessions
+from conftest import FakeDatabase
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.queries.append((normalized, params))
+        hook = self.db.hooks.pop(normalized.split(" SET ")[0].split(",")[0], None)
+        if hook:
+            hook()
+        self._row = None
+        self._rows = []
+        if normalized.startswith("SELECT jti, ticket_id"):
+            self._row = self.db.sessions.get(params[0])
+        elif normalized.startswith("SELECT DISTINCT ON (ticket_id)"):
+            self._rows = [
+                (row[1], row[0], row[4])
+                for row in self.db.sessions.values()
+                if row[1] in params[0] and row[3] == "view"
+            ]
+        elif normalized.startswith("INSERT INTO link_sessions"):
+            jtis, ticket_ids, purchase_ids, exps = params
+            self._rows = list(zip(ticket_ids, jtis, exps))
+        elif normalized.startswith("UPDATE link_sessions SET redeemed"):
+            self._row = self.db.sessions.get(params[0])
+        elif normalized.startswith("UPDATE link_sessions SET revoked"):
+            self.rowcount = 1
+
+    def fetchone(self):
+        return self._row
+
+    def fetchall(self):
+        return self._rows
+
+
+class SessionDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        now = datetime.now(timezone.utc)
+        self.sessions = {
+            "opaque": (
+                "opaque", 5, 9, "view", now + timedelta(days=1), now, None, None, now
+            ),
+        }
+        # Statement prefix -> callback run once before that statement.
+        self.hooks = {}
+
+
+@pytest.fixture
+def fake_db(monkeypatch, dummy_psycopg):
+    db = SessionDatabase()
+    monkeypatch.setattr(link_sessions, "get_connection", db.get_connection)
+    monkeypatch.setattr(link_sessions, "_SCHEMA_READY", True)
+    link_sessions.reset_session_cache()
+    yield db
+    link_sessions.reset_session_cache()
+
+
+def test_get_session_is_cached_until_revoked(fake_db):
+    assert link_sessions.get_session("opaque", scope="view", require_redeemed=True)
+    assert link_sessions.get_session("opaque", scope="view", require_redeemed=True)
+    assert fake_db.connections == 1
+    assert link_sessions.get_session("opaque", scope="download") is None
+
+    link_sessions.revoke_ticket_sessions(5)
+    del fake_db.sessions["opaque"]
+    assert link_sessions.get_session("opaque", scope="view") is None
+
+
+def test_revocation_invalidates_after_the_update(fake_db):
+    # A lookup that lands while the UPDATE is in flight still sees the row...
+    fake_db.hooks["UPDATE link_sessions"] = lambda: link_sessions.get_session("opaque")
+    link_sessions.revoke_ticket_sessions(5)
+    del fake_db.sessions["opaque"]
+
+    # ...but the entry it cached is dropped once the revocation is written.
+    assert link_sessions.get_session("opaque") is None
+
+
+def test_load_racing_a_revocation_is_not_cached(fake_db):
+    fake_db.hooks["SELECT jti"] = lambda: link_sessions.revoke_ticket_sessions(5)
+    assert link_sessions.get_session("opaque") is not None
+
+    del fake_db.sessions["opaque"]
+    assert link_sessions.get_session("opaque") is None
+
+
+def test_redeem_on_callers_connection_is_not_cached(fake_db):
+    conn = fake_db.get_connection()
+    assert link_sessions.redeem_session("opaque", scope="view", conn=conn)
+    del fake_db.sessions["opaque"]
+    assert link_sessions.get_session("opaque") is None
+
+    fake_db.sessions["opaque"] = SessionDatabase().sessions["opaque"]
+    assert link_sessions.redeem_session("opaque", scope="view")
+    del fake_db.sessions["opaque"]
+    assert link_sessions.get_session("opaque") is not None
+
+
+class AsyncConnection:
+    """Awaitable view of a fake connection, like ``async_connection``."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cursor(self):
+        return AsyncCursor(self.conn.cursor())
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def execute(self, query, params=None):
+        self.cursor.execute(query, params)
+
+    async def fetchone(self):
+        return self.cursor.fetchone()
+
+
+def test_async_lookup_uses_callers_connection_and_cache(monkeypatch, fake_db):
+    monkeypatch.setattr(link_sessions, "USAGE_FLUSH_INTERVAL_SECONDS", 3600)
+    monkeypatch.setattr(link_sessions, "_last_usage_flush", float("inf"))
+    conn = AsyncConnection(fake_db.get_connection())
+
+    async def lookups():
+        first = await link_sessions.get_session_async(
+            "opaque", scope="view", require_redeemed=True, conn=conn
+        )
+        touched = await link_sessions.touch_session_usage_async(
+            "opaque", scope="view", conn=conn
+        )
+        return first, touched
+
+    first, touched = asyncio.run(lookups())
+    assert first is not None and touched.used is not None
+    assert fake_db.connections == 1
+    assert len(fake_db.queries) == 1
+    assert link_sessions.get_session("opaque") == first
+
+
+def test_touch_usage_is_written_in_batches(monkeypatch, fake_db):
+    monkeypatch.setattr(link_sessions, "USAGE_FLUSH_INTERVAL_SECONDS", 3600)
+    monkeypatch.setattr(link_sessions, "_last_usage_flush", float("inf"))
+
+    for _ in range(3):
+        assert link_sessions.touch_session_usage("opaque", scope="view").used is not None
+    assert not [q for q, _ in fake_db.queries if q.startswith("UPDATE")]
+
+    assert link_sessions.flush_session_usage() == 1
+    updates = [(q, p) for q, p in fake_db.queries if q.startswith("UPDATE")]
+    assert len(updates) == 1
+    assert "unnest" in updates[0][0]
+    assert updates[0][1][0] == ["opaque"]
+    assert link_sessions.flush_session_usage() == 0
+
+
+def test_bulk_issue_reuses_active_sessions_and_inserts_once(fake_db):
+    departure = datetime.now(timezone.utc) + timedelta(hours=3)
+    sessions = link_sessions.get_or_create_view_sessions(
+        [(5, 9, departure), (6, 9, departure), (7, 9, departure), (6, 9, departure)],
+        lang="bg",
+    )
+
+    assert sessions[5][0] == "opaque"
+    assert set(sessions) == {5, 6, 7}
+    assert sessions[6][0] != sessions[7][0]
+    assert fake_db.connections == 1
+    # One lookup for all tickets plus one INSERT for the missing ones.
+    assert len(fake_db.queries) == 2
+    insert_params = fake_db.queries[1][1]
+    assert insert_params[1] == [6, 7]
+    assert insert_params[2] == [9, 9]
@@ -4,48 +4,6 @@ import os
 import sys
 from dataclasses import dataclass
 
-import psycopg2
-
-
-class _DummyPsycopgCursor:
-    def __enter__(self):  # pragma: no cover - context helper
-        return self
-
-    def __exit__(self, exc_type, exc, tb):  # pragma: no cover - context helper
-        return None
-
-    def execute(self, *args, **kwargs):
-        return None
-
-    def fetchone(self):
-        return None
-
-    def fetchall(self):
-        return []
-
-    def close(self):
-        return None
-
-
-class _DummyPsycopgConnection:
-    def __init__(self):
-        self.autocommit = False
-
-    def cursor(self):
-        return _DummyPsycopgCursor()
-
-    def commit(self):
-        return None
-
-    def rollback(self):
-        return None
-
-    def close(self):
-        return None
-
-
-psycopg2.connect = lambda *args, **kwargs: _DummyPsycopgConnection()  # type: ignore
-
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from backend.services import link_sessions
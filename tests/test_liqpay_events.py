@@ -0,0 +1,123 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import liqpay_events
+from conftest import FakeDatabase
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._one = None
+        self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.queries.append((normalized, params))
+        self._one, self._all = None, []
+        if normalized.startswith("INSERT INTO liqpay_callback_event"):
+            key = (params[1], params[2], params[3])
+            if key in self.db.keys:
+                return
+            self.db.keys[key] = len(self.db.keys) + 1
+            self._one = (self.db.keys[key],)
+        elif normalized.startswith("SELECT id FROM liqpay_callback_event"):
+            self._one = (self.db.keys[tuple(params)],)
+        elif "FOR UPDATE SKIP LOCKED" in normalized:
+            self._all = self.db.pending
+
+    def fetchone(self):
+        return self._one
+
+    def fetchall(self):
+        return self._all
+
+
+class CallbackDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        self.keys = {}
+        self.pending = []
+
+    def updates(self):
+        return [
+            (q, p)
+            for q, p in self.queries
+            if q.startswith("UPDATE liqpay_callback_event") and "SKIP LOCKED" not in q
+        ]
+
+
+@pytest.fixture
+def db(monkeypatch, dummy_psycopg):
+    fake = CallbackDatabase()
+    monkeypatch.setattr(liqpay_events, "get_connection", fake.get_connection)
+    return fake
+
+
+def test_enqueue_deduplicates_retries(db):
+    payload = {"order_id": "purchase-7", "payment_id": 99, "status": "SUCCESS"}
+
+    first = liqpay_events.enqueue(7, "purchase-7", payload)
+    retry = liqpay_events.enqueue(7, "purchase-7", payload)
+    later_status = liqpay_events.enqueue(7, "purchase-7", {**payload, "status": "reversed"})
+
+    assert first == (1, True)
+    assert retry == (1, False)
+    assert later_status == (2, True)
+    assert db.queries[0][1][:4] == (7, "purchase-7", "99", "success")
+
+
+def test_process_pending_records_outcomes(db):
+    db.pending = [
+        (1, 7, "purchase-7", "p1", "success", {"status": "success"}, 1),
+        (2, 8, "purchase-8", "p2", "success", '{"status": "success"}', 3),
+        (3, 9, "purchase-9", "p3", "success", {"status": "success"}, 1),
+    ]
+    seen = []
+
+    def handler(event):
+        seen.append((event.id, event.payload["status"]))
+        if event.id == 2:
+            raise RuntimeError("db down")
+        if event.id == 3:
+            raise liqpay_events.EventRejected("rejected_404", "Purchase not found")
+        return "paid"
+
+    assert liqpay_events.process_pending(handler) == 3
+    assert seen == [(1, "success"), (2, "success"), (3, "success")]
+
+    done, retried, rejected = db.updates()
+    assert "processed_at = NOW()" in done[0] and done[1] == ("paid", None, 1)
+    assert "next_attempt_at" in retried[0] and retried[1][1:] == (30, 2)
+    assert rejected[1] == ("rejected_404", "Purchase not found", 3)
+    # The claim is committed on its own, then every outcome.
+    assert db.commits == 4
+
+
+def test_process_pending_marks_exhausted_events_failed(db, caplog):
+    db.pending = [
+        (5, 7, "purchase-7", "p1", "success", {}, liqpay_events.MAX_ATTEMPTS),
+    ]
+
+    def handler(event):
+        raise RuntimeError("still down")
+
+    with caplog.at_level("WARNING", logger="backend.services.liqpay_events"):
+        assert liqpay_events.process_pending(handler) == 1
+
+    (query, params), = db.updates()
+    assert "processed_at = NOW()" in query
+    assert params == ("failed", "still down", 5)
+    assert any("Giving up on LiqPay callback event=5" in r.message for r in caplog.records)
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import log_config
+from backend.log_config import (
+    RequestIdMiddleware,
+    SamplingFilter,
+    get_request_id,
+    parse_sample_rates,
+    request_context,
+)
+
+
+def _record(name, level=logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+
+def test_parse_sample_rates_ignores_garbage():
+    assert parse_sample_rates("backend.public_access=0.1, uvicorn.access=2,x,y=abc") == {
+        "backend.public_access": 0.1,
+        "uvicorn.access": 1.0,
+    }
+
+
+def test_sampling_is_per_category_and_sticky_per_request():
+    sampler = SamplingFilter({"backend.public_access": 0.5, "backend": 0.0})
+
+    assert sampler.filter(_record("backend.public_access", logging.WARNING))
+    assert not sampler.filter(_record("backend.services.checkbox"))
+    assert sampler.filter(_record("uvicorn.access"))
+
+    kept = 0
+    for i in range(200):
+        with request_context(f"req-{i}"):
+            first = sampler.filter(_record("backend.public_access"))
+            assert sampler.filter(_record("backend.public_access")) == first
+            kept += first
+    assert 60 < kept < 140
+
+
+def test_records_are_written_as_json_by_the_listener(capsys):
+    log_config.configure_logging(level="INFO", fmt="json", sample_rates={}, capture_uvicorn=False)
+    try:
+        with request_context("abc123"):
+            logging.getLogger("backend.test").info("hello %s", "world", extra={"scope": "view"})
+    finally:
+        log_config.shutdown_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    (entry,) = [line for line in lines if line.get("logger") == "backend.test"]
+    assert entry["message"] == "hello world"
+    assert entry["request_id"] == "abc123"
+    assert entry["scope"] == "view"
+    assert entry["level"] == "INFO"
+
+
+def test_middleware_binds_and_echoes_request_id():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/id")
+    def _id():
+        return {"request_id": get_request_id()}
+
+    client = TestClient(app)
+    given = client.get("/id", headers={"X-Request-ID": "edge-1"})
+    assert given.json() == {"request_id": "edge-1"}
+    assert given.headers["x-request-id"] == "edge-1"
+
+    generated = client.get("/id", headers={"X-Request-ID": "bad id\n"})
+    assert generated.headers["x-request-id"] == generated.json()["request_id"] != "bad id\n"
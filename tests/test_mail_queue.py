@@ -0,0 +1,195 @@
+import os
+import smtplib
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import email as email_service
+from backend.services import mail_queue
+from conftest import FakeDatabase
+
+SETTINGS = email_service.SMTPSettings(
+    host="smtp.example.test",
+    port=587,
+    username="user",
+    password="secret",
+    from_email="tickets@example.test",
+    from_name=None,
+)
+
+
+class FakeSMTP:
+    def __init__(self, log, fail_on=()):
+        self.log = log
+        self.fail_on = dict(fail_on)
+        self.closed = False
+
+    def send_message(self, message):
+        error = self.fail_on.pop(message["To"], None)
+        if error is not None:
+            raise error
+        self.log.append((id(self), message["To"]))
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeOpener:
+    def __init__(self, *fail_on):
+        self.sessions = []
+        self.sent = []
+        self.fail_on = list(fail_on)
+
+    def __call__(self, settings):
+        session = FakeSMTP(self.sent, self.fail_on.pop(0) if self.fail_on else {})
+        self.sessions.append(session)
+        return session
+
+
+def _message(to):
+    return email_service.build_ticket_message(SETTINGS, to, "Ticket", "<p>hi</p>", b"%PDF")
+
+
+def test_pool_reuses_authenticated_session():
+    opener = FakeOpener()
+    pool = email_service.SMTPPool(2, opener=opener)
+
+    assert pool.send_many(SETTINGS, [_message("a@x.test"), _message("b@x.test")]) == [None, None]
+    assert pool.send_many(SETTINGS, [_message("c@x.test")]) == [None]
+
+    assert len(opener.sessions) == 1
+    assert [to for _, to in opener.sent] == ["a@x.test", "b@x.test", "c@x.test"]
+
+
+def test_pool_rotates_sessions_after_message_limit():
+    opener = FakeOpener()
+    pool = email_service.SMTPPool(1, max_messages=2, opener=opener)
+
+    pool.send_many(SETTINGS, [_message("a@x.test"), _message("b@x.test")])
+    pool.send_many(SETTINGS, [_message("c@x.test")])
+
+    assert len(opener.sessions) == 2
+    assert opener.sessions[0].closed
+
+
+def test_pool_reconnects_once_and_reports_rejections():
+    opener = FakeOpener(
+        {"b@x.test": smtplib.SMTPServerDisconnected("gone")},
+        {"c@x.test": smtplib.SMTPRecipientsRefused({"c@x.test": (550, b"no such user")})},
+    )
+    pool = email_service.SMTPPool(1, opener=opener)
+
+    results = pool.send_many(
+        SETTINGS, [_message("a@x.test"), _message("b@x.test"), _message("c@x.test")]
+    )
+
+    assert results[0] is None and results[1] is None
+    assert isinstance(results[2], smtplib.SMTPRecipientsRefused)
+    assert len(opener.sessions) == 2
+    assert opener.sessions[0].closed
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.queries.append((normalized, params))
+        self._all = []
+        if normalized.startswith("INSERT INTO email_outbox"):
+            self._all = [(i + 1,) for i in range(len(params[2]))]
+        elif "FOR UPDATE SKIP LOCKED" in normalized:
+            self._all = self.db.pending
+
+    def fetchall(self):
+        return self._all
+
+
+class OutboxDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        self.pending = []
+
+    def updates(self):
+        return [(q, p) for q, p in self.queries if q.startswith("UPDATE email_outbox")]
+
+
+@pytest.fixture
+def db(monkeypatch, dummy_psycopg):
+    fake = OutboxDatabase()
+    monkeypatch.setattr(mail_queue, "get_connection", fake.get_connection)
+    monkeypatch.setattr(mail_queue, "load_smtp_settings", lambda: SETTINGS)
+    monkeypatch.setattr(mail_queue, "get_or_render_pdf", lambda conn, ticket_id, lang, link, dto: b"%PDF")
+    monkeypatch.setattr(
+        mail_queue,
+        "render_ticket_email",
+        lambda dto, link, lang: (f"Ticket {dto['id']}", f"<a href='{link}'>open</a>"),
+    )
+    return fake
+
+
+def test_enqueue_inserts_one_row_per_ticket(db):
+    ids = mail_queue.enqueue_ticket_emails(
+        [(11, "https://x.test/q/a"), (12, "https://x.test/q/b")], "a@x.test", "EN"
+    )
+
+    assert ids == [1, 2]
+    query, params = db.queries[0]
+    assert params == ("a@x.test", "en", [11, 12], ["https://x.test/q/a", "https://x.test/q/b"])
+    assert db.commits == 1
+
+
+def test_process_pending_sends_batch_and_records_outcomes(db, monkeypatch):
+    db.pending = [
+        (1, 11, "a@x.test", "en", "https://x.test/q/a", 0),
+        (2, 404, "b@x.test", "en", "https://x.test/q/b", 0),
+        (3, 13, "c@x.test", "en", "https://x.test/q/c", 2),
+    ]
+
+    def fake_dto(ticket_id, lang, conn):
+        if ticket_id == 404:
+            raise ValueError("Ticket not found")
+        return {"id": ticket_id}
+
+    monkeypatch.setattr(mail_queue, "get_ticket_dto", fake_dto)
+    opener = FakeOpener({"c@x.test": smtplib.SMTPDataError(451, b"try later")})
+    pool = email_service.SMTPPool(1, opener=opener)
+
+    assert mail_queue.process_pending(pool=pool) == 3
+
+    assert [to for _, to in opener.sent] == ["a@x.test"]
+    assert len(opener.sessions) == 1
+    updates = db.updates()
+    assert any("status = 'failed'" in q and p[1] == 2 for q, p in updates)
+    assert any("status = 'sent'" in q and p == ([1],) for q, p in updates)
+    retry = next((q, p) for q, p in updates if "next_attempt_at" in q)
+    assert retry[1][1:] == (mail_queue._retry_delay(3), 3)
+    # One commit per stored PDF on the render connection, then the batch.
+    assert db.commits == 3
+
+
+def test_process_pending_skips_without_smtp(db, monkeypatch):
+    db.pending = [(1, 11, "a@x.test", "en", "https://x.test/q/a", 0)]
+
+    def missing():
+        raise email_service.EmailConfigurationError("SMTP_HOST")
+
+    monkeypatch.setattr(mail_queue, "load_smtp_settings", missing)
+
+    assert mail_queue.process_pending() == 1
+    assert "status = 'skipped'" in db.updates()[0][0]
@@ -0,0 +1,75 @@
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import otp
+from conftest import FakeConnection, FakeDatabase
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.queries.append((normalized, params))
+        self._row = None
+        if normalized.startswith("UPDATE op_token SET used_at"):
+            if self.db.tokens.pop(params, None):
+                self._row = (params[0],)
+        elif normalized.startswith("DELETE FROM"):
+            table = normalized.split()[2]
+            pending = self.db.expired[table]
+            self.rowcount = min(pending, params[1])
+            self.db.expired[table] -= self.rowcount
+
+    def fetchone(self):
+        return self._row
+
+
+class OtpDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        self.tokens = {("tok", "cancel", 7): True}
+        self.expired = {"otp_challenge": 5, "op_token": 2}
+
+
+@pytest.fixture
+def fake_db(monkeypatch, dummy_psycopg):
+    db = OtpDatabase()
+    monkeypatch.setattr(otp, "get_connection", db.get_connection)
+    return db
+
+
+def test_consume_op_token_joins_the_callers_transaction(fake_db):
+    conn = FakeConnection(fake_db)
+
+    assert otp.consume_op_token("tok", "cancel", 7, conn=conn) is True
+    assert otp.consume_op_token("tok", "cancel", 7, conn=conn) is False
+    assert fake_db.connections == 0
+    assert fake_db.commits == 0
+
+
+def test_purge_expired_deletes_in_batches(fake_db):
+    deleted = otp.purge_expired(grace=timedelta(0), batch_size=2)
+
+    assert deleted == (5, 2)
+    deletes = [q for q, _params in fake_db.queries if q.startswith("DELETE")]
+    # 2 + 2 + 1 challenges, then 2 + 0 tokens
+    assert len(deletes) == 5
+    assert fake_db.commits == 5
+    assert fake_db.connections == 1
@@ -138,10 +138,13 @@ def test_payments_resolve_rejects_unknown_order_format(client):
     assert resp.status_code == 422
 
 
-def test_payments_resolve_handles_missing_liqpay_columns(client):
+def test_payments_resolve_handles_missing_liqpay_columns(client, monkeypatch):
     cli, state = client
     state["row"] = [1, "reserved", 15.0, "a@b.com", "Alice", None, None, None, None, None]
     state["has_liqpay_column"] = False
+    from backend import schema
+
+    monkeypatch.setattr(schema, "_columns", {"purchase": frozenset({"id", "status", "amount_due"})})
 
     resp = cli.get("/public/payments/resolve", params={"order_id": "purchase-1"})
 
@@ -261,10 +264,11 @@ def test_liqpay_callback_parses_urlencoded_body_without_python_multipart(client,
         "decode_payload",
         lambda _data: {"order_id": "ticket-94-83", "status": "success", "payment_id": "p-1"},
     )
+    enqueued = []
     monkeypatch.setattr(
-        public_module,
-        "_sync_purchase_paid_from_liqpay_callback",
-        lambda purchase_id, order_id, payload, background_tasks=None: ("paid", "p-1"),
+        public_module.liqpay_events,
+        "enqueue",
+        lambda purchase_id, order_id, payload: enqueued.append((purchase_id, order_id)) or (5, True),
     )
 
     resp = cli.post(
@@ -276,6 +280,7 @@ def test_liqpay_callback_parses_urlencoded_body_without_python_multipart(client,
     assert resp.status_code == 200
     body = resp.json()
     assert body["ok"] is True
-    assert body["status"] == "paid"
+    assert body["status"] == "queued"
     assert body["purchase_id"] == 83
     assert body["payment_id"] == "p-1"
+    assert enqueued == [(83, "ticket-94-83")]
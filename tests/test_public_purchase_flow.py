@@ -265,14 +265,14 @@ def test_public_cancel_preview_returns_expected_amounts(public_client, monkeypat
 
     free_called: list[tuple[Any, ...]] = []
 
-    def fake_free_ticket(*args, **kwargs):
+    def fake_free_tickets(*args, **kwargs):
         free_called.append(args)
 
     monkeypatch.setattr(public_module, "_require_purchase_context", fake_require_purchase_context)
     monkeypatch.setattr(public_module, "get_connection", lambda: _DummyConnection())
     monkeypatch.setattr(public_module, "_load_purchase_state", fake_load_purchase_state)
     monkeypatch.setattr(public_module, "_plan_cancel", fake_plan_cancel)
-    monkeypatch.setattr(public_module, "free_ticket", fake_free_ticket)
+    monkeypatch.setattr(public_module, "free_tickets", fake_free_tickets)
 
     response = client.post(
         "/public/purchase/5/cancel/preview",
@@ -299,3 +299,48 @@ def test_public_cancel_preview_returns_expected_amounts(public_client, monkeypat
         "lock_tickets": False,
     }
     assert free_called == []
+
+
+class _PlanCursor:
+    """Tickets 1 and 2 on tour 5, ticket 3 on tour 6; both tours run 10 -> 20 -> 30."""
+
+    tickets = {1: (5, 10, 30, 1, 42), 2: (5, 20, 30, 0, 42), 3: (6, 10, 20, 0, 42)}
+
+    def __init__(self):
+        self.queries = []
+        self._rows = []
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.queries.append(normalized)
+        if normalized.startswith("SELECT tour_id, departure_stop_id"):
+            row = self.tickets.get(params[0])
+            self._rows = [row] if row else []
+        elif normalized.startswith("SELECT t.route_id, t.pricelist_id"):
+            self._rows = [(1, 7, None, stop_id, None) for stop_id in (10, 20, 30)]
+        elif normalized.startswith("SELECT departure_stop_id, arrival_stop_id, price"):
+            self._rows = [(10, 20, 50), (20, 30, 30), (10, 30, 70)]
+        else:
+            self._rows = []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+def test_cancel_plan_quotes_tickets_per_tour(dummy_psycopg):
+    from backend.routers import public as public_module
+    from backend.services import fares
+
+    fares.invalidate()
+    cur = _PlanCursor()
+    plans, delta = public_module._plan_cancel(cur, 42, [1, 2, 3])
+
+    assert [plan["value"] for plan in plans] == [77.0, 30.0, 50.0]
+    assert delta == -157.0
+    # One route lookup per tour and one matrix load for the shared pricelist.
+    assert sum(q.startswith("SELECT t.route_id") for q in cur.queries) == 2
+    assert sum(q.startswith("SELECT departure_stop_id") for q in cur.queries) == 1
+    fares.invalidate()
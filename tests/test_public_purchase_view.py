@@ -0,0 +1,166 @@
+import importlib
+import os
+import sys
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _ticket_row(ticket_id, passenger_id, seat_num):
+    return (
+        ticket_id, 100 + seat_num, seat_num, passenger_id, f"Pax {passenger_id}",
+        10, 20, 0, 5, date(2030, 5, 1), 7, "Sofia - Varna", 3, 1, 1,
+        42, "Buyer", "buyer@example.com", "+359", Decimal("20.00"),
+        None, "reserved", "online", datetime(2030, 4, 1, 9, 0), Decimal("10.00"),
+    )
+
+
+class DummyCursor:
+    def __init__(self, state):
+        self.state = state
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self.state["queries"].append(query)
+        if "md5(" in query:
+            self.result = [(self.state["version"],)]
+        elif "FROM purchase" in query:
+            self.result = [(42, "reserved", Decimal("20.00"), "Buyer", "buyer@example.com", "+359", None)]
+        elif "WHERE t.purchase_id" in query:
+            self.result = [_ticket_row(1, 11, 3), _ticket_row(2, 12, 4)]
+        elif "FROM pricelist" in query:
+            self.result = [(3, "BGN")]
+        elif "FROM routestop" in query:
+            self.result = [
+                (10, 1, None, time(8, 0), "Sofia", None, None, None, None, None, 7),
+                (20, 2, time(14, 0), None, "Varna", None, None, None, None, None, 7),
+            ]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result or []
+
+    def close(self):
+        pass
+
+
+class DummyConn:
+    def __init__(self, state):
+        self.state = state
+        state["connections"].append(self)
+
+    def cursor(self):
+        return DummyCursor(self.state)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    state = {"queries": [], "version": "v1", "touch_conns": [], "connections": []}
+    monkeypatch.setattr("psycopg2.connect", lambda *a, **kw: DummyConn(state))
+    if "backend.main" in sys.modules:
+        importlib.reload(sys.modules["backend.main"])
+    else:
+        importlib.import_module("backend.main")
+    app = sys.modules["backend.main"].app
+
+    from backend.routers import public as public_module
+    from backend.services.link_sessions import LinkSession
+
+    session = LinkSession(
+        jti="opaque",
+        ticket_id=1,
+        purchase_id=42,
+        scope="view",
+        exp=datetime(2099, 1, 1, tzinfo=timezone.utc),
+        redeemed=datetime(2030, 1, 1, tzinfo=timezone.utc),
+        used=None,
+        revoked=None,
+        created_at=datetime(2030, 1, 1, tzinfo=timezone.utc),
+    )
+
+    async def get_session_async(opaque, *, scope=None, require_redeemed=False, conn):
+        return session
+
+    async def touch_session_usage_async(opaque, *, scope=None, conn):
+        state["touch_conns"].append(conn)
+        return session
+
+    monkeypatch.setattr(public_module.link_sessions, "get_session_async", get_session_async)
+    monkeypatch.setattr(
+        public_module.link_sessions, "touch_session_usage_async", touch_session_usage_async
+    )
+    monkeypatch.setattr(public_module, "get_connection", lambda: DummyConn(state))
+    monkeypatch.setattr("backend.database.get_connection", lambda: DummyConn(state))
+    # Serve ``async_connection`` from the dummy psycopg2 connection.
+    monkeypatch.setattr("backend.async_database.ASYNC_DB_ENABLED", False)
+    public_module._purchase_view_cache.clear()
+    client = TestClient(app)
+    client.cookies.set("minicab_purchase_42", "opaque")
+    state["queries"].clear()
+    state["connections"].clear()
+    yield client, state
+    public_module._purchase_view_cache.clear()
+
+
+def test_purchase_view_uses_fixed_query_count(client):
+    http, state = client
+    resp = http.get("/public/purchase/42")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [t["id"] for t in data["tickets"]] == [1, 2]
+    assert data["tickets"][0]["pricing"]["currency"] == "BGN"
+    assert data["tickets"][1]["segment_details"]["duration_minutes"] == 360
+    assert len(data["passengers"]) == 2
+    # Session touch, version probe and DTO load share a single connection.
+    assert len(state["connections"]) == 1
+    assert len(state["touch_conns"]) == 1 and state["touch_conns"][0] is not None
+    # version, purchase row, tickets, currencies, stops
+    assert len(state["queries"]) == 5
+    assert resp.headers["etag"] == '"bg-v1"'
+
+
+def test_purchase_view_etag_and_cache(client):
+    http, state = client
+    etag = http.get("/public/purchase/42").headers["etag"]
+
+    state["queries"].clear()
+    not_modified = http.get("/public/purchase/42", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    # Only the version probe runs while the rows are unchanged.
+    assert len(state["queries"]) == 1
+
+    state["queries"].clear()
+    cached = http.get("/public/purchase/42")
+    assert cached.status_code == 200
+    assert len(state["queries"]) == 1
+
+    state["version"] = "v2"
+    state["queries"].clear()
+    changed = http.get("/public/purchase/42", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == '"bg-v2"'
+    assert len(state["queries"]) == 5
@@ -15,8 +15,8 @@ class DummyCursor:
         self.query = query
 
     def fetchall(self):
-        # Return one dummy tour row with times and price
-        return [(1, date(2024, 1, 1), 5, 1, time(8, 0), time(10, 0), 200.0)]
+        # Return one dummy tour row (leg index first) with times and price
+        return [(0, 1, date(2024, 1, 1), 5, 1, time(8, 0), time(10, 0), 200.0)]
 
     def close(self):
         pass
@@ -54,6 +54,9 @@ def client(monkeypatch):
         importlib.import_module('backend.main')
     app = sys.modules['backend.main'].app
     monkeypatch.setattr('backend.routers.tour.get_connection', fake_conn)
+    monkeypatch.setattr('backend.async_database.ASYNC_DB_ENABLED', False)
+    from backend.services import tour_search
+    tour_search.clear_cache()
     return TestClient(app)
 
 
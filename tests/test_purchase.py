@@ -48,6 +48,11 @@ class DummyCursor:
             return [10]
         return [1]
     def fetchall(self):
+        if "join routestop" in self.query.lower():
+            return [(1, 1, date(2024, 1, 1), stop_id, time(7 + stop_id, 0)) for stop_id in (1, 2, 3, 4)]
+        if "seat_num, available" in self.query.lower():
+            _ids, tour_ids, seat_nums = self.queries[-1][1]
+            return [(num, tour, num, "1234") for tour, num in zip(tour_ids, seat_nums)]
         q = self.query.lower()
         if "select stop_id, departure_time from routestop" in q:
             return [
@@ -178,7 +183,7 @@ def client(monkeypatch):
     import backend.database
     monkeypatch.setattr('backend.database.get_connection', fake_get_connection)
     monkeypatch.setattr('backend.ticket_utils.free_ticket', lambda *a, **k: None)
-    monkeypatch.setattr('backend.routers.purchase.free_ticket', lambda *a, **k: None)
+    monkeypatch.setattr('backend.routers.purchase.free_tickets', lambda *a, **k: None)
     monkeypatch.setattr('backend.services.ticket_links.issue', fake_issue)
     monkeypatch.setattr('backend.services.ticket_links.verify', fake_verify)
     def fake_decode_token(token):
@@ -187,13 +192,22 @@ def client(monkeypatch):
         raise jwt.PyJWTError("invalid")
 
     monkeypatch.setattr('backend.auth.decode_token', fake_decode_token)
-    monkeypatch.setattr('backend.routers._ticket_link_helpers.get_or_create_view_session', fake_get_or_create_view_session)
-    monkeypatch.setattr('backend.routers.purchase.render_ticket_pdf', lambda *a, **k: b'%PDF-FAKE%')
-    monkeypatch.setattr(
-        'backend.routers.purchase.render_ticket_email',
-        lambda dto, deep_link, lang: ("subject", "<p>body</p>"),
-    )
-    monkeypatch.setattr('backend.routers.purchase.send_ticket_email', lambda *a, **k: None)
+
+    def fake_get_or_create_view_sessions(requests, *, lang, scopes=None, conn=None):
+        return {
+            ticket_id: fake_get_or_create_view_session(
+                ticket_id,
+                purchase_id=purchase_id,
+                lang=lang,
+                departure_dt=departure_dt,
+                scopes=scopes,
+                conn=conn,
+            )
+            for ticket_id, purchase_id, departure_dt in requests
+        }
+
+    monkeypatch.setattr('backend.routers._ticket_link_helpers.get_or_create_view_sessions', fake_get_or_create_view_sessions)
+    monkeypatch.setattr('backend.routers.purchase.enqueue_ticket_emails', lambda *a, **k: [])
     if 'backend.main' in sys.modules:
         importlib.reload(sys.modules['backend.main'])
     else:
@@ -426,6 +440,9 @@ def test_public_pay_skips_liqpay_order_persistence_when_column_missing(client, m
 
     monkeypatch.setattr(public_module, "_require_purchase_context", fake_require_purchase_context)
     monkeypatch.setattr(public_module, "get_connection", fake_get_connection_missing_columns)
+    monkeypatch.setattr(
+        public_module.schema, "_columns", {"purchase": frozenset({"id", "status", "amount_due"})}
+    )
 
     resp = cli.post('/public/purchase/1/pay')
 
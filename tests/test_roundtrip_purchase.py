@@ -38,6 +38,11 @@ class UniqueSalesCursor:
             return [10]
         return [1]
     def fetchall(self):
+        if "join routestop" in self.query.lower():
+            return [(1, 1, None, stop_id, None) for stop_id in (1, 2, 3, 4)]
+        if "seat_num, available" in self.query.lower():
+            _ids, tour_ids, seat_nums = self.queries[-1][1]
+            return [(num, tour, num, "1234") for tour, num in zip(tour_ids, seat_nums)]
         if "select stop_id from routestop" in self.query.lower():
             return [(1,), (2,), (3,), (4,)]
         return []
@@ -90,7 +95,7 @@ def client(monkeypatch):
         return f"token-{token_counter['value']}"
 
     monkeypatch.setattr('backend.ticket_utils.free_ticket', lambda *a, **k: None)
-    monkeypatch.setattr('backend.routers.purchase.free_ticket', lambda *a, **k: None)
+    monkeypatch.setattr('backend.routers.purchase.free_tickets', lambda *a, **k: None)
     monkeypatch.setattr('backend.services.ticket_links.verify', fake_verify)
     monkeypatch.setattr('backend.services.ticket_links.issue', fake_issue)
     session_counter = {"value": 0}
@@ -115,13 +120,21 @@ def client(monkeypatch):
         session_counter["value"] += 1
         return f"opaque-{session_counter['value']}", datetime(2030, 1, 1, tzinfo=timezone.utc)
 
-    monkeypatch.setattr('backend.routers._ticket_link_helpers.get_or_create_view_session', fake_get_or_create_view_session)
-    monkeypatch.setattr('backend.routers.purchase.render_ticket_pdf', lambda *a, **k: b'%PDF-FAKE%')
-    monkeypatch.setattr(
-        'backend.routers.purchase.render_ticket_email',
-        lambda dto, deep_link, lang: ("subject", "<p>body</p>"),
-    )
-    monkeypatch.setattr('backend.routers.purchase.send_ticket_email', lambda *a, **k: None)
+    def fake_get_or_create_view_sessions(requests, *, lang, scopes=None, conn=None):
+        return {
+            ticket_id: fake_get_or_create_view_session(
+                ticket_id,
+                purchase_id=purchase_id,
+                lang=lang,
+                departure_dt=departure_dt,
+                scopes=scopes,
+                conn=conn,
+            )
+            for ticket_id, purchase_id, departure_dt in requests
+        }
+
+    monkeypatch.setattr('backend.routers._ticket_link_helpers.get_or_create_view_sessions', fake_get_or_create_view_sessions)
+    monkeypatch.setattr('backend.routers.purchase.enqueue_ticket_emails', lambda *a, **k: [])
     if 'backend.main' in sys.modules:
         importlib.reload(sys.modules['backend.main'])
     else:
@@ -0,0 +1,119 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend import schema
+
+
+class CatalogCursor:
+    def __init__(self, columns, version="025_tour_list_stats_indexes.sql"):
+        self.columns = columns
+        self.version = version
+        self.queries = []
+        self._last = ""
+
+    def execute(self, query, params=None):
+        self._last = query
+        self.queries.append(query)
+
+    def fetchall(self):
+        return [(table, column) for table, cols in self.columns.items() for column in cols]
+
+    def fetchone(self):
+        return (self.version,) if "schema_version" in self._last else None
+
+    def close(self):
+        pass
+
+
+class CatalogConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def restore_registry():
+    saved = (schema._columns, schema._version)
+    yield
+    schema._columns, schema._version = saved
+
+
+def test_load_exposes_cached_flags():
+    cur = CatalogCursor({"purchase": ["id", *schema.LIQPAY_COLUMNS], "link_sessions": ["jti"]})
+
+    assert schema.load(cur) is True
+    assert schema.is_loaded()
+    assert schema.version() == "025_tour_list_stats_indexes.sql"
+    assert schema.purchase_has_liqpay_tracking()
+    assert not schema.purchase_has_fiscal_columns()
+    assert schema.missing_columns("purchase", ["id", "fiscal_status"]) == ["fiscal_status"]
+    assert not schema.has_table("otp_challenge")
+
+    queries = len(cur.queries)
+    schema.has_column("purchase", "liqpay_status")
+    assert len(cur.queries) == queries
+
+    schema.mark_missing("purchase", ["liqpay_status"])
+    assert not schema.purchase_has_liqpay_tracking()
+
+
+def test_unloaded_registry_is_optimistic():
+    schema.override(None)
+
+    assert schema.load(CatalogCursor({})) is False
+    assert not schema.is_loaded()
+    assert schema.has_column("purchase", "liqpay_order_id")
+    assert schema.missing_columns("purchase", schema.FISCAL_COLUMNS) == []
+
+
+def test_run_migrations_loads_registry_without_migrations_dir(monkeypatch, tmp_path):
+    cur = CatalogCursor({"purchase": ["id", *schema.FISCAL_COLUMNS]})
+    monkeypatch.setattr("psycopg2.connect", lambda *args, **kwargs: CatalogConnection(cur))
+    from backend import database
+
+    monkeypatch.setattr(database, "MIGRATIONS_DIR", tmp_path / "missing")
+    schema.override(None)
+    cur.queries.clear()
+
+    database.run_migrations()
+
+    assert schema.is_loaded()
+    assert schema.purchase_has_fiscal_columns()
+    assert not any("schema_migrations WHERE" in query for query in cur.queries)
+
+
+def test_run_migrations_stamps_legacy_files_under_a_lock(monkeypatch, tmp_path):
+    cur = CatalogCursor({"purchase": ["id"]})
+    monkeypatch.setattr("psycopg2.connect", lambda *args, **kwargs: CatalogConnection(cur))
+    from backend import database
+
+    (tmp_path / "000_create_purchase_sales.sql").write_text("CREATE TYPE IF NOT EXISTS broken;")
+    (tmp_path / "030_email_outbox.sql").write_text("CREATE TABLE IF NOT EXISTS email_outbox ();")
+    monkeypatch.setattr(database, "MIGRATIONS_DIR", tmp_path)
+    schema.override(None)
+    cur.queries.clear()
+
+    database.run_migrations()
+
+    assert not any("broken" in query for query in cur.queries)
+    assert "CREATE TABLE IF NOT EXISTS email_outbox ();" in cur.queries
+    stamps = [q for q in cur.queries if q.startswith("INSERT INTO schema_migrations")]
+    assert len(stamps) == 2
+    lock = cur.queries.index("SELECT pg_advisory_lock(%s)")
+    unlock = cur.queries.index("SELECT pg_advisory_unlock(%s)")
+    first_check = next(
+        i for i, q in enumerate(cur.queries) if "FROM schema_migrations WHERE" in q
+    )
+    assert lock < first_check < unlock
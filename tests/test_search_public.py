@@ -1,6 +1,8 @@
 import os
 import sys
 import importlib
+from datetime import date, time
+from decimal import Decimal
 
 import pytest
 from fastapi.testclient import TestClient
@@ -16,6 +18,15 @@ class DummyCursor:
         self.params = params
 
     def fetchall(self):
+        if "as q(idx, dep, arr, date_from, date_to)" in self.query:
+            SEARCHES.append(self.params)
+            # leg 0: 1 -> 2, leg 1: 2 -> 1 (the return window)
+            rows = [
+                (0, 7, date(2030, 5, 1), 12, 1, time(8, 0), time(14, 0), Decimal("40.00")),
+                (0, 8, date(2030, 5, 1), 3, 1, time(18, 0), None, Decimal("35.00")),
+                (1, 9, date(2030, 5, 4), 20, 2, time(9, 0), time(15, 0), Decimal("40.00")),
+            ]
+            return [row for row in rows if row[0] < len(self.params[0])]
         if "select distinct departure_stop_id" in self.query:
             return [(1,), (2,)]
         if "select distinct arrival_stop_id" in self.query:
@@ -34,6 +45,9 @@ class DummyCursor:
 
 
 class DummyConn:
+    def __init__(self):
+        CONNECTIONS.append(self)
+
     def cursor(self):
         return DummyCursor()
 
@@ -47,6 +61,10 @@ class DummyConn:
         pass
 
 
+CONNECTIONS = []
+SEARCHES = []
+
+
 def fake_get_connection():
     return DummyConn()
 
@@ -62,7 +80,7 @@ def client(monkeypatch):
     else:
         importlib.import_module("backend.main")
     app = sys.modules["backend.main"].app
-    monkeypatch.setattr("backend.routers.search.get_connection", fake_get_connection)
+    monkeypatch.setattr("backend.async_database.ASYNC_DB_ENABLED", False)
     return TestClient(app)
 
 
@@ -105,3 +123,97 @@ def test_arrivals_options(client):
     )
     assert resp.status_code == 200
     assert resp.headers.get("access-control-allow-origin") == "http://localhost:4000"
+
+
+def test_calendar_window_in_one_query(client):
+    from backend.routers import search
+    from backend.services import tour_search
+
+    search._calendar_cache.clear()
+    tour_search.clear_cache()
+    CONNECTIONS.clear()
+    SEARCHES.clear()
+    params = {
+        "departure_stop_id": 1,
+        "arrival_stop_id": 2,
+        "start": "2030-05-01",
+        "end": "2030-05-03",
+    }
+    resp = client.get("/search/calendar", params=params)
+    assert resp.status_code == 200
+    days = resp.json()
+    assert [d["date"] for d in days] == ["2030-05-01", "2030-05-02", "2030-05-03"]
+    assert days[0]["min_price"] == 35.0
+    assert days[0]["seats"] == 15
+    assert [t["departure_time"] for t in days[0]["tours"]] == ["08:00", "18:00"]
+    assert days[1]["tours"] == [] and days[1]["min_price"] is None
+    assert len(CONNECTIONS) == 1
+    # The window is a single tour_search leg.
+    (search_params,) = SEARCHES
+    assert search_params[:5] == ([0], [1], [2], [date(2030, 5, 1)], [date(2030, 5, 3)])
+
+    cached = client.get(
+        "/search/calendar", params=params, headers={"If-None-Match": resp.headers["etag"]}
+    )
+    assert cached.status_code == 304
+    assert len(CONNECTIONS) == 1
+    search._calendar_cache.clear()
+    tour_search.clear_cache()
+
+
+def test_calendar_rejects_long_windows(client):
+    resp = client.get(
+        "/search/calendar",
+        params={
+            "departure_stop_id": 1,
+            "arrival_stop_id": 2,
+            "start": "2030-01-01",
+            "end": "2030-06-01",
+        },
+    )
+    assert resp.status_code == 400
+
+
+def test_tour_search_batches_legs_and_return_in_one_query(client):
+    from backend.services import tour_search
+
+    tour_search.clear_cache()
+    SEARCHES.clear()
+    payload = {
+        "seats": 2,
+        "legs": [
+            {
+                "departure_stop_id": 1,
+                "arrival_stop_id": 2,
+                "date_from": "2030-04-30",
+                "date_to": "2030-05-02",
+                "return_date_from": "2030-05-04",
+            }
+        ],
+    }
+    resp = client.post("/search/tours", json=payload)
+    assert resp.status_code == 200
+    (leg,) = resp.json()["legs"]
+    assert [d["date"] for d in leg["outbound"]] == ["2030-04-30", "2030-05-01", "2030-05-02"]
+    assert leg["outbound"][1]["min_price"] == 35.0
+    assert [t["id"] for t in leg["outbound"][1]["tours"]] == [7, 8]
+    assert leg["outbound"][1]["tours"][1]["arrival_time"] is None
+    assert [t["id"] for d in leg["return"] for t in d["tours"]] == [9]
+
+    (params,) = SEARCHES
+    assert params[:3] == ([0, 1], [1, 2], [2, 1])
+    assert params[-1] == 2
+
+    again = client.post("/search/tours", json=payload)
+    assert again.json() == resp.json()
+    assert len(SEARCHES) == 1
+    tour_search.clear_cache()
+
+
+def test_tour_search_rejects_long_windows(client):
+    resp = client.post(
+        "/search/tours",
+        json={"legs": [{"departure_stop_id": 1, "arrival_stop_id": 2,
+                        "date_from": "2030-05-01", "date_to": "2030-06-01"}]},
+    )
+    assert resp.status_code == 400
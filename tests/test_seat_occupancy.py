@@ -0,0 +1,79 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services.seat_occupancy import (
+    SeatOccupancy,
+    availability_mask,
+    segments_mask,
+    span_mask,
+)
+from backend.ticket_utils import recalc_available
+
+
+SEATS = [
+    (1, 1, "123"),
+    (2, 2, "0"),
+    (3, 3, "23"),
+    (4, 4, None),
+    (5, 5, "123"),
+]
+
+
+def _naive_free(avail, idx_from, idx_to):
+    return bool(avail) and all(str(i + 1) in avail for i in range(idx_from, idx_to))
+
+
+def test_masks_match_string_semantics():
+    assert availability_mask("0") == 0
+    assert availability_mask("13") == 0b101
+    assert span_mask(1, 3) == 0b110
+    assert segments_mask(["2", "3"]) == span_mask(1, 3)
+
+
+def test_free_flags_and_counts_match_naive_scan():
+    occupancy = SeatOccupancy(SEATS)
+    spans = [(i, j) for i in range(3) for j in range(i + 1, 4)]
+
+    counts = occupancy.free_counts(spans)
+    for idx_from, idx_to in spans:
+        expected = [_naive_free(avail, idx_from, idx_to) for _id, _num, avail in SEATS]
+        assert occupancy.free_flags(span_mask(idx_from, idx_to)) == expected
+        assert counts[(idx_from, idx_to)] == sum(expected)
+
+
+class RecalcCursor:
+    def __init__(self):
+        self.executed = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.executed.append((normalized, params))
+        if normalized.startswith("SELECT route_id, pricelist_id FROM tour"):
+            self._result = [(10, 20)]
+        elif normalized.startswith("SELECT stop_id FROM routestop"):
+            self._result = [(100,), (200,), (300,), (400,)]
+        elif normalized.startswith("SELECT id, seat_num, available FROM seat"):
+            self._result = SEATS
+        elif normalized.startswith("SELECT departure_stop_id, arrival_stop_id FROM prices"):
+            self._result = [(100, 400), (200, 400), (400, 100), (100, 999)]
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+
+def test_recalc_available_inserts_all_pairs_at_once():
+    cur = RecalcCursor()
+    recalc_available(cur, 7)
+
+    inserts = [(q, p) for q, p in cur.executed if q.startswith("INSERT INTO available")]
+    assert len(inserts) == 1
+    _query, params = inserts[0]
+    assert params == (7, [100, 200], [400, 400], [2, 3], [0, 1], [3, 3])
@@ -138,6 +138,27 @@ def test_send_message_returns_false_on_http_error(monkeypatch):
     assert telegram.send_message("hi") is False
 
 
+def test_deliver_raises_rate_limited_with_retry_after(monkeypatch):
+    _enable_telegram(monkeypatch)
+
+    class FakeResponse:
+        status_code = 429
+        text = "Too Many Requests"
+        headers: dict = {}
+
+        def json(self):
+            return {"ok": False, "error_code": 429, "parameters": {"retry_after": 17}}
+
+    monkeypatch.setattr(
+        "backend.services.telegram.httpx.post",
+        lambda *a, **k: FakeResponse(),
+    )
+    with pytest.raises(telegram.TelegramRateLimited) as exc_info:
+        telegram.deliver("hi", chat_id="-100999")
+    assert exc_info.value.retry_after == 17.0
+    assert telegram.send_message("hi") is False
+
+
 def test_build_telegram_message_uses_snapshot(monkeypatch):
     purchase = _import_purchase_module()
 
@@ -192,50 +213,52 @@ def test_build_telegram_message_html_escapes(monkeypatch):
 def test_queue_telegram_event_is_noop_when_disabled(monkeypatch):
     purchase = _import_purchase_module()
 
-    class FakeBG:
-        def __init__(self):
-            self.tasks = []
-
-        def add_task(self, fn, *args, **kwargs):
-            self.tasks.append((fn, args, kwargs))
+    queued = []
+    monkeypatch.setattr(purchase.jobs, "enqueue", lambda *args, **kwargs: queued.append(args))
 
-    bg = FakeBG()
-    purchase._queue_telegram_event(bg, 1, "paid")
-    assert bg.tasks == []
+    purchase._queue_telegram_event(1, "paid", conn=object())
+    assert queued == []
 
 
-def test_queue_telegram_event_schedules_when_enabled(monkeypatch):
+def test_queue_telegram_event_enqueues_job_when_enabled(monkeypatch):
     _enable_telegram(monkeypatch)
     purchase = _import_purchase_module()
 
-    class FakeBG:
-        def __init__(self):
-            self.tasks = []
-
-        def add_task(self, fn, *args, **kwargs):
-            self.tasks.append((fn, args, kwargs))
+    queued = []
+    monkeypatch.setattr(
+        purchase.jobs, "enqueue", lambda *args, **kwargs: queued.append((args, kwargs)) or 1
+    )
 
-    bg = FakeBG()
-    purchase._queue_telegram_event(bg, 7, "paid", {"passenger_name": "Test"})
-    assert len(bg.tasks) == 1
-    fn, args, _ = bg.tasks[0]
-    assert fn is purchase._send_telegram_event_task
-    assert args == (7, "paid", {"passenger_name": "Test"})
+    conn = object()
+    purchase._queue_telegram_event(7, "paid", {"passenger_name": "Test"}, conn=conn)
+    assert len(queued) == 1
+    args, kwargs = queued[0]
+    assert args == (
+        "telegram.purchase_event",
+        {"purchase_id": 7, "event_type": "paid", "snapshot": {"passenger_name": "Test"}},
+    )
+    # Queued in the caller's transaction, not on a connection of its own.
+    assert kwargs["conn"] is conn
 
 
-def test_send_telegram_event_task_uses_snapshot_without_db(monkeypatch):
+def test_record_telegram_event_uses_snapshot_without_db(monkeypatch):
     _enable_telegram(monkeypatch)
     purchase = _import_purchase_module()
 
     sent_messages: list = []
 
-    def fake_send(text, parse_mode="HTML"):
+    def fake_enqueue(text, **kwargs):
         sent_messages.append(text)
-        return True
+        assert kwargs["purchase_id"] == 99
+        assert kwargs["event_type"] == "cancelled"
+        return 1
 
-    monkeypatch.setattr(purchase.telegram, "send_message", fake_send)
+    monkeypatch.setattr(purchase.telegram_outbox, "enqueue", fake_enqueue)
 
     class DummyConn:
+        def commit(self):
+            pass
+
         def close(self):
             pass
 
@@ -250,7 +273,7 @@ def test_send_telegram_event_task_uses_snapshot_without_db(monkeypatch):
         "amount_due": 25.0,
         "currency": "BGN",
     }
-    purchase._send_telegram_event_task(99, "cancelled", snapshot)
+    assert purchase._record_telegram_event(99, "cancelled", snapshot) is True
 
     assert len(sent_messages) == 1
     assert "Отмена #99" in sent_messages[0]
@@ -0,0 +1,165 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services import telegram
+from backend.services import telegram_outbox
+from backend.services.telegram_outbox import OutboxMessage, TokenBucket
+from conftest import FakeDatabase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=20, burst=2, clock=clock)
+
+    assert bucket.try_acquire() is True
+    assert bucket.try_acquire() is True
+    assert bucket.try_acquire() is False
+
+    clock.now += 3  # 20/min -> one token every 3 s
+    assert bucket.try_acquire() is True
+    assert bucket.try_acquire() is False
+
+
+def test_token_bucket_block_honours_retry_after():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=600, burst=5, clock=clock)
+
+    bucket.block(30)
+    clock.now += 29
+    assert bucket.try_acquire() is False
+    clock.now += 1
+    assert bucket.try_acquire() is True
+
+
+def test_build_digests_respects_message_limit():
+    messages = [OutboxMessage(id=i, text="x" * 40, attempts=0) for i in range(1, 6)]
+
+    batches = telegram_outbox.build_digests(messages, limit=200)
+
+    assert [[m.id for m in batch] for batch in batches] == [[1, 2, 3], [4, 5]]
+    assert all(len(telegram_outbox.digest_text(batch, 200)) <= 200 for batch in batches)
+    assert telegram_outbox.digest_text(batches[1]).startswith("\U0001F4EC <b>Событий: 2</b>")
+    assert telegram_outbox.digest_text(batches[0][:1]) == "x" * 40
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        normalized = " ".join(query.split())
+        self.db.queries.append((normalized, params))
+        self._all = []
+        if normalized.startswith("SELECT chat_id"):
+            self._all = [(chat_id,) for chat_id in self.db.pending]
+        elif "FOR UPDATE SKIP LOCKED" in normalized:
+            self._all = self.db.pending.get(params[0], [])
+
+    def fetchall(self):
+        return self._all
+
+
+class OutboxDatabase(FakeDatabase):
+    cursor_class = FakeCursor
+
+    def __init__(self):
+        super().__init__()
+        self.pending = {}
+
+    def updates(self):
+        return [(q, p) for q, p in self.queries if q.startswith("UPDATE telegram_outbox")]
+
+
+@pytest.fixture
+def db(monkeypatch, dummy_psycopg):
+    fake = OutboxDatabase()
+    monkeypatch.setattr(telegram_outbox, "get_connection", fake.get_connection)
+    monkeypatch.setattr(telegram_outbox, "_buckets", {})
+    monkeypatch.setenv("TELEGRAM_ENABLED", "true")
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "-100123")
+    return fake
+
+
+def test_process_pending_sends_one_digest_per_chat(db, monkeypatch):
+    db.pending = {
+        "-100123": [(1, "Бронь #1", 0), (2, "Оплата #1", 0), (3, "Бронь #2", 0)],
+        "-100456": [(4, "Отмена #3", 0)],
+    }
+    sent = []
+    monkeypatch.setattr(
+        telegram_outbox.telegram,
+        "deliver",
+        lambda text, chat_id=None: sent.append((chat_id, text)),
+    )
+
+    assert telegram_outbox.process_pending() == 4
+
+    assert [chat for chat, _ in sent] == ["-100123", "-100456"]
+    assert "Событий: 3" in sent[0][1] and "Оплата #1" in sent[0][1]
+    assert sent[1][1] == "Отмена #3"
+    sent_ids = [p[0] for q, p in db.updates() if "status = 'sent'" in q]
+    assert sent_ids == [[1, 2, 3], [4]]
+
+
+def test_process_pending_postpones_chat_on_rate_limit(db, monkeypatch):
+    db.pending = {"-100123": [(1, "Бронь #1", 0), (2, "Бронь #2", 0)]}
+    monkeypatch.setattr(telegram_outbox, "build_digests", lambda rows: [[row] for row in rows])
+
+    def rate_limited(text, chat_id=None):
+        raise telegram.TelegramRateLimited(42)
+
+    monkeypatch.setattr(telegram_outbox.telegram, "deliver", rate_limited)
+
+    assert telegram_outbox.process_pending() == 0
+
+    (query, params), = db.updates()
+    assert "next_attempt_at" in query and "attempts" not in query
+    assert params == (42, [1, 2])
+    assert telegram_outbox._buckets["-100123"].try_acquire() is False
+
+
+def test_process_pending_waits_for_tokens(db, monkeypatch):
+    db.pending = {"-100123": [(i, f"Бронь #{i}", 0) for i in range(1, 5)]}
+    monkeypatch.setattr(telegram_outbox, "CHAT_BURST", 2)
+    monkeypatch.setattr(telegram_outbox, "build_digests", lambda rows: [[row] for row in rows])
+    sent = []
+    monkeypatch.setattr(
+        telegram_outbox.telegram, "deliver", lambda text, chat_id=None: sent.append(text)
+    )
+
+    assert telegram_outbox.process_pending() == 2
+    assert sent == ["Бронь #1", "Бронь #2"]
+
+
+def test_process_pending_retries_failed_digest_with_backoff(db, monkeypatch):
+    db.pending = {"-100123": [(1, "Бронь #1", 2)]}
+
+    def broken(text, chat_id=None):
+        raise telegram.TelegramError("status=400")
+
+    monkeypatch.setattr(telegram_outbox.telegram, "deliver", broken)
+
+    assert telegram_outbox.process_pending() == 1
+
+    (query, params), = db.updates()
+    assert params[1:] == (telegram_outbox._retry_delay(3), [1])
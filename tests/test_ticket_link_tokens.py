@@ -12,8 +12,9 @@ from backend.services import ticket_links
 
 
 class FakeCursor:
-    def __init__(self, store):
+    def __init__(self, store, before_revoke=None):
         self.store = store
+        self.before_revoke = before_revoke
         self._result = None
 
     def __enter__(self):
@@ -40,6 +41,8 @@ class FakeCursor:
             }
             self._result = None
         elif "update ticket_link_tokens" in normalized and "set revoked_at" in normalized:
+            if self.before_revoke:
+                self.before_revoke.pop()()
             now = datetime.now(timezone.utc)
             if "where ticket_id" in normalized:
                 ticket_id = params[0]
@@ -90,11 +93,12 @@ class FakeCursor:
 
 
 class FakeConnection:
-    def __init__(self, store):
+    def __init__(self, store, before_revoke):
         self.store = store
+        self.before_revoke = before_revoke
 
     def cursor(self):
-        return FakeCursor(self.store)
+        return FakeCursor(self.store, self.before_revoke)
 
     def commit(self):
         pass
@@ -106,9 +110,13 @@ class FakeConnection:
 class FakeDatabase:
     def __init__(self):
         self.tokens = {}
+        self.connections = 0
+        # Callbacks run once, just before the next revoking UPDATE.
+        self.before_revoke = []
 
     def get_connection(self):
-        return FakeConnection(self.tokens)
+        self.connections += 1
+        return FakeConnection(self.tokens, self.before_revoke)
 
 
 @pytest.fixture(autouse=True)
@@ -121,7 +129,9 @@ def configure_secret(monkeypatch):
 def fake_db(monkeypatch):
     db = FakeDatabase()
     monkeypatch.setattr(ticket_links, "_get_connection", db.get_connection)
-    return db
+    ticket_links.reset_token_cache()
+    yield db
+    ticket_links.reset_token_cache()
 
 
 def test_issue_and_verify_roundtrip(monkeypatch, fake_db):
@@ -252,3 +262,52 @@ def test_issue_revokes_previous_tokens(monkeypatch, fake_db):
 
     second_payload = ticket_links.verify(second_token)
     assert second_payload["jti"] != first_jti
+
+
+def test_verify_caches_lookup_until_revoked(monkeypatch, fake_db):
+    now = datetime(2024, 9, 1, tzinfo=timezone.utc)
+    monkeypatch.setattr(ticket_links, "_utcnow", lambda: now)
+
+    token = ticket_links.issue(
+        ticket_id=400,
+        purchase_id=None,
+        scopes=["view"],
+        lang="bg",
+        departure_dt=now + timedelta(hours=4),
+    )
+    ticket_links.verify(token)
+    connections = fake_db.connections
+    ticket_links.verify(token)
+    assert fake_db.connections == connections
+
+    # A revocation made by this process is visible immediately.
+    ticket_links.issue(
+        ticket_id=400,
+        purchase_id=None,
+        scopes=["view"],
+        lang="bg",
+        departure_dt=now + timedelta(hours=4),
+    )
+    with pytest.raises(ticket_links.TokenRevoked):
+        ticket_links.verify(token)
+
+
+def test_verify_during_revoke_does_not_keep_stale_entry(monkeypatch, fake_db):
+    now = datetime(2024, 9, 1, tzinfo=timezone.utc)
+    monkeypatch.setattr(ticket_links, "_utcnow", lambda: now)
+
+    token = ticket_links.issue(
+        ticket_id=401,
+        purchase_id=None,
+        scopes=["view"],
+        lang="bg",
+        departure_dt=now + timedelta(hours=4),
+    )
+    jti = jwt.decode(token, options={"verify_signature": False})["jti"]
+
+    # The lookup runs before the UPDATE lands and caches the active token.
+    fake_db.before_revoke.append(lambda: ticket_links.verify(token))
+    assert ticket_links.revoke(jti) is True
+
+    with pytest.raises(ticket_links.TokenRevoked):
+        ticket_links.verify(token)
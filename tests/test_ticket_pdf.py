@@ -3,11 +3,12 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from backend.services.ticket_pdf import render_ticket_pdf
+from backend.services import ticket_pdf
+from backend.services.ticket_pdf import render_ticket_html, render_ticket_pdf
 
 
-def test_render_ticket_pdf_produces_bytes():
-    dto = {
+def _ticket_dto():
+    return {
         "ticket": {
             "id": 2732866,
             "seat_id": 77,
@@ -73,6 +74,9 @@ def test_render_ticket_pdf_produces_bytes():
         "payment_status": {"status": "paid", "is_paid": True},
     }
 
+
+def test_render_ticket_pdf_produces_bytes():
+    dto = _ticket_dto()
     deep_link = "https://app.example.com/q/opaque-abc"
 
     pdf_bytes = render_ticket_pdf(dto, deep_link)
@@ -80,3 +84,68 @@ def test_render_ticket_pdf_produces_bytes():
     assert isinstance(pdf_bytes, bytes)
     assert pdf_bytes.startswith(b"%PDF")
     assert len(pdf_bytes) > 1000
+
+
+def test_render_ticket_html_can_leave_out_stylesheet():
+    deep_link = "https://app.example.com/q/opaque-abc"
+
+    inline = render_ticket_html(_ticket_dto(), deep_link)
+    bare = render_ticket_html(_ticket_dto(), deep_link, inline_css=False)
+
+    assert "<style>" in inline and ".footer a{" in inline
+    assert "<style>" not in bare
+    assert "./logo/logo.svg" in bare
+
+
+def test_asset_url_fetcher_serves_template_files_from_memory(monkeypatch):
+    url = (ticket_pdf._TEMPLATES_DIR / "logo" / "logo.svg").as_uri()
+    monkeypatch.setattr(ticket_pdf, "_assets", {})
+
+    first = ticket_pdf._asset_url_fetcher(url)
+    assert first["mime_type"] == "image/svg+xml"
+    assert first["string"].lstrip().startswith(b"<")
+
+    def _no_disk(*_args, **_kwargs):
+        raise AssertionError("asset read from disk twice")
+
+    monkeypatch.setattr(ticket_pdf.Path, "read_bytes", _no_disk)
+    assert ticket_pdf._asset_url_fetcher(url)["string"] == first["string"]
+
+
+def test_image_cache_keeps_document_data_and_shares_assets(monkeypatch):
+    url = (ticket_pdf._TEMPLATES_DIR / "logo" / "speling.svg").as_uri()
+    monkeypatch.setattr(ticket_pdf, "_assets", {})
+    monkeypatch.setattr(ticket_pdf, "_asset_image_ids", set())
+    monkeypatch.setattr(ticket_pdf, "_static_images", {})
+    ticket_pdf._asset_url_fetcher(url)
+    asset_data_key = f"{ticket_pdf._asset_image_id(url)}-source-"
+
+    cache = ticket_pdf._DocumentImageCache()
+    cache[url] = "logo"
+    cache[asset_data_key] = b"logo-png"
+    # WeasyPrint stores the QR image and its data the same way and reads
+    # the data back while writing the PDF.
+    cache["data:image/png;base64,AAAA"] = "qr"
+    cache["7-source-"] = b"qr-png"
+    assert "7-source-" in cache and cache["7-source-"] == b"qr-png"
+
+    cache.clear()
+    assert "7-source-" not in cache
+    assert "data:image/png;base64,AAAA" not in cache
+    assert ticket_pdf._static_images == {url: "logo", asset_data_key: b"logo-png"}
+
+    later = ticket_pdf._DocumentImageCache()
+    assert url in later and later[asset_data_key] == b"logo-png"
+
+
+def test_render_ticket_pdf_with_qr_code_twice():
+    # The QR image data must still be in the cache when the PDF is written.
+    first = render_ticket_pdf(_ticket_dto(), "https://app.example.com/q/opaque-abc")
+    second = render_ticket_pdf(_ticket_dto(), "https://app.example.com/q/opaque-xyz")
+
+    for pdf_bytes in (first, second):
+        assert pdf_bytes.startswith(b"%PDF")
+        assert b"/Image" in pdf_bytes
+    assert not any(
+        isinstance(key, str) and key.startswith("data:") for key in ticket_pdf._static_images
+    )
@@ -254,7 +254,6 @@ def test_ticket_pdf_rate_limit(client, monkeypatch):
 
     monkeypatch.setattr(access_guard, "RATE_LIMIT_MAX_REQUESTS", 1)
     monkeypatch.setattr(access_guard, "RATE_LIMIT_BURST", 0)
-    monkeypatch.setattr(access_guard, "RATE_LIMIT_DELAY_SECONDS", 0.0)
 
     state["link_payload"] = {
         "ticket_id": 55,
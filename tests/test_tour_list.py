@@ -0,0 +1,112 @@
+import importlib
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+class DummyCursor:
+    def __init__(self):
+        self.queries = []
+        self.query = ""
+
+    def execute(self, query, params=None):
+        self.query = query
+        self.queries.append((query, params))
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        if "WITH page AS" in self.query:
+            return [
+                (7, 1, 2, date(2030, 5, 1), 1, 0, 46, 5, 2, 3, 2, Decimal("220.00")),
+                (9, 1, 2, date(2030, 5, 2), 2, 1, 48, 0, 0, 0, 0, 0),
+            ]
+        return []
+
+    def close(self):
+        pass
+
+
+class DummyConn:
+    def __init__(self):
+        self.cursor_obj = DummyCursor()
+
+    def cursor(self):
+        return self.cursor_obj
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def conn():
+    return DummyConn()
+
+
+@pytest.fixture
+def client(monkeypatch, conn):
+    monkeypatch.setattr("psycopg2.connect", lambda *a, **kw: DummyConn())
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    if "backend.main" in sys.modules:
+        importlib.reload(sys.modules["backend.main"])
+    else:
+        importlib.import_module("backend.main")
+    app = sys.modules["backend.main"].app
+    monkeypatch.setattr("backend.routers.tour.get_connection", lambda: conn)
+    import backend.auth
+
+    app.dependency_overrides[backend.auth.require_admin_token] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.pop(backend.auth.require_admin_token, None)
+
+
+def test_tour_list_includes_occupancy(client, conn):
+    resp = client.get("/tours/list", params={"page_size": 1})
+    assert resp.status_code == 200
+    data = resp.json()
+    first = data["items"][0]
+    assert first["sold_seats"] == 5
+    assert first["blocked_seats"] == 2
+    assert first["free_seats"] == 39
+    assert first["reserved_tickets"] == 3
+    assert first["paid_tickets"] == 2
+    assert first["revenue"] == 220.0
+    assert [item["id"] for item in data["items"]] == [7]
+    assert data["next_cursor"] == "2030-05-01:7"
+    # A single query per page: no COUNT(*) and no OFFSET.
+    assert len(conn.cursor_obj.queries) == 1
+    page_query, _params = conn.cursor_obj.queries[-1]
+    assert "amount_due" in page_query
+    assert "OFFSET" not in page_query
+
+
+def test_tour_list_last_full_page_has_no_cursor(client, conn):
+    resp = client.get("/tours/list", params={"page_size": 2})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data["items"]) == 2
+    assert data["next_cursor"] is None
+
+
+def test_tour_list_keyset_cursor(client, conn):
+    resp = client.get("/tours/list", params={"page_size": 2, "cursor": "2030-05-02:9"})
+    assert resp.status_code == 200
+    page_query, params = conn.cursor_obj.queries[-1]
+    assert "(date, id) > (%s, %s)" in page_query
+    assert params[-4:] == (date(2030, 5, 2), 9, 3, 0.1)
+
+
+def test_tour_list_rejects_bad_cursor(client):
+    resp = client.get("/tours/list", params={"cursor": "nope"})
+    assert resp.status_code == 400